@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+测量统一命令行入口（scripts/volc.py）每个子命令的冷启动时间
+
+每次都启动新的解释器执行 volc.py --import-only <子命令>，取多次运行的中位数；
+--details 额外用 -X importtime 列出累计耗时最高的模块，--save/--baseline 用于跟踪变化：
+
+python bench_import.py --runs 5
+python bench_import.py --save import_times.json
+python bench_import.py --baseline import_times.json --details
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'volc.py')
+sys.path.insert(0, os.path.dirname(CLI))
+
+from volc import COMMANDS
+
+
+def run_once(args):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, CLI] + args, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    error = result.stderr.strip().splitlines()[-1] if result.returncode else None
+    return elapsed, error
+
+
+def measure(args, runs):
+    times, error = [], None
+    for _ in range(runs):
+        elapsed, error = run_once(args)
+        if error:
+            break
+        times.append(elapsed)
+    return (statistics.median(times) if times else None), error
+
+
+def top_imports(command, limit):
+    """用 -X importtime 统计累计耗时最高的顶层模块"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', CLI, '--import-only', command],
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        if cumulative.isdigit() and not name.startswith(' ') and '.' not in name:
+            rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='子命令冷启动时间基准测试')
+    parser.add_argument('--runs', type=int, default=5, help='每个子命令的运行次数')
+    parser.add_argument('--commands', nargs='+', choices=COMMANDS, help='只测量指定子命令')
+    parser.add_argument('--details', action='store_true', help='列出累计耗时最高的模块')
+    parser.add_argument('--save', help='把结果写入JSON文件')
+    parser.add_argument('--baseline', help='与之前保存的JSON结果对比')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    for name in ['--help'] + (args.commands or list(COMMANDS)):
+        label = 'volc --help' if name == '--help' else name
+        elapsed, error = measure([name] if name == '--help' else ['--import-only', name], args.runs)
+        results[label] = elapsed
+        if error:
+            print(f"{label:<18} 导入失败: {error}")
+            continue
+        line = f"{label:<18} {elapsed * 1e3:8.1f} ms"
+        if baseline.get(label):
+            line += f"  (基线 {baseline[label] * 1e3:8.1f} ms, {(elapsed / baseline[label] - 1) * 100:+6.1f}%)"
+        print(line)
+        if args.details and name != '--help':
+            for cumulative, module in top_imports(name, 5):
+                print(f"{'':<20}{module:<32} {cumulative / 1e3:8.1f} ms")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+对比SDK模型反序列化与原始JSON快速路径（rawjson.call_raw）的CPU和内存开销
+
+先对本地替身服务录制一页实例列表，再在不访问网络的情况下回放，
+只比较解码和读取字段的开销：
+
+python bench_rawjson.py --calls 200 --page-size 100
+'''
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import volcenginesdkcore
+import volcenginesdkredis
+
+from cassette import use_cassette
+from rawjson import call_raw, orjson, project
+from standin import StandIn
+
+FIELDS = ['instance_id', 'instance_name', 'status', 'vpc_id', 'zone_ids', 'capacity.total']
+
+
+def make_api(standin_host, ak, sk):
+    configuration = volcenginesdkcore.Configuration()
+    configuration.ak, configuration.sk = ak, sk
+    configuration.host, configuration.scheme, configuration.region = standin_host, 'http', 'cn-shanghai'
+    return volcenginesdkredis.REDISApi(volcenginesdkcore.ApiClient(configuration))
+
+
+def read_fields(instances):
+    return [(instance.instance_id, instance.instance_name, instance.status, instance.vpc_id) for instance in instances]
+
+
+def measure(label, call, calls):
+    call()
+    tracemalloc.start()
+    cpu_start = time.process_time()
+    for _ in range(calls):
+        call()
+    cpu = time.process_time() - cpu_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} CPU {cpu / calls * 1e3:8.2f} ms/call  峰值内存 {peak / 1024:9.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='原始JSON快速路径基准测试')
+    parser.add_argument('--calls', type=int, default=200, help='每种方式的调用次数')
+    parser.add_argument('--page-size', type=int, default=100, help='每页实例数')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='volc-rawjson-'), 'bench.json')
+    request = volcenginesdkredis.DescribeDBInstancesRequest(page_number=1, page_size=args.page_size)
+    with StandIn(tls=False, instances=args.page_size) as standin:
+        host, ak, sk = standin.host, standin.ak, standin.sk
+        with use_cassette(path, mode='record'):
+            api = make_api(host, ak, sk)
+            api.describe_db_instances(request)
+            call_raw(api.describe_db_instances, request)
+
+    print(f"JSON解码器: {'orjson' if orjson is not None else 'json'}")
+    with use_cassette(path, mode='replay', latency=None):
+        api = make_api(host, ak, sk)
+        measure('SDK模型', lambda: read_fields(api.describe_db_instances(request).instances), args.calls)
+        measure('原始JSON + ModelView', lambda: read_fields(call_raw(api.describe_db_instances, request).instances),
+                args.calls)
+        measure('原始JSON + 字段投影', lambda: project(call_raw(api.describe_db_instances, request).instances, FIELDS),
+                args.calls)
+
+
+if __name__ == '__main__':
+    main()
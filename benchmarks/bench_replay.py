@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+基于录制回放测量每次调用的CPU开销，并离线对比串行与线程池并发
+
+先对本地替身服务录制一次（也可以用 --cassette 指定对真实环境录制的文件），
+然后在不访问网络的情况下按录制延迟回放：
+
+python bench_replay.py --calls 500
+python bench_replay.py --calls 200 --threads 16 --latency-ms 30
+python bench_replay.py --cassette ../cassettes/inventory.json --latency recorded
+'''
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import volcenginesdkcore
+import volcenginesdkredis
+
+from sign import APIConfig, APIClient, HTTPTransport
+from cassette import use_cassette
+from standin import StandIn
+
+
+def make_calls(ak, sk, host):
+    configuration = volcenginesdkcore.Configuration()
+    configuration.ak, configuration.sk = ak, sk
+    configuration.host, configuration.scheme, configuration.region = host, 'http', 'cn-shanghai'
+    redis_api = volcenginesdkredis.REDISApi(volcenginesdkcore.ApiClient(configuration))
+    raw_client = APIClient(APIConfig(ak=ak, sk=sk, host=host, region='cn-beijing'),
+                           HTTPTransport(scheme='http'))
+    raw_client.scheme = 'http'
+    return {
+        'SDK DescribeDBInstances': lambda: redis_api.describe_db_instances(
+            volcenginesdkredis.DescribeDBInstancesRequest(page_number=1, page_size=100)),
+        '原始客户端 ListZones': lambda: raw_client.call('DNS', 'ListZones', '2018-08-01', {}),
+    }
+
+
+def measure(label, call, calls, threads):
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: call(), range(calls)))
+    else:
+        for _ in range(calls):
+            call()
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    print(f"{label:<36} 线程 {threads:>3}  {calls / wall:10.1f} calls/sec  CPU {cpu / calls * 1e6:8.1f} µs/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='录制回放基准测试')
+    parser.add_argument('--calls', type=int, default=500, help='每种调用的次数')
+    parser.add_argument('--threads', type=int, default=8, help='并发对比使用的线程数')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='录制时替身服务的处理延迟（毫秒）')
+    parser.add_argument('--latency', default='recorded', help="回放延迟：recorded、none或秒数")
+    parser.add_argument('--cassette', help='已有的录制文件，不提供时先对替身服务录制')
+    args = parser.parse_args()
+
+    latency = None if args.latency == 'none' else (args.latency if args.latency == 'recorded' else float(args.latency))
+    path = args.cassette or os.path.join(tempfile.mkdtemp(prefix='volc-cassette-'), 'bench.json')
+    ak, sk, host = 'AKLTstandin', 'standin-secret', '127.0.0.1:0'
+
+    if not args.cassette:
+        with StandIn(tls=False, latency=args.latency_ms / 1000) as standin:
+            ak, sk, host = standin.ak, standin.sk, standin.host
+            with use_cassette(path, mode='record'):
+                for call in make_calls(ak, sk, host).values():
+                    call()
+        print(f"已录制到 {path}")
+
+    with use_cassette(path, mode='replay', latency=latency):
+        for label, call in make_calls(ak, sk, host).items():
+            measure(label, call, args.calls, 1)
+            measure(label, call, args.calls, args.threads)
+
+
+if __name__ == '__main__':
+    main()
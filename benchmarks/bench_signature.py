@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+SignatureBuilder签名吞吐量微基准（signatures/sec）
+
+python bench_signature.py
+python bench_signature.py --iterations 50000 --list-size 2000
+'''
+import argparse
+import datetime
+import json
+import timeit
+from urllib.parse import quote
+
+from sign import SignatureBuilder
+
+AK = 'AKLTbenchmark'
+SK = 'benchmark-secret'
+HOST = 'open.volcengineapi.com'
+
+# 轮询时反复发送的相同Describe请求体
+POLL_BODY = json.dumps({'InstanceId': 'postgres-b7b939b9efe4', 'PageNumber': 1, 'PageSize': 100})
+
+
+def reference_norm_query(params):
+    """未做任何缓存的参考实现，用于对比norm_query"""
+    query_items = []
+    for key in sorted(params.keys()):
+        if isinstance(params[key], list):
+            for item in params[key]:
+                query_items.append(f"{quote(key, safe='-_.~')}={quote(str(item), safe='-_.~')}")
+        else:
+            query_items.append(f"{quote(key, safe='-_.~')}={quote(str(params[key]), safe='-_.~')}")
+    return '&'.join(query_items).replace('+', '%20')
+
+
+def sign_with(builder, body, query_string, x_date):
+    return builder.sign(AK, SK, 'POST', HOST, '/', query_string, 'application/json',
+                        body, 'cn-shanghai', 'rds_postgresql', x_date)
+
+
+def report(label, seconds, iterations):
+    print(f"{label:<40} {iterations / seconds:12.0f} ops/sec  ({seconds * 1e6 / iterations:7.2f} us/op)")
+
+
+def bench_sign(iterations):
+    x_date = datetime.datetime.now(datetime.UTC).strftime('%Y%m%dT%H%M%SZ')
+    query_string = SignatureBuilder.norm_query({'Action': 'DescribeDBInstances', 'Version': '2022-01-01'})
+    uncached = SignatureBuilder(key_cache_size=0, body_cache_size=0, prefix_cache_size=0)
+    cached = SignatureBuilder()
+
+    print("== 签名 ==")
+    for label, builder, body in (
+        ('无缓存, 空请求体', uncached, ''),
+        ('有缓存, 空请求体', cached, ''),
+        ('无缓存, 重复的Describe请求体', uncached, POLL_BODY),
+        ('有缓存, 重复的Describe请求体', cached, POLL_BODY),
+    ):
+        seconds = timeit.timeit(lambda: sign_with(builder, body, query_string, x_date), number=iterations)
+        report(label, seconds, iterations)
+
+
+def bench_norm_query(iterations, list_size):
+    params = {
+        'Action': 'DescribeInstances',
+        'Version': '2020-04-01',
+        'InstanceIds': [f'i-{index:012d}' for index in range(list_size)],
+        'Tags': [f'env:prod-{index % 10}' for index in range(list_size)],
+    }
+    assert SignatureBuilder.norm_query(params) == reference_norm_query(params)
+
+    print(f"== norm_query (列表参数 2 x {list_size}) ==")
+    rounds = max(iterations // list_size, 10)
+    report('参考实现', timeit.timeit(lambda: reference_norm_query(params), number=rounds), rounds)
+    report('SignatureBuilder.norm_query', timeit.timeit(lambda: SignatureBuilder.norm_query(params), number=rounds), rounds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SignatureBuilder签名吞吐量微基准')
+    parser.add_argument('--iterations', type=int, default=20000, help='每个用例的迭代次数')
+    parser.add_argument('--list-size', type=int, default=1000, help='norm_query中列表参数的长度')
+    args = parser.parse_args()
+
+    bench_sign(args.iterations)
+    bench_norm_query(args.iterations, args.list_size)
+
+
+if __name__ == '__main__':
+    main()
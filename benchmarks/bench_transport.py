@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+对比APIClient在长连接池与每次新建连接两种模式下的吞吐量（calls/sec）
+
+在本地启动一个HTTPS服务作为OpenAPI替身，无需真实凭证：
+
+python bench_transport.py --calls 500
+python bench_transport.py --calls 2000 --threads 8 --latency-ms 5
+'''
+import argparse
+import json
+import os
+import shutil
+import ssl
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+from sign import APIConfig, APIClient, HTTPTransport
+from standin import StandInServer, generate_certificate
+
+RESPONSE_BODY = json.dumps({
+    'ResponseMetadata': {'RequestId': 'bench', 'Action': 'DescribeVpcs', 'Version': '2020-04-01'},
+    'Result': {'Vpcs': [], 'TotalCount': 0}
+}).encode('utf-8')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """返回固定响应的OpenAPI替身，开启HTTP/1.1以支持keep-alive"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(cert_file, key_file, latency):
+    StandInHandler.latency = latency
+    server = StandInServer(('127.0.0.1', 0), StandInHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_file, key_file)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_config(host):
+    os.environ.setdefault('volcAK', 'AKLTbenchmark')
+    os.environ.setdefault('volcSK', 'benchmark-secret')
+    config = APIConfig()
+    config.host = host
+    return config
+
+
+def run(label, call, calls, threads):
+    start = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: call(), range(calls)))
+    else:
+        for _ in range(calls):
+            call()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {calls:>6} 次  {elapsed:8.3f} 秒  {calls / elapsed:10.1f} calls/sec")
+    return calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='APIClient传输层吞吐量基准测试')
+    parser.add_argument('--calls', type=int, default=500, help='每种模式的调用次数')
+    parser.add_argument('--threads', type=int, default=1, help='并发线程数')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='替身服务模拟的处理延迟（毫秒）')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='volc-bench-')
+    try:
+        cert_file, key_file = generate_certificate(work_dir)
+        server = start_server(cert_file, key_file, args.latency_ms / 1000)
+        config = make_config(f'127.0.0.1:{server.server_address[1]}')
+
+        def fresh_connection_call():
+            # 模拟旧实现：每次调用都建立新的TCP+TLS连接
+            with HTTPTransport(verify=cert_file) as transport:
+                APIClient(config, transport).send_request()
+
+        pooled = APIClient(config, HTTPTransport(pool_maxsize=max(args.threads, 1), verify=cert_file))
+
+        print(f"替身服务: https://{config.host}  线程数: {args.threads}")
+        baseline = run('每次新建连接', fresh_connection_call, args.calls, args.threads)
+        keep_alive = run('长连接池(HTTPTransport)', pooled.send_request, args.calls, args.threads)
+        print(f"提升: {keep_alive / baseline:.2f}x")
+
+        pooled.close()
+        server.shutdown()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+本地OpenAPI替身服务，用于离线基准测试和回归测试
+
+- 按Authorization头校验HMAC-SHA256签名（兼容SignatureBuilder和SDK的签名方式）
+- 按接口返回基于夹具数据的响应，支持PageNumber/PageSize、Offset/Limit、NextToken分页
+- 可配置处理延迟、限流错误比例，以及新建资源从Creating到Running的状态迁移时间
+
+命令行启动后，把SDK Configuration.host（及scheme）或APIConfig.host指向打印出的地址即可：
+
+python standin.py --port 8080 --http --latency-ms 20 --throttle 0.05 --transition 10
+python standin.py --instances 500 --records 2000
+
+在代码中使用：
+
+    with StandIn(latency=0.01, throttle_rate=0.1) as standin:
+        config = APIConfig(ak=standin.ak, sk=standin.sk, host=standin.host)
+        client = APIClient(config, HTTPTransport(verify=standin.cert_file))
+'''
+import argparse
+import calendar
+import copy
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from sign import SignatureBuilder
+
+DEFAULT_AK = 'AKLTstandin'
+DEFAULT_SK = 'standin-secret'
+
+_AUTH_PATTERN = re.compile(
+    r'HMAC-SHA256 Credential=(?P<ak>[^/]+)/(?P<date>\d{8})/(?P<region>[^/]+)/(?P<service>[^/]+)/request, '
+    r'SignedHeaders=(?P<signed>[^,]+), Signature=(?P<signature>[0-9a-f]+)'
+)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """加大监听队列，避免并发压测时连接被丢弃后重传"""
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def generate_certificate(work_dir):
+    """使用openssl生成绑定127.0.0.1的自签名证书"""
+    if not shutil.which('openssl'):
+        raise RuntimeError('未找到openssl命令，无法生成自签名证书')
+    cert_file = os.path.join(work_dir, 'cert.pem')
+    key_file = os.path.join(work_dir, 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+        '-keyout', key_file, '-out', cert_file, '-days', '1',
+        '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1'
+    ], check=True, capture_output=True)
+    return cert_file, key_file
+
+
+class SignatureVerifier:
+    """按请求中的SignedHeaders重建规范请求并校验签名"""
+
+    def __init__(self, credentials: Dict[str, str], max_skew: float = 900):
+        self.credentials = credentials
+        self.max_skew = max_skew
+        self.signature_builder = SignatureBuilder()
+
+    def verify(self, method: str, raw_path: str, headers, body: bytes) -> Tuple[bool, str, Dict[str, str]]:
+        """返回(是否通过, 错误码, 凭证信息)"""
+        match = _AUTH_PATTERN.match(headers.get('Authorization', ''))
+        if not match:
+            return False, 'MissingAuthenticationToken', {}
+        scope = match.groupdict()
+        sk = self.credentials.get(scope['ak'])
+        if sk is None:
+            return False, 'InvalidAccessKey', scope
+
+        x_date = headers.get('X-Date', '')
+        try:
+            signed_at = calendar.timegm(time.strptime(x_date, '%Y%m%dT%H%M%SZ'))
+        except ValueError:
+            return False, 'InvalidTimestamp', scope
+        if abs(time.time() - signed_at) > self.max_skew:
+            return False, 'InvalidTimestamp', scope
+
+        body_sha256 = hashlib.sha256(body).hexdigest()
+        if headers.get('X-Content-Sha256', body_sha256) != body_sha256:
+            return False, 'ContentSHA256Mismatch', scope
+
+        split = urlsplit(raw_path)
+        query: Dict[str, Any] = {}
+        for key, value in parse_qsl(split.query, keep_blank_values=True):
+            query.setdefault(key, []).append(value)
+        query = {key: values[0] if len(values) == 1 else values for key, values in query.items()}
+        canonical_query = self.signature_builder.norm_query(query)
+
+        names = scope['signed'].split(';')
+        builder = self.signature_builder
+        k_signing, credential_scope = builder.signing_key(sk, scope['date'], scope['region'], scope['service'])
+        # SDK签名时会去掉Host中的默认端口，原始客户端不会，两种都接受
+        host = headers.get('Host', '')
+        hosts = [host, re.sub(r':(80|443)$', '', host)]
+        for candidate in dict.fromkeys(hosts):
+            values = {name: (candidate if name == 'host' else (headers.get(name) or '').strip()) for name in names}
+            canonical_headers = ''.join(f"{name}:{values[name]}\n" for name in names)
+            canonical_request = '\n'.join([method, split.path or '/', canonical_query, canonical_headers,
+                                           scope['signed'], body_sha256])
+            string_to_sign = f"HMAC-SHA256\n{x_date}\n{credential_scope}\n{builder.hash_sha256(canonical_request)}"
+            expected = hmac.new(k_signing, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+            if hmac.compare_digest(expected, scope['signature']):
+                return True, '', scope
+        return False, 'SignatureDoesNotMatch', scope
+
+
+class StandInState:
+    """替身服务的资源数据和行为配置
+
+    Args:
+        instances: 每种数据库服务预置的实例数
+        zones: 预置的DNS域名数
+        records: 每个域名预置的解析记录数
+        clusters: 预置的VKE集群数
+        eips: 预置的EIP数
+        ecs_instances: 预置的ECS实例数
+        transition: 新建资源从Creating变为Running所需的秒数
+        latency: 每个请求的处理延迟（秒）
+        latency_jitter: 在latency基础上随机增加的最大延迟（秒）
+        throttle_rate: 随机返回限流错误的比例（0~1）
+        retry_after: 限流响应中的Retry-After（秒），为None时不返回
+        seed: 随机数种子，保证多次运行结果一致
+    """
+
+    def __init__(self, instances: int = 30, zones: int = 3, records: int = 120, clusters: int = 2,
+                 eips: int = 40, ecs_instances: int = 50, transition: float = 5.0, latency: float = 0.0,
+                 latency_jitter: float = 0.0, throttle_rate: float = 0.0, retry_after: Optional[float] = None,
+                 seed: int = 42):
+        self.transition = transition
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self.rejected: Counter = Counter()
+        self.lock = threading.Lock()
+        self.collections: Dict[str, List[Dict[str, Any]]] = {}
+        self._seed(instances, zones, records, clusters, eips, ecs_instances)
+
+    # ---- 夹具数据 ----
+
+    def _seed(self, instances, zones, records, clusters, eips, ecs_instances):
+        for service, id_prefix in (('rds_postgresql', 'postgres'), ('redis', 'redis'), ('mongodb', 'mongo'),
+                                   ('kafka', 'kafka'), ('escloud', 'es')):
+            self.collections[service] = [self._db_instance(service, f"{id_prefix}-{i:04d}", f"{id_prefix}-{i}", 0)
+                                         for i in range(instances)]
+            self.collections[f"{service}:allow_lists"] = []
+        self.collections['dns:zones'] = [
+            {'ZID': 1000 + i, 'ZoneName': f"example{i}.com", 'RecordCount': records} for i in range(zones)
+        ]
+        self.collections['dns:records'] = [
+            {'ZID': zone['ZID'], 'RecordID': f"{zone['ZID']}-{i}", 'Host': f"host{i}", 'Type': 'A',
+             'Value': f"10.0.{i // 250}.{i % 250 + 1}", 'TTL': 600, 'Line': 'default', 'Enable': True}
+            for zone in self.collections['dns:zones'] for i in range(records)
+        ]
+        self.collections['vke:clusters'] = [self._cluster(f"cc{i:04d}", f"cluster-{i}", 0) for i in range(clusters)]
+        self.collections['vke:node_pools'] = []
+        self.collections['vke:addons'] = []
+        self.collections['vpc:eips'] = [
+            {'AllocationId': f"eip-{i:04d}", 'EipAddress': f"203.0.113.{i % 250 + 1}", 'Status': 'Available',
+             'Bandwidth': 10, 'BillingType': 3, 'ISP': 'BGP', 'Name': f"eip-{i}"} for i in range(eips)
+        ]
+        self.collections['ecs:instances'] = [self._ecs_instance(f"i-{i:06d}", f"ecs-{i}", 0)
+                                             for i in range(ecs_instances)]
+        self.collections['iam:users'] = [
+            {'UserName': f"user{i}", 'DisplayName': f"用户{i}", 'AccountId': 1} for i in range(25)
+        ]
+
+    def _db_instance(self, service: str, instance_id: str, name: str, ready_at: float) -> Dict[str, Any]:
+        status_field = 'Status' if service in ('redis', 'escloud') else 'InstanceStatus'
+        instance = {'InstanceId': instance_id, 'InstanceName': name, status_field: 'Running',
+                    'RegionId': 'cn-shanghai', 'ZoneId': 'cn-shanghai-a', 'CreateTime': '2024-01-01T00:00:00Z',
+                    '_ready_at': ready_at, '_status': (status_field,)}
+        if service == 'escloud':
+            instance['InstanceConfiguration'] = {'InstanceName': name}
+        return instance
+
+    def _cluster(self, cluster_id: str, name: str, ready_at: float) -> Dict[str, Any]:
+        return {'Id': cluster_id, 'Name': name, 'Status': {'Phase': 'Running'}, 'KubernetesVersion': '1.28',
+                '_ready_at': ready_at, '_status': ('Status', 'Phase')}
+
+    def _ecs_instance(self, instance_id: str, name: str, ready_at: float) -> Dict[str, Any]:
+        return {'InstanceId': instance_id, 'InstanceName': name, 'Status': 'RUNNING',
+                'ZoneId': 'cn-shanghai-a', '_ready_at': ready_at, '_status': ('Status',),
+                '_states': ('CREATING', 'RUNNING')}
+
+    def _render(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """按创建时间计算当前状态，并去掉内部字段"""
+        result = {key: copy.deepcopy(value) for key, value in item.items() if not key.startswith('_')}
+        path = item.get('_status')
+        if path:
+            creating, running = item.get('_states', ('Creating', 'Running'))
+            target = result
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = running if time.time() >= item['_ready_at'] else creating
+        return result
+
+    # ---- 分页 ----
+
+    @staticmethod
+    def _page_number(items: List[Any], params: Dict[str, Any], default_size: int = 10) -> Tuple[List[Any], Dict]:
+        page_number = int(params.get('PageNumber') or 1)
+        page_size = min(int(params.get('PageSize') or default_size), 100)
+        start = (page_number - 1) * page_size
+        return items[start:start + page_size], {'PageNumber': page_number, 'PageSize': page_size}
+
+    @staticmethod
+    def _next_token(items: List[Any], params: Dict[str, Any], default_size: int = 10) -> Tuple[List[Any], Dict]:
+        start = int(params.get('NextToken') or 0)
+        size = min(int(params.get('MaxResults') or default_size), 100)
+        end = start + size
+        return items[start:end], {'NextToken': str(end) if end < len(items) else ''}
+
+    @staticmethod
+    def _offset_limit(items: List[Any], params: Dict[str, Any], default_size: int = 10) -> Tuple[List[Any], Dict]:
+        offset = int(params.get('Offset') or 0)
+        limit = min(int(params.get('Limit') or default_size), 50)
+        return items[offset:offset + limit], {'Offset': offset, 'Limit': limit}
+
+    # ---- 接口实现 ----
+
+    def handle(self, service: str, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """处理一次请求，返回Result部分；未实现的接口返回空结果，资源不存在时返回None"""
+        handler = getattr(self, f"_{action}", None)
+        with self.lock:
+            return handler(service, params) if handler else {}
+
+    def _match_ids(self, items, params, field='InstanceId', param='InstanceIds'):
+        ids = params.get(param) or ([params[field]] if params.get(field) else None)
+        return [item for item in items if item[field] in ids] if ids else items
+
+    def _DescribeDBInstances(self, service, params):
+        items = [self._render(item) for item in self._match_ids(self.collections.get(service, []), params)]
+        page, _ = self._page_number(items, params)
+        if service == 'redis':
+            return {'Instances': page, 'TotalInstancesNum': len(items)}
+        if service == 'mongodb':
+            return {'DBInstances': page, 'Total': len(items)}
+        return {'Instances': page, 'Total': len(items)}
+
+    def _DescribeInstances(self, service, params):
+        if service == 'ecs':
+            items = [self._render(item) for item in self._match_ids(self.collections['ecs:instances'], params)]
+            page, meta = self._next_token(items, params)
+            return {'Instances': page, 'TotalCount': len(items), **meta}
+        items = [self._render(item) for item in self._match_ids(self.collections.get(service, []), params)]
+        page, _ = self._page_number(items, params)
+        if service == 'kafka':
+            return {'InstancesInfo': page, 'Total': len(items)}
+        return {'Instances': page, 'TotalCount': len(items)}
+
+    def _DescribeInstance(self, service, params):
+        for item in self.collections.get(service, []):
+            if item['InstanceId'] == params.get('InstanceId'):
+                return {'InstanceInfo': self._render(item)}
+        return None
+
+    def _CreateDBInstance(self, service, params):
+        instance_id = f"{service[:5]}-{uuid.uuid4().hex[:8]}"
+        self.collections.setdefault(service, []).append(self._db_instance(
+            service, instance_id, params.get('InstanceName', instance_id), time.time() + self.transition))
+        return {'InstanceId': instance_id}
+
+    _CreateInstance = _CreateDBInstance
+
+    def _DescribeAllowLists(self, service, params):
+        allow_lists = self.collections.setdefault(f"{service}:allow_lists", [])
+        if params.get('InstanceId'):
+            allow_lists = [item for item in allow_lists if params['InstanceId'] in item['_instances']]
+        return {'AllowLists': [self._render(item) for item in allow_lists]}
+
+    def _CreateAllowList(self, service, params):
+        allow_list_id = f"acl-{uuid.uuid4().hex[:10]}"
+        self.collections.setdefault(f"{service}:allow_lists", []).append({
+            'AllowListId': allow_list_id, 'AllowListName': params.get('AllowListName'),
+            'AllowListDesc': params.get('AllowListDesc', ''), 'AllowListIPNum': 0, '_instances': set()
+        })
+        return {'AllowListId': allow_list_id}
+
+    def _AssociateAllowList(self, service, params):
+        for item in self.collections.get(f"{service}:allow_lists", []):
+            if item['AllowListId'] in (params.get('AllowListIds') or []):
+                item['_instances'].update(params.get('InstanceIds') or [])
+        return {}
+
+    def _ListZones(self, service, params):
+        zones = self.collections['dns:zones']
+        page, meta = self._page_number(zones, params, default_size=500)
+        return {'Zones': page, 'Total': len(zones), **meta}
+
+    def _ListRecords(self, service, params):
+        records = [record for record in self.collections['dns:records'] if record['ZID'] == int(params.get('ZID', 0))]
+        page, meta = self._page_number(records, params, default_size=500)
+        return {'Records': page, 'TotalCount': len(records), **meta}
+
+    def _CreateRecord(self, service, params):
+        record_id = uuid.uuid4().hex[:12]
+        self.collections['dns:records'].append({
+            'ZID': int(params.get('ZID', 0)), 'RecordID': record_id, 'Host': params.get('Host'),
+            'Type': params.get('Type'), 'Value': params.get('Value'), 'TTL': params.get('TTL', 600),
+            'Line': params.get('Line', 'default'), 'Enable': True
+        })
+        return {'RecordID': record_id}
+
+    def _ListClusters(self, service, params):
+        ids = (params.get('Filter') or {}).get('Ids')
+        clusters = [self._render(item) for item in self.collections['vke:clusters'] if not ids or item['Id'] in ids]
+        page, meta = self._page_number(clusters, params, default_size=100)
+        return {'Items': page, 'TotalCount': len(clusters), **meta}
+
+    def _CreateCluster(self, service, params):
+        cluster_id = f"cc{uuid.uuid4().hex[:10]}"
+        self.collections['vke:clusters'].append(
+            self._cluster(cluster_id, params.get('Name', cluster_id), time.time() + self.transition))
+        return {'Id': cluster_id}
+
+    def _ListNodePools(self, service, params):
+        cluster_ids = (params.get('Filter') or {}).get('ClusterIds') or []
+        ids = (params.get('Filter') or {}).get('Ids') or []
+        pools = [self._render(item) for item in self.collections['vke:node_pools']
+                 if (not cluster_ids or item['ClusterId'] in cluster_ids) and (not ids or item['Id'] in ids)]
+        page, meta = self._page_number(pools, params, default_size=100)
+        return {'Items': page, 'TotalCount': len(pools), **meta}
+
+    def _CreateNodePool(self, service, params):
+        node_pool_id = f"pcc{uuid.uuid4().hex[:10]}"
+        self.collections['vke:node_pools'].append({
+            'Id': node_pool_id, 'Name': params.get('Name'), 'ClusterId': params.get('ClusterId'),
+            'Status': {'Phase': 'Running'}, '_ready_at': time.time() + self.transition, '_status': ('Status', 'Phase')
+        })
+        return {'Id': node_pool_id}
+
+    def _ListAddons(self, service, params):
+        cluster_ids = (params.get('Filter') or {}).get('ClusterIds') or []
+        addons = [self._render(item) for item in self.collections['vke:addons']
+                  if not cluster_ids or item['ClusterId'] in cluster_ids]
+        page, meta = self._page_number(addons, params, default_size=100)
+        return {'Items': page, 'TotalCount': len(addons), **meta}
+
+    def _CreateAddon(self, service, params):
+        self.collections['vke:addons'].append({
+            'Name': params.get('Name'), 'Version': params.get('Version'), 'ClusterId': params.get('ClusterId'),
+            'Status': {'Phase': 'Running'}, '_ready_at': time.time() + self.transition, '_status': ('Status', 'Phase')
+        })
+        return {}
+
+    def _DescribeEipAddresses(self, service, params):
+        eips = self.collections['vpc:eips']
+        if params.get('AllocationIds'):
+            eips = [eip for eip in eips if eip['AllocationId'] in params['AllocationIds']]
+        if params.get('PageNumber'):
+            page, meta = self._page_number(eips, params)
+        else:
+            page, meta = self._next_token(eips, params)
+        return {'EipAddresses': page, 'TotalCount': len(eips), **meta}
+
+    def _RunInstances(self, service, params):
+        count = int(params.get('Count') or 1)
+        name = params.get('InstanceName', 'ecs')
+        ids = []
+        for _ in range(count):
+            instance_id = f"i-{uuid.uuid4().hex[:12]}"
+            self.collections['ecs:instances'].append(
+                self._ecs_instance(instance_id, name, time.time() + self.transition))
+            ids.append(instance_id)
+        return {'InstanceIds': ids}
+
+    def _DeleteInstances(self, service, params):
+        ids = set(params.get('InstanceIds') or [])
+        self.collections['ecs:instances'] = [item for item in self.collections['ecs:instances']
+                                             if item['InstanceId'] not in ids]
+        return {'OperationDetails': [{'InstanceId': instance_id} for instance_id in sorted(ids)]}
+
+    def _ListUsers(self, service, params):
+        users = self.collections['iam:users']
+        page, meta = self._offset_limit(users, params)
+        return {'UserMetadata': page, 'Total': len(users), **meta}
+
+
+def _unflatten(params: Dict[str, Any]) -> Dict[str, Any]:
+    """把表单编码的列表参数（InstanceIds.1、TagFilters.1.Key）还原成列表和字典"""
+    result: Dict[str, Any] = {}
+    for key, value in params.items():
+        parts = key.split('.')
+        if len(parts) == 1 or not parts[1].isdigit():
+            result[key] = value
+            continue
+        items = result.setdefault(parts[0], {})
+        if not isinstance(items, dict):
+            result[key] = value
+            continue
+        if len(parts) == 2:
+            items[int(parts[1])] = value
+        else:
+            items.setdefault(int(parts[1]), {})['.'.join(parts[2:])] = value
+    for key, value in result.items():
+        if isinstance(value, dict) and value and all(isinstance(index, int) for index in value):
+            result[key] = [value[index] for index in sorted(value)]
+    return result
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """OpenAPI替身请求处理，开启HTTP/1.1以支持keep-alive"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    state: StandInState = None
+    verifier: SignatureVerifier = None
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False, default=list).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, code: str, metadata: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        metadata = dict(metadata, Error={'Code': code, 'Message': f"stand-in: {code}"})
+        self._send_json(status, {'ResponseMetadata': metadata}, headers)
+
+    def _handle(self):
+        state = self.state
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        query = dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+        action, version = query.get('Action', ''), query.get('Version', '')
+        metadata = {'RequestId': uuid.uuid4().hex, 'Action': action, 'Version': version}
+
+        ok, code, scope = self.verifier.verify(self.command, self.path, self.headers, body)
+        service = scope.get('service', '').lower()
+        metadata.update(Service=service, Region=scope.get('region', ''))
+        if not ok:
+            state.rejected[code] += 1
+            return self._error(401 if code != 'InvalidTimestamp' else 400, code, metadata)
+
+        if state.latency or state.latency_jitter:
+            time.sleep(state.latency + state.random.uniform(0, state.latency_jitter))
+
+        with state.lock:
+            state.requests[f"{service}.{action}"] += 1
+            throttled = state.throttle_rate and state.random.random() < state.throttle_rate
+            if throttled:
+                state.throttled[f"{service}.{action}"] += 1
+        if throttled:
+            headers = {'Retry-After': str(state.retry_after)} if state.retry_after is not None else None
+            return self._error(429, 'FlowLimitExceeded', metadata, headers)
+
+        params = dict(query)
+        if body and 'json' in (self.headers.get('Content-Type') or ''):
+            params.update(json.loads(body))
+        elif body:
+            params.update(parse_qsl(body.decode('utf-8')))
+        result = state.handle(service, action, _unflatten(params))
+        if result is None:
+            return self._error(404, 'ResourceNotFound', metadata)
+        self._send_json(200, {'ResponseMetadata': metadata, 'Result': result})
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandIn:
+    """在后台线程中运行的替身服务
+
+    Args:
+        state: 资源数据和行为配置，不提供时使用默认配置；其余关键字参数传给StandInState
+        port: 监听端口，0表示随机端口
+        tls: 是否使用HTTPS（自签名证书）
+        credentials: 允许的 {AK: SK}，默认只接受DEFAULT_AK/DEFAULT_SK
+    """
+
+    def __init__(self, state: Optional[StandInState] = None, port: int = 0, tls: bool = True,
+                 credentials: Optional[Dict[str, str]] = None, **state_options):
+        self.state = state or StandInState(**state_options)
+        self.credentials = credentials or {DEFAULT_AK: DEFAULT_SK}
+        self.ak, self.sk = next(iter(self.credentials.items()))
+        self.port = port
+        self.tls = tls
+        self.cert_file = None
+        self._work_dir = None
+        self.server = None
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def scheme(self) -> str:
+        return 'https' if self.tls else 'http'
+
+    def start(self) -> 'StandIn':
+        handler = type('BoundStandInHandler', (StandInHandler,), {
+            'state': self.state, 'verifier': SignatureVerifier(self.credentials)
+        })
+        self.server = StandInServer(('127.0.0.1', self.port), handler)
+        if self.tls:
+            self._work_dir = tempfile.mkdtemp(prefix='volc-standin-')
+            self.cert_file, key_file = generate_certificate(self._work_dir)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.cert_file, key_file)
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def configure_sdk(self, configuration, region: str = 'cn-shanghai'):
+        """让SDK Configuration指向替身服务，未设置区域时SDK不会签名，这里补上默认区域"""
+        configuration.ak, configuration.sk = self.ak, self.sk
+        configuration.region = configuration.region or region
+        configuration.host = self.host
+        configuration.scheme = self.scheme
+        if self.tls:
+            configuration.ssl_ca_cert = self.cert_file
+        return configuration
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self._work_dir:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地OpenAPI替身服务')
+    parser.add_argument('--port', type=int, default=8443, help='监听端口')
+    parser.add_argument('--http', action='store_true', help='使用HTTP而不是HTTPS')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='每个请求的处理延迟（毫秒）')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='随机附加延迟上限（毫秒）')
+    parser.add_argument('--throttle', type=float, default=0.0, help='随机返回限流错误的比例（0~1）')
+    parser.add_argument('--retry-after', type=float, default=None, help='限流响应的Retry-After（秒）')
+    parser.add_argument('--transition', type=float, default=5.0, help='新建资源从Creating到Running的秒数')
+    parser.add_argument('--instances', type=int, default=30, help='每种数据库服务预置的实例数')
+    parser.add_argument('--records', type=int, default=120, help='每个域名预置的解析记录数')
+    parser.add_argument('--ak', default=DEFAULT_AK, help='允许的AK')
+    parser.add_argument('--sk', default=DEFAULT_SK, help='AK对应的SK')
+    args = parser.parse_args()
+
+    state = StandInState(instances=args.instances, records=args.records, transition=args.transition,
+                         latency=args.latency_ms / 1000, latency_jitter=args.jitter_ms / 1000,
+                         throttle_rate=args.throttle, retry_after=args.retry_after)
+    standin = StandIn(state, port=args.port, tls=not args.http, credentials={args.ak: args.sk}).start()
+    print(f"替身服务: {standin.scheme}://{standin.host}  AK={args.ak} SK={args.sk}")
+    if standin.cert_file:
+        print(f"CA证书: {standin.cert_file}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"请求: {sum(state.requests.values())}  限流: {sum(state.throttled.values())}  "
+                  f"签名失败: {sum(state.rejected.values())}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,28 +11,36 @@ python add_cdn_domain.py \
     --auto-cert true \
     --https true --ipv6 true --project default
 '''
-import os
 import sys
 import json
 import argparse
 from typing import Dict, List, Any, Optional, Tuple
 from configs.api_config import api_config
 from sign import APIConfig, APIClient, APIError
+from metrics import default_metrics
+from retry import default_engine
 
 
 class CDNConfig(APIConfig):
     """CDN API配置类，继承自APIConfig"""
-    
+
+    SERVICE = 'CDN'
+    VERSION = '2021-03-01'
+    DEFAULT_REGION = 'cn-shanghai'
+
     def __init__(self):
-        # 设置CDN服务的默认参数
-        os.environ.setdefault('Service', 'CDN')
-        os.environ.setdefault('Version', '2021-03-01')
-        os.environ.setdefault('Region', 'cn-shanghai')
-        os.environ.setdefault('Action', 'AddCdnDomain')
-        os.environ.setdefault('method', 'POST')
-        os.environ.setdefault('volcAK', api_config['ak'])
-        os.environ.setdefault('volcSK', api_config['sk'])
-        super().__init__()
+        super().__init__(ak=api_config['ak'], sk=api_config['sk'], region=self.DEFAULT_REGION)
+
+
+_client: Optional[APIClient] = None
+
+
+def get_client() -> APIClient:
+    """获取共享的CDN API客户端，多次调用之间复用连接"""
+    global _client
+    if _client is None:
+        _client = APIClient(CDNConfig(), middlewares=[default_metrics.middleware, default_engine.middleware])
+    return _client
 
 
 def get_certificate() -> Tuple[Optional[str], Optional[str]]:
@@ -43,31 +51,19 @@ def get_certificate() -> Tuple[Optional[str], Optional[str]]:
     """
     try:
         print("开始获取证书...")
-        # 设置证书服务的默认参数
-        os.environ['Service'] = 'CDN'
-        os.environ['Version'] = '2021-03-01'
-        os.environ['Region'] = 'cn-beijing'
-        os.environ['Action'] = 'ListCertInfo'
-        os.environ['method'] = 'POST'
-        os.environ.setdefault('volcAK', api_config['ak'])
-        os.environ.setdefault('volcSK', api_config['sk'])
-        # 使用正确的Source参数
-        os.environ['API_PARAMS'] = '{"Source": "volc_cert_center"}'
-        # print("API参数:", os.environ['API_PARAMS'])
-        
         # 确保api_config中有AK和SK
-        if not os.environ.get('volcAK') or not os.environ.get('volcSK'):
+        if not api_config.get('ak') or not api_config.get('sk'):
             print("错误: AK或SK未设置")
             return None, None
             
-        # 创建API客户端
-        config = APIConfig()
-        client = APIClient(config)
+        client = get_client()
         
         print("发送证书API请求...")
         # 发送请求
         try:
-            response = client.send_request()
+            # 使用正确的Source参数
+            response = client.call(CDNConfig.SERVICE, 'ListCertInfo', CDNConfig.VERSION,
+                                   {"Source": "volc_cert_center"}, region='cn-beijing')
             # print('证书API响应:', response)
             
             # 检查是否有证书
@@ -105,27 +101,13 @@ def get_cdn_cname(domain: str) -> Optional[str]:
     """
     try:
         print(f"获取域名 {domain} 的CNAME...")
-        # 设置CDN服务的默认参数
-        os.environ['Service'] = 'CDN'
-        os.environ['Version'] = '2021-03-01'
-        os.environ['Region'] = 'cn-shanghai'
-        os.environ['Action'] = 'DescribeCdnConfig'
-        os.environ['method'] = 'POST'
-        os.environ.setdefault('volcAK', api_config['ak'])
-        os.environ.setdefault('volcSK', api_config['sk'])
-        
         # 设置API参数
         api_params = {
             "Domain": domain
         }
-        os.environ['API_PARAMS'] = json.dumps(api_params)
-        
-        # 创建API客户端
-        config = APIConfig()
-        client = APIClient(config)
         
         # 发送请求
-        response = client.send_request()
+        response = get_client().call(CDNConfig.SERVICE, 'DescribeCdnConfig', CDNConfig.VERSION, api_params)
         
         # 检查响应中是否有CNAME信息
         if 'Result' in response and 'DomainConfig' in response['Result']:
@@ -224,18 +206,10 @@ def add_cdn_domain(
     else:
         api_params["HTTPS"] = {"Switch": False}
     
-    # 将API参数设置到环境变量
-    os.environ['API_PARAMS'] = json.dumps(api_params)
-    os.environ['Action'] = 'AddCdnDomain'
-    
-    # print(os.environ['API_PARAMS'])
+    # print(json.dumps(api_params))
     try:
-        # 创建CDN配置和API客户端
-        config = CDNConfig()
-        client = APIClient(config)
-        
         # 发送请求
-        response = client.send_request()
+        response = get_client().call(CDNConfig.SERVICE, 'AddCdnDomain', CDNConfig.VERSION, api_params)
         print(f"成功添加CDN域名: {domain}")
         return response
     except (ValueError, APIError) as e:
@@ -20,26 +20,36 @@ python list_cdn_domains.py \
     --page-size 10 \
     --page-number 1
 '''
-import os
 import sys
 import json
 import argparse
 from typing import Dict, List, Any, Optional
 
 from sign import APIConfig, APIClient, APIError
+from metrics import default_metrics
+from retry import default_engine
 
 
 class CDNConfig(APIConfig):
     """CDN API配置类，继承自APIConfig"""
-    
-    def __init__(self, action: str = 'BatchUpdateCdnConfig'):
-        # 设置CDN服务的默认参数
-        os.environ.setdefault('Service', 'CDN')
-        os.environ.setdefault('Version', '2021-03-01')
-        os.environ.setdefault('Region', 'cn-shanghai')
-        os.environ.setdefault('Action', action)
-        os.environ.setdefault('method', 'POST')
-        super().__init__()
+
+    SERVICE = 'CDN'
+    VERSION = '2021-03-01'
+    DEFAULT_REGION = 'cn-shanghai'
+
+    def __init__(self):
+        super().__init__(region=self.DEFAULT_REGION)
+
+
+_client: Optional[APIClient] = None
+
+
+def get_client() -> APIClient:
+    """获取共享的CDN API客户端，多次调用之间复用连接"""
+    global _client
+    if _client is None:
+        _client = APIClient(CDNConfig(), middlewares=[default_metrics.middleware, default_engine.middleware])
+    return _client
 
 
 def update_cdn_domain(
@@ -94,18 +104,11 @@ def update_cdn_domain(
     if origin_protocol:
         api_params["OriginProtocol"] = origin_protocol
     
-    # 将API参数设置到环境变量
-    os.environ['API_PARAMS'] = json.dumps(api_params)
-    print(os.environ['API_PARAMS'])
-    os.environ['Action'] = 'BatchUpdateCdnConfig'
+    print(json.dumps(api_params))
     
     try:
-        # 创建CDN配置和API客户端
-        config = CDNConfig('BatchUpdateCdnConfig')
-        client = APIClient(config)
-        
         # 发送请求
-        response = client.send_request()
+        response = get_client().call(CDNConfig.SERVICE, 'BatchUpdateCdnConfig', CDNConfig.VERSION, api_params)
         print(f"成功更新CDN域名配置: {domain}")
         return response
     except (ValueError, APIError) as e:
@@ -135,17 +138,9 @@ def list_cdn_domains(
         "Project": project
     }
     
-    # 将API参数设置到环境变量
-    os.environ['API_PARAMS'] = json.dumps(api_params)
-    os.environ['Action'] = 'ListCdnDomains'
-    
     try:
-        # 创建CDN配置和API客户端
-        config = CDNConfig('ListCdnDomains')
-        client = APIClient(config)
-        
         # 发送请求
-        response = client.send_request()
+        response = get_client().call(CDNConfig.SERVICE, 'ListCdnDomains', CDNConfig.VERSION, api_params)
         print(f"成功获取CDN域名列表")
         return response
     except (ValueError, APIError) as e:
@@ -6,7 +6,6 @@ import argparse
 import logging
 import os
 import sys
-from escloud_manager import ESCloudManager
 
 # 配置日志记录
 log_dir = os.path.join(os.path.dirname(__file__), 'logs')
@@ -26,6 +25,8 @@ logger.addHandler(file_handler)
 def list_instances():
     """列出所有ESCloud实例"""
     try:
+        # 解析参数之后才导入管理器和SDK，-h等不访问接口的调用可以立即返回
+        from escloud_manager import ESCloudManager
         manager = ESCloudManager()
         request = manager.api.DescribeInstancesRequest()
         response = manager.client_api.describe_instances(request)
@@ -54,6 +55,7 @@ def list_instances():
 def delete_instance(instance_id, force=False):
     """删除指定的ESCloud实例"""
     try:
+        from escloud_manager import ESCloudManager
         manager = ESCloudManager()
         
         # 获取实例详情，确认实例存在
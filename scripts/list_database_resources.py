@@ -7,25 +7,24 @@ import volcenginesdkredis
 from volcenginesdkcore.rest import ApiException
 from base_resource_manager import BaseResourceManager
 from configs.api_config import api_config
+from sdkclient import new_api_client
+from paginator import Paginator, PageNumberPaging
+from rawjson import call_raw
 from datetime import datetime
 import os
 
 class DatabaseResourceManager(BaseResourceManager):
-    def __init__(self):
-        super().__init__("Database")
-        self.rds_api = volcenginesdkrdspostgresql.RDSPOSTGRESQLApi()
-        self.mongodb_api = volcenginesdkmongodb.MONGODBApi()
-        self.es_api = volcenginesdkescloud.ESCLOUDApi()
-        self.kafka_api = volcenginesdkkafka.KAFKAApi()
-        self.redis_api = volcenginesdkredis.REDISApi()
-
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__("Database", ak, sk, region)
+        self.rds_api = volcenginesdkrdspostgresql.RDSPOSTGRESQLApi(self.api_client)
+        self.mongodb_api = volcenginesdkmongodb.MONGODBApi(self.api_client)
+        self.es_api = volcenginesdkescloud.ESCLOUDApi(self.api_client)
+        self.kafka_api = volcenginesdkkafka.KAFKAApi(self.api_client)
+        self.redis_api = volcenginesdkredis.REDISApi(self.api_client)
+
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     def list_and_write_resources(self):
         """列出所有数据库和消息队列资源并写入文件"""
@@ -54,16 +53,16 @@ class DatabaseResourceManager(BaseResourceManager):
     def _list_postgresql_instances(self):
         """列出所有PostgreSQL实例"""
         try:
-            request = volcenginesdkrdspostgresql.DescribeDBInstancesRequest()
-            request.page_number = 1
-            request.page_size = 100
-            response = self.rds_api.describe_db_instances(request)
-            
-            if not hasattr(response, 'instances'):
+            instances = Paginator(
+                lambda params: call_raw(self.rds_api.describe_db_instances,
+                    volcenginesdkrdspostgresql.DescribeDBInstancesRequest(**params)),
+                PageNumberPaging(page_size=100, total='total'),
+                items='instances'
+            )
+            result = [self._format_postgresql_info(instance) for instance in instances]
+            if not result:
                 self.logger.info("未找到任何PostgreSQL实例")
-                return []
-            
-            return [self._format_postgresql_info(instance) for instance in response.instances]
+            return result
             
         except ApiException as e:
             self.logger.error(f"获取PostgreSQL实例列表时发生异常: {e}")
@@ -72,16 +71,16 @@ class DatabaseResourceManager(BaseResourceManager):
     def _list_mongodb_instances(self):
         """列出所有MongoDB实例"""
         try:
-            request = volcenginesdkmongodb.DescribeDBInstancesRequest()
-            request.page_number = 1
-            request.page_size = 100
-            response = self.mongodb_api.describe_db_instances(request)
-            # print(response)
-            if not hasattr(response, 'db_instances'):
+            instances = Paginator(
+                lambda params: call_raw(self.mongodb_api.describe_db_instances,
+                    volcenginesdkmongodb.DescribeDBInstancesRequest(**params)),
+                PageNumberPaging(page_size=100, total='total'),
+                items='db_instances'
+            )
+            result = [self._format_mongodb_info(instance) for instance in instances]
+            if not result:
                 self.logger.info("未找到任何MongoDB实例")
-                return []
-            
-            return [self._format_mongodb_info(instance) for instance in response.db_instances]
+            return result
             
         except ApiException as e:
             self.logger.error(f"获取MongoDB实例列表时发生异常: {e}")
@@ -90,16 +89,16 @@ class DatabaseResourceManager(BaseResourceManager):
     def _list_es_instances(self):
         """列出所有Elasticsearch实例"""
         try:
-            request = volcenginesdkescloud.DescribeInstancesRequest()
-            request.page_number = 1
-            request.page_size = 100
-            response = self.es_api.describe_instances(request)
-            # print(response)
-            if not hasattr(response, 'instances'):
+            instances = Paginator(
+                lambda params: call_raw(self.es_api.describe_instances,
+                    volcenginesdkescloud.DescribeInstancesRequest(**params)),
+                PageNumberPaging(page_size=100, total='total_count'),
+                items='instances'
+            )
+            result = [self._format_es_info(instance) for instance in instances]
+            if not result:
                 self.logger.info("未找到任何Elasticsearch实例")
-                return []
-            
-            return [self._format_es_info(instance) for instance in response.instances]
+            return result
             
         except ApiException as e:
             self.logger.error(f"获取Elasticsearch实例列表时发生异常: {e}")
@@ -108,17 +107,16 @@ class DatabaseResourceManager(BaseResourceManager):
     def _list_kafka_instances(self):
         """列出所有Kafka实例"""
         try:
-            request = volcenginesdkkafka.DescribeInstancesRequest(
-                page_number = 1,
-                page_size = 100,
+            instances = Paginator(
+                lambda params: call_raw(self.kafka_api.describe_instances,
+                    volcenginesdkkafka.DescribeInstancesRequest(**params)),
+                PageNumberPaging(page_size=100, total='total'),
+                items='instances_info'
             )
-            response = self.kafka_api.describe_instances(request)
-            
-            if not hasattr(response, 'instances_info'):
+            result = [self._format_kafka_info(instance) for instance in instances]
+            if not result:
                 self.logger.info("未找到任何Kafka实例")
-                return []
-            
-            return [self._format_kafka_info(instance) for instance in response.instances_info]
+            return result
             
         except ApiException as e:
             self.logger.error(f"获取Kafka实例列表时发生异常: {e}")
@@ -127,18 +125,16 @@ class DatabaseResourceManager(BaseResourceManager):
     def _list_redis_instances(self):
         """列出所有Redis实例"""
         try:
-            request = volcenginesdkredis.DescribeDBInstancesRequest(
-                page_number = 1,
-                page_size=100,
+            instances = Paginator(
+                lambda params: call_raw(self.redis_api.describe_db_instances,
+                    volcenginesdkredis.DescribeDBInstancesRequest(**params)),
+                PageNumberPaging(page_size=100, total='total_instances_num'),
+                items='instances'
             )
-
-            response = self.redis_api.describe_db_instances(request)
-            # print(response)
-            if not hasattr(response, 'instances'):
+            result = [self._format_redis_info(instance) for instance in instances]
+            if not result:
                 self.logger.info("未找到任何Redis实例")
-                return []
-            
-            return [self._format_redis_info(instance) for instance in response.instances]
+            return result
             
         except ApiException as e:
             self.logger.error(f"获取Redis实例列表时发生异常: {e}")
@@ -150,7 +146,7 @@ class DatabaseResourceManager(BaseResourceManager):
             endpoint_request = volcenginesdkredis.DescribeDBInstanceDetailRequest(
                 instance_id=instance_id
             )
-            endpoint_response = self.redis_api.describe_db_instance_detail(endpoint_request)
+            endpoint_response = call_raw(self.redis_api.describe_db_instance_detail, endpoint_request)
             # print(endpoint_response)
             if hasattr(endpoint_response, 'visit_addrs'):
                 return endpoint_response
@@ -165,7 +161,7 @@ class DatabaseResourceManager(BaseResourceManager):
             endpoint_request = volcenginesdkmongodb.DescribeDBEndpointRequest(
                 instance_id=instance_id
             )
-            endpoint_response = self.mongodb_api.describe_db_endpoint(endpoint_request)
+            endpoint_response = call_raw(self.mongodb_api.describe_db_endpoint, endpoint_request)
             if hasattr(endpoint_response, 'db_endpoints') and endpoint_response.db_endpoints:
                 for endpoint in endpoint_response.db_endpoints:
                     if endpoint.network_type == 'Public' and endpoint.db_addresses:
@@ -324,7 +320,7 @@ class DatabaseResourceManager(BaseResourceManager):
             detail_request = volcenginesdkkafka.DescribeInstanceDetailRequest(
                 instance_id=instance_id
             )
-            detail_response = self.kafka_api.describe_instance_detail(detail_request)
+            detail_response = call_raw(self.kafka_api.describe_instance_detail, detail_request)
             # print(detail_response)
             if hasattr(detail_response, 'basic_instance_info'):
                 return detail_response
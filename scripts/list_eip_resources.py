@@ -5,6 +5,8 @@ import time
 import logging
 import os
 from configs.api_config import api_config
+from sdkclient import new_api_client
+from paginator import Paginator, NextTokenPaging
 from base_resource_manager import BaseResourceManager
 
 # 确保logs目录存在
@@ -23,31 +25,27 @@ file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(mes
 logger.addHandler(file_handler)
 
 class EIPResourceManager(BaseResourceManager):
-    def __init__(self):
-        super().__init__("EIP")
-        self.vpc_api = volcenginesdkvpc.VPCApi()
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__("EIP", ak, sk, region)
+        self.vpc_api = volcenginesdkvpc.VPCApi(self.api_client)
 
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     def list_resources(self):
         """列出所有EIP详细信息"""
         try:
-            request = volcenginesdkvpc.DescribeEipAddressesRequest(
-                page_number=1,
-                page_size=100,
+            eips = Paginator(
+                lambda params: self.vpc_api.describe_eip_addresses(
+                    volcenginesdkvpc.DescribeEipAddressesRequest(**params)),
+                NextTokenPaging(max_results=100),
+                items='eip_addresses'
             )
-            response = self.vpc_api.describe_eip_addresses(request)
-            if not hasattr(response, 'eip_addresses'):
+            result = [self._format_eip_info(eip) for eip in eips]
+            if not result:
                 self.logger.info("未找到任何EIP资源")
-                return []
-            
-            return [self._format_eip_info(eip) for eip in response.eip_addresses]
+            return result
             
         except ApiException as e:
             self.logger.error(f"获取EIP列表时发生异常: {e}")
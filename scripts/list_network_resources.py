@@ -5,6 +5,8 @@ import time
 import logging
 import os
 from configs.api_config import api_config
+from sdkclient import new_api_client
+from rawjson import call_raw
 from base_resource_manager import BaseResourceManager
 
 # 确保logs目录存在
@@ -23,17 +25,13 @@ file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(mes
 logger.addHandler(file_handler)
 
 class NetworkResourceManager(BaseResourceManager):
-    def __init__(self):
-        super().__init__("Network")
-        self.vpc_api = volcenginesdkvpc.VPCApi()
-
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__("Network", ak, sk, region)
+        self.vpc_api = volcenginesdkvpc.VPCApi(self.api_client)
+
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     def list_resources(self):
         """列出所有网络资源"""
@@ -47,7 +45,7 @@ class NetworkResourceManager(BaseResourceManager):
         """列出所有VPC信息"""
         try:
             request = volcenginesdkvpc.DescribeVpcsRequest()
-            response = self.vpc_api.describe_vpcs(request)
+            response = call_raw(self.vpc_api.describe_vpcs, request)
             
             if not hasattr(response, 'vpcs'):
                 self.logger.info("未找到任何VPC")
@@ -64,7 +62,7 @@ class NetworkResourceManager(BaseResourceManager):
         try:
             request = volcenginesdkvpc.DescribeSubnetsRequest()
             request.vpc_id = vpc_id
-            response = self.vpc_api.describe_subnets(request)
+            response = call_raw(self.vpc_api.describe_subnets, request)
             
             if not hasattr(response, 'subnets'):
                 self.logger.info(f"未找到VPC {vpc_id} 的任何子网")
@@ -81,7 +79,7 @@ class NetworkResourceManager(BaseResourceManager):
         try:
             request = volcenginesdkvpc.DescribeSecurityGroupsRequest()
             request.vpc_id = vpc_id
-            response = self.vpc_api.describe_security_groups(request)
+            response = call_raw(self.vpc_api.describe_security_groups, request)
             
             if not hasattr(response, 'security_groups'):
                 self.logger.info(f"未找到VPC {vpc_id} 的任何安全组")
@@ -133,7 +131,7 @@ class NetworkResourceManager(BaseResourceManager):
             request = volcenginesdkvpc.DescribeSecurityGroupAttributesRequest(
                 security_group_id=sg.security_group_id,
             )
-            response = self.vpc_api.describe_security_group_attributes(request)
+            response = call_raw(self.vpc_api.describe_security_group_attributes, request)
             
             if hasattr(response, 'permissions') and response.permissions:
                 sg_info['ingress_rules'] = []
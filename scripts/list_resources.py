@@ -1,15 +1,26 @@
 # coding: utf-8
 from __future__ import absolute_import
-from list_eip_resources import EIPResourceManager
-from list_network_resources import NetworkResourceManager
-from list_vke_clusters import VKEClusterManager
-from list_database_resources import DatabaseResourceManager
+import importlib
 import logging
 import os
 
 # 配置日志记录
 logger = logging.getLogger(__name__)
 
+# 菜单选项对应的(模块名, 资源管理器类名, 完成提示)，选择后才导入对应模块和SDK
+RESOURCE_MANAGERS = {
+    '1': ('list_eip_resources', 'EIPResourceManager', "成功完成EIP资源信息的收集和记录"),
+    '2': ('list_network_resources', 'NetworkResourceManager', "成功完成网络资源信息的收集和记录"),
+    '3': ('list_vke_clusters', 'VKEClusterManager', "成功完成VKE集群信息的收集和记录"),
+    '4': ('list_database_resources', 'DatabaseResourceManager', "成功完成数据库和消息队列资源信息的收集和记录"),
+}
+
+
+def load_manager(choice):
+    """按菜单选项导入并创建资源管理器"""
+    module_name, class_name, _ = RESOURCE_MANAGERS[choice]
+    return getattr(importlib.import_module(module_name), class_name)()
+
 def print_menu():
     """打印菜单选项"""
     print("\n资源列表查询系统")
@@ -25,17 +36,9 @@ def print_menu():
 def list_all_resources():
     """列出所有资源"""
     try:
-        # 创建资源管理器实例
-        eip_manager = EIPResourceManager()
-        network_manager = NetworkResourceManager()
-        vke_manager = VKEClusterManager()
-        database_manager = DatabaseResourceManager()
-
-        # 获取并写入资源信息
-        eip_manager.list_and_write_resources()
-        network_manager.list_and_write_resources()
-        vke_manager.list_and_write_resources()
-        database_manager.list_and_write_resources()
+        # 依次创建资源管理器，获取并写入资源信息
+        for choice in RESOURCE_MANAGERS:
+            load_manager(choice).list_and_write_resources()
 
         print("成功完成所有资源信息的收集和记录")
     except Exception as e:
@@ -50,22 +53,9 @@ def main():
             if choice == '0':
                 print("感谢使用，再见！")
                 break
-            elif choice == '1':
-                eip_manager = EIPResourceManager()
-                eip_manager.list_and_write_resources()
-                print("成功完成EIP资源信息的收集和记录")
-            elif choice == '2':
-                network_manager = NetworkResourceManager()
-                network_manager.list_and_write_resources()
-                print("成功完成网络资源信息的收集和记录")
-            elif choice == '3':
-                vke_manager = VKEClusterManager()
-                vke_manager.list_and_write_resources()
-                print("成功完成VKE集群信息的收集和记录")
-            elif choice == '4':
-                database_manager = DatabaseResourceManager()
-                database_manager.list_and_write_resources()
-                print("成功完成数据库和消息队列资源信息的收集和记录")
+            elif choice in RESOURCE_MANAGERS:
+                load_manager(choice).list_and_write_resources()
+                print(RESOURCE_MANAGERS[choice][2])
             elif choice == '99':
                 list_all_resources()
                 print("成功完成所有资源信息的收集和记录")
@@ -1,25 +1,20 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import volcenginesdkcore
 import volcenginesdkvke
 from volcenginesdkvke.models.list_clusters_request import ListClustersRequest
-from configs.api_config import api_config
+from sdkclient import new_api_client
 from base_resource_manager import BaseResourceManager
 import os
 
 class VKEClusterManager(BaseResourceManager):
-    def __init__(self):
-        super().__init__("VKE")
-        self.vke_api = volcenginesdkvke.VKEApi()
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__("VKE", ak, sk, region)
+        self.vke_api = volcenginesdkvke.VKEApi(self.api_client)
 
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     def list_resources(self):
         """列出所有集群信息"""
@@ -8,6 +8,7 @@ import logging
 import os
 import json
 from configs.api_config import api_config
+from sdkclient import new_api_client
 
 # 确保logs目录存在
 log_dir = os.path.join(os.path.dirname(__file__), 'logs')
@@ -25,17 +26,13 @@ file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(mes
 logger.addHandler(file_handler)
 
 class SecurityGroupManager:
-    def __init__(self):
-        self._init_client()
-        self.vpc_api = volcenginesdkvpc.VPCApi()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
+        self.vpc_api = volcenginesdkvpc.VPCApi(self.api_client)
 
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     def get_security_group_details(self, security_group_id):
         """
@@ -10,6 +10,7 @@ import volcenginesdkcore
 import volcenginesdkbilling
 from volcenginesdkcore.rest import ApiException
 from configs.api_config import api_config
+from sdkclient import get_api, get_manager
 
 # 配置日志记录
 log_dir = os.path.join(os.path.dirname(__file__), 'logs')
@@ -26,6 +27,15 @@ file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(mes
 logger.addHandler(file_handler)
 
 
+# 产品类型对应的白名单管理器类名
+WHITELIST_MANAGERS = {
+    'Message_Queue_for_Kafka': 'KafkaWhitelistManager',
+    'veDB for DocumentDB': 'MongoDBWhitelistManager',
+    'RDS for PostgreSQL': 'PostgreSQLWhitelistManager',
+    'veDB_for_Redis': 'RedisWhitelistManager',
+}
+
+
 def unbind_instance_whitelists(instance_id, product):
     """解绑实例的所有白名单
     Args:
@@ -35,19 +45,12 @@ def unbind_instance_whitelists(instance_id, product):
         bool: 解绑是否成功
     """
     try:
+        manager_name = WHITELIST_MANAGERS.get(product)
         whitelist_manager = None
-        if product == 'Message_Queue_for_Kafka':
-            from whitelist_manager import KafkaWhitelistManager
-            whitelist_manager = KafkaWhitelistManager()
-        elif product == 'veDB for DocumentDB':
-            from whitelist_manager import MongoDBWhitelistManager
-            whitelist_manager = MongoDBWhitelistManager()
-        elif product == 'RDS for PostgreSQL':
-            from whitelist_manager import PostgreSQLWhitelistManager
-            whitelist_manager = PostgreSQLWhitelistManager()
-        elif product == 'veDB_for_Redis':
-            from whitelist_manager import RedisWhitelistManager
-            whitelist_manager = RedisWhitelistManager()
+        if manager_name:
+            import whitelist_manager as whitelist_module
+            # 同一进程内多次退订时复用注册表中的白名单管理器
+            whitelist_manager = get_manager(getattr(whitelist_module, manager_name))
 
         if whitelist_manager:
             logger.info(f"正在解绑 {product} 实例 {instance_id} 的白名单...")
@@ -67,12 +70,6 @@ def unsubscribe_instance(instance_id, product="ESCloud", force=False):
         bool: 退订是否成功
     """
     try:
-        # 初始化配置
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        volcenginesdkcore.Configuration.set_default(configuration)
 
         # 确认退订
         if not force:
@@ -87,7 +84,7 @@ def unsubscribe_instance(instance_id, product="ESCloud", force=False):
             logger.warning("白名单解绑失败，但将继续执行退订操作")
 
         # 创建退订请求
-        api_instance = volcenginesdkbilling.BILLINGApi()
+        api_instance = get_api(volcenginesdkbilling.BILLINGApi)
         unsubscribe_request = volcenginesdkbilling.UnsubscribeInstanceRequest(
             instance_id=instance_id,
             product=product
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+统一命令行入口
+
+子命令对应的脚本在选中之后才导入，SDK模块也只在真正调用接口时加载，
+查看帮助或只执行某一个命令时不再为其他服务付出启动时间：
+
+python volc.py --help
+python volc.py clean-escloud -l
+python volc.py unsubscribe -i es-xxxx -p ESCloud
+python volc.py --import-only list-database      # 只导入子命令模块，用于测量启动时间
+'''
+import argparse
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import runpy
+import sys
+
+# 子命令 -> (脚本模块名, 说明)
+COMMANDS = {
+    'list': ('list_resources', '交互式资源列表查询'),
+    'list-eip': ('list_eip_resources', '列出EIP资源'),
+    'list-network': ('list_network_resources', '列出VPC、子网、安全组等网络资源'),
+    'list-vke': ('list_vke_clusters', '列出VKE集群'),
+    'list-database': ('list_database_resources', '列出数据库和消息队列资源'),
+    'security-groups': ('security_group_details', '查看安全组规则详情'),
+    'clean': ('clean', '交互式资源清理'),
+    'clean-escloud': ('clean_escloud', '列出或删除ESCloud实例'),
+    'unsubscribe': ('unsubscribe_instances', '退订包年包月实例'),
+    'cdn-add': ('add_cdn_domain', '添加CDN域名'),
+    'cdn-config': ('batch_update_cdn_config', '批量更新CDN域名配置'),
+}
+
+# 脚本中使用的旧模块名 -> 当前文件对应的模块名
+LEGACY_MODULES = {
+    'base_resource_manager': 'base',
+    'instance_status_checker': 'instance',
+    'resource_manager': 'resource',
+    'whitelist_manager': 'whitelist',
+    'escloud_manager': 'escloud',
+    'redis_manager': 'redis',
+    'vpc_manager': 'vpc',
+    'eip_manager': 'eip',
+}
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'volcengine')
+SEARCH_PATHS = [
+    SCRIPTS_DIR,
+    PACKAGE_DIR,
+    os.path.join(PACKAGE_DIR, 'auth'),
+    os.path.join(PACKAGE_DIR, 'core'),
+    os.path.join(PACKAGE_DIR, 'managers'),
+]
+
+
+class LegacyModuleFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """常规查找失败后，把旧模块名解析为当前模块，两个名字指向同一个模块对象"""
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname in LEGACY_MODULES:
+            return importlib.util.spec_from_loader(fullname, self)
+        return None
+
+    def create_module(self, spec):
+        return importlib.import_module(LEGACY_MODULES[spec.name])
+
+    def exec_module(self, module):
+        pass
+
+
+def setup_import_path():
+    """让脚本的平铺导入（from sign import ...、from retry import ...）在任意工作目录下可用"""
+    for path in reversed(SEARCH_PATHS):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    if not any(isinstance(finder, LegacyModuleFinder) for finder in sys.meta_path):
+        sys.meta_path.append(LegacyModuleFinder())
+
+
+def build_parser():
+    epilog = '\n'.join(f"  {name:<18}{description}" for name, (_, description) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog='volc',
+        description='火山引擎资源管理工具',
+        epilog='子命令:\n' + epilog + '\n\n子命令的参数原样传给对应脚本，例如 volc clean-escloud -h',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--import-only', action='store_true', help='只导入子命令模块，不执行，用于测量启动时间')
+    parser.add_argument('command', choices=COMMANDS, metavar='command', help='子命令')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='传给子命令的参数')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    module_name, _ = COMMANDS[args.command]
+    setup_import_path()
+    if args.import_only:
+        importlib.import_module(module_name)
+        return 0
+    # 以__main__方式运行脚本，脚本自己的参数解析和入口逻辑保持不变
+    sys.argv[1:] = args.args
+    runpy.run_module(module_name, run_name='__main__', alter_sys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import asyncio
+import ssl
+from typing import Optional, Dict, Any, Union, Iterable, List, Sequence, Callable
+
+import aiohttp
+
+try:
+    from sign import APIConfig, APIError, RequestPreparer, SignatureBuilder
+    from middleware import APICall, run_async_chain
+except ImportError:  # 以包方式导入时auth、core目录不在sys.path中
+    from volcengine.auth.sign import APIConfig, APIError, RequestPreparer, SignatureBuilder
+    from volcengine.core.middleware import APICall, run_async_chain
+
+
+'''
+异步OpenAPI客户端，适合一次发起大量相互独立的调用（DNS、CDN、DTS、账单等）
+
+    async with AsyncAPIClient(APIConfig(), max_concurrency=100) as client:
+        zones = await client.call('DNS', 'ListZones', '2018-08-01', {}, region='cn-beijing')
+        results = await client.map('DNS', 'ListRecords', '2018-08-01',
+                                   [{'ZID': zid} for zid in zids], region='cn-beijing')
+'''
+
+
+class AsyncAPIClient(RequestPreparer):
+    """基于asyncio的OpenAPI客户端
+
+    与APIClient共享请求构建和签名逻辑，使用aiohttp连接池保持长连接，
+    并通过信号量限制同时在途的请求数（只计实际发送中的请求，不含中间件的重试等待）。
+
+    Args:
+        config: API配置
+        signature_builder: 签名器，可以与同步客户端共享
+        max_concurrency: 同时在途的最大请求数
+        limit_per_host: 每个主机的最大连接数，0表示不单独限制
+        connect_timeout: 建立连接超时时间（秒）
+        read_timeout: 读取响应超时时间（秒）
+        verify: 是否校验服务端证书，也可以传入CA证书路径
+        scheme: 请求协议，默认为https
+        middlewares: 异步请求中间件，签名形式为 async def mw(call, proceed)
+    """
+
+    def __init__(self, config: APIConfig, signature_builder: Optional[SignatureBuilder] = None,
+                 max_concurrency: int = 50, limit_per_host: int = 0,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 verify: Union[bool, str] = True, scheme: str = 'https',
+                 middlewares: Sequence[Callable] = ()):
+        super().__init__(config, signature_builder, scheme=scheme)
+        self.middlewares = list(middlewares)
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.verify = verify
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _ssl_option(self) -> Union[bool, ssl.SSLContext]:
+        if isinstance(self.verify, str):
+            return ssl.create_default_context(cafile=self.verify)
+        return True if self.verify else False
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             limit_per_host=self.limit_per_host,
+                                             ssl=self._ssl_option())
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def call(self, service: str, action: str, version: str, params: Optional[Dict[str, Any]] = None,
+                   region: Optional[str] = None, method: str = 'POST',
+                   content_type: Optional[str] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """发送一次OpenAPI请求，参数含义同APIClient.call
+
+        Args:
+            timeout: 本次请求的总超时时间（秒），不提供则使用客户端的连接/读取超时
+
+        Raises:
+            APIError: 当HTTP请求失败、超时或响应中包含错误时
+        """
+        if not self.middlewares:
+            return await self._send(service, action, version, params, region, method, content_type, timeout)
+        call = APICall(service, action, version, region or self.config.region, params, method, self.config.ak)
+        return await run_async_chain(
+            self.middlewares, call,
+            lambda: self._send(service, action, version, params, region, method, content_type, timeout)
+        )
+
+    async def _send(self, service: str, action: str, version: str, params: Optional[Dict[str, Any]],
+                    region: Optional[str], method: str, content_type: Optional[str],
+                    timeout: Optional[float]) -> Dict[str, Any]:
+        # 并发名额只在实际发送期间占用，中间件里的重试退避等待不占名额，限流时不会拖住其他请求；
+        # 在获得名额后再签名，避免排队过久导致X-Date过期；重试时也会重新签名
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        async with self._semaphore:
+            prepared = self.prepare(service, action, version, params, region, method, content_type)
+            try:
+                async with self._get_session().request(prepared.method, prepared.url,
+                                                       headers=prepared.headers,
+                                                       data=prepared.body.encode('utf-8'),
+                                                       timeout=request_timeout) as response:
+                    text = await response.text()
+                    status = response.status
+                    headers = dict(response.headers)
+            except asyncio.TimeoutError as e:
+                raise APIError(f'HTTP请求超时：{service}.{action}', code=APIError.NETWORK_ERROR) from e
+            except aiohttp.ClientError as e:
+                raise APIError(f'HTTP请求异常：{e}', code=APIError.NETWORK_ERROR) from e
+        return self.parse_response(status, text, headers)
+
+    async def gather(self, calls: Iterable[Dict[str, Any]], return_exceptions: bool = False) -> List[Any]:
+        """并发执行一批调用，结果顺序与输入一致
+
+        Args:
+            calls: 每一项是传给call()的关键字参数，例如
+                {'service': 'DNS', 'action': 'ListRecords', 'version': '2018-08-01', 'params': {...}}
+            return_exceptions: 为True时失败的调用以异常对象形式返回，不中断其他调用
+        """
+        return await asyncio.gather(*(self.call(**kwargs) for kwargs in calls),
+                                    return_exceptions=return_exceptions)
+
+    async def map(self, service: str, action: str, version: str, params_list: Sequence[Dict[str, Any]],
+                  return_exceptions: bool = False, **kwargs) -> List[Any]:
+        """以不同参数并发调用同一个API，其余关键字参数传给call()"""
+        return await self.gather(
+            (dict(service=service, action=action, version=version, params=params, **kwargs)
+             for params in params_list),
+            return_exceptions=return_exceptions
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+def run_batch(config: APIConfig, calls: Iterable[Dict[str, Any]], max_concurrency: int = 50,
+              return_exceptions: bool = True) -> List[Any]:
+    """在同步代码中并发执行一批调用的便捷函数"""
+    async def _run():
+        async with AsyncAPIClient(config, max_concurrency=max_concurrency) as client:
+            return await client.gather(calls, return_exceptions=return_exceptions)
+    return asyncio.run(_run())
@@ -5,7 +5,17 @@ from urllib.parse import quote
 import requests
 import os
 import json
-from typing import Optional, Dict, Any, Union
+import socket
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Dict, Any, Union, NamedTuple, Sequence, Mapping
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+try:
+    from middleware import APICall, Middleware, run_chain
+except ImportError:  # 以包方式导入（import volcengine.auth）时core目录不在sys.path中
+    from volcengine.core.middleware import APICall, Middleware, run_chain
 
 
 '''
@@ -24,16 +34,24 @@ Service: rds_postgresql mongodb vke Redis Kafka ESloud iam
 '''
 
 class APIConfig:
-    def __init__(self):
-        self.ak = self._get_required_env('volcAK', '访问密钥ID不能为空')
-        self.sk = self._get_required_env('volcSK', '访问密钥不能为空')
+    """API配置
+
+    显式传入的参数优先，未传入的参数从环境变量读取。Action/Service/Version/API_PARAMS
+    仅供send_request()这类环境变量驱动的调用使用，APIClient.call()不依赖它们。
+    """
+
+    def __init__(self, ak: Optional[str] = None, sk: Optional[str] = None,
+                 region: Optional[str] = None, host: Optional[str] = None,
+                 content_type: Optional[str] = None):
+        self.ak = ak or self._get_required_env('volcAK', '访问密钥ID不能为空')
+        self.sk = sk or self._get_required_env('volcSK', '访问密钥不能为空')
         self.action = os.environ.get('Action', 'DescribeVpcs')
         self.method = os.environ.get('method', 'GET')
         self.service = os.environ.get('Service', 'vpc')
         self.version = os.environ.get('Version', '2020-04-01')
-        self.region = os.environ.get('Region', 'cn-shanghai')
-        self.host = os.environ.get('Host', 'open.volcengineapi.com')
-        self.content_type = os.environ.get('ContentType', 'application/json')
+        self.region = region or os.environ.get('Region', 'cn-shanghai')
+        self.host = host or os.environ.get('Host', 'open.volcengineapi.com')
+        self.content_type = content_type or os.environ.get('ContentType', 'application/json')
         self.api_params = self._parse_api_params()
 
     @staticmethod
@@ -53,16 +71,50 @@ class APIConfig:
                 raise ValueError(f'API参数解析失败: {e}')
         return None
 
+@lru_cache(maxsize=4096)
+def _quote(value: str) -> str:
+    return quote(value, safe='-_.~')
+
+
 class SignatureBuilder:
+    """HMAC-SHA256请求签名器
+
+    签名时缓存以下中间结果，避免对同样的输入重复计算：
+    - 按 (sk, 日期, 区域, 服务) 缓存派生出的签名密钥和credential scope
+    - 按 (方法, 路径, 查询串, 内容类型, 主机) 缓存规范请求中不随时间变化的前缀
+    - 按请求体内容缓存其SHA256，轮询时反复发送的相同请求体只计算一次
+
+    缓存大小为0时关闭对应的缓存。签名器是线程安全的，可以在多个客户端间共享。
+
+    Args:
+        key_cache_size: 签名密钥缓存的最大条目数
+        body_cache_size: 请求体哈希缓存的最大条目数
+        prefix_cache_size: 规范请求前缀缓存的最大条目数
+    """
+
+    SIGNED_HEADERS = 'content-type;host;x-content-sha256;x-date'
+    EMPTY_BODY_SHA256 = hashlib.sha256(b'').hexdigest()
+
+    def __init__(self, key_cache_size: int = 64, body_cache_size: int = 256, prefix_cache_size: int = 256):
+        self.key_cache_size = key_cache_size
+        self._signing_keys: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._body_hash = lru_cache(maxsize=body_cache_size)(self.hash_sha256) if body_cache_size else self.hash_sha256
+        self._canonical_prefix = (lru_cache(maxsize=prefix_cache_size)(self._build_canonical_prefix)
+                                  if prefix_cache_size else self._build_canonical_prefix)
+
     @staticmethod
     def norm_query(params: Dict[str, Any]) -> str:
         query_items = []
-        for key in sorted(params.keys()):
-            if isinstance(params[key], list):
-                for item in params[key]:
-                    query_items.append(f"{quote(key, safe='-_.~')}={quote(str(item), safe='-_.~')}")
+        append = query_items.append
+        for key in sorted(params):
+            value = params[key]
+            quoted_key = _quote(key)
+            if isinstance(value, list):
+                for item in value:
+                    append(f"{quoted_key}={_quote(str(item))}")
             else:
-                query_items.append(f"{quote(key, safe='-_.~')}={quote(str(params[key]), safe='-_.~')}")
+                append(f"{quoted_key}={_quote(str(value))}")
         return '&'.join(query_items).replace('+', '%20')
 
     @staticmethod
@@ -73,116 +125,342 @@ class SignatureBuilder:
     def hmac_sha256(key: bytes, content: str) -> bytes:
         return hmac.new(key, content.encode('utf-8'), hashlib.sha256).digest()
 
-class APIClient:
-    def __init__(self, config: APIConfig):
-        self.config = config
-        self.signature_builder = SignatureBuilder()
+    def body_sha256(self, body: str) -> str:
+        """计算请求体的SHA256，相同的请求体命中缓存"""
+        if not body:
+            return self.EMPTY_BODY_SHA256
+        return self._body_hash(body)
+
+    def signing_key(self, sk: str, short_date: str, region: str, service: str) -> tuple:
+        """返回 (签名密钥, credential scope)，按 (sk, 日期, 区域, 服务) 缓存"""
+        cache_key = (sk, short_date, region, service)
+        with self._lock:
+            cached = self._signing_keys.get(cache_key)
+            if cached is not None:
+                self._signing_keys.move_to_end(cache_key)
+                return cached
+
+        k_date = self.hmac_sha256(sk.encode('utf-8'), short_date)
+        k_region = self.hmac_sha256(k_date, region)
+        k_service = self.hmac_sha256(k_region, service)
+        k_signing = self.hmac_sha256(k_service, 'request')
+        entry = (k_signing, f"{short_date}/{region}/{service}/request")
+
+        if self.key_cache_size:
+            with self._lock:
+                self._signing_keys[cache_key] = entry
+                while len(self._signing_keys) > self.key_cache_size:
+                    self._signing_keys.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _build_canonical_prefix(method: str, path: str, query_string: str, content_type: str, host: str) -> str:
+        return f"{method.upper()}\n{path}\n{query_string}\ncontent-type:{content_type}\nhost:{host}\n"
+
+    def sign(self, ak: str, sk: str, method: str, host: str, path: str, query_string: str,
+             content_type: str, body: str, region: str, service: str, x_date: str) -> Dict[str, str]:
+        """为请求计算签名并返回需要附加的请求头
+
+        Args:
+            query_string: 已经过norm_query规范化的查询串
+            x_date: 形如 20240101T000000Z 的UTC时间
+        """
+        content_sha256 = self.body_sha256(body)
+        canonical_request = (
+            f"{self._canonical_prefix(method, path, query_string, content_type, host)}"
+            f"x-content-sha256:{content_sha256}\nx-date:{x_date}\n\n{self.SIGNED_HEADERS}\n{content_sha256}"
+        )
+        k_signing, credential_scope = self.signing_key(sk, x_date[:8], region, service)
+        string_to_sign = f"HMAC-SHA256\n{x_date}\n{credential_scope}\n{self.hash_sha256(canonical_request)}"
+        signature = hmac.new(k_signing, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+        return {
+            'Host': host,
+            'X-Content-Sha256': content_sha256,
+            'X-Date': x_date,
+            'Content-Type': content_type,
+            'Authorization': f"HMAC-SHA256 Credential={ak}/{credential_scope}, "
+                             f"SignedHeaders={self.SIGNED_HEADERS}, Signature={signature}"
+        }
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """在连接池的每个socket上开启TCP keep-alive和TCP_NODELAY"""
+
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', self.SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+
+class HTTPTransport:
+    """可复用的HTTP传输层
+
+    基于requests.Session保持长连接，多次send_request之间复用TCP/TLS连接。
+
+    Args:
+        pool_connections: 缓存的主机连接池数量
+        pool_maxsize: 每个主机连接池保留的最大连接数
+        connect_timeout: 建立连接超时时间（秒）
+        read_timeout: 读取响应超时时间（秒）
+        host_pool_sizes: 按主机单独指定连接池大小，例如 {'open.volcengineapi.com': 50}
+        pool_block: 连接池耗尽时是否阻塞等待空闲连接
+        verify: 是否校验服务端证书，也可以传入CA证书路径
+        scheme: 请求协议，默认为https
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 host_pool_sizes: Optional[Dict[str, int]] = None,
+                 pool_block: bool = False, verify: Union[bool, str] = True,
+                 scheme: str = 'https'):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.verify = verify
+        self.scheme = scheme
+        self.session = requests.Session()
+        self.session.mount('https://', _KeepAliveAdapter(pool_connections=pool_connections,
+                                                          pool_maxsize=pool_maxsize,
+                                                          pool_block=pool_block))
+        self.session.mount('http://', _KeepAliveAdapter(pool_connections=pool_connections,
+                                                         pool_maxsize=pool_maxsize,
+                                                         pool_block=pool_block))
+        # 按主机挂载独立的适配器，requests会优先匹配最长的URL前缀
+        for host, size in (host_pool_sizes or {}).items():
+            self.session.mount(f'{scheme}://{host}/', _KeepAliveAdapter(pool_connections=1,
+                                                                         pool_maxsize=size,
+                                                                         pool_block=pool_block))
+
+    @property
+    def timeout(self) -> tuple:
+        return self.connect_timeout, self.read_timeout
+
+    def request(self, method: str, url: str, headers: Dict[str, str], data: str) -> requests.Response:
+        return self.session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            data=data,
+            timeout=self.timeout,
+            verify=self.verify
+        )
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class PreparedRequest(NamedTuple):
+    """已签名、可直接发送的请求"""
+    method: str
+    url: str
+    headers: Dict[str, str]
+    body: str
 
-    def send_request(self) -> Dict[str, Any]:
-        now = datetime.datetime.now(datetime.UTC)
-        body = json.dumps(self.config.api_params) if self.config.api_params is not None else ''
 
-        request_params = self._build_request_params(body, now)
+class RequestPreparer:
+    """构建签名请求和解析响应的公共逻辑，由同步和异步客户端共享
+
+    这里只做纯内存计算，不读写环境变量，也不修改实例状态。
+    """
+
+    def __init__(self, config: APIConfig, signature_builder: Optional[SignatureBuilder] = None,
+                 scheme: str = 'https'):
+        self.config = config
+        self.signature_builder = signature_builder or SignatureBuilder()
+        self.scheme = scheme
+
+    def prepare(self, service: str, action: str, version: str, params: Optional[Dict[str, Any]] = None,
+                region: Optional[str] = None, method: str = 'POST',
+                content_type: Optional[str] = None) -> PreparedRequest:
+        """构建并签名一次OpenAPI请求，参数含义同APIClient.call"""
+        body = json.dumps(params) if params is not None else ''
+        request_params = self._build_request_params(
+            service=service,
+            action=action,
+            version=version,
+            region=region or self.config.region,
+            method=method,
+            content_type=content_type or self.config.content_type,
+            body=body,
+            date=datetime.datetime.now(datetime.UTC)
+        )
         headers = self._build_headers(request_params)
-        response = self._make_request(request_params, headers)
-        return self._handle_response(response)
+        url = f"{self.scheme}://{request_params['host']}{request_params['path']}?{request_params['query_string']}"
+        return PreparedRequest(request_params['method'], url, headers, body)
 
-    def _build_request_params(self, body: str, date: datetime.datetime) -> Dict[str, Any]:
+    def _build_request_params(self, service: str, action: str, version: str, region: str, method: str,
+                              content_type: str, body: str, date: datetime.datetime) -> Dict[str, Any]:
+        query = {'Action': action, 'Version': version}
         return {
             'body': body,
             'host': self.config.host,
             'path': '/',
-            'method': self.config.method,
-            'content_type': self.config.content_type,
+            'method': method,
+            'content_type': content_type,
             'date': date,
-            'query': {'Action': self.config.action, 'Version': self.config.version}
+            'service': service,
+            'region': region,
+            'query': query,
+            'query_string': self.signature_builder.norm_query(query)
         }
 
     def _build_headers(self, request_params: Dict[str, Any]) -> Dict[str, str]:
-        x_date = request_params['date'].strftime('%Y%m%dT%H%M%SZ')
-        short_date = x_date[:8]
-        content_sha256 = self.signature_builder.hash_sha256(request_params['body'])
-
-        headers = {
-            'Host': request_params['host'],
-            'X-Content-Sha256': content_sha256,
-            'X-Date': x_date,
-            'Content-Type': request_params['content_type']
-        }
-
-        signature = self._calculate_signature(request_params, x_date, short_date, content_sha256)
-        headers['Authorization'] = self._build_authorization_header(short_date, signature)
-
-        return headers
-
-    def _calculate_signature(self, request_params: Dict[str, Any], x_date: str, short_date: str, content_sha256: str) -> str:
-        signed_headers = ['content-type', 'host', 'x-content-sha256', 'x-date']
-        signed_headers_str = ';'.join(signed_headers)
-
-        canonical_request = self._build_canonical_request(request_params, content_sha256, x_date, signed_headers_str)
-        hashed_canonical_request = self.signature_builder.hash_sha256(canonical_request)
-
-        credential_scope = f"{short_date}/{self.config.region}/{self.config.service}/request"
-        string_to_sign = f"HMAC-SHA256\n{x_date}\n{credential_scope}\n{hashed_canonical_request}"
-
-        k_date = self.signature_builder.hmac_sha256(self.config.sk.encode('utf-8'), short_date)
-        k_region = self.signature_builder.hmac_sha256(k_date, self.config.region)
-        k_service = self.signature_builder.hmac_sha256(k_region, self.config.service)
-        k_signing = self.signature_builder.hmac_sha256(k_service, 'request')
-
-        return self.signature_builder.hmac_sha256(k_signing, string_to_sign).hex()
-
-    def _build_canonical_request(self, request_params: Dict[str, Any], content_sha256: str, x_date: str, signed_headers_str: str) -> str:
-        canonical_headers = [
-            f"content-type:{request_params['content_type']}",
-            f"host:{request_params['host']}",
-            f"x-content-sha256:{content_sha256}",
-            f"x-date:{x_date}"
-        ]
-
-        return '\n'.join([
-            request_params['method'].upper(),
-            request_params['path'],
-            self.signature_builder.norm_query(request_params['query']),
-            '\n'.join(canonical_headers),
-            '',
-            signed_headers_str,
-            content_sha256
-        ])
-
-    def _build_authorization_header(self, short_date: str, signature: str) -> str:
-        credential_scope = f"{short_date}/{self.config.region}/{self.config.service}/request"
-        return f"HMAC-SHA256 Credential={self.config.ak}/{credential_scope}, SignedHeaders=content-type;host;x-content-sha256;x-date, Signature={signature}"
-
-    def _make_request(self, request_params: Dict[str, Any], headers: Dict[str, str]) -> requests.Response:
-        url = f"https://{request_params['host']}{request_params['path']}?{self.signature_builder.norm_query(request_params['query'])}"
-        return requests.request(
+        return self.signature_builder.sign(
+            ak=self.config.ak,
+            sk=self.config.sk,
             method=request_params['method'],
-            url=url,
-            headers=headers,
-            data=request_params['body']
+            host=request_params['host'],
+            path=request_params['path'],
+            query_string=request_params['query_string'],
+            content_type=request_params['content_type'],
+            body=request_params['body'],
+            region=request_params['region'],
+            service=request_params['service'],
+            x_date=request_params['date'].strftime('%Y%m%dT%H%M%SZ')
         )
 
-    def _handle_response(self, response: requests.Response) -> Dict[str, Any]:
-        if response.status_code != 200:
-            raise APIError(f'HTTP请求失败，状态码：{response.status_code}\n响应内容：{response.text}')
-
-        if not response.text.strip():
+    @staticmethod
+    def parse_response(status_code: int, text: str, headers: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+        """校验HTTP状态码和ResponseMetadata.Error，返回解析后的JSON"""
+        retry_after = (headers or {}).get('Retry-After')
+        if status_code != 200:
+            raise APIError(f'HTTP请求失败，状态码：{status_code}\n响应内容：{text}',
+                           code=APIError.extract_code(text), status=status_code, retry_after=retry_after)
+
+        if not text.strip():
             print('任务执行成功，响应为空')
             return {}
 
         try:
-            result = response.json()
+            result = json.loads(text)
         except json.JSONDecodeError as e:
-            raise APIError(f'响应内容不是有效的JSON格式：{response.text}')
+            raise APIError(f'响应内容不是有效的JSON格式：{text}', status=status_code)
 
-        if result.get('ResponseMetadata', {}).get('Error'):
-            raise APIError(f'任务执行失败：{result["ResponseMetadata"]["Error"]}')
+        error = result.get('ResponseMetadata', {}).get('Error')
+        if error:
+            raise APIError(f'任务执行失败：{error}', code=error.get('Code'), status=status_code,
+                           retry_after=retry_after)
 
         return result
 
+
+class APIClient(RequestPreparer):
+    """同步OpenAPI客户端
+
+    Args:
+        config: API配置
+        transport: HTTP传输层，不提供则创建默认的长连接传输层
+        signature_builder: 签名器，可以在多个客户端间共享
+        middlewares: 请求中间件（重试、限流等），见middleware模块
+    """
+
+    def __init__(self, config: APIConfig, transport: Optional[HTTPTransport] = None,
+                 signature_builder: Optional[SignatureBuilder] = None,
+                 middlewares: Sequence[Middleware] = ()):
+        self.transport = transport or HTTPTransport()
+        self.middlewares = list(middlewares)
+        super().__init__(config, signature_builder, scheme=self.transport.scheme)
+
+    def close(self):
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def call(self, service: str, action: str, version: str, params: Optional[Dict[str, Any]] = None,
+             region: Optional[str] = None, method: str = 'POST',
+             content_type: Optional[str] = None) -> Dict[str, Any]:
+        """发送一次OpenAPI请求
+
+        请求完全在内存中构建，不读写环境变量，也不修改客户端状态，
+        因此同一个APIClient可以在多个线程间共享。
+
+        Args:
+            service: 服务名称，例如 DNS、CDN、rds_postgresql
+            action: API动作名称，例如 ListZones
+            version: API版本，例如 2018-08-01
+            params: API参数，作为JSON请求体发送
+            region: 区域，不提供则使用配置中的区域
+            method: HTTP方法，默认为POST
+            content_type: 请求内容类型，不提供则使用配置中的类型
+
+        Returns:
+            Dict: API响应结果
+
+        Raises:
+            APIError: 当HTTP请求失败或响应中包含错误时
+        """
+        def send() -> Dict[str, Any]:
+            # 每次发送（包括重试）都重新签名，保证X-Date有效
+            prepared = self.prepare(service, action, version, params, region, method, content_type)
+            return self._handle_response(self._make_request(prepared))
+
+        if not self.middlewares:
+            return send()
+        call = APICall(service, action, version, region or self.config.region, params, method, self.config.ak)
+        return run_chain(self.middlewares, call, send)
+
+    def send_request(self) -> Dict[str, Any]:
+        """按APIConfig中从环境变量读取的参数发送请求"""
+        return self.call(
+            service=self.config.service,
+            action=self.config.action,
+            version=self.config.version,
+            params=self.config.api_params,
+            region=self.config.region,
+            method=self.config.method
+        )
+
+    def _make_request(self, prepared: PreparedRequest) -> requests.Response:
+        try:
+            return self.transport.request(
+                method=prepared.method,
+                url=prepared.url,
+                headers=prepared.headers,
+                data=prepared.body
+            )
+        except requests.RequestException as e:
+            raise APIError(f'HTTP请求异常：{e}', code=APIError.NETWORK_ERROR) from e
+
+    def _handle_response(self, response: requests.Response) -> Dict[str, Any]:
+        return self.parse_response(response.status_code, response.text, response.headers)
+
 class APIError(Exception):
-    pass
+    """API调用失败
+
+    Attributes:
+        code: 错误码，取自ResponseMetadata.Error.Code；网络异常时为NETWORK_ERROR
+        status: HTTP状态码
+        retry_after: 服务端通过Retry-After头给出的建议重试间隔
+    """
+
+    NETWORK_ERROR = 'NetworkError'
+
+    def __init__(self, message: str, code: Optional[str] = None, status: Optional[int] = None,
+                 retry_after: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+        self.retry_after = retry_after
+
+    @staticmethod
+    def extract_code(text: str) -> Optional[str]:
+        """从错误响应体中提取ResponseMetadata.Error.Code"""
+        try:
+            return json.loads(text)['ResponseMetadata']['Error']['Code']
+        except (ValueError, KeyError, TypeError):
+            return None
 
 def main():
     try:
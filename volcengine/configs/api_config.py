@@ -10,4 +10,36 @@ api_config = {
 timeout_config = {
     "instance_ready": 1800,  # 实例就绪超时时间（秒）
     "check_interval": 30     # 检查间隔（秒）
-}
\ No newline at end of file
+}
+
+# 限流配置（令牌桶），键为 "服务" 或 "服务.接口"，值为QPS或 {"rate": QPS, "burst": 突发数}
+rate_limit_config = {
+    "backend": "memory",   # memory: 进程内共享；file: 同一台机器上的多个脚本共享
+    "lock_dir": None,      # file后端的状态目录，默认为系统临时目录下的volcengine-ratelimit
+    "default_rate": None,  # 未配置的服务不限流
+    "limits": {
+        "vke": 10,
+        "vke.CreateCluster": 1,
+        "vke.CreateNodePool": 2,
+        "vke.CreateAddon": 2
+    }
+}
+
+# 自适应轮询配置
+polling_config = {
+    "history_file": None,  # 就绪耗时历史文件，默认为 ~/.volcengine/readiness_history.json
+    "min_interval": 5,     # 预计完成时间附近的查询间隔（秒）
+    "max_interval": 120,   # 查询间隔上限（秒）
+    "max_samples": 50      # 每个(服务, 规格, 区域)保留的最近样本数
+}
+
+# 并发创建配置
+provision_config = {
+    "max_workers": 16,        # 同时执行的步骤数上限（等待实例就绪也占用一个）
+    "limits": {
+        "network": 1,          # VPC、子网按名称查重，逐个创建
+        "create_instance": 4   # 同时发出的创建实例请求数
+    },
+    "journal": True,          # 记录步骤日志，中途失败后重新运行从未完成的步骤继续
+    "journal_file": None      # 步骤日志文件，默认为 ~/.volcengine/provision_journal.jsonl
+}
@@ -5,6 +5,7 @@ ecs_configs = {
         "name": "her-test-hs-sh-gpu-01",  # ECS实例名称
         "description": "测试ECS实例",  # 实例描述
         "dry_run": False,  # 是否预览
+        "count": 1,  # 实例数量，批量创建（create --batch）时创建参数相同的配置合并为一次请求，名称自动添加序号
         "instance_type_id": "ecs.c3a.2xlarge",  # 实例规格
         "image_id": "image-yzpyj8j5sl4e0wax4krm",  # 镜像ID
         "zone_id": "cn-shanghai-a",  # 可用区
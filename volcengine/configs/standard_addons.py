@@ -122,4 +122,22 @@ STANDARD_ADDONS = [
     #     "deploy_node_type": "Node",
     #     "config": '{"TopicId":"53c3715c-d5cc-4ea8-ae7a-24c6039c1104","ProjectId":"7d1c61be-d155-4766-9e88-4b3f80f69b03"}'
     # }
-]
\ No newline at end of file
+]
+# 组件依赖关系：组件 -> 需要先安装并处于Running状态的组件
+# 依赖的组件不在本次安装列表中时忽略该依赖；组件配置中的"requires"字段优先于这里的设置
+ADDON_DEPENDENCIES = {
+    # 网络插件就绪后Pod才能正常分配IP
+    "core-dns": ["vpc-cni"],
+    "csi-ebs": ["vpc-cni"],
+    "csi-nas": ["vpc-cni"],
+    "csi-tos": ["vpc-cni"],
+    "snapshot-controller": ["csi-ebs"],
+    "vci-virtual-kubelet": ["vpc-cni"],
+    # ingress-nginx部署在虚拟节点上
+    "ingress-nginx": ["vpc-cni", "core-dns", "vci-virtual-kubelet"],
+    "metrics-server": ["vpc-cni", "core-dns"],
+    "metrics-collector": ["metrics-server", "csi-ebs"],
+    "log-collector": ["vpc-cni", "core-dns"],
+    "node-problem-detector": ["vpc-cni"],
+    "prometheus-agent": ["core-dns", "csi-ebs", "metrics-server"],
+}
@@ -2,13 +2,16 @@ import os
 import logging
 import time
 from abc import ABC, abstractmethod
-from configs.api_config import api_config
+try:
+    from configs.api_config import api_config
+except ImportError:  # 以包方式导入（import volcengine.core）时configs不在sys.path中
+    from volcengine.configs.api_config import api_config
 
 class BaseResourceManager(ABC):
-    def __init__(self, resource_name):
+    def __init__(self, resource_name, ak=None, sk=None, region=None):
         self.resource_name = resource_name
         self._setup_logging()
-        self._init_client()
+        self._init_client(ak, sk, region)
 
     def _setup_logging(self):
         """设置日志配置"""
@@ -31,8 +34,8 @@ class BaseResourceManager(ABC):
         self.logger.addHandler(file_handler)
 
     @abstractmethod
-    def _init_client(self):
-        """初始化客户端，子类必须实现"""
+    def _init_client(self, ak=None, sk=None, region=None):
+        """初始化客户端，子类必须实现；未提供的凭证和区域使用api_config中的配置"""
         pass
 
     @abstractmethod
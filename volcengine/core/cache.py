@@ -0,0 +1,242 @@
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from middleware import APICall, install as install_middleware, use as use_middleware
+
+logger = logging.getLogger(__name__)
+
+'''
+读穿透响应缓存
+
+Describe*/List*等只读接口的响应按(账号, 区域, 服务, 接口, 规范化参数)缓存，
+带TTL和LRU淘汰；同一账号下同一服务的写操作（Create*/Delete*/Modify*/Associate*等）
+会让该服务的全部缓存失效。
+
+    cache = ResponseCache(ttl=30, ttls={'dns.ListZones': 300})
+    APIClient(config, middlewares=[cache.middleware])
+    enable_sdk_cache(cache)                 # 对所有SDK ApiClient生效
+
+轮询状态等需要最新数据的地方使用 with cache.bypass(): 跳过缓存。
+'''
+
+READ_PREFIXES = ('Describe', 'List', 'Get', 'Query')
+
+MUTATING_PREFIXES = (
+    'Create', 'Delete', 'Modify', 'Associate', 'Disassociate', 'Update', 'Attach', 'Detach',
+    'Add', 'Remove', 'Run', 'Start', 'Stop', 'Reboot', 'Release', 'Allocate', 'Install',
+    'Uninstall', 'Bind', 'Unbind', 'Set', 'Reset', 'Renew', 'Restart',
+)
+
+
+def canonical_params(params: Any) -> str:
+    """把请求参数转换为与键顺序无关的字符串，SDK请求模型先转换为字典"""
+    if hasattr(params, 'to_dict'):
+        params = params.to_dict()
+    if params is None:
+        return ''
+    return json.dumps(params, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def clone_response(value: Any) -> Any:
+    """复制响应，SDK模型共享其中的Configuration（含logger等不能深拷贝的对象）"""
+    if isinstance(value, list):
+        return [clone_response(item) for item in value]
+    if isinstance(value, dict):
+        return {key: clone_response(item) for key, item in value.items()}
+    swagger_types = getattr(type(value), 'swagger_types', None)
+    if swagger_types is not None:
+        clone = copy.copy(value)
+        for name in swagger_types:
+            attr = '_' + name
+            if attr in clone.__dict__:
+                clone.__dict__[attr] = clone_response(clone.__dict__[attr])
+        return clone
+    return copy.deepcopy(value)
+
+
+class ResponseCache:
+    """TTL + LRU 响应缓存
+
+    Args:
+        max_entries: 最多缓存的响应数，超出时淘汰最久未使用的
+        ttl: 默认缓存时间（秒）
+        ttls: 按 "服务" 或 "服务.接口" 单独指定的缓存时间（不区分大小写），0表示不缓存
+        read_prefixes: 视为只读、可以缓存的接口前缀
+        mutating_prefixes: 视为写操作、触发失效的接口前缀
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0, ttls: Optional[Mapping[str, float]] = None,
+                 read_prefixes: Iterable[str] = READ_PREFIXES, mutating_prefixes: Iterable[str] = MUTATING_PREFIXES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.ttls = {key.lower(): value for key, value in (ttls or {}).items()}
+        self.read_prefixes = tuple(read_prefixes)
+        self.mutating_prefixes = tuple(mutating_prefixes)
+        self._clock = clock
+        self._entries: 'OrderedDict[Tuple, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.action_stats: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+    def _ttl_for(self, service: str, action: str) -> float:
+        return self.ttls.get(f"{service}.{action}".lower(), self.ttls.get(service.lower(), self.ttl))
+
+    def is_read(self, action: str) -> bool:
+        return action.startswith(self.read_prefixes)
+
+    def is_mutating(self, action: str) -> bool:
+        return action.startswith(self.mutating_prefixes)
+
+    @staticmethod
+    def make_key(call: APICall) -> Tuple:
+        return (call.account or '', call.region or '', call.service.lower(), call.action,
+                canonical_params(call.params), call.raw)
+
+    def _count(self, call: APICall, field: str):
+        stats = self.action_stats.setdefault((call.service.lower(), call.action), {'hits': 0, 'misses': 0})
+        stats[field] += 1
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """读取缓存，返回(是否命中, 响应副本)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+        return True, clone_response(value)
+
+    def put(self, key: Tuple, value: Any, ttl: float):
+        # 保存副本，避免调用方修改返回结果后污染缓存
+        value = clone_response(value)
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, service: Optional[str] = None, account: Optional[str] = None):
+        """让缓存失效，不指定服务时清空全部缓存"""
+        with self._lock:
+            if service is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                service = service.lower()
+                keys = [key for key in self._entries
+                        if key[2] == service and (account is None or key[0] == (account or ''))]
+                for key in keys:
+                    del self._entries[key]
+                removed = len(keys)
+            self.invalidations += removed
+        if removed:
+            logger.debug(f"{service or '全部服务'} 缓存失效 {removed} 条")
+
+    @contextmanager
+    def bypass(self):
+        """在当前线程内跳过缓存读取（结果仍会写入缓存），用于轮询等需要最新数据的场景"""
+        previous = getattr(self._local, 'bypass', False)
+        self._local.bypass = True
+        try:
+            yield
+        finally:
+            self._local.bypass = previous
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'actions': {f"{service}.{action}": dict(counts)
+                            for (service, action), counts in self.action_stats.items()},
+            }
+
+    def _lookup(self, call: APICall) -> Tuple[Optional[Tuple], bool, Any]:
+        """返回(缓存键, 是否命中, 响应)，不可缓存的请求缓存键为None"""
+        if not self.is_read(call.action) or self._ttl_for(call.service, call.action) <= 0:
+            return None, False, None
+        key = self.make_key(call)
+        hit, value = (False, None) if getattr(self._local, 'bypass', False) else self.get(key)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._count(call, 'hits' if hit else 'misses')
+        return key, hit, value
+
+    def middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """同步中间件，用于APIClient和SDK ApiClient"""
+        if self.is_mutating(call.action):
+            # 写操作完成前后各失效一次，避免并发读取把旧数据写回缓存
+            self.invalidate(call.service, call.account)
+            try:
+                return proceed()
+            finally:
+                self.invalidate(call.service, call.account)
+        key, hit, value = self._lookup(call)
+        if hit:
+            return value
+        result = proceed()
+        if key is not None:
+            self.put(key, result, self._ttl_for(call.service, call.action))
+        return result
+
+    async def async_middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """异步中间件，用于AsyncAPIClient"""
+        if self.is_mutating(call.action):
+            self.invalidate(call.service, call.account)
+            try:
+                return await proceed()
+            finally:
+                self.invalidate(call.service, call.account)
+        key, hit, value = self._lookup(call)
+        if hit:
+            return value
+        result = await proceed()
+        if key is not None:
+            self.put(key, result, self._ttl_for(call.service, call.action))
+        return result
+
+
+# 进程内共享的默认缓存
+default_cache = ResponseCache()
+
+
+def enable_sdk_cache(api_client=None, cache: Optional[ResponseCache] = None) -> ResponseCache:
+    """让SDK ApiClient的只读调用经过缓存
+
+    缓存放在中间件链的最外层，命中时不会再经过重试和限流。
+
+    Args:
+        api_client: 只对该ApiClient实例生效；不提供时对进程内所有ApiClient生效，
+            此时其他模块的状态轮询也会读到缓存，需要自行使用bypass()
+        cache: 使用指定的缓存代替默认缓存
+    """
+    cache = cache or default_cache
+    if api_client is None:
+        use_middleware(cache.middleware, first=True)
+    else:
+        install_middleware(api_client, cache.middleware, first=True)
+    return cache
@@ -0,0 +1,268 @@
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+'''
+录制/回放（cassette）
+
+在传输层拦截请求：SDK侧拦截volcenginesdkcore.rest.RESTClientObject.request，
+原始签名客户端侧拦截sign.HTTPTransport.request。ResourceBase、VKEManager、dns.py
+以及各个列表脚本无需任何修改即可录制或回放：
+
+    with use_cassette('cassettes/inventory.json', mode='record'):
+        DatabaseResourceManager().list_resources()
+
+    with use_cassette('cassettes/inventory.json', mode='replay', latency='recorded'):
+        DatabaseResourceManager().list_resources()      # 不访问网络
+
+请求按(服务, 区域, 接口, 版本, 规范化请求体)匹配；同一个请求录制了多次时按顺序回放，
+用完后重复最后一次响应（适合状态轮询）。录制文件不保存签名和凭证。
+'''
+
+_SCOPE_PATTERN = re.compile(r'Credential=[^/]+/\d{8}/(?P<region>[^/]+)/(?P<service>[^/]+)/request')
+
+# 回放时保留的响应头
+_KEPT_HEADERS = ('Content-Type', 'Retry-After')
+
+
+class CassetteMissError(Exception):
+    """回放模式下没有找到匹配的录制"""
+
+
+def _canonical_body(body: Any) -> Any:
+    if body is None or body == '':
+        return None
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    if isinstance(body, str):
+        try:
+            return json.loads(body)
+        except ValueError:
+            return body
+    return body
+
+
+def request_key(headers: Optional[Dict[str, str]], query: Dict[str, Any], body: Any) -> Dict[str, Any]:
+    """提取用于匹配的请求信息"""
+    scope = _SCOPE_PATTERN.search((headers or {}).get('Authorization', '')) if headers else None
+    return {
+        'service': scope.group('service').lower() if scope else '',
+        'region': scope.group('region') if scope else '',
+        'action': query.get('Action', ''),
+        'version': query.get('Version', ''),
+        'body': _canonical_body(body),
+    }
+
+
+def _key_string(key: Dict[str, Any]) -> str:
+    return json.dumps(key, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class Cassette:
+    """一组录制的请求/响应
+
+    Args:
+        path: 录制文件路径
+        latency: 回放延迟，'recorded'表示按录制时的耗时等待，数字表示固定延迟（秒），None表示不等待
+    """
+
+    def __init__(self, path: Optional[str] = None, latency: Union[str, float, None] = 'recorded'):
+        self.path = path
+        self.latency = latency
+        self.interactions: List[Dict[str, Any]] = []
+        self.played = 0
+        self.recorded = 0
+        self._index: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: Optional[str] = None) -> 'Cassette':
+        path = path or self.path
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with self._lock:
+            self.interactions = data.get('interactions', [])
+            self._index.clear()
+            self._cursor.clear()
+            for interaction in self.interactions:
+                self._index.setdefault(_key_string(interaction['request']), []).append(interaction)
+        logger.info(f"已加载 {len(self.interactions)} 条录制: {path}")
+        return self
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {'version': 1, 'interactions': list(self.interactions)}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logger.info(f"已保存 {len(data['interactions'])} 条录制: {path}")
+
+    def record(self, key: Dict[str, Any], status: int, headers: Dict[str, str], body: str, elapsed: float):
+        interaction = {
+            'request': key,
+            'response': {
+                'status': status,
+                'headers': {name: headers[name] for name in _KEPT_HEADERS if headers.get(name) is not None},
+                'body': body,
+            },
+            'latency': round(elapsed, 6),
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+            self._index.setdefault(_key_string(key), []).append(interaction)
+            self.recorded += 1
+
+    def play(self, key: Dict[str, Any]) -> Dict[str, Any]:
+        """取出下一条匹配的录制并按配置等待，返回其response部分"""
+        key_string = _key_string(key)
+        with self._lock:
+            candidates = self._index.get(key_string)
+            if not candidates:
+                raise CassetteMissError(f"没有匹配的录制: {key['service']}.{key['action']} {key_string}")
+            cursor = self._cursor.get(key_string, 0)
+            interaction = candidates[min(cursor, len(candidates) - 1)]
+            self._cursor[key_string] = cursor + 1
+            self.played += 1
+
+        delay = interaction.get('latency', 0) if self.latency == 'recorded' else self.latency
+        if delay:
+            time.sleep(delay)
+        return interaction['response']
+
+
+class _ReplayRESTResponse(io.IOBase):
+    """与volcenginesdkcore.rest.RESTResponse接口一致的回放响应"""
+
+    def __init__(self, response: Dict[str, Any]):
+        self.status = response['status']
+        self.reason = 'OK' if 200 <= self.status <= 299 else 'Replayed'
+        self.data = response['body']
+        self._headers = dict(response.get('headers') or {})
+
+    def getheaders(self):
+        return self._headers
+
+    def getheader(self, name, default=None):
+        return self._headers.get(name, default)
+
+
+def _replay_requests_response(response: Dict[str, Any], url: str) -> requests.Response:
+    result = requests.Response()
+    result.status_code = response['status']
+    result._content = response['body'].encode('utf-8')
+    result.headers = CaseInsensitiveDict(response.get('headers') or {})
+    result.encoding = 'utf-8'
+    result.url = url
+    return result
+
+
+_active_lock = threading.Lock()
+_active: Optional[Tuple[Cassette, str]] = None
+_original_sdk_request = None
+_original_transport_request = None
+
+
+def _sdk_request(self, method, url, query_params=None, headers=None, body=None, post_params=None,
+                 _preload_content=True, _request_timeout=None):
+    cassette, mode = _active
+    query = dict(query_params or [])
+    query.update(parse_qsl(urlsplit(url).query))
+    key = request_key(headers, query, body if body is not None else post_params)
+
+    if mode == 'replay':
+        from volcenginesdkcore.rest import ApiException
+        response = _ReplayRESTResponse(cassette.play(key))
+        if not 200 <= response.status <= 299:
+            raise ApiException(http_resp=response)
+        return response
+
+    from volcenginesdkcore.rest import ApiException
+    start = time.perf_counter()
+    try:
+        response = _original_sdk_request(self, method, url, query_params, headers, body, post_params,
+                                         _preload_content, _request_timeout)
+    except ApiException as e:
+        if e.status:
+            cassette.record(key, e.status, dict(e.headers or {}), e.body or '', time.perf_counter() - start)
+        raise
+    data = response.data if isinstance(response.data, str) else response.data.decode('utf-8')
+    cassette.record(key, response.status, dict(response.getheaders() or {}), data, time.perf_counter() - start)
+    return response
+
+
+def _transport_request(self, method, url, headers, data):
+    cassette, mode = _active
+    key = request_key(headers, dict(parse_qsl(urlsplit(url).query)), data)
+    if mode == 'replay':
+        return _replay_requests_response(cassette.play(key), url)
+
+    start = time.perf_counter()
+    response = _original_transport_request(self, method, url, headers, data)
+    cassette.record(key, response.status_code, dict(response.headers), response.text, time.perf_counter() - start)
+    return response
+
+
+def _install(cassette: Cassette, mode: str):
+    global _active, _original_sdk_request, _original_transport_request
+    from volcenginesdkcore.rest import RESTClientObject
+    from sign import HTTPTransport
+    with _active_lock:
+        if _active is not None:
+            raise RuntimeError("已有正在使用的cassette，不支持嵌套")
+        _active = (cassette, mode)
+        _original_sdk_request = RESTClientObject.request
+        _original_transport_request = HTTPTransport.request
+        RESTClientObject.request = _sdk_request
+        HTTPTransport.request = _transport_request
+
+
+def _uninstall():
+    global _active
+    from volcenginesdkcore.rest import RESTClientObject
+    from sign import HTTPTransport
+    with _active_lock:
+        RESTClientObject.request = _original_sdk_request
+        HTTPTransport.request = _original_transport_request
+        _active = None
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = 'once', latency: Union[str, float, None] = 'recorded'):
+    """在with块内录制或回放所有SDK和原始客户端请求
+
+    Args:
+        path: 录制文件路径
+        mode: record（总是访问网络并覆盖录制）、replay（只回放，缺失时抛出CassetteMissError）、
+            once（文件存在时回放，否则录制）
+        latency: 回放延迟，见Cassette
+    """
+    if mode not in ('record', 'replay', 'once'):
+        raise ValueError(f"不支持的模式: {mode}")
+    if mode == 'once':
+        mode = 'replay' if os.path.exists(path) else 'record'
+
+    cassette = Cassette(path, latency)
+    if mode == 'replay':
+        cassette.load()
+    _install(cassette, mode)
+    try:
+        yield cassette
+    finally:
+        _uninstall()
+        if mode == 'record':
+            cassette.save()
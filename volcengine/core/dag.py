@@ -0,0 +1,327 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+'''
+按依赖关系并发执行的创建流程
+
+每个实例配置的创建过程描述为一个Plan：步骤、步骤依赖的其他步骤，以及步骤所属的并发限制组。
+Orchestrator同时执行多个Plan，依赖已满足的步骤立即开始，同一Plan内互不依赖的步骤
+（例如申请EIP与创建实例）以及不同Plan之间的步骤都会并发执行：
+
+    plan = Plan('pg-prod')
+    plan.add('network', lambda r: (vpc_id, subnet_id))
+    plan.add('eip', lambda r: manager.allocate_eip())
+    plan.add('instance', lambda r: manager.create_instance(config, *r['network']), requires=['network'],
+             limit='create_instance')
+    plan.add('endpoint', lambda r: manager.create_public_endpoint(r['instance'], r['eip'][0]),
+             requires=['instance', 'eip'])
+
+    report = Orchestrator(max_workers=8, limits={'create_instance': 2}).run([plan, ...])
+    report.log()          # 每个步骤的状态、开始时间和耗时
+
+步骤函数接收本Plan中已完成步骤的结果字典，返回值作为该步骤的结果；抛出异常即为失败，
+依赖它的步骤不再执行。
+
+传入journal（journal.StepJournal）时每个完成的步骤写入日志，中途失败后重新运行同样的Plan
+会直接使用已记录的结果，从未完成的步骤继续。步骤中发出创建请求时用client_token()作为幂等令牌。
+'''
+
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+STATUS_TEXT = {SUCCEEDED: '成功', FAILED: '失败', SKIPPED: '跳过'}
+
+_current = threading.local()
+
+
+class StepError(Exception):
+    """步骤失败，消息说明失败原因"""
+
+
+def require(value: Any, message: str) -> Any:
+    """value为空（None、False、空字符串等）时以message失败，否则原样返回，用于适配返回None表示失败的方法"""
+    if not value:
+        raise StepError(message)
+    return value
+
+
+def client_token(name: str = '') -> Optional[str]:
+    """当前步骤的幂等令牌，不在步骤中调用时返回None
+
+    令牌由Plan的运行ID和步骤名生成，从日志恢复执行时保持不变；一个步骤发出多个创建请求时用name区分。
+    """
+    token = getattr(_current, 'token', None)
+    if token is None or not name:
+        return token
+    return uuid.uuid5(uuid.NAMESPACE_OID, f"{token}/{name}").hex
+
+
+def _call_step(func: Callable[[Dict[str, Any]], Any], inputs: Dict[str, Any], token: str) -> Any:
+    _current.token = token
+    try:
+        return func(inputs)
+    finally:
+        _current.token = None
+
+
+class Step:
+    """Plan中的一个步骤"""
+    __slots__ = ('name', 'func', 'requires', 'limit')
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], requires: Sequence[str] = (),
+                 limit: Optional[str] = None):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.limit = limit
+
+
+class Plan:
+    """一个实例配置的创建步骤及其依赖关系
+
+    Args:
+        name: 名称，同一次运行中的Plan名称不能重复
+        key: 在步骤日志中的键，默认与名称相同；配置变化时应使用不同的键，避免恢复出旧配置的结果
+    """
+
+    def __init__(self, name: str, key: Optional[str] = None):
+        self.name = name
+        self.key = key or name
+        self.steps: Dict[str, Step] = {}
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], requires: Iterable[str] = (),
+            limit: Optional[str] = None) -> 'Plan':
+        """添加步骤
+
+        Args:
+            func: 步骤函数，接收已完成步骤的结果字典
+            requires: 依赖的步骤名，全部成功后才开始
+            limit: 并发限制组，同一组的步骤（跨所有Plan）同时执行的数量受Orchestrator的limits限制
+        """
+        if name in self.steps:
+            raise ValueError(f"{self.name} 中的步骤 {name} 重复")
+        self.steps[name] = Step(name, func, tuple(requires), limit)
+        return self
+
+    def validate(self):
+        """检查依赖的步骤都存在且没有循环依赖"""
+        for step in self.steps.values():
+            for dependency in step.requires:
+                if dependency not in self.steps:
+                    raise ValueError(f"{self.name} 中的步骤 {step.name} 依赖不存在的步骤 {dependency}")
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"{self.name} 中存在循环依赖: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dependency in self.steps[name].requires:
+                visit(dependency, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.steps:
+            visit(name, [])
+
+
+class StepResult:
+    """一个步骤的执行结果和耗时，resumed表示结果来自步骤日志，本次没有执行"""
+    __slots__ = ('plan', 'step', 'status', 'value', 'error', 'started', 'finished', 'resumed')
+
+    def __init__(self, plan: str, step: str, status: str, value: Any = None, error: Optional[BaseException] = None,
+                 started: Optional[float] = None, finished: Optional[float] = None, resumed: bool = False):
+        self.plan = plan
+        self.step = step
+        self.status = status
+        self.value = value
+        self.error = error
+        self.started = started
+        self.finished = finished
+        self.resumed = resumed
+
+    @property
+    def duration(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+class Report:
+    """一次运行的结果，时间为相对运行开始的秒数"""
+
+    def __init__(self, plans: Sequence[Plan], results: Dict[Tuple[str, str], StepResult], elapsed: float):
+        self.plans = list(plans)
+        self.results = results
+        self.elapsed = elapsed
+
+    def step(self, plan: str, step: str) -> StepResult:
+        return self.results[(plan, step)]
+
+    def values(self, plan: str) -> Dict[str, Any]:
+        """Plan中成功步骤的结果"""
+        return {result.step: result.value for (name, _), result in self.results.items()
+                if name == plan and result.status == SUCCEEDED}
+
+    def succeeded(self, plan: Optional[str] = None) -> bool:
+        """指定Plan（不指定时为全部Plan）的所有步骤是否都成功"""
+        return all(result.status == SUCCEEDED for (name, _), result in self.results.items()
+                   if plan is None or name == plan)
+
+    def failures(self) -> List[StepResult]:
+        return [result for result in self.results.values() if result.status == FAILED]
+
+    def summary(self) -> str:
+        """按Plan列出每个步骤的状态、开始时间和耗时，以及并发带来的节省"""
+        lines = [f"{'实例':<24}{'步骤':<20}{'状态':<6}{'开始(秒)':>10}{'耗时(秒)':>10}"]
+        busy = 0.0
+        for plan in self.plans:
+            results = sorted((self.results[(plan.name, name)] for name in plan.steps),
+                             key=lambda result: (result.started is None, result.started or 0))
+            for result in results:
+                started = '-' if result.started is None else f"{result.started:.1f}"
+                status = '恢复' if result.resumed else STATUS_TEXT[result.status]
+                line = (f"{plan.name:<24}{result.step:<20}{status:<6}"
+                        f"{started:>10}{result.duration:>10.1f}")
+                if result.error is not None:
+                    line += f"  {result.error}"
+                lines.append(line)
+                busy += result.duration
+            finished = [result.finished for result in results if result.finished is not None]
+            if finished:
+                lines.append(f"{plan.name:<24}{'(合计)':<20}{'':<6}{'':>10}{max(finished):>10.1f}")
+        lines.append(f"总耗时 {self.elapsed:.1f} 秒，各步骤耗时合计 {busy:.1f} 秒")
+        return '\n'.join(lines)
+
+    def log(self):
+        logger.info('\n' + self.summary())
+        for result in self.failures():
+            logger.error(f"{result.plan} 的步骤 {result.step} 失败: {result.error}")
+
+
+class Orchestrator:
+    """并发执行多个Plan
+
+    Args:
+        max_workers: 同时执行的步骤数上限
+        limits: 并发限制组 -> 该组同时执行的步骤数上限（至少为1），例如 {'create_instance': 2}
+        journal: 步骤日志（journal.StepJournal），为None时不记录也不恢复
+        clock: 时钟函数
+    """
+
+    def __init__(self, max_workers: int = 8, limits: Optional[Mapping[str, int]] = None, journal=None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_workers = max_workers
+        self.limits = dict(limits or {})
+        # 上限小于1的组里的步骤永远不会开始，也不会有结果
+        invalid = {name: value for name, value in self.limits.items() if value < 1}
+        if invalid:
+            raise ValueError(f"并发限制必须至少为1: {invalid}")
+        self.journal = journal
+        self.clock = clock
+
+    def run(self, plans: Sequence[Plan]) -> Report:
+        names = [plan.name for plan in plans]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Plan名称重复: {names}")
+        for plan in plans:
+            plan.validate()
+
+        start = self.clock()
+        results: Dict[Tuple[str, str], StepResult] = {}
+        runs = {}
+        for plan in plans:
+            runs[plan.name] = self._resume(plan, results)
+        pending = [(plan, step) for plan in plans for step in plan.steps.values()
+                   if (plan.name, step.name) not in results]
+        running = {}
+        active = {}
+
+        def status_of(plan, name):
+            result = results.get((plan.name, name))
+            return result.status if result else None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='volc-provision') as executor:
+            while pending or running:
+                # 跳过的步骤可能让后面的步骤也需要跳过，重复扫描直到没有新的跳过
+                skipped = True
+                while skipped:
+                    skipped = False
+                    waiting = []
+                    for plan, step in pending:
+                        statuses = [status_of(plan, name) for name in step.requires]
+                        if any(status in (FAILED, SKIPPED) for status in statuses):
+                            blocked = [name for name, status in zip(step.requires, statuses) if status in (FAILED, SKIPPED)]
+                            results[(plan.name, step.name)] = StepResult(
+                                plan.name, step.name, SKIPPED,
+                                error=StepError(f"依赖的步骤未成功: {', '.join(blocked)}"))
+                            logger.info(f"[{plan.name}] 跳过 {step.name}：依赖的步骤未成功")
+                            skipped = True
+                        elif all(status == SUCCEEDED for status in statuses) and self._acquire(step.limit, active):
+                            inputs = self._values(results, plan)
+                            started = self.clock() - start
+                            logger.info(f"[{plan.name}] 开始 {step.name}")
+                            token = uuid.uuid5(uuid.NAMESPACE_OID, f"{runs[plan.name]}/{step.name}").hex
+                            running[executor.submit(_call_step, step.func, inputs, token)] = (plan, step, started)
+                        else:
+                            waiting.append((plan, step))
+                    pending = waiting
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    plan, step, started = running.pop(future)
+                    if step.limit is not None:
+                        active[step.limit] -= 1
+                    finished = self.clock() - start
+                    error = future.exception()
+                    if error is None:
+                        results[(plan.name, step.name)] = StepResult(
+                            plan.name, step.name, SUCCEEDED, future.result(), None, started, finished)
+                        logger.info(f"[{plan.name}] 完成 {step.name}，耗时 {finished - started:.1f} 秒")
+                        if self.journal is not None:
+                            self.journal.record(plan.key, step.name, future.result())
+                    else:
+                        results[(plan.name, step.name)] = StepResult(
+                            plan.name, step.name, FAILED, None, error, started, finished)
+                        logger.error(f"[{plan.name}] {step.name} 失败，耗时 {finished - started:.1f} 秒: {error}")
+
+        report = Report(plans, results, self.clock() - start)
+        if self.journal is not None:
+            for plan in plans:
+                if report.succeeded(plan.name):
+                    self.journal.finish(plan.key)
+        return report
+
+    def _resume(self, plan: Plan, results: Dict[Tuple[str, str], StepResult]) -> str:
+        """从步骤日志恢复已完成的步骤，返回Plan的运行ID"""
+        if self.journal is None:
+            return uuid.uuid4().hex
+        run, completed = self.journal.begin(plan.key)
+        resumed = [name for name in plan.steps if name in completed]
+        for name in resumed:
+            results[(plan.name, name)] = StepResult(plan.name, name, SUCCEEDED, completed[name], resumed=True)
+        if resumed:
+            logger.info(f"[{plan.name}] 从步骤日志恢复已完成的步骤: {', '.join(resumed)}")
+        return run
+
+    def _acquire(self, limit: Optional[str], active: Dict[str, int]) -> bool:
+        if limit is None:
+            return True
+        if active.get(limit, 0) >= self.limits.get(limit, self.max_workers):
+            return False
+        active[limit] = active.get(limit, 0) + 1
+        return True
+
+    @staticmethod
+    def _values(results: Dict[Tuple[str, str], StepResult], plan: Plan) -> Dict[str, Any]:
+        return {name: results[(plan.name, name)].value for name in plan.steps
+                if (plan.name, name) in results and results[(plan.name, name)].status == SUCCEEDED}
@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+'''
+可恢复执行的步骤日志
+
+创建流程中途失败（进程退出、网络中断、某个步骤出错）后重新运行时，已完成的步骤不应再执行：
+重复的“是否已存在”名称查询浪费时间，申请EIP等操作重复执行还会多创建资源。
+StepJournal把每个Plan已完成步骤的结果追加写入JSONL文件，Orchestrator开始执行前读取，
+已完成的步骤直接使用记录的结果（vpc_id、subnet_id、instance_id、eip、端点等），
+从第一个未完成的步骤继续：
+
+    journal = StepJournal('~/.volcengine/provision_journal.jsonl')
+    Orchestrator(max_workers=8, journal=journal).run(plans)
+
+每个Plan第一次执行时分配一个运行ID并写入日志，恢复执行时沿用，创建请求的幂等令牌由运行ID
+和步骤名生成（见dag.client_token），因此发出了创建请求但没来得及记录结果的步骤重新执行时，
+服务端会返回同一个资源而不是再创建一个。Plan的所有步骤成功后删除它的记录，下次运行重新开始。
+
+文件格式（每行一条记录）：
+    {"event": "start", "plan": key, "run": 运行ID, "time": ...}
+    {"event": "step", "plan": key, "step": 步骤名, "value": 结果, "time": ...}
+    {"event": "finish", "plan": key, "time": ...}
+
+同一个日志文件不支持多个进程同时写入。
+'''
+
+
+class StepJournal:
+    """追加写入的步骤日志
+
+    Args:
+        path: JSONL文件路径
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._plans: Dict[str, Dict[str, Any]] = {}
+        self._stale = 0
+        self._load()
+        if self._stale:
+            self._compact()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        count = 0
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            count += 1
+            try:
+                record = json.loads(line)
+                event, key = record['event'], record['plan']
+            except (ValueError, KeyError, TypeError):
+                # 进程在写入过程中退出时最后一行可能不完整
+                logger.warning(f"步骤日志 {self.path} 第 {number} 行无法解析，忽略")
+                continue
+            if event == 'start':
+                self._plans[key] = {'run': record['run'], 'steps': {}}
+            elif event == 'step' and key in self._plans:
+                self._plans[key]['steps'][record['step']] = record.get('value')
+            elif event == 'finish':
+                self._plans.pop(key, None)
+        # 已完成Plan的记录、被覆盖的记录和无法解析的行
+        self._stale = count - sum(1 + len(plan['steps']) for plan in self._plans.values())
+
+    def _compact(self):
+        """只保留未完成Plan的记录，原子替换日志文件"""
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            fd, temp = tempfile.mkstemp(dir=directory, prefix='.journal-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for key, plan in self._plans.items():
+                    f.write(self._line({'event': 'start', 'plan': key, 'run': plan['run']}))
+                    for step, value in plan['steps'].items():
+                        f.write(self._line({'event': 'step', 'plan': key, 'step': step, 'value': value}))
+            os.replace(temp, self.path)
+            self._stale = 0
+        except OSError as e:
+            logger.warning(f"整理步骤日志 {self.path} 失败: {e}")
+
+    @staticmethod
+    def _line(record: Dict[str, Any]) -> str:
+        record.setdefault('time', time.strftime('%Y-%m-%d %H:%M:%S'))
+        return json.dumps(record, ensure_ascii=False) + '\n'
+
+    def _append(self, record: Dict[str, Any]) -> bool:
+        """追加一条记录；写入失败（磁盘已满、没有权限等）时只记录警告，不影响正在执行的Plan"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(self._line(record))
+                f.flush()
+                os.fsync(f.fileno())
+            return True
+        except OSError as e:
+            logger.warning(f"写入步骤日志 {self.path} 失败，中断后将无法从该处恢复: {e}")
+            return False
+
+    def begin(self, key: str) -> Tuple[str, Dict[str, Any]]:
+        """开始或恢复执行一个Plan
+
+        Returns:
+            (运行ID, {已完成的步骤名: 结果})
+        """
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                plan = {'run': uuid.uuid4().hex, 'steps': {}}
+                self._plans[key] = plan
+                self._append({'event': 'start', 'plan': key, 'run': plan['run']})
+            return plan['run'], dict(plan['steps'])
+
+    def record(self, key: str, step: str, value: Any) -> bool:
+        """记录一个已完成的步骤，结果无法序列化为JSON或写入失败时返回False（恢复时该步骤重新执行）"""
+        try:
+            line = {'event': 'step', 'plan': key, 'step': step, 'value': json.loads(json.dumps(value))}
+        except (TypeError, ValueError):
+            logger.warning(f"步骤 {key}/{step} 的结果无法写入日志，恢复时将重新执行")
+            return False
+        with self._lock:
+            if key not in self._plans:
+                return False
+            self._plans[key]['steps'][step] = line['value']
+            return self._append(line)
+
+    def finish(self, key: str):
+        """Plan的所有步骤已成功，删除它的记录"""
+        with self._lock:
+            if self._plans.pop(key, None) is not None:
+                self._append({'event': 'finish', 'plan': key})
+
+    def completed(self, key: str) -> Optional[Dict[str, Any]]:
+        """Plan已完成的步骤和结果，没有记录时返回None"""
+        with self._lock:
+            plan = self._plans.get(key)
+            return dict(plan['steps']) if plan else None
@@ -0,0 +1,63 @@
+import importlib
+import logging
+import sys
+import threading
+import types
+from typing import Any, List
+
+logger = logging.getLogger(__name__)
+
+'''
+延迟导入SDK模块
+
+每个volcenginesdk*包导入时都会加载全部接口和模型，单个包需要上百毫秒。
+模块级使用lazy_import代替import，第一次访问属性时才真正导入：
+
+    volcenginesdkredis = lazy_import('volcenginesdkredis')
+
+    api = volcenginesdkredis.REDISApi(api_client)   # 此时才导入volcenginesdkredis
+
+只列出实例、只清理某一种资源的命令因此不再为用不到的SDK付出启动时间。
+'''
+
+
+class LazyModule(types.ModuleType):
+    """第一次访问属性时才导入的模块代理，导入后的属性访问直接转发给真实模块"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+                    logger.debug(f"已加载模块 {self.__name__}")
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__['_lazy_module'] is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """返回延迟导入的模块；模块已经导入时直接返回真实模块"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
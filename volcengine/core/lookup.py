@@ -0,0 +1,274 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from volcenginesdkcore.rest import ApiException
+
+from cache import default_cache
+from lazy import lazy_import
+from paginator import FieldGetter, NextTokenPaging, PageNumberPaging, Paginator, get_field
+from rawjson import call_raw
+
+logger = logging.getLogger(__name__)
+
+'''
+按ID查询资源状态
+
+不带过滤条件的DescribeDBInstances、ListClusters会返回账号下的全部实例，
+逐个比对ID的开销随账号规模增长，而且每次轮询都要付出一次。ResourceLookup按服务
+选择最便宜的查询方式：
+
+- 支持ID过滤的接口（InstanceId、InstanceIds、FilterForListClustersInput(ids=...)等）直接按ID查询
+- 不支持过滤但有详情接口的服务（例如ESCloud的DescribeInstance）按ID查详情
+- 两者都没有，或一次要查的ID太多时，才列出全部实例，短时间内的并发查询共享同一份列表
+
+    lookup = resource_lookup(redis_api)               # 按接口对象推断服务
+    lookup.status('redis-xxxx')                       # 'Running'，不存在时为None
+    lookup.statuses(['redis-a', 'redis-b'])           # {实例ID: 状态}，供批量等待器使用
+    resource_lookup(vpc_api, 'subnet').find('subnet-xxxx')
+
+查询总是跳过响应缓存，得到的是最新状态。
+'''
+
+# 单ID过滤或详情接口最多逐个查询多少个ID，超过时一次列出全部实例更省请求
+DEFAULT_MAX_SINGLE_LOOKUPS = 5
+
+
+def _is_not_found(e: ApiException) -> bool:
+    return e.status == 404 or 'NotFound' in str(e.body or '')
+
+
+class ResourceLookup:
+    """按ID查询资源
+
+    Args:
+        list_page: 接收请求参数字典、返回一页列表响应的函数
+        items: 列表响应中资源列表的字段
+        paging: 列表接口的分页方式
+        id_field: 资源ID字段
+        status_field: 状态字段，可以是点分隔的路径
+        id_filter: 接收ID列表、返回按ID过滤的请求参数的函数；接口不支持过滤时为None
+        max_filter_ids: 过滤条件一次最多能带的ID数，单ID过滤（例如InstanceId）为1
+        get_detail: 按ID查询详情、返回资源（不存在时返回None）的函数
+        max_single_lookups: 只能逐个查询时，最多逐个查询的ID数
+        list_ttl: 全量列表在多长时间内（秒）被并发查询共享
+        name: 服务名，用于日志和统计
+    """
+
+    def __init__(self, list_page: Callable[[Dict[str, Any]], Any], items: FieldGetter, paging,
+                 id_field: FieldGetter = 'instance_id', status_field: FieldGetter = 'status',
+                 id_filter: Optional[Callable[[List[str]], Dict[str, Any]]] = None, max_filter_ids: int = 1,
+                 get_detail: Optional[Callable[[str], Any]] = None,
+                 max_single_lookups: int = DEFAULT_MAX_SINGLE_LOOKUPS, list_ttl: float = 2.0, name: str = ''):
+        self.list_page = list_page
+        self.items = items
+        self.paging = paging
+        self.id_field = id_field
+        self.status_field = status_field
+        self.id_filter = id_filter
+        self.max_filter_ids = max_filter_ids
+        self.get_detail = get_detail
+        self.max_single_lookups = max_single_lookups
+        self.list_ttl = list_ttl
+        self.name = name
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_at = float('-inf')
+        self._snapshot_lock = threading.Lock()
+        self._stats = Counter()
+
+    def find_all(self, resource_ids: Iterable[str]) -> Dict[str, Any]:
+        """查询多个资源，返回{ID: 资源}，不存在的资源不出现在结果中"""
+        wanted = list(dict.fromkeys(resource_ids))
+        if not wanted:
+            return {}
+        with default_cache.bypass():
+            if self.id_filter is not None and (self.max_filter_ids > 1 or len(wanted) <= self.max_single_lookups):
+                return self._filtered(wanted)
+            if self.get_detail is not None and len(wanted) <= self.max_single_lookups:
+                return self._details(wanted)
+            snapshot = self._full_list()
+        return {resource_id: snapshot[resource_id] for resource_id in wanted if resource_id in snapshot}
+
+    def find(self, resource_id: str) -> Any:
+        """查询一个资源，不存在时返回None"""
+        return self.find_all([resource_id]).get(resource_id)
+
+    def statuses(self, resource_ids: Iterable[str]) -> Dict[str, Any]:
+        """查询多个资源的状态，返回{ID: 状态}"""
+        return {resource_id: get_field(item, self.status_field)
+                for resource_id, item in self.find_all(resource_ids).items()}
+
+    def status(self, resource_id: str) -> Any:
+        """查询一个资源的状态，不存在时返回None"""
+        return self.statuses([resource_id]).get(resource_id)
+
+    def stats(self) -> Dict[str, int]:
+        """按查询方式统计的请求次数"""
+        return dict(self._stats)
+
+    def _collect(self, params: Dict[str, Any], wanted: set, found: Dict[str, Any]):
+        for item in Paginator(lambda page: self.list_page({**params, **page}), self.paging, self.items,
+                              prefetch=False):
+            resource_id = get_field(item, self.id_field)
+            # 部分接口的ID过滤是模糊匹配，这里仍按ID精确比对
+            if resource_id in wanted:
+                found[resource_id] = item
+                if wanted.issubset(found):
+                    break
+
+    def _filtered(self, wanted: List[str]) -> Dict[str, Any]:
+        found = {}
+        for offset in range(0, len(wanted), self.max_filter_ids):
+            batch = wanted[offset:offset + self.max_filter_ids]
+            self._stats['filtered'] += 1
+            self._collect(self.id_filter(batch), set(batch), found)
+        return found
+
+    def _details(self, wanted: List[str]) -> Dict[str, Any]:
+        found = {}
+        for resource_id in wanted:
+            self._stats['detail'] += 1
+            item = self.get_detail(resource_id)
+            if item is not None:
+                found[resource_id] = item
+        return found
+
+    def _full_list(self) -> Dict[str, Any]:
+        """列出全部资源，list_ttl内的并发查询共享同一次结果"""
+        with self._snapshot_lock:
+            if self._snapshot is not None and time.monotonic() - self._snapshot_at < self.list_ttl:
+                self._stats['full_list_shared'] += 1
+                return self._snapshot
+            self._stats['full_list'] += 1
+            snapshot = {}
+            for item in Paginator(self.list_page, self.paging, self.items, prefetch=False):
+                snapshot[get_field(item, self.id_field)] = item
+            logger.debug(f"列出全部{self.name}资源 {len(snapshot)} 个")
+            self._snapshot, self._snapshot_at = snapshot, time.monotonic()
+            return snapshot
+
+
+# 资源类型 -> 查询方式
+#   module/list/request: SDK模块、列表接口方法和请求模型
+#   filter: ID过滤参数名，或接收(SDK模块, ID列表)返回过滤参数的函数；max_ids为一次最多带的ID数
+#   detail: (详情接口方法, 请求模型, 响应中资源的字段)
+LOOKUP_SPECS: Dict[str, Dict[str, Any]] = {
+    'redis': {
+        'module': 'volcenginesdkredis', 'list': 'describe_db_instances', 'request': 'DescribeDBInstancesRequest',
+        'items': 'instances', 'paging': lambda: PageNumberPaging(100, total='total_instances_num'),
+        'status': 'status', 'filter': 'instance_id', 'max_ids': 1,
+    },
+    'pg': {
+        'module': 'volcenginesdkrdspostgresql', 'list': 'describe_db_instances',
+        'request': 'DescribeDBInstancesRequest', 'items': 'instances',
+        'paging': lambda: PageNumberPaging(100, total='total'),
+        'status': 'instance_status', 'filter': 'instance_id', 'max_ids': 1,
+    },
+    'mongodb': {
+        'module': 'volcenginesdkmongodb', 'list': 'describe_db_instances', 'request': 'DescribeDBInstancesRequest',
+        'items': 'db_instances', 'paging': lambda: PageNumberPaging(100, total='total'),
+        'status': 'instance_status', 'filter': 'instance_id', 'max_ids': 1,
+    },
+    'kafka': {
+        'module': 'volcenginesdkkafka', 'list': 'describe_instances', 'request': 'DescribeInstancesRequest',
+        'items': 'instances_info', 'paging': lambda: PageNumberPaging(100, total='total'),
+        'status': 'instance_status', 'filter': 'instance_id', 'max_ids': 1,
+    },
+    'escloud': {
+        'module': 'volcenginesdkescloud', 'list': 'describe_instances', 'request': 'DescribeInstancesRequest',
+        'items': 'instances', 'paging': lambda: PageNumberPaging(100, total='total_count'),
+        'status': 'status', 'detail': ('describe_instance', 'DescribeInstanceRequest', 'instance_info'),
+    },
+    'vke': {
+        'module': 'volcenginesdkvke', 'list': 'list_clusters', 'request': 'ListClustersRequest',
+        'items': 'items', 'paging': lambda: PageNumberPaging(100, total='total_count'),
+        'id': 'id', 'status': 'status.phase',
+        'filter': lambda module, ids: {'filter': module.FilterForListClustersInput(ids=ids)}, 'max_ids': 100,
+    },
+    'vke_node_pool': {
+        'module': 'volcenginesdkvke', 'list': 'list_node_pools', 'request': 'ListNodePoolsRequest',
+        'items': 'items', 'paging': lambda: PageNumberPaging(100, total='total_count'),
+        'id': 'id', 'status': 'status.phase',
+        'filter': lambda module, ids: {'filter': module.FilterForListNodePoolsInput(ids=ids)}, 'max_ids': 100,
+    },
+    'ecs': {
+        'module': 'volcenginesdkecs', 'list': 'describe_instances', 'request': 'DescribeInstancesRequest',
+        'items': 'instances', 'paging': lambda: NextTokenPaging(100),
+        'status': 'status', 'filter': 'instance_ids', 'max_ids': 100,
+    },
+    'vpc': {
+        'module': 'volcenginesdkvpc', 'list': 'describe_vpcs', 'request': 'DescribeVpcsRequest',
+        'items': 'vpcs', 'paging': lambda: PageNumberPaging(100, total='total_count'),
+        'id': 'vpc_id', 'status': 'status', 'filter': 'vpc_ids', 'max_ids': 100,
+    },
+    'subnet': {
+        'module': 'volcenginesdkvpc', 'list': 'describe_subnets', 'request': 'DescribeSubnetsRequest',
+        'items': 'subnets', 'paging': lambda: PageNumberPaging(100, total='total_count'),
+        'id': 'subnet_id', 'status': 'status', 'filter': 'subnet_ids', 'max_ids': 100,
+    },
+    'eip': {
+        'module': 'volcenginesdkvpc', 'list': 'describe_eip_addresses', 'request': 'DescribeEipAddressesRequest',
+        'items': 'eip_addresses', 'paging': lambda: PageNumberPaging(100, total='total_count'),
+        'id': 'allocation_id', 'status': 'status', 'filter': 'allocation_ids', 'max_ids': 100,
+    },
+}
+
+# SDK接口类 -> 默认资源类型
+API_RESOURCES = {
+    'REDISApi': 'redis',
+    'RDSPOSTGRESQLApi': 'pg',
+    'MONGODBApi': 'mongodb',
+    'KAFKAApi': 'kafka',
+    'ESCLOUDApi': 'escloud',
+    'VKEApi': 'vke',
+    'ECSApi': 'ecs',
+    'VPCApi': 'vpc',
+}
+
+
+def resource_lookup(client_api, resource: Optional[str] = None, **options) -> ResourceLookup:
+    """为SDK接口对象创建ResourceLookup
+
+    Args:
+        client_api: SDK接口对象，例如 REDISApi(api_client)
+        resource: 资源类型，见LOOKUP_SPECS；不提供时按接口类推断
+        options: 传给ResourceLookup的其他参数，例如 list_ttl、max_single_lookups
+    """
+    resource = resource or API_RESOURCES.get(type(client_api).__name__)
+    if resource not in LOOKUP_SPECS:
+        raise ValueError(f"不支持按ID查询的资源类型: {resource} ({type(client_api).__name__})")
+    spec = LOOKUP_SPECS[resource]
+    module = lazy_import(spec['module'])
+    list_method = getattr(client_api, spec['list'])
+
+    def list_page(params):
+        return call_raw(list_method, getattr(module, spec['request'])(**params))
+
+    id_filter = None
+    id_param = spec.get('filter')
+    if callable(id_param):
+        id_filter = lambda ids: id_param(module, ids)
+    elif id_param is not None:
+        max_ids = spec.get('max_ids', 1)
+        id_filter = (lambda ids: {id_param: ids[0]}) if max_ids == 1 else (lambda ids: {id_param: ids})
+
+    get_detail = None
+    if spec.get('detail'):
+        detail_method, detail_request, detail_field = spec['detail']
+
+        def get_detail(resource_id):
+            try:
+                response = call_raw(getattr(client_api, detail_method),
+                                    getattr(module, detail_request)(instance_id=resource_id))
+            except ApiException as e:
+                if _is_not_found(e):
+                    return None
+                raise
+            return get_field(response, detail_field)
+
+    options.setdefault('max_filter_ids', spec.get('max_ids', 1))
+    return ResourceLookup(list_page, spec['items'], spec['paging'](), id_field=spec.get('id', 'instance_id'),
+                          status_field=spec['status'], id_filter=id_filter, get_detail=get_detail,
+                          name=resource, **options)
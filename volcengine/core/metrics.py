@@ -0,0 +1,409 @@
+import atexit
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from middleware import APICall, use as use_middleware
+from retry import classify
+
+logger = logging.getLogger(__name__)
+
+'''
+接口级延迟/吞吐指标
+
+按(服务, 接口)记录：
+- 调用延迟直方图（包含重试和退避等待，即调用方实际感受到的耗时）
+- 正在进行中的调用数
+- 尝试次数与重试次数
+- 发送/接收字节数
+- 按错误码统计的失败次数
+
+中间件记录调用级指标，尝试次数和字节数在传输层统计（每次实际发送计一次），
+因此与重试、限流等中间件的注册顺序无关。
+
+    metrics = enable_sdk_metrics()                 # SDK ApiClient
+    APIClient(config, middlewares=[default_metrics.middleware, ...])
+    metrics.snapshot()                             # 进程内读取
+    metrics.write_openmetrics('/tmp/volc.prom')    # 导出为OpenMetrics文本
+    metrics.serve(9464)                            # 或提供 /metrics HTTP端点
+
+设置环境变量 VOLC_METRICS_FILE 时进程退出前写出指标文件，
+设置 VOLC_METRICS_PORT 时启动HTTP端点。
+'''
+
+# 延迟直方图的桶上界（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PREFIX = 'volc_api'
+
+
+class _ActionMetrics:
+    """单个(服务, 接口)的指标"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.requests = 0
+        self.in_flight = 0
+        self.attempts = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.errors: Dict[str, int] = {}
+
+
+class _CallContext:
+    """当前调用的传输层统计，由中间件创建、传输层钩子累加"""
+    __slots__ = ('attempts', 'bytes_out', 'bytes_in')
+
+    def __init__(self):
+        self.attempts = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar('volc_metrics_call', default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: str) -> str:
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + '}'
+
+
+def _format_le(bound: float) -> str:
+    return repr(float(bound))
+
+
+class Metrics:
+    """进程内指标收集器
+
+    Args:
+        buckets: 延迟直方图的桶上界（秒），升序
+        clock: 计时函数，便于测试时替换
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, clock: Callable[[], float] = time.perf_counter):
+        self.buckets = tuple(sorted(buckets))
+        self._clock = clock
+        self._actions: Dict[Tuple[str, str], _ActionMetrics] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _get(self, service: str, action: str) -> _ActionMetrics:
+        key = (service.lower(), action)
+        entry = self._actions.get(key)
+        if entry is None:
+            entry = self._actions[key] = _ActionMetrics(self.buckets)
+        return entry
+
+    def _start(self, call: APICall) -> Tuple[_CallContext, contextvars.Token, float]:
+        with self._lock:
+            self._get(call.service, call.action).in_flight += 1
+        context = _CallContext()
+        return context, _current.set(context), self._clock()
+
+    def _finish(self, call: APICall, context: _CallContext, token: contextvars.Token, started: float,
+                error: Optional[BaseException]):
+        elapsed = self._clock() - started
+        _current.reset(token)
+        code = None
+        if error is not None:
+            info = classify(error)
+            code = info.code or (str(info.status) if info.status else type(error).__name__)
+        with self._lock:
+            entry = self._get(call.service, call.action)
+            entry.in_flight -= 1
+            entry.requests += 1
+            entry.bucket_counts[bisect.bisect_left(self.buckets, elapsed)] += 1
+            entry.latency_sum += elapsed
+            entry.latency_max = max(entry.latency_max, elapsed)
+            entry.attempts += context.attempts
+            entry.bytes_out += context.bytes_out
+            entry.bytes_in += context.bytes_in
+            if code is not None:
+                entry.errors[code] = entry.errors.get(code, 0) + 1
+
+    def middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """同步中间件，用于APIClient和SDK ApiClient"""
+        _ensure_transport_hooks()
+        context, token, started = self._start(call)
+        error = None
+        try:
+            return proceed()
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(call, context, token, started, error)
+
+    async def async_middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """异步中间件，用于AsyncAPIClient"""
+        _ensure_transport_hooks()
+        context, token, started = self._start(call)
+        error = None
+        try:
+            return await proceed()
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(call, context, token, started, error)
+
+    def reset(self):
+        """清空已收集的指标，进行中的调用数保留"""
+        with self._lock:
+            for key, entry in list(self._actions.items()):
+                in_flight = entry.in_flight
+                self._actions[key] = _ActionMetrics(self.buckets)
+                self._actions[key].in_flight = in_flight
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回当前指标的副本，键为 "服务.接口" """
+        with self._lock:
+            items = sorted(self._actions.items())
+            result = {}
+            for (service, action), entry in items:
+                cumulative, buckets = 0, {}
+                for bound, count in zip(self.buckets + (float('inf'),), entry.bucket_counts):
+                    cumulative += count
+                    buckets[bound] = cumulative
+                result[f"{service}.{action}"] = {
+                    'requests': entry.requests,
+                    'in_flight': entry.in_flight,
+                    'attempts': entry.attempts,
+                    'retries': max(entry.attempts - entry.requests, 0),
+                    'bytes_out': entry.bytes_out,
+                    'bytes_in': entry.bytes_in,
+                    'errors': dict(entry.errors),
+                    'latency': {
+                        'count': entry.requests,
+                        'sum': entry.latency_sum,
+                        'avg': entry.latency_sum / entry.requests if entry.requests else 0.0,
+                        'max': entry.latency_max,
+                        'buckets': buckets,
+                    },
+                }
+            return result
+
+    def render_openmetrics(self) -> str:
+        """按OpenMetrics文本格式输出全部指标"""
+        snapshot = self.snapshot()
+        lines: List[str] = []
+
+        def family(name: str, metric_type: str, help_text: str, samples: List[str]):
+            lines.append(f"# TYPE {PREFIX}_{name} {metric_type}")
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.extend(samples)
+
+        per_action = [(key.split('.', 1), value) for key, value in snapshot.items()]
+
+        samples = []
+        for (service, action), value in per_action:
+            latency = value['latency']
+            for bound, count in latency['buckets'].items():
+                le = '+Inf' if bound == float('inf') else _format_le(bound)
+                samples.append(f"{PREFIX}_request_duration_seconds_bucket"
+                               f"{_labels(service=service, action=action, le=le)} {count}")
+            samples.append(f"{PREFIX}_request_duration_seconds_count{_labels(service=service, action=action)} "
+                           f"{latency['count']}")
+            samples.append(f"{PREFIX}_request_duration_seconds_sum{_labels(service=service, action=action)} "
+                           f"{latency['sum']:.6f}")
+        family('request_duration_seconds', 'histogram', '调用耗时（包含重试）', samples)
+
+        counters = (
+            ('requests', 'requests', 'counter', '完成的调用次数'),
+            ('attempts', 'attempts', 'counter', '实际发送的请求次数（包含重试）'),
+            ('retries', 'retries', 'counter', '重试次数'),
+            ('request_bytes', 'bytes_out', 'counter', '发送的请求体字节数'),
+            ('response_bytes', 'bytes_in', 'counter', '接收的响应体字节数'),
+        )
+        for name, field, metric_type, help_text in counters:
+            family(name, metric_type, help_text, [
+                f"{PREFIX}_{name}_total{_labels(service=service, action=action)} {value[field]}"
+                for (service, action), value in per_action
+            ])
+
+        family('in_flight', 'gauge', '正在进行中的调用数', [
+            f"{PREFIX}_in_flight{_labels(service=service, action=action)} {value['in_flight']}"
+            for (service, action), value in per_action
+        ])
+        family('errors', 'counter', '按错误码统计的失败调用次数', [
+            f"{PREFIX}_errors_total{_labels(service=service, action=action, code=code)} {count}"
+            for (service, action), value in per_action
+            for code, count in sorted(value['errors'].items())
+        ])
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write_openmetrics(self, path: str):
+        """把指标写入文件（先写临时文件再替换，读取方不会读到半个文件）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_openmetrics())
+        os.replace(temp_path, path)
+
+    def write_json(self, path: str):
+        """把snapshot()写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2,
+                      default=lambda value: '+Inf' if value == float('inf') else str(value))
+
+    def serve(self, port: int = 9464, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """在后台线程提供 /metrics HTTP端点，重复调用返回已启动的服务"""
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = metrics.render_openmetrics().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='volc-metrics', daemon=True).start()
+        logger.info(f"指标端点: http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def stop_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _record_transport(bytes_out: int, bytes_in: int):
+    context = _current.get()
+    if context is not None:
+        context.attempts += 1
+        context.bytes_out += bytes_out
+        context.bytes_in += bytes_in
+
+
+def _length(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    return len(json.dumps(value))
+
+
+_hooks_lock = threading.Lock()
+_hooks_installed = False
+
+
+def _ensure_transport_hooks():
+    """在SDK的ApiClient.request和原始客户端的prepare/parse_response上统计每次实际发送，只执行一次
+
+    这两层都位于cassette拦截的传输层之上，回放时同样会被统计。
+    """
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        from volcenginesdkcore.api_client import ApiClient
+        from volcenginesdkcore.rest import ApiException
+        from sign import RequestPreparer
+
+        original_request = ApiClient.request
+        original_prepare = RequestPreparer.prepare
+        original_parse = RequestPreparer.parse_response
+
+        def request(self, method, url, query_params=None, headers=None, post_params=None, body=None,
+                    _preload_content=True, _request_timeout=None):
+            if _current.get() is None:
+                return original_request(self, method, url, query_params, headers, post_params, body,
+                                        _preload_content, _request_timeout)
+            sent = _length(body)
+            try:
+                response = original_request(self, method, url, query_params, headers, post_params, body,
+                                            _preload_content, _request_timeout)
+            except ApiException as e:
+                _record_transport(sent, _length(e.body))
+                raise
+            except BaseException:
+                _record_transport(sent, 0)
+                raise
+            _record_transport(sent, _length(getattr(response, 'data', None)))
+            return response
+
+        def prepare(self, *args, **kwargs):
+            prepared = original_prepare(self, *args, **kwargs)
+            context = _current.get()
+            if context is not None:
+                # 每次发送（包括重试）都会重新签名，以此计一次尝试
+                context.attempts += 1
+                context.bytes_out += _length(prepared.body)
+            return prepared
+
+        def parse_response(status_code, text, headers=None):
+            context = _current.get()
+            if context is not None:
+                context.bytes_in += _length(text)
+            return original_parse(status_code, text, headers)
+
+        ApiClient.request = request
+        RequestPreparer.prepare = prepare
+        RequestPreparer.parse_response = staticmethod(parse_response)
+        _hooks_installed = True
+
+
+# 进程内共享的默认实例
+default_metrics = Metrics()
+
+_export_lock = threading.Lock()
+_export_configured = False
+
+
+def _configure_export_from_env(metrics: Metrics):
+    global _export_configured
+    with _export_lock:
+        if _export_configured:
+            return
+        _export_configured = True
+    path = os.environ.get('VOLC_METRICS_FILE')
+    if path:
+        atexit.register(metrics.write_openmetrics, path)
+    port = os.environ.get('VOLC_METRICS_PORT')
+    if port:
+        try:
+            metrics.serve(int(port))
+        except (OSError, ValueError) as e:
+            logger.warning(f"指标端点启动失败: {e}")
+
+
+def enable_sdk_metrics(metrics: Optional[Metrics] = None) -> Metrics:
+    """让进程内所有SDK ApiClient的调用记录指标，可重复调用
+
+    放在全局中间件链的最前面，延迟包含重试与限流等待。首次调用时按
+    VOLC_METRICS_FILE/VOLC_METRICS_PORT环境变量配置导出。
+    """
+    metrics = metrics or default_metrics
+    _ensure_transport_hooks()
+    use_middleware(metrics.middleware, first=True)
+    _configure_export_from_env(metrics)
+    return metrics
@@ -0,0 +1,158 @@
+import threading
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+'''
+请求中间件
+
+原始签名客户端（sign.APIClient/AsyncAPIClient）和SDK的ApiClient共用同一种中间件接口：
+
+    def middleware(call: APICall, proceed: Callable[[], Any]) -> Any
+
+call描述本次请求，proceed()执行链上的下一个中间件并最终发出请求。重试、限流、
+缓存、指标等功能都以中间件的形式接入，调用方代码无需修改。
+
+SDK侧可以按ApiClient实例安装（install），也可以对进程内所有ApiClient生效（use）。
+'''
+
+
+class APICall(NamedTuple):
+    """一次API请求的描述信息"""
+    service: str
+    action: str
+    version: str
+    region: Optional[str] = None
+    params: Any = None
+    method: str = 'POST'
+    account: Optional[str] = None
+    # 原始JSON模式（_preload_content=False），返回解码后的字典而不是SDK模型
+    raw: bool = False
+
+
+Middleware = Callable[[APICall, Callable[[], Any]], Any]
+
+
+def run_chain(middlewares: Sequence[Middleware], call: APICall, terminal: Callable[[], Any]) -> Any:
+    """按顺序执行中间件链，最后调用terminal发出请求"""
+    def dispatch(index: int) -> Any:
+        if index == len(middlewares):
+            return terminal()
+        return middlewares[index](call, lambda: dispatch(index + 1))
+    return dispatch(0)
+
+
+async def run_async_chain(middlewares: Sequence[Callable], call: APICall, terminal: Callable) -> Any:
+    """异步版本的run_chain，中间件和terminal都是协程函数"""
+    async def dispatch(index: int) -> Any:
+        if index == len(middlewares):
+            return await terminal()
+        return await middlewares[index](call, lambda: dispatch(index + 1))
+    return await dispatch(0)
+
+
+def parse_resource_path(resource_path: str) -> tuple:
+    """解析SDK生成代码中的resource_path
+
+    例如 '/DescribeDBInstances/2022-01-01/rds_postgresql/post/application_json/'
+    返回 ('DescribeDBInstances', '2022-01-01', 'rds_postgresql', 'POST')
+    """
+    parts = [part for part in resource_path.split('/') if part]
+    action = parts[0] if len(parts) > 0 else ''
+    version = parts[1] if len(parts) > 1 else ''
+    service = parts[2] if len(parts) > 2 else ''
+    method = parts[3].upper() if len(parts) > 3 else 'POST'
+    return action, version, service, method
+
+
+# 对进程内所有SDK ApiClient生效的中间件
+_global_middlewares: List[Middleware] = []
+_patch_lock = threading.Lock()
+_original_call_api = None
+
+
+def _sdk_call(api_client, resource_path: str, body: Any, raw: bool = False) -> APICall:
+    action, version, service, method = parse_resource_path(resource_path)
+    configuration = getattr(api_client, 'configuration', None)
+    return APICall(
+        service=service,
+        action=action,
+        version=version,
+        region=getattr(configuration, 'region', None),
+        params=body,
+        method=method,
+        account=getattr(configuration, 'ak', None),
+        raw=raw
+    )
+
+
+def _patched_call_api(self, resource_path, method, *args, **kwargs):
+    middlewares = (getattr(self, '_volc_outer_middlewares', []) + _global_middlewares
+                   + getattr(self, '_volc_middlewares', []))
+    if not middlewares or kwargs.get('async_req'):
+        return _original_call_api(self, resource_path, method, *args, **kwargs)
+
+    call = _sdk_call(self, resource_path, kwargs.get('body'), kwargs.get('_preload_content') is False)
+
+    def send():
+        # SDK会就地修改query_params/header_params（追加Action、签名头等），每次尝试都使用副本
+        return _original_call_api(self, resource_path, method, *[_fresh(arg) for arg in args],
+                                  **{key: _fresh(value) for key, value in kwargs.items()})
+    return run_chain(middlewares, call, send)
+
+
+def _fresh(value: Any) -> Any:
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+def _ensure_patched():
+    """在ApiClient.call_api上挂接中间件链，只执行一次"""
+    global _original_call_api
+    with _patch_lock:
+        if _original_call_api is not None:
+            return
+        from volcenginesdkcore.api_client import ApiClient
+        _original_call_api = ApiClient.call_api
+        ApiClient.call_api = _patched_call_api
+
+
+def use(*middlewares: Middleware, first: bool = False):
+    """注册对进程内所有SDK ApiClient生效的中间件，重复注册同一个中间件会被忽略
+
+    Args:
+        first: 为True时插入到链的最前面（最外层），例如缓存命中时不需要再经过重试
+    """
+    _ensure_patched()
+    with _patch_lock:
+        new = [middleware for middleware in middlewares if middleware not in _global_middlewares]
+        if first:
+            _global_middlewares[:0] = new
+        else:
+            _global_middlewares.extend(new)
+
+
+def remove(*middlewares: Middleware):
+    """移除通过use注册的中间件"""
+    with _patch_lock:
+        for middleware in middlewares:
+            if middleware in _global_middlewares:
+                _global_middlewares.remove(middleware)
+
+
+def install(api_client, *middlewares: Middleware, first: bool = False):
+    """只对指定的SDK ApiClient实例安装中间件
+
+    默认在全局中间件之后（内层）执行，first为True时在全局中间件之前（外层）执行。
+    """
+    _ensure_patched()
+    attr = '_volc_outer_middlewares' if first else '_volc_middlewares'
+    installed = getattr(api_client, attr, None)
+    if installed is None:
+        installed = []
+        setattr(api_client, attr, installed)
+    for middleware in middlewares:
+        if middleware not in installed:
+            installed.append(middleware)
+    return api_client
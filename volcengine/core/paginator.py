@@ -0,0 +1,186 @@
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+'''
+通用分页器
+
+支持三种分页方式，按需逐条产出结果（生成器），并在调用方处理当前页时后台预取下一页：
+
+    # SDK：PageNumber/PageSize
+    pages = Paginator(lambda p: api.describe_db_instances(DescribeDBInstancesRequest(**p)),
+                      PageNumberPaging(page_size=100, total='total'), items='instances')
+    for instance in pages:
+        ...
+
+    # 原始客户端：字典响应，字段路径用点分隔
+    Paginator(lambda p: client.call('DNS', 'ListRecords', '2018-08-01', dict(ZID=zid, **p)),
+              PageNumberPaging(100, 'PageNumber', 'PageSize', total='Result.TotalCount'),
+              items='Result.Records')
+
+    # NextToken/MaxResults
+    Paginator(fetch, NextTokenPaging(max_results=100), items='instances')
+'''
+
+FieldGetter = Union[str, Callable[[Any], Any], None]
+
+
+def get_field(obj: Any, path: FieldGetter, default: Any = None) -> Any:
+    """从SDK模型或字典中读取字段，path可以是点分隔的路径或函数"""
+    if path is None:
+        return default
+    if callable(path):
+        return path(obj)
+    for name in path.split('.'):
+        if obj is None:
+            return default
+        obj = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+    return default if obj is None else obj
+
+
+class PageNumberPaging:
+    """PageNumber/PageSize分页
+
+    Args:
+        page_size: 每页数量
+        page_param: 页码参数名
+        size_param: 每页数量参数名
+        total: 响应中总数的字段，提供时用于提前判断是否还有下一页
+        start: 起始页码
+    """
+
+    def __init__(self, page_size: int = 100, page_param: str = 'page_number', size_param: str = 'page_size',
+                 total: FieldGetter = None, start: int = 1):
+        self.page_size = page_size
+        self.page_param = page_param
+        self.size_param = size_param
+        self.total = total
+        self.start = start
+
+    def first(self) -> Dict[str, Any]:
+        return {self.page_param: self.start, self.size_param: self.page_size}
+
+    def next(self, params: Dict[str, Any], response: Any, count: int, fetched: int) -> Optional[Dict[str, Any]]:
+        # 有总数时以总数为准，服务端可能把过大的page_size截断
+        total = get_field(response, self.total)
+        if isinstance(total, int) and (fetched >= total or count == 0):
+            return None
+        if not isinstance(total, int) and count < self.page_size:
+            return None
+        return {self.page_param: params[self.page_param] + 1, self.size_param: self.page_size}
+
+
+class OffsetLimitPaging:
+    """Offset/Limit分页，参数含义同PageNumberPaging"""
+
+    def __init__(self, limit: int = 100, offset_param: str = 'offset', limit_param: str = 'limit',
+                 total: FieldGetter = None, start: int = 0):
+        self.limit = limit
+        self.offset_param = offset_param
+        self.limit_param = limit_param
+        self.total = total
+        self.start = start
+
+    def first(self) -> Dict[str, Any]:
+        return {self.offset_param: self.start, self.limit_param: self.limit}
+
+    def next(self, params: Dict[str, Any], response: Any, count: int, fetched: int) -> Optional[Dict[str, Any]]:
+        total = get_field(response, self.total)
+        offset = params[self.offset_param] + count
+        if isinstance(total, int) and (offset >= total or count == 0):
+            return None
+        if not isinstance(total, int) and count < self.limit:
+            return None
+        return {self.offset_param: offset, self.limit_param: self.limit}
+
+
+class NextTokenPaging:
+    """NextToken/MaxResults分页
+
+    Args:
+        max_results: 每页数量
+        token_param: 请求中的令牌参数名
+        size_param: 每页数量参数名
+        token_field: 响应中下一页令牌的字段
+    """
+
+    def __init__(self, max_results: int = 100, token_param: str = 'next_token', size_param: str = 'max_results',
+                 token_field: FieldGetter = 'next_token'):
+        self.max_results = max_results
+        self.token_param = token_param
+        self.size_param = size_param
+        self.token_field = token_field
+
+    def first(self) -> Dict[str, Any]:
+        return {self.size_param: self.max_results}
+
+    def next(self, params: Dict[str, Any], response: Any, count: int, fetched: int) -> Optional[Dict[str, Any]]:
+        token = get_field(response, self.token_field)
+        if not token:
+            return None
+        return {self.token_param: token, self.size_param: self.max_results}
+
+
+Paging = Union[PageNumberPaging, OffsetLimitPaging, NextTokenPaging]
+
+
+class Paginator:
+    """惰性分页迭代器
+
+    Args:
+        fetch: 接收分页参数字典、返回一页响应的函数
+        paging: 分页方式
+        items: 响应中结果列表的字段
+        prefetch: 是否在处理当前页时后台预取下一页
+    """
+
+    def __init__(self, fetch: Callable[[Dict[str, Any]], Any], paging: Paging, items: FieldGetter,
+                 prefetch: bool = True):
+        self.fetch = fetch
+        self.paging = paging
+        self.items = items
+        self.prefetch = prefetch
+
+    def pages(self) -> Iterator[Any]:
+        """逐页产出原始响应"""
+        for response, _ in self._iter_pages():
+            yield response
+
+    def _iter_pages(self) -> Iterator[tuple]:
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        params = self.paging.first()
+        pending = None
+        fetched = 0
+        try:
+            while params is not None:
+                response = pending.result() if pending is not None else self.fetch(params)
+                pending = None
+                items = list(get_field(response, self.items, []))
+                fetched += len(items)
+                next_params = self.paging.next(params, response, len(items), fetched)
+                if next_params is not None and executor is not None:
+                    # 预取线程沿用调用方的上下文变量（指标等），预取的页与同步获取的页记录在同一个调用下
+                    pending = executor.submit(contextvars.copy_context().run, self.fetch, next_params)
+                yield response, items
+                params = next_params
+        finally:
+            # 调用方提前结束迭代时不再等待预取结果
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def __iter__(self) -> Iterator[Any]:
+        for _, items in self._iter_pages():
+            yield from items
+
+    def all(self) -> List[Any]:
+        """取回全部结果"""
+        return list(self)
+
+
+def paginate(fetch: Callable[[Dict[str, Any]], Any], paging: Paging, items: FieldGetter,
+             prefetch: bool = True) -> Iterator[Any]:
+    """Paginator的函数形式，返回逐条产出结果的生成器"""
+    return iter(Paginator(fetch, paging, items, prefetch))
@@ -0,0 +1,258 @@
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from configs.api_config import polling_config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+'''
+基于历史耗时的自适应轮询
+
+固定间隔轮询要么在实例就绪后白等几分钟，要么浪费大量查询。ReadinessHistory
+按(服务, 规格, 区域)记录历次从创建到就绪的耗时，AdaptiveSchedule据此安排下一次查询：
+
+- 离预计完成还早时稀疏查询：每次等待剩余时间的一半，逐步逼近预计完成时间
+- 在预计完成时间附近（历史P50到P90之间）按最小间隔密集查询
+- 超过历史P90仍未就绪时间隔逐次翻倍，直到最大间隔
+- 查询出错时按指数退避（带抖动）
+
+    schedule = AdaptiveSchedule(('redis', '2GiB', 'cn-shanghai'), fallback_interval=30)
+    default_waiter.wait_for(key, fetch, instance_id, 'Running', schedule=schedule)
+
+实例就绪时写入历史，并在日志中对比预计耗时和实际耗时。
+VPC、子网、EIP等单个资源的等待循环使用poll_until：
+
+    poll_until(lambda: vpc_status(vpc_id) == 'Available', AdaptiveSchedule(('vpc', '', region), 10), timeout=300)
+'''
+
+HistoryKey = Tuple[str, str, str]
+
+
+def _default_history_file() -> str:
+    return polling_config.get('history_file') or os.path.join(
+        os.path.expanduser('~'), '.volcengine', 'readiness_history.json')
+
+
+def _key_text(key: HistoryKey) -> str:
+    return '|'.join('' if part is None else str(part) for part in key)
+
+
+class ReadinessHistory:
+    """就绪耗时历史，保存在本地JSON文件中
+
+    Args:
+        path: 文件路径，为None时只保存在内存中
+        max_samples: 每个键保留的最近样本数
+    """
+
+    def __init__(self, path: Optional[str] = None, max_samples: int = 50):
+        self.path = path
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = self._load() if path else {}
+        # 本进程新增、尚未写入文件的样本
+        self._pending: Dict[str, List[float]] = {}
+
+    def _load(self) -> Dict[str, List[float]]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            return {key: [float(value) for value in values] for key, values in data.items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"读取就绪耗时历史 {self.path} 失败，忽略: {e}")
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        # 数据文件会被原子替换，因此锁加在旁边的.lock文件上；
+        # 持锁期间重新读取文件，只把本进程新增的样本追加到各个键后面，不覆盖其他进程写入的样本
+        with open(self.path + '.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                merged = self._load()
+                for key, values in self._pending.items():
+                    samples = merged.setdefault(key, [])
+                    samples.extend(values)
+                    del samples[:-self.max_samples]
+                fd, temp = tempfile.mkstemp(dir=directory, prefix='.readiness-')
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(merged, f, ensure_ascii=False, indent=1)
+                    os.replace(temp, self.path)
+                except BaseException:
+                    os.unlink(temp)
+                    raise
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+        self._pending.clear()
+        # 同时拿到其他进程记录的样本
+        self._samples = merged
+
+    def record(self, key: HistoryKey, duration: float):
+        """记录一次从开始等待到就绪的耗时（秒）"""
+        text = _key_text(key)
+        duration = round(duration, 3)
+        with self._lock:
+            values = self._samples.setdefault(text, [])
+            values.append(duration)
+            del values[:-self.max_samples]
+            if self.path:
+                # 保存失败的样本留到下一次保存时再写入
+                pending = self._pending.setdefault(text, [])
+                pending.append(duration)
+                del pending[:-self.max_samples]
+                try:
+                    self._save()
+                except OSError as e:
+                    logger.warning(f"保存就绪耗时历史 {self.path} 失败: {e}")
+
+    def expected(self, key: HistoryKey) -> Optional[Dict[str, float]]:
+        """历史耗时的P50、P90和样本数，没有样本时返回None"""
+        with self._lock:
+            values = sorted(self._samples.get(_key_text(key), []))
+        if not values:
+            return None
+        p90 = values[min(len(values) - 1, int(round(0.9 * (len(values) - 1))))]
+        return {'p50': statistics.median(values), 'p90': p90, 'samples': len(values)}
+
+    def report(self) -> List[Dict[str, Any]]:
+        """每个(服务, 规格, 区域)的样本数、P50、P90和最近一次耗时"""
+        with self._lock:
+            items = {key: list(values) for key, values in self._samples.items()}
+        rows = []
+        for text, values in sorted(items.items()):
+            service, spec, region = (text.split('|') + ['', '', ''])[:3]
+            expected = self.expected((service, spec, region)) or {}
+            rows.append({'service': service, 'spec': spec, 'region': region, 'samples': len(values),
+                         'p50': expected.get('p50'), 'p90': expected.get('p90'), 'last': values[-1]})
+        return rows
+
+
+class FixedSchedule:
+    """固定间隔轮询，查询出错时也按相同间隔重试"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+    def next_delay(self, elapsed: float) -> float:
+        return self.interval
+
+    def error_delay(self, errors: int) -> float:
+        return self.interval
+
+    def finished(self, instance_id: str, elapsed: float, succeeded: bool):
+        pass
+
+
+class AdaptiveSchedule:
+    """按历史就绪耗时安排查询时间
+
+    Args:
+        key: (服务, 规格, 区域)
+        fallback_interval: 没有历史样本时的固定间隔
+        min_interval: 预计完成时间附近的查询间隔
+        max_interval: 最大查询间隔
+        history: 耗时历史，默认使用default_history
+    """
+
+    def __init__(self, key: HistoryKey, fallback_interval: float = 30, min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None, history: Optional[ReadinessHistory] = None):
+        self.key = key
+        self.fallback_interval = fallback_interval
+        self.min_interval = polling_config['min_interval'] if min_interval is None else min_interval
+        self.max_interval = polling_config['max_interval'] if max_interval is None else max_interval
+        self.history = history or default_history
+        self.expected = self.history.expected(key)
+        self._overdue_checks = 0
+
+    def _clamp(self, delay: float) -> float:
+        return max(self.min_interval, min(self.max_interval, delay))
+
+    def next_delay(self, elapsed: float) -> float:
+        if self.expected is None:
+            return self.fallback_interval
+        window_start = self.expected['p50'] * 0.8
+        window_end = max(self.expected['p90'] * 1.2, window_start + self.min_interval)
+        if elapsed < window_start:
+            # 稀疏阶段：每次等待剩余时间的一半，越接近预计时间查询越密
+            return self._clamp((window_start - elapsed) / 2)
+        if elapsed <= window_end:
+            return self.min_interval
+        self._overdue_checks += 1
+        return self._clamp(self.min_interval * 2 ** self._overdue_checks)
+
+    def error_delay(self, errors: int) -> float:
+        base = self.min_interval if self.expected is not None else self.fallback_interval
+        return self._clamp(base * 2 ** errors * random.uniform(0.5, 1.0))
+
+    def finished(self, instance_id: str, elapsed: float, succeeded: bool):
+        """就绪时写入历史，并记录预计与实际耗时的对比"""
+        service, spec, region = self.key
+        if not succeeded:
+            return
+        if self.expected is not None:
+            logger.info(f"{service} 实例 {instance_id} (规格: {spec or '-'}, 区域: {region}) 就绪耗时 {elapsed:.0f} 秒，"
+                        f"历史P50 {self.expected['p50']:.0f} 秒 / P90 {self.expected['p90']:.0f} 秒，"
+                        f"偏差 {elapsed - self.expected['p50']:+.0f} 秒")
+        else:
+            logger.info(f"{service} 实例 {instance_id} (规格: {spec or '-'}, 区域: {region}) 就绪耗时 {elapsed:.0f} 秒，"
+                        f"暂无历史数据")
+        self.history.record(self.key, elapsed)
+
+
+def config_spec(config: Optional[Dict[str, Any]], field: str) -> str:
+    """从实例配置的instance部分取规格，作为历史耗时的分组键，没有时返回空字符串"""
+    value = ((config or {}).get('instance') or {}).get(field)
+    return '' if value is None else str(value)
+
+
+def poll_until(check: Callable[[], bool], schedule, timeout: float, name: str = '', max_errors: int = 3,
+               sleep: Callable[[float], None] = time.sleep, clock: Callable[[], float] = time.monotonic) -> bool:
+    """按调度反复调用check，直到返回True或超时
+
+    check抛出异常时按schedule.error_delay退避重试，连续出错max_errors次后抛出最后一次的异常。
+
+    Returns:
+        bool: 超时前check是否返回了True
+    """
+    started = clock()
+    errors = 0
+    while True:
+        elapsed = clock() - started
+        try:
+            if check():
+                schedule.finished(name, clock() - started, True)
+                return True
+            errors = 0
+            delay = schedule.next_delay(elapsed)
+        except Exception as e:
+            errors += 1
+            if errors >= max_errors:
+                raise
+            delay = schedule.error_delay(errors)
+            logger.warning(f"查询 {name} 状态出错({errors}/{max_errors})，{delay:.0f} 秒后重试: {e}")
+        remaining = timeout - (clock() - started)
+        if remaining <= 0:
+            schedule.finished(name, clock() - started, False)
+            return False
+        sleep(min(delay, remaining))
+
+
+default_history = ReadinessHistory(_default_history_file(), polling_config.get('max_samples', 50))
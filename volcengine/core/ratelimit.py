@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from middleware import APICall, use as use_middleware
+
+logger = logging.getLogger(__name__)
+
+'''
+按(账号, 服务, 接口)限流的令牌桶
+
+    limiter = RateLimiter({'vke': 10, 'vke.CreateCluster': 1})
+    limiter.acquire('vke', 'CreateCluster', account=ak)   # 没有令牌时阻塞等待
+
+- memory后端：进程内共享，多个线程/管理器共用同一个桶
+- file后端：桶状态保存在锁目录下的小文件中，用flock互斥，同一台机器上的多个脚本共用配额
+
+也可以作为中间件接入，让每次SDK/原始客户端请求（包括重试）都先拿令牌：
+
+    enable_sdk_rate_limit()
+'''
+
+RateSpec = Union[float, Mapping[str, float]]
+
+
+class TokenBucket:
+    """进程内令牌桶
+
+    Args:
+        rate: 每秒补充的令牌数（即QPS）
+        burst: 桶容量，允许的瞬时突发请求数
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float) -> float:
+        """尝试取走令牌，成功返回0，否则返回需要等待的秒数"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+
+class FileTokenBucket:
+    """跨进程令牌桶，状态文件内容为"剩余令牌 上次更新时间"
+
+    Args:
+        path: 状态文件路径
+        rate: 每秒补充的令牌数
+        burst: 桶容量
+    """
+
+    def __init__(self, path: str, rate: float, burst: float, clock: Callable[[], float] = time.time):
+        if fcntl is None:
+            raise RuntimeError("当前平台不支持fcntl，无法使用file限流后端")
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        # 同一进程内的线程先在这里排队，避免反复争抢文件锁
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float) -> float:
+        with self._lock, open(self.path, 'a+') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                now = self._clock()
+                try:
+                    available, updated = (float(value) for value in f.read().split())
+                except ValueError:
+                    available, updated = self.burst, now
+                available = min(self.burst, available + max(now - updated, 0.0) * self.rate)
+                wait = 0.0
+                if available >= tokens:
+                    available -= tokens
+                else:
+                    wait = (tokens - available) / self.rate
+                f.seek(0)
+                f.truncate()
+                f.write(f"{available!r} {now!r}")
+                f.flush()
+                return wait
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """按(账号, 服务, 接口)维护令牌桶
+
+    Args:
+        limits: 限流配置，键为 "服务" 或 "服务.接口"（不区分大小写），
+            值为QPS或 {"rate": QPS, "burst": 突发数}，接口级配置优先于服务级配置
+        default_rate: 未配置的服务使用的QPS，为None时不限流
+        default_burst: 未单独指定burst时的桶容量，默认为max(1, QPS)
+        backend: memory（进程内）或 file（跨进程）
+        lock_dir: file后端保存桶状态的目录
+    """
+
+    def __init__(self, limits: Optional[Mapping[str, RateSpec]] = None, default_rate: Optional[float] = None,
+                 default_burst: Optional[float] = None, backend: str = 'memory',
+                 lock_dir: Optional[str] = None, sleep: Callable[[float], None] = time.sleep):
+        self.backend = 'memory'
+        self.lock_dir = os.path.join(tempfile.gettempdir(), 'volcengine-ratelimit')
+        self.sleep = sleep
+        self.waited: Dict[Tuple[str, str], float] = {}
+        self._buckets: Dict[Tuple[str, str, str], Any] = {}
+        self._lock = threading.Lock()
+        self.configure(limits, default_rate, default_burst, backend, lock_dir)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> 'RateLimiter':
+        """从api_config.rate_limit_config格式的配置创建"""
+        limiter = cls()
+        limiter.configure_from(config)
+        return limiter
+
+    def configure_from(self, config: Mapping[str, Any]):
+        """按api_config.rate_limit_config格式的配置更新"""
+        self.configure(config.get('limits'), config.get('default_rate'), config.get('default_burst'),
+                       config.get('backend'), config.get('lock_dir'))
+
+    def configure(self, limits: Optional[Mapping[str, RateSpec]] = None, default_rate: Optional[float] = None,
+                  default_burst: Optional[float] = None, backend: Optional[str] = None,
+                  lock_dir: Optional[str] = None):
+        """更新限流配置，已创建的令牌桶会按新配置重建"""
+        if backend is not None and backend not in ('memory', 'file'):
+            raise ValueError(f"不支持的限流后端: {backend}")
+        with self._lock:
+            self.backend = backend or self.backend
+            self.lock_dir = lock_dir or self.lock_dir
+            self.limits = {key.lower(): value for key, value in (limits or {}).items()}
+            self.default_rate = default_rate
+            self.default_burst = default_burst
+            self._buckets.clear()
+
+    def _resolve(self, service: str, action: str) -> Optional[Tuple[float, float]]:
+        spec = self.limits.get(f"{service}.{action}".lower(), self.limits.get(service.lower(), self.default_rate))
+        if spec is None:
+            return None
+        if isinstance(spec, Mapping):
+            rate = float(spec['rate'])
+            burst = spec.get('burst')
+        else:
+            rate, burst = float(spec), None
+        if burst is None:
+            burst = self.default_burst or max(1.0, rate)
+        return rate, float(burst)
+
+    def _bucket(self, account: str, service: str, action: str):
+        key = (account, service.lower(), action)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None or key in self._buckets:
+                return bucket
+            resolved = self._resolve(service, action)
+            if resolved is None:
+                bucket = None
+            elif self.backend == 'file':
+                os.makedirs(self.lock_dir, exist_ok=True)
+                # 文件名只用摘要，避免把AK写到磁盘上
+                digest = hashlib.sha1('|'.join(key).encode('utf-8')).hexdigest()
+                bucket = FileTokenBucket(os.path.join(self.lock_dir, f"{digest}.bucket"), *resolved)
+            else:
+                bucket = TokenBucket(*resolved)
+            self._buckets[key] = bucket
+            return bucket
+
+    def acquire(self, service: str, action: str, account: Optional[str] = None, tokens: float = 1.0,
+                timeout: Optional[float] = None) -> bool:
+        """获取令牌，没有令牌时阻塞等待
+
+        Args:
+            timeout: 最长等待时间（秒），为None时一直等待
+
+        Returns:
+            bool: 是否拿到令牌，只有设置了timeout并超时才会返回False
+        """
+        bucket = self._bucket(account or '', service, action)
+        if bucket is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        total_wait = 0.0
+        while True:
+            wait = bucket._take(tokens)
+            if wait <= 0:
+                break
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            self.sleep(wait)
+            total_wait += wait
+        if total_wait:
+            with self._lock:
+                key = (service.lower(), action)
+                self.waited[key] = self.waited.get(key, 0.0) + total_wait
+            logger.debug(f"{service}.{action} 限流等待 {total_wait:.2f} 秒")
+        return True
+
+    def middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """中间件：请求发出前先获取令牌"""
+        self.acquire(call.service, call.action, call.account)
+        return proceed()
+
+    async def async_middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """AsyncAPIClient使用的异步中间件，等待时不阻塞事件循环"""
+        bucket = self._bucket(call.account or '', call.service, call.action)
+        if bucket is not None:
+            while True:
+                wait = bucket._take(1.0)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+        return await proceed()
+
+
+# 进程内共享的默认限流器，未配置时不限流
+default_limiter = RateLimiter()
+
+
+def enable_sdk_rate_limit(config: Optional[Mapping[str, Any]] = None, limiter: Optional[RateLimiter] = None):
+    """让进程内所有SDK ApiClient的调用先经过限流器
+
+    应在enable_sdk_retry之后调用，这样每次重试也会重新获取令牌。
+
+    Args:
+        config: rate_limit_config格式的配置，提供时用于更新默认限流器
+        limiter: 使用指定的限流器代替默认限流器
+    """
+    limiter = limiter or default_limiter
+    if config is not None:
+        limiter.configure_from(config)
+    use_middleware(limiter.middleware)
+    return limiter
@@ -0,0 +1,243 @@
+import json
+import logging
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from volcenginesdkcore.interceptor.interceptors import ResponseInterceptor
+from volcenginesdkcore.rest import ApiException
+
+from paginator import get_field
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson为可选依赖
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+'''
+跳过SDK模型反序列化的原始JSON快速路径
+
+SDK默认把响应逐字段反序列化为模型对象，资源很多时CPU和内存主要消耗在这里，
+而清单类代码只读取其中少数字段。call_raw让SDK跳过反序列化，直接用orjson
+（未安装时使用json）解码Result，再包装为按需取值的ModelView：
+
+    response = call_raw(redis_api.describe_db_instances, DescribeDBInstancesRequest(page_size=100))
+    for instance in response.instances:          # 与模型对象相同的属性名
+        print(instance.instance_id, instance.capacity.total)
+
+    project(response.instances, ['instance_id', 'capacity.total'])   # 只提取需要的字段
+
+重试、限流、缓存、指标等中间件照常生效；缓存中保存的是解码后的字典。
+'''
+
+_PRIMITIVE_TYPES = {'str', 'int', 'float', 'bool', 'object', 'date', 'datetime', 'long'}
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """解码JSON，优先使用orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_result(data: Union[bytes, str]) -> Dict[str, Any]:
+    """解码OpenAPI响应并返回Result部分，错误处理与SDK反序列化保持一致"""
+    document = loads(data) if data else {}
+    meta = document.get('ResponseMetadata') if isinstance(document, dict) else None
+    if meta is None:
+        raise ApiException(status=200, reason="InternalServiceError")
+    error = meta.get('Error')
+    if error is not None:
+        raise ApiException(status=200, reason=str(error))
+    return document.get('Result') or {}
+
+
+class RawJSONInterceptor(ResponseInterceptor):
+    """SDK响应拦截器：请求带 _preload_content=False 时把Result解码为字典作为返回值"""
+
+    def name(self):
+        return 'volc-raw-json-interceptor'
+
+    def intercept(self, context):
+        if context.request.preload_content:
+            return context
+        response = context.response.http_response
+        try:
+            context.response.result = decode_result(response.data)
+        finally:
+            release = getattr(response, 'release_conn', None)
+            if release is not None:
+                release()
+        return context
+
+
+_interceptor = RawJSONInterceptor()
+
+
+def enable_raw_json(api_client):
+    """在ApiClient上安装RawJSONInterceptor，可重复调用"""
+    chain = api_client.interceptor_chain
+    if not any(interceptor.name() == _interceptor.name() for interceptor in chain.response_interceptors):
+        chain.append_response_interceptor(_interceptor)
+    return api_client
+
+
+@lru_cache(maxsize=None)
+def _resolve_model(package: str, name: str):
+    return getattr(sys.modules.get(package), name, None)
+
+
+@lru_cache(maxsize=None)
+def _models_package(model) -> str:
+    return model.__module__.rsplit('.', 1)[0]
+
+
+def _convert(value: Any, type_name: str, package: str) -> Any:
+    if value is None:
+        return None
+    if type_name.startswith('list['):
+        item_type = type_name[5:-1]
+        return [_convert(item, item_type, package) for item in value]
+    if type_name.startswith('dict('):
+        item_type = type_name[5:-1].split(', ', 1)[1]
+        return {key: _convert(item, item_type, package) for key, item in value.items()}
+    if type_name in _PRIMITIVE_TYPES:
+        return value
+    model = _resolve_model(package, type_name)
+    if model is None or not getattr(model, 'swagger_types', None) or not isinstance(value, dict):
+        return value
+    return ModelView(value, model)
+
+
+class ModelView:
+    """SDK模型的只读视图
+
+    属性名与SDK模型相同（按模型的attribute_map映射到JSON键），第一次访问时才转换，
+    嵌套对象同样返回ModelView；模型中没有的属性抛出AttributeError，因此
+    hasattr/getattr的行为与模型对象一致。日期时间字段保留接口返回的字符串。
+
+    Args:
+        data: 解码后的JSON对象
+        model: 对应的SDK模型类
+    """
+    __slots__ = ('_data', '_model', '_values')
+
+    def __init__(self, data: Dict[str, Any], model):
+        self._data = data
+        self._model = model
+        self._values: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        values = self._values
+        if name in values:
+            return values[name]
+        key = self._model.attribute_map.get(name)
+        if key is None:
+            raise AttributeError(f"'{self._model.__name__}' object has no attribute '{name}'")
+        value = values[name] = _convert(self._data.get(key), self._model.swagger_types[name],
+                                        _models_package(self._model))
+        return value
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        """原始JSON对象"""
+        return self._data
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，格式与SDK模型的to_dict()相同"""
+        return {name: _plain(getattr(self, name)) for name in self._model.swagger_types}
+
+    def __eq__(self, other):
+        if isinstance(other, ModelView):
+            return self._model is other._model and self._data == other._data
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{self._model.__name__}View({self._data!r})"
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, ModelView):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    return value
+
+
+def response_model(request):
+    """根据请求模型推断响应模型，例如DescribeDBInstancesRequest -> DescribeDBInstancesResponse"""
+    name = type(request).__name__
+    if not name.endswith('Request'):
+        return None
+    package = _models_package(type(request))
+    return _resolve_model(package, name[:-len('Request')] + 'Response')
+
+
+def call_raw(method: Callable, request, model=None, **kwargs) -> Union[ModelView, Dict[str, Any]]:
+    """以原始JSON模式调用SDK接口方法
+
+    Args:
+        method: SDK接口方法，例如 redis_api.describe_db_instances
+        request: 请求模型
+        model: 响应模型，不提供时按请求模型推断；推断不到时返回字典
+
+    Returns:
+        ModelView 或 Result字典
+    """
+    enable_raw_json(method.__self__.api_client)
+    result = method(request, _preload_content=False, **kwargs)
+    model = model or response_model(request)
+    if model is None or not isinstance(result, dict):
+        return result
+    return ModelView(result, model)
+
+
+@lru_cache(maxsize=None)
+def _compile_path(model, path: str) -> Optional[tuple]:
+    """把属性路径转换为JSON键路径：((JSON键, 类型名), ...)，路径不合法时返回None"""
+    steps = []
+    package = _models_package(model)
+    for name in path.split('.'):
+        if model is None or name not in model.attribute_map:
+            return None
+        type_name = model.swagger_types[name]
+        steps.append((model.attribute_map[name], type_name))
+        model = _resolve_model(package, type_name)
+    return tuple(steps), package
+
+
+def _project_view(view: ModelView, path: str) -> Any:
+    compiled = _compile_path(view._model, path)
+    if compiled is None:
+        return _plain(get_field(view, path))
+    steps, package = compiled
+    value = view._data
+    for key, _ in steps:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return _plain(_convert(value, steps[-1][1], package))
+
+
+def project(items: Iterable[Any], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """只提取指定字段
+
+    对ModelView直接按JSON键读取，不创建中间视图。
+
+    Args:
+        items: ModelView、模型对象或字典
+        fields: 属性名，支持点号路径（例如 'capacity.total'），结果中以完整路径为键
+    """
+    result = []
+    for item in items:
+        if isinstance(item, ModelView):
+            result.append({field: _project_view(item, field) for field in fields})
+        else:
+            result.append({field: _plain(get_field(item, field)) for field in fields})
+    return result
@@ -0,0 +1,396 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from enum import Enum
+from functools import wraps
+from typing import Any, Callable, Dict, NamedTuple, Optional, Set
+
+import urllib3
+
+from middleware import APICall, use as use_middleware
+
+logger = logging.getLogger(__name__)
+
+'''
+共享的重试子系统
+
+- 按错误码把异常分为限流、服务端错误、网络错误和不可重试错误
+- 指数退避 + 全抖动（full jitter），服务端给出Retry-After时以其为下限
+- 按服务维护熔断器，错误率突增时快速失败，冷却后放行探测请求
+- 没有ClientToken的写操作（创建、申请等）只重试限流和请求发出前的连接错误：
+  请求可能已被服务端执行时（读超时、5xx）重试会重复创建计费资源
+
+原始签名客户端和SDK ApiClient都可以通过中间件接入：
+
+    engine = RetryEngine()
+    APIClient(config, middlewares=[engine.middleware])
+    middleware.use(engine.middleware)          # 对所有SDK ApiClient生效
+'''
+
+
+class ErrorKind(str, Enum):
+    """错误分类"""
+    THROTTLING = "throttling"
+    SERVER = "server"
+    NETWORK = "network"
+    NON_RETRYABLE = "non_retryable"
+
+
+# 火山引擎OpenAPI的流控错误码
+THROTTLING_CODES = {
+    'Throttling', 'ThrottlingException', 'RequestLimitExceeded', 'TooManyRequests',
+    'FlowLimitExceeded', 'AccountFlowLimitExceeded', 'APIFlowLimitExceeded', 'ServiceFlowLimitExceeded',
+}
+
+# 服务端临时错误码
+SERVER_ERROR_CODES = {
+    'InternalError', 'InternalServiceError', 'InternalServiceTimeout', 'ServiceUnavailable',
+    'ServiceUnavailableTemp', 'ServiceBusy', 'SystemBusy',
+}
+
+NETWORK_ERROR_CODE = 'NetworkError'
+
+# 只读接口的Action前缀，其余接口视为写操作
+READ_ONLY_PREFIXES = ('Describe', 'List', 'Get', 'Query', 'Check')
+
+
+class ErrorInfo(NamedTuple):
+    """异常的分类结果"""
+    kind: ErrorKind
+    code: Optional[str] = None
+    status: Optional[int] = None
+    retry_after: Optional[float] = None
+
+
+class CircuitOpenError(Exception):
+    """服务熔断期间拒绝请求"""
+
+    def __init__(self, service: str, retry_in: float):
+        super().__init__(f"服务 {service} 已熔断，{retry_in:.1f} 秒后重新探测")
+        self.service = service
+        self.retry_in = retry_in
+
+
+def _parse_retry_after(value: Any) -> Optional[float]:
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _code_from_body(body: Any) -> Optional[str]:
+    if not body:
+        return None
+    try:
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        return json.loads(body)['ResponseMetadata']['Error']['Code']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def classify(error: BaseException) -> ErrorInfo:
+    """对异常进行分类
+
+    支持sign.APIError（code/status/retry_after属性）、SDK的ApiException
+    （status/body/headers属性）以及底层的网络异常。
+    """
+    if isinstance(error, CircuitOpenError):
+        return ErrorInfo(ErrorKind.NON_RETRYABLE, 'CircuitOpen')
+
+    if isinstance(error, (ConnectionError, TimeoutError, urllib3.exceptions.HTTPError)):
+        return ErrorInfo(ErrorKind.NETWORK, NETWORK_ERROR_CODE)
+
+    status = getattr(error, 'status', None)
+    code = getattr(error, 'code', None)
+    if not isinstance(code, str):
+        code = _code_from_body(getattr(error, 'body', None))
+    headers = getattr(error, 'headers', None) or {}
+    retry_after = _parse_retry_after(getattr(error, 'retry_after', None) or headers.get('Retry-After'))
+
+    if code == NETWORK_ERROR_CODE or status == 0:
+        # SDK把SSL等底层异常包装成status为0的ApiException
+        return ErrorInfo(ErrorKind.NETWORK, code or NETWORK_ERROR_CODE, status, retry_after)
+    if code in THROTTLING_CODES or (code and ('FlowLimit' in code or 'Throttl' in code)) or status == 429:
+        return ErrorInfo(ErrorKind.THROTTLING, code, status, retry_after)
+    if code in SERVER_ERROR_CODES or (isinstance(status, int) and status >= 500):
+        return ErrorInfo(ErrorKind.SERVER, code, status, retry_after)
+    return ErrorInfo(ErrorKind.NON_RETRYABLE, code, status, retry_after)
+
+
+# requests、aiohttp中表示连接阶段失败的异常类名，不直接依赖这两个库
+CONNECT_ERROR_NAMES = {'ConnectTimeout', 'ClientConnectorError'}
+
+
+def is_connect_error(error: BaseException) -> bool:
+    """是否为请求发出前的连接错误（建立连接失败、连接超时、域名解析失败），此时服务端没有收到请求
+
+    沿着包装链查找：sign.APIError的__cause__、requests.ConnectionError包装的MaxRetryError、MaxRetryError.reason。
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (urllib3.exceptions.ConnectTimeoutError, ConnectionRefusedError)) or \
+                CONNECT_ERROR_NAMES & {cls.__name__ for cls in type(error).__mro__}:
+            return True
+        if isinstance(error, urllib3.exceptions.MaxRetryError):
+            error = error.reason
+        elif error.__cause__ is not None:
+            error = error.__cause__
+        else:
+            error = next((arg for arg in error.args if isinstance(arg, BaseException)), None)
+    return False
+
+
+def _client_token(params: Any) -> Optional[str]:
+    if isinstance(params, dict):
+        return params.get('ClientToken') or params.get('client_token')
+    return getattr(params, 'client_token', None)
+
+
+def is_idempotent(call: APICall) -> bool:
+    """重复发送是否安全：只读接口，或带ClientToken的写操作"""
+    return call.action.startswith(READ_ONLY_PREFIXES) or bool(_client_token(call.params))
+
+
+class RetryPolicy:
+    """重试策略
+
+    Args:
+        max_attempts: 最大尝试次数（包含第一次）
+        base_delay: 退避基数（秒），第n次重试的等待上限为 base_delay * 2^n
+        max_delay: 单次等待的上限（秒）
+        throttle_base_delay: 限流错误使用的退避基数（秒），通常比普通错误更大
+        retry_on: 需要重试的错误类型
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 20.0,
+                 throttle_base_delay: float = 1.0, retry_on: Optional[Set[ErrorKind]] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttle_base_delay = throttle_base_delay
+        self.retry_on = retry_on or {ErrorKind.THROTTLING, ErrorKind.SERVER, ErrorKind.NETWORK}
+
+    def should_retry(self, info: ErrorInfo, attempt: int, error: Optional[BaseException] = None,
+                     idempotent: bool = True) -> bool:
+        """非幂等请求只在限流或请求发出前的连接错误时重试"""
+        if info.kind not in self.retry_on or attempt >= self.max_attempts:
+            return False
+        return idempotent or info.kind == ErrorKind.THROTTLING or (error is not None and is_connect_error(error))
+
+    def compute_delay(self, info: ErrorInfo, attempt: int) -> float:
+        """计算第attempt次失败后的等待时间（全抖动），Retry-After作为下限"""
+        base = self.throttle_base_delay if info.kind == ErrorKind.THROTTLING else self.base_delay
+        delay = random.uniform(0, min(self.max_delay, base * (2 ** (attempt - 1))))
+        if info.retry_after is not None:
+            delay = max(delay, info.retry_after)
+        return delay
+
+
+class CircuitBreaker:
+    """基于滑动窗口错误率的熔断器
+
+    最近window次调用中，可重试类错误占比达到failure_rate（且调用数不少于min_calls）时熔断，
+    reset_timeout秒后进入半开状态，放行一个探测请求，成功则恢复，失败则继续熔断。
+
+    Args:
+        window: 统计错误率的调用次数窗口
+        failure_rate: 触发熔断的错误率
+        min_calls: 窗口内的最少调用次数，不足时不熔断
+        reset_timeout: 熔断持续时间（秒）
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window: int = 20, failure_rate: float = 0.5, min_calls: int = 10,
+                 reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> Optional[float]:
+        """请求前调用，允许通过返回None，否则返回距下次探测的秒数"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return None
+            remaining = self.reset_timeout - (self._clock() - self._opened_at)
+            if self._state == self.OPEN and remaining > 0:
+                return remaining
+            # 冷却结束，只放行一个探测请求
+            if self._probing:
+                return max(remaining, 0.1)
+            self._state = self.HALF_OPEN
+            self._probing = True
+            return None
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(True)
+            if self._state == self.HALF_OPEN:
+                logger.info("熔断器探测成功，恢复正常")
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            if self._state == self.HALF_OPEN:
+                self._trip()
+                return
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._trip()
+
+    def _trip(self):
+        logger.warning(f"错误率过高，熔断 {self.reset_timeout} 秒")
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._probing = False
+
+
+class RetryEngine:
+    """按服务执行重试与熔断
+
+    Args:
+        policy: 重试策略，不提供则使用默认策略
+        breaker_factory: 为每个服务创建熔断器的工厂函数，传None关闭熔断
+        sleep: 同步等待函数，便于测试时替换
+    """
+
+    def __init__(self, policy: Optional[RetryPolicy] = None,
+                 breaker_factory: Optional[Callable[[], CircuitBreaker]] = CircuitBreaker,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.policy = policy or RetryPolicy()
+        self.breaker_factory = breaker_factory
+        self.sleep = sleep
+        self.retry_counts: Dict[str, int] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, service: str) -> Optional[CircuitBreaker]:
+        if self.breaker_factory is None:
+            return None
+        with self._lock:
+            breaker = self._breakers.get(service)
+            if breaker is None:
+                breaker = self._breakers[service] = self.breaker_factory()
+            return breaker
+
+    def _check_breaker(self, service: str, breaker: Optional[CircuitBreaker]):
+        if breaker is not None:
+            retry_in = breaker.before_call()
+            if retry_in is not None:
+                raise CircuitOpenError(service, retry_in)
+
+    def _on_error(self, service: str, breaker: Optional[CircuitBreaker], error: BaseException,
+                  attempt: int, idempotent: bool = True) -> Optional[float]:
+        """记录失败并返回下次重试前的等待时间，不需要重试时返回None"""
+        info = classify(error)
+        if breaker is not None:
+            if info.kind == ErrorKind.NON_RETRYABLE:
+                # 参数错误等不代表服务异常，不计入错误率
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+        if not self.policy.should_retry(info, attempt, error, idempotent):
+            if not idempotent and info.kind in self.policy.retry_on and attempt < self.policy.max_attempts:
+                logger.warning(f"{service} 写操作失败（{info.kind.value}, {info.code}），请求可能已被执行且没有幂等令牌，不重试")
+            return None
+        delay = self.policy.compute_delay(info, attempt)
+        with self._lock:
+            self.retry_counts[service] = self.retry_counts.get(service, 0) + 1
+        logger.warning(f"{service} 调用失败（{info.kind.value}, {info.code}），"
+                       f"第 {attempt}/{self.policy.max_attempts} 次尝试，{delay:.2f} 秒后重试")
+        return delay
+
+    def execute(self, service: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """执行func，按策略重试"""
+        return self._execute(service, lambda: func(*args, **kwargs))
+
+    def _execute(self, service: str, func: Callable[[], Any], idempotent: bool = True) -> Any:
+        breaker = self.breaker(service)
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_breaker(service, breaker)
+            try:
+                result = func()
+            except Exception as e:
+                delay = self._on_error(service, breaker, e, attempt, idempotent)
+                if delay is None:
+                    raise
+                self.sleep(delay)
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    async def execute_async(self, service: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """execute的异步版本，func为协程函数"""
+        return await self._execute_async(service, lambda: func(*args, **kwargs))
+
+    async def _execute_async(self, service: str, func: Callable[[], Any], idempotent: bool = True) -> Any:
+        breaker = self.breaker(service)
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_breaker(service, breaker)
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self._on_error(service, breaker, e, attempt, idempotent)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    def middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """同步中间件，用于APIClient和SDK ApiClient"""
+        return self._execute(call.service, proceed, is_idempotent(call))
+
+    async def async_middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """异步中间件，用于AsyncAPIClient"""
+        return await self._execute_async(call.service, proceed, is_idempotent(call))
+
+    def retryable(self, service: str):
+        """装饰器：对被装饰函数的整体调用进行重试"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.execute(service, func, *args, **kwargs)
+            return wrapper
+        return decorator
+
+
+# 进程内共享的默认重试引擎
+default_engine = RetryEngine()
+
+
+def enable_sdk_retry(engine: Optional[RetryEngine] = None):
+    """让进程内所有SDK ApiClient的调用经过重试引擎，可重复调用"""
+    use_middleware((engine or default_engine).middleware)
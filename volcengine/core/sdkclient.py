@@ -0,0 +1,249 @@
+import atexit
+import hashlib
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from volcenginesdkcore import ApiClient, Configuration
+
+from configs.api_config import api_config
+from metrics import enable_sdk_metrics
+from retry import enable_sdk_retry
+
+logger = logging.getLogger(__name__)
+
+'''
+相互独立的SDK客户端
+
+Configuration.set_default会修改进程全局状态，不同区域、不同账号的管理器无法同时存在，
+也不能在多线程中安全使用。这里为每个管理器创建独立的Configuration和ApiClient：
+
+    api_client = new_api_client(region='cn-beijing')
+    redis_api = volcenginesdkredis.REDISApi(api_client)
+
+所有ApiClient共享同一组urllib3连接池（按TLS、代理、超时等设置区分），
+同一进程内驱动多个区域、多个账号时不会为每个客户端重复建立连接。
+
+导入本模块时注册所有SDK ApiClient共用的全局中间件（重试、指标），管理器和脚本不需要再各自调用；
+之后注册的限流等中间件位于重试内层，每次重试都会重新经过。这里创建的客户端都关闭了SDK自带的
+重试（Configuration.auto_retry），RetryEngine是唯一的重试层。
+
+不需要独立客户端的地方通过进程级注册表复用已创建的对象，避免每次操作都重新构建：
+
+    vpc_api = get_api(volcenginesdkvpc.VPCApi, region='cn-beijing')
+    whitelist_manager = get_manager(RedisWhitelistManager, ak, sk, region)
+'''
+
+T = TypeVar('T')
+
+# 共享连接池的默认大小：每个主机的最大连接数、缓存的主机连接池数
+DEFAULT_POOL_MAXSIZE = 32
+DEFAULT_NUM_POOLS = 32
+
+_pools_lock = threading.Lock()
+_pools: Dict[Tuple, Any] = {}
+
+
+def enable_default_middlewares():
+    """注册所有SDK ApiClient共用的全局中间件：指标（最外层）和重试，可重复调用"""
+    enable_sdk_retry()
+    enable_sdk_metrics()
+
+
+enable_default_middlewares()
+
+
+def resolve_identity(ak: Optional[str] = None, sk: Optional[str] = None,
+                     region: Optional[str] = None) -> Tuple[str, str, str]:
+    """补全凭证和区域，未提供的取自api_config，使默认值与显式传入相同值时得到同一个键"""
+    return ak or api_config['ak'], sk or api_config['sk'], region or api_config['region']
+
+
+def new_configuration(ak: Optional[str] = None, sk: Optional[str] = None, region: Optional[str] = None,
+                      **options) -> Configuration:
+    """创建独立的Configuration，未提供的凭证和区域取自api_config
+
+    Args:
+        options: 其他Configuration属性，例如 host、scheme、connect_timeout
+    """
+    configuration = Configuration()
+    configuration.ak, configuration.sk, configuration.region = resolve_identity(ak, sk, region)
+    configuration.client_side_validation = True
+    configuration.connection_pool_maxsize = DEFAULT_POOL_MAXSIZE
+    configuration.num_pools = DEFAULT_NUM_POOLS
+    # 重试统一由RetryEngine中间件负责，SDK自带的重试会与之叠加，并且会重发不带ClientToken的写操作
+    configuration.auto_retry = False
+    for name, value in options.items():
+        setattr(configuration, name, value)
+    return configuration
+
+
+def _pool_key(pool_manager) -> Tuple:
+    proxy = getattr(pool_manager, 'proxy', None)
+    return (
+        type(pool_manager).__name__,
+        str(proxy) if proxy else None,
+        repr(sorted((getattr(pool_manager, 'proxy_headers', None) or {}).items())),
+        tuple(sorted((key, repr(value)) for key, value in pool_manager.connection_pool_kw.items())),
+    )
+
+
+def share_transport(api_client: ApiClient) -> ApiClient:
+    """让ApiClient使用共享连接池，设置相同的客户端共用同一个urllib3 PoolManager"""
+    rest_client = api_client.rest_client
+    key = _pool_key(rest_client.pool_manager)
+    with _pools_lock:
+        shared = _pools.get(key)
+        if shared is None:
+            _pools[key] = rest_client.pool_manager
+            return api_client
+    if shared is not rest_client.pool_manager:
+        rest_client.pool_manager.clear()
+        rest_client.pool_manager = shared
+    return api_client
+
+
+def new_api_client(configuration: Optional[Configuration] = None, ak: Optional[str] = None,
+                   sk: Optional[str] = None, region: Optional[str] = None, **options) -> ApiClient:
+    """创建使用共享连接池的独立ApiClient
+
+    Args:
+        configuration: 使用指定的Configuration；不提供时按其余参数调用new_configuration创建。
+            在别处创建的Configuration同样会关闭SDK自带的重试（auto_retry）
+    """
+    if configuration is None:
+        configuration = new_configuration(ak, sk, region, **options)
+    else:
+        configuration.auto_retry = False
+    return share_transport(ApiClient(configuration))
+
+
+def client_identity(api_client: ApiClient) -> Tuple[str, str, str]:
+    """返回ApiClient使用的(ak, sk, region)，用于创建同一账号、同一区域的其他管理器"""
+    configuration = api_client.configuration
+    return configuration.ak, configuration.sk, configuration.region
+
+
+def pool_stats() -> Dict[str, int]:
+    """共享连接池统计"""
+    with _pools_lock:
+        return {
+            'pool_managers': len(_pools),
+            'host_pools': sum(len(pool_manager.pools) for pool_manager in _pools.values()),
+        }
+
+
+def _secret_digest(sk: str) -> str:
+    return hashlib.sha256((sk or '').encode('utf-8')).hexdigest()[:16]
+
+
+class ClientRegistry:
+    """进程级客户端注册表
+
+    按(服务, 区域, 凭证)缓存SDK接口对象和管理器，多线程并发获取同一个键时只创建一次。
+    每个服务的接口对象使用独立的ApiClient（底层连接池仍然共享），
+    因此一个服务上安装的拦截器、缓存不会影响其他服务。
+    注册表中只保存SK的摘要，统计信息不包含凭证。
+    """
+
+    def __init__(self, api_client_factory: Callable[..., ApiClient] = new_api_client):
+        self._api_client_factory = api_client_factory
+        self._lock = threading.RLock()
+        self._entries: Dict[Tuple, Any] = {}
+        self._hits: Counter = Counter()
+        self._misses: Counter = Counter()
+
+    @staticmethod
+    def _key(kind: type, ak: str, sk: str, region: str) -> Tuple:
+        return kind, region, ak, _secret_digest(sk)
+
+    def _get_or_create(self, kind: type, identity: Tuple[str, str, str], factory: Callable[[], T]) -> T:
+        ak, sk, region = identity
+        key = self._key(kind, ak, sk, region)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._hits[kind.__name__] += 1
+            return entry
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = factory()
+                self._entries[key] = entry
+                self._misses[kind.__name__] += 1
+                logger.debug(f"创建客户端 {kind.__name__} (区域: {region})")
+            else:
+                self._hits[kind.__name__] += 1
+        return entry
+
+    def get_api(self, api_class: Type[T], ak: Optional[str] = None, sk: Optional[str] = None,
+                region: Optional[str] = None) -> T:
+        """获取SDK接口对象，例如 get_api(volcenginesdkvpc.VPCApi, region='cn-beijing')"""
+        identity = resolve_identity(ak, sk, region)
+        return self._get_or_create(api_class, identity,
+                                   lambda: api_class(self._api_client_factory(None, *identity)))
+
+    def get_manager(self, manager_class: Type[T], ak: Optional[str] = None, sk: Optional[str] = None,
+                    region: Optional[str] = None) -> T:
+        """获取管理器实例，管理器类需要接受(ak, sk, region)参数"""
+        identity = resolve_identity(ak, sk, region)
+        return self._get_or_create(manager_class, identity, lambda: manager_class(*identity))
+
+    def stats(self) -> Dict[str, Any]:
+        """按服务统计缓存的对象数、命中和创建次数，并附带共享连接池统计"""
+        with self._lock:
+            clients = Counter(key[0].__name__ for key in self._entries)
+            services = {
+                name: {'clients': clients.get(name, 0), 'hits': self._hits[name], 'created': self._misses[name]}
+                for name in sorted(set(clients) | set(self._hits) | set(self._misses))
+            }
+        return {'services': services, 'pools': pool_stats()}
+
+    def close(self):
+        """释放所有缓存的对象；之后再获取会重新创建"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            api_client = getattr(entry, 'api_client', None)
+            if isinstance(api_client, ApiClient) and api_client._pool is not None:
+                api_client._pool.close()
+                api_client._pool.join()
+                api_client._pool = None
+        if entries:
+            logger.debug(f"已释放 {len(entries)} 个缓存的客户端")
+
+
+def close_pools():
+    """关闭并丢弃共享连接池中的空闲连接"""
+    with _pools_lock:
+        pool_managers = list(_pools.values())
+        _pools.clear()
+    for pool_manager in pool_managers:
+        pool_manager.clear()
+
+
+default_registry = ClientRegistry()
+
+
+def get_api(api_class: Type[T], ak: Optional[str] = None, sk: Optional[str] = None,
+            region: Optional[str] = None) -> T:
+    """从默认注册表获取SDK接口对象"""
+    return default_registry.get_api(api_class, ak, sk, region)
+
+
+def get_manager(manager_class: Type[T], ak: Optional[str] = None, sk: Optional[str] = None,
+                region: Optional[str] = None) -> T:
+    """从默认注册表获取管理器实例"""
+    return default_registry.get_manager(manager_class, ak, sk, region)
+
+
+def registry_stats() -> Dict[str, Any]:
+    """默认注册表统计"""
+    return default_registry.stats()
+
+
+@atexit.register
+def _shutdown():
+    default_registry.close()
+    close_pools()
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from middleware import APICall, use as use_middleware
+from cache import READ_PREFIXES, canonical_params, clone_response
+
+logger = logging.getLogger(__name__)
+
+'''
+并发相同读请求合并（singleflight）
+
+多个线程同时发起参数完全相同的只读请求时，只有第一个请求真正发出，
+其余请求等待并共享它的结果（或异常）。请求结束后立即移除，不做任何缓存，
+因此不会读到比"发起时刻"更旧的数据。
+
+    enable_sdk_singleflight()        # 对所有SDK ApiClient生效，调用方代码无需修改
+'''
+
+
+class _Flight:
+    """一次正在进行中的请求"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """按键合并并发调用
+
+    Args:
+        read_prefixes: 视为只读、可以合并的接口前缀
+    """
+
+    def __init__(self, read_prefixes: Iterable[str] = READ_PREFIXES):
+        self.read_prefixes = tuple(read_prefixes)
+        self.calls = 0
+        self.shared = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._async_flights: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """执行func，若同一个key的调用正在进行则等待并共享其结果"""
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            # 每个等待者拿到独立副本，避免互相修改
+            return clone_response(flight.result)
+
+        try:
+            flight.result = func()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def do_async(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """do的异步版本，func为协程函数，只在同一个事件循环内合并"""
+        future = self._async_flights.get(key)
+        self.calls += 1
+        if future is not None:
+            self.shared += 1
+            return clone_response(await asyncio.shield(future))
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_flights[key] = future
+        try:
+            result = await func()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待者时避免"异常未被获取"的警告
+            future.exception()
+            raise
+        finally:
+            del self._async_flights[key]
+
+    def is_read(self, action: str) -> bool:
+        return action.startswith(self.read_prefixes)
+
+    @staticmethod
+    def make_key(call: APICall) -> tuple:
+        return (call.account or '', call.region or '', call.service.lower(), call.action,
+                canonical_params(call.params), call.raw)
+
+    def middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """同步中间件，用于APIClient和SDK ApiClient"""
+        if not self.is_read(call.action):
+            return proceed()
+        return self.do(self.make_key(call), proceed)
+
+    async def async_middleware(self, call: APICall, proceed: Callable[[], Any]) -> Any:
+        """异步中间件，用于AsyncAPIClient"""
+        if not self.is_read(call.action):
+            return await proceed()
+        return await self.do_async(self.make_key(call), proceed)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'calls': self.calls, 'shared': self.shared}
+
+
+# 进程内共享的默认实例
+default_singleflight = SingleFlight()
+
+
+def enable_sdk_singleflight(singleflight: Optional[SingleFlight] = None) -> SingleFlight:
+    """让进程内所有SDK ApiClient的并发相同读请求合并，可重复调用
+
+    放在全局中间件链的最前面，等待者共享的是经过重试后的最终结果。
+    """
+    singleflight = singleflight or default_singleflight
+    use_middleware(singleflight.middleware, first=True)
+    return singleflight
@@ -0,0 +1,315 @@
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence
+
+from cache import default_cache
+from paginator import FieldGetter, Paginator, get_field
+from polling import FixedSchedule
+
+logger = logging.getLogger(__name__)
+
+'''
+批量状态等待器
+
+每个wait_for_*循环只轮询一个实例，而且多数要拉取整个实例列表才能找到一个ID，
+同时创建20个实例就是每30秒20次全量列表查询。BatchWaiter把等待登记为
+(服务, 实例ID, 目标状态)，后台线程每个周期对每个服务只发一次列表或批量查询，
+再逐个判断登记的实例：
+
+    fetch = lambda ids: list_statuses(fetch_page, PageNumberPaging(100, total='total'), 'instances', ids)
+    futures = [default_waiter.wait_for(('redis', ak, region), fetch, instance_id, 'Running') for instance_id in ids]
+    futures[0].result()          # 达到目标状态时返回状态，失败、超时时抛出WaitError
+
+    default_waiter.wait_all(('redis', ak, region), fetch, ids, 'Running')   # {实例ID: 是否就绪}
+
+fetch接收实例ID列表，返回{实例ID: 当前状态}，查不到的实例不出现在结果中。
+每个等待可以指定自己的轮询调度（polling.AdaptiveSchedule），服务在最早需要查询的时刻发出查询。
+'''
+
+
+class WaitError(Exception):
+    """等待失败：进入失败状态、超时、实例不存在或连续查询出错
+
+    Attributes:
+        instance_id: 实例ID
+        reason: failed、timeout、missing 或 error
+        status: 最后一次查询到的状态
+    """
+
+    def __init__(self, instance_id: str, reason: str, status: Any = None, message: str = ''):
+        self.instance_id = instance_id
+        self.reason = reason
+        self.status = status
+        super().__init__(message or f"等待实例 {instance_id} 失败: {reason} (状态: {status})")
+
+
+class _Waiter:
+    """一个登记中的等待"""
+    __slots__ = ('instance_id', 'target_statuses', 'failure_statuses', 'deadline', 'fail_if_missing',
+                 'schedule', 'started', 'next_check', 'future', 'status')
+
+    def __init__(self, instance_id, target_statuses, failure_statuses, deadline, fail_if_missing, schedule,
+                 started, next_check):
+        self.instance_id = instance_id
+        self.target_statuses = target_statuses
+        self.failure_statuses = failure_statuses
+        self.deadline = deadline
+        self.fail_if_missing = fail_if_missing
+        self.schedule = schedule
+        self.started = started
+        self.next_check = next_check
+        self.future: Future = Future()
+        self.status = None
+
+
+class _Source:
+    """一个服务（账号、区域）的查询函数和登记在它下面的等待"""
+    __slots__ = ('fetch', 'next_poll', 'last_poll', 'errors', 'waiters')
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.next_poll = 0.0
+        self.last_poll = float('-inf')
+        self.errors = 0
+        self.waiters: List[_Waiter] = []
+
+
+def _as_set(statuses) -> frozenset:
+    if statuses is None:
+        return frozenset()
+    if isinstance(statuses, str):
+        return frozenset([statuses])
+    return frozenset(statuses)
+
+
+def list_statuses(fetch_page: Callable[[Dict[str, Any]], Any], paging, items: FieldGetter,
+                  instance_ids: Iterable[str], id_field: FieldGetter = 'instance_id',
+                  status_field: FieldGetter = 'status') -> Dict[str, Any]:
+    """分页列出实例并收集指定实例的状态，全部找到后不再翻页
+
+    Args:
+        fetch_page: 接收分页参数、返回一页响应的函数，与Paginator相同
+        paging: 分页方式
+        items: 响应中实例列表的字段
+    """
+    wanted = set(instance_ids)
+    statuses = {}
+    # 不预取：全部找到后提前结束，且预取线程不在调用方的缓存跳过范围内
+    for item in Paginator(fetch_page, paging, items, prefetch=False):
+        instance_id = get_field(item, id_field)
+        if instance_id in wanted:
+            statuses[instance_id] = get_field(item, status_field)
+            if len(statuses) == len(wanted):
+                break
+    return statuses
+
+
+class BatchWaiter:
+    """合并多个实例状态等待的后台轮询服务
+
+    每个等待按自己的调度（固定间隔或AdaptiveSchedule）决定下一次需要查询的时间，
+    同一服务在最早需要查询的时刻发一次请求，顺带检查该服务下的所有等待。
+
+    Args:
+        interval: 默认轮询间隔（秒）
+        max_errors: 同一服务连续查询出错多少次后，让该服务下的全部等待失败
+        min_gap: 同一服务两次查询之间的最小间隔（秒），用于合并短时间内陆续登记的等待
+        clock: 时钟函数
+    """
+
+    def __init__(self, interval: float = 30.0, max_errors: int = 3, min_gap: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self.max_errors = max_errors
+        self.min_gap = min_gap
+        self.clock = clock
+        self._sources: Dict[Hashable, _Source] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = Counter()
+
+    def wait_for(self, key: Hashable, fetch: Callable[[List[str]], Dict[str, Any]], instance_id: str,
+                 target_status: Any, failure_statuses: Any = None, timeout: float = 1800,
+                 interval: Optional[float] = None, schedule=None, initial_delay: float = 0,
+                 fail_if_missing: bool = False) -> Future:
+        """登记一个等待，返回Future
+
+        Args:
+            key: 服务标识，同一个key的等待合并为一次查询，例如 ('redis', ak, region)
+            fetch: 查询函数，接收实例ID列表，返回{实例ID: 状态}；同一个key使用第一次登记的函数
+            target_status: 目标状态，可以是多个
+            failure_statuses: 失败状态，进入这些状态时立即结束等待
+            interval: 固定轮询间隔，未提供schedule时使用
+            schedule: 轮询调度，例如 polling.AdaptiveSchedule
+            initial_delay: 第一次查询前的延迟
+            fail_if_missing: 查询结果中没有该实例时立即失败
+
+        Returns:
+            Future: 达到目标状态时结果为该状态，否则为WaitError异常
+        """
+        now = self.clock()
+        if schedule is None:
+            schedule = FixedSchedule(self.interval if interval is None else interval)
+        waiter = _Waiter(instance_id, _as_set(target_status), _as_set(failure_statuses), now + timeout,
+                         fail_if_missing, schedule, now, now + initial_delay)
+        with self._condition:
+            source = self._sources.get(key)
+            if source is None:
+                source = self._sources[key] = _Source(fetch)
+            source.waiters.append(waiter)
+            self._schedule(source)
+            self._stats['registered'] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='volc-batch-waiter', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return waiter.future
+
+    def wait_all(self, key: Hashable, fetch: Callable[[List[str]], Dict[str, Any]], instance_ids: Sequence[str],
+                 target_status: Any, schedule_for: Optional[Callable[[str], Any]] = None,
+                 **options) -> Dict[str, bool]:
+        """登记多个等待并阻塞到全部结束，返回{实例ID: 是否达到目标状态}，失败原因写入日志
+
+        Args:
+            schedule_for: 为每个实例创建轮询调度的函数，例如按实例规格创建AdaptiveSchedule
+        """
+        futures = {}
+        for instance_id in dict.fromkeys(instance_ids):
+            if schedule_for is not None:
+                options['schedule'] = schedule_for(instance_id)
+            futures[instance_id] = self.wait_for(key, fetch, instance_id, target_status, **options)
+        results = {}
+        for instance_id, future in futures.items():
+            try:
+                status = future.result()
+                logger.info(f"实例 {instance_id} 已达到目标状态: {status}")
+                results[instance_id] = True
+            except WaitError as e:
+                logger.error(str(e))
+                results[instance_id] = False
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        """登记、查询和结束的次数，以及当前等待中的数量"""
+        with self._condition:
+            stats = dict(self._stats)
+            stats['pending'] = sum(len(source.waiters) for source in self._sources.values())
+        return stats
+
+    def _schedule(self, source: _Source):
+        """服务的下一次查询时间：最早需要查询的等待，且与上一次查询至少间隔min_gap"""
+        if source.waiters:
+            source.next_poll = max(min(waiter.next_check for waiter in source.waiters),
+                                   source.last_poll + self.min_gap)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = self.clock()
+                    for source in list(self._sources.values()):
+                        self._expire(source, list(source.waiters))
+                    self._drop_finished()
+                    if not self._sources:
+                        self._thread = None
+                        return
+                    due = [(key, source) for key, source in self._sources.items() if source.next_poll <= now]
+                    if due:
+                        break
+                    wake = min(min(source.next_poll, *(w.deadline for w in source.waiters))
+                               for source in self._sources.values())
+                    self._condition.wait(max(0.0, wake - now))
+                for _, source in due:
+                    # 查询进行中不再重复调度，查询结束后按各等待的调度重新计算
+                    source.next_poll = float('inf')
+                    source.last_poll = now
+                batches = [(key, source, list(source.waiters)) for key, source in due]
+            for key, source, waiters in batches:
+                self._poll(key, source, waiters)
+                with self._condition:
+                    self._schedule(source)
+
+    def _drop_finished(self):
+        """移除已结束（包括调用方取消）的等待和没有等待的服务"""
+        for key, source in list(self._sources.items()):
+            source.waiters = [w for w in source.waiters if not w.future.done()]
+            if not source.waiters:
+                del self._sources[key]
+
+    def _poll(self, key: Hashable, source: _Source, waiters: List[_Waiter]):
+        instance_ids = list(dict.fromkeys(waiter.instance_id for waiter in waiters))
+        self._stats['polls'] += 1
+        try:
+            # 轮询需要最新状态，跳过响应缓存
+            with default_cache.bypass():
+                statuses = source.fetch(instance_ids)
+            source.errors = 0
+        except Exception as e:
+            source.errors += 1
+            self._stats['poll_errors'] += 1
+            logger.warning(f"查询 {key} 下 {len(instance_ids)} 个实例的状态时出错({source.errors}/{self.max_errors}): {e}")
+            if source.errors >= self.max_errors:
+                for waiter in waiters:
+                    self._finish(source, waiter, WaitError(waiter.instance_id, 'error', waiter.status, str(e)))
+                return
+            now = self.clock()
+            for waiter in waiters:
+                waiter.next_check = now + waiter.schedule.error_delay(source.errors)
+            self._expire(source, waiters)
+            return
+
+        for waiter in waiters:
+            found = waiter.instance_id in statuses
+            waiter.status = statuses.get(waiter.instance_id)
+            if waiter.status in waiter.target_statuses:
+                self._finish(source, waiter, waiter.status)
+            elif waiter.status in waiter.failure_statuses:
+                self._finish(source, waiter, WaitError(waiter.instance_id, 'failed', waiter.status))
+            elif not found and waiter.fail_if_missing:
+                self._finish(source, waiter, WaitError(waiter.instance_id, 'missing'))
+        pending = [waiter for waiter in waiters if not waiter.future.done()]
+        now = self.clock()
+        for waiter in pending:
+            # 本次查询已拿到所有等待的最新状态，顺带查询到的等待也从现在起重新调度，
+            # 陆续登记的等待因此对齐到同一次查询
+            waiter.next_check = now + waiter.schedule.next_delay(now - waiter.started)
+        if pending:
+            logger.info(f"{key}: {len(waiters) - len(pending)} 个实例已结束等待，"
+                        f"{len(pending)} 个仍在等待: "
+                        + ', '.join(f"{waiter.instance_id}={waiter.status}" for waiter in pending[:10]))
+        self._expire(source, pending)
+
+    def _expire(self, source: _Source, waiters: List[_Waiter]):
+        now = self.clock()
+        for waiter in waiters:
+            if not waiter.future.done() and now >= waiter.deadline:
+                self._finish(source, waiter, WaitError(waiter.instance_id, 'timeout', waiter.status))
+
+    def _finish(self, source: _Source, waiter: _Waiter, outcome):
+        succeeded = not isinstance(outcome, WaitError)
+        with self._condition:
+            if waiter in source.waiters:
+                source.waiters.remove(waiter)
+            self._stats['succeeded' if succeeded else 'failed'] += 1
+        if waiter.future.done():
+            return
+        try:
+            waiter.schedule.finished(waiter.instance_id, self.clock() - waiter.started, succeeded)
+        except Exception as e:
+            logger.warning(f"记录实例 {waiter.instance_id} 的等待耗时失败: {e}")
+        if succeeded:
+            waiter.future.set_result(outcome)
+        else:
+            waiter.future.set_exception(outcome)
+
+
+def service_key(service: str, api_client) -> tuple:
+    """按服务、账号和区域生成等待器的key"""
+    configuration = api_client.configuration
+    return service, configuration.ak, configuration.region
+
+
+default_waiter = BatchWaiter()
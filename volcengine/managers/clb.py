@@ -5,12 +5,13 @@ import json
 import logging
 import time
 from typing import Dict, List, Optional, Union, Any
-from functools import wraps
 from volcenginesdkcore.rest import ApiException
 from volcenginesdkcore import Configuration
 import volcenginesdkclb
 from volcenginesdkclb import CLBApi, DescribeLoadBalancersRequest
 from configs.api_config import api_config
+from sdkclient import new_api_client, new_configuration
+from rawjson import call_raw
 from configs.clb_configs import clb_configs
 
 # 配置日志
@@ -20,44 +21,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def retry_on_failure(max_retries: int = 3, delay: int = 1):
-    """重试装饰器"""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except ApiException as e:
-                    if attempt == max_retries - 1:
-                        raise
-                    logger.warning(f"尝试 {attempt + 1}/{max_retries} 失败: {str(e)}")
-                    time.sleep(delay)
-            return None
-        return wrapper
-    return decorator
-
 class CLBManager:
     """负载均衡资源管理器"""
 
-    def __init__(self):
+    def __init__(self, ak=None, sk=None, region=None):
         """初始化CLB管理器"""
-        self.config = self._init_config()
-        self.client = CLBApi()
+        self.config = self._init_config(ak, sk, region)
+        self.client = CLBApi(new_api_client(self.config))
         self._load_balancer_cache = {}
         self._cache_timeout = 300  # 缓存超时时间（秒）
         self._last_cache_update = 0
 
-    def _init_config(self) -> Configuration:
-        """初始化配置"""
-        config = Configuration()
-        config.ak = os.getenv('volcAK') or api_config['ak']
-        config.sk = os.getenv('volcSK') or api_config['sk']
-        config.region = os.getenv('Region', 'cn-shanghai') or api_config['region']
-        Configuration.set_default(config)
+    def _init_config(self, ak=None, sk=None, region=None) -> Configuration:
+        """初始化配置，只用于本管理器的ApiClient，不修改全局默认配置
+
+        重试、限流等由全局SDK中间件统一处理，方法上不再叠加重试装饰器
+        """
+        config = new_configuration(
+            ak=ak or os.getenv('volcAK'),
+            sk=sk or os.getenv('volcSK'),
+            region=region or os.getenv('Region', 'cn-shanghai'),
+        )
         return config
 
-    @retry_on_failure(max_retries=3, delay=2)
     def create_load_balancer(self, name: str, subnet_id: str, type: str = 'public',
                            load_balancer_spec: str = 'small_1', eip: Optional[Dict] = None,
                            address_ip_version: str = 'ipv4',
@@ -102,7 +88,6 @@ class CLBManager:
             logger.error(f'创建负载均衡实例失败：{str(e)}')
             raise
 
-    @retry_on_failure(max_retries=3, delay=1)
     def describe_load_balancers(self, load_balancer_ids: Optional[List[str]] = None) -> Dict[str, Any]:
         """查询负载均衡实例列表
 
@@ -123,8 +108,8 @@ class CLBManager:
             request = volcenginesdkclb.DescribeLoadBalancersRequest()
             if load_balancer_ids:
                 request.load_balancer_ids = load_balancer_ids
-            response = self.client.describe_load_balancers(request)
-            result = response.to_dict()
+            # 只读查询走原始JSON快速路径，to_dict()格式与SDK模型一致
+            result = call_raw(self.client.describe_load_balancers, request).to_dict()
             
             # 更新缓存
             if not load_balancer_ids:
@@ -141,7 +126,6 @@ class CLBManager:
         self._load_balancer_cache = {}
         self._last_cache_update = 0
 
-    @retry_on_failure(max_retries=3, delay=1)
     def modify_load_balancer_attributes(self, load_balancer_id: str,
                                       name: Optional[str] = None,
                                       description: Optional[str] = None) -> Dict[str, Any]:
@@ -169,7 +153,6 @@ class CLBManager:
             logger.error(f'修改负载均衡实例属性失败：{str(e)}')
             raise
 
-    @retry_on_failure(max_retries=3, delay=2)
     def delete_load_balancer(self, load_balancer_ids: Union[str, List[str]]) -> List[Dict[str, Any]]:
         """删除负载均衡实例
 
@@ -9,15 +9,19 @@ DNS操作工具模块
 - 记录导入导出
 """
 
-import os
 import json
 import logging
+import threading
 from typing import Dict, List, Any, Optional, Tuple, Union, NamedTuple
 from dataclasses import dataclass
 from pathlib import Path
 from enum import Enum
 from datetime import datetime
 from sign import APIConfig, APIClient, APIError
+from paginator import Paginator, PageNumberPaging
+from cache import default_cache
+from metrics import default_metrics
+from retry import default_engine
 from configs.api_config import api_config
 import argparse
 
@@ -104,19 +108,31 @@ class DNSRecord:
 
 class DNSConfig(APIConfig):
     """DNS API配置类"""
-    
+
+    SERVICE = 'DNS'
+    VERSION = '2018-08-01'
+    DEFAULT_REGION = 'cn-beijing'
+
     def __init__(self, ak: Optional[str] = None, sk: Optional[str] = None):
-        # 设置DNS服务的默认参数
-        os.environ.setdefault('Service', 'DNS')
-        os.environ.setdefault('Version', '2018-08-01')
-        os.environ.setdefault('Region', 'cn-beijing')
-        os.environ.setdefault('method', 'POST')
-        
         # 获取访问凭证
         self.volcAK, self.volcSK = get_credentials(ak, sk)
-        os.environ.setdefault('volcAK', self.volcAK)
-        os.environ.setdefault('volcSK', self.volcSK)
-        super().__init__()
+        super().__init__(ak=self.volcAK, sk=self.volcSK, region=self.DEFAULT_REGION)
+
+# 按访问凭证缓存的API客户端，APIClient.call是线程安全的，可以在线程间共享
+_clients: Dict[Tuple[str, str], APIClient] = {}
+_clients_lock = threading.Lock()
+
+def _get_client(ak: Optional[str] = None, sk: Optional[str] = None) -> APIClient:
+    """获取（必要时创建）与访问凭证对应的共享API客户端"""
+    key = get_credentials(ak, sk)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            # ListZones/ListRecords走共享缓存，创建/修改/删除记录时自动失效；缓存未命中的请求经过重试与熔断
+            client = APIClient(DNSConfig(*key), middlewares=[default_cache.middleware, default_metrics.middleware,
+                                                             default_engine.middleware])
+            _clients[key] = client
+        return client
 
 def get_credentials(ak: Optional[str] = None, sk: Optional[str] = None) -> Tuple[str, str]:
     """获取访问凭证
@@ -161,16 +177,10 @@ def _make_api_request(action: str, params: Dict[str, Any], region: str = "cn-bei
     Raises:
         DNSOperationError: 当API请求失败时
     """
-    if region:
-        os.environ['Region'] = region
-    
-    os.environ['Action'] = action
-    os.environ['API_PARAMS'] = json.dumps(params)
-    
     try:
-        config = DNSConfig(ak, sk)
-        client = APIClient(config)
-        response = client.send_request()
+        client = _get_client(ak, sk)
+        response = client.call(DNSConfig.SERVICE, action, DNSConfig.VERSION, params,
+                               region=region or DNSConfig.DEFAULT_REGION, method='POST')
         
         # 检查API响应中的错误
         if "ResponseMetadata" in response and "Error" in response["ResponseMetadata"]:
@@ -250,14 +260,39 @@ def get_zid_by_domain(domain: str, ak: Optional[str] = None, sk: Optional[str] =
         logger.error(f"根据域名获取ZID时出现异常: {str(e)}")
         return OperationResult(False, str(e), None)
 
-def list_records(zid: int, page_number: int = 1, page_size: int = 500, 
+def iter_records(zid: int, page_size: int = 500, ak: Optional[str] = None, sk: Optional[str] = None,
+                 region: str = "cn-beijing", **filters):
+    """逐条产出域名的全部解析记录，自动翻页并预取下一页
+    
+    Args:
+        zid: 域名ID
+        page_size: 每页记录数，默认为500
+        ak: 访问密钥ID，如果不提供则从api_config获取
+        sk: 访问密钥，如果不提供则从api_config获取
+        region: 区域，默认为cn-beijing
+        filters: 其他ListRecords查询参数，例如Host、Type
+        
+    Raises:
+        DNSOperationError: 当API请求失败时
+    """
+    return iter(_records_paginator(zid, page_size, ak, sk, region, filters))
+
+def _records_paginator(zid: int, page_size: int, ak: Optional[str], sk: Optional[str],
+                       region: str, filters: Dict[str, Any]) -> Paginator:
+    return Paginator(
+        lambda page: _make_api_request('ListRecords', {"ZID": zid, **filters, **page}, region, ak, sk),
+        PageNumberPaging(page_size, 'PageNumber', 'PageSize', total='Result.TotalCount'),
+        items='Result.Records'
+    )
+
+def list_records(zid: int, page_number: Optional[int] = None, page_size: int = 500, 
                 ak: Optional[str] = None, sk: Optional[str] = None, 
                 region: str = "cn-beijing") -> OperationResult:
     """获取域名记录列表
     
     Args:
         zid: 域名ID
-        page_number: 页码，默认为1
+        page_number: 页码，不提供时获取全部分页并合并到Result.Records中
         page_size: 每页记录数，默认为500
         ak: 访问密钥ID，如果不提供则从api_config获取
         sk: 访问密钥，如果不提供则从api_config获取
@@ -267,13 +302,23 @@ def list_records(zid: int, page_number: int = 1, page_size: int = 500,
         OperationResult: 操作结果
     """
     try:
-        params = {
-            "ZID": zid,
-            "PageNumber": page_number,
-            "PageSize": page_size,
-        }
-        response = _make_api_request('ListRecords', params, region, ak, sk)
-        return OperationResult(True, "成功获取域名记录列表", response)
+        if page_number is not None:
+            params = {
+                "ZID": zid,
+                "PageNumber": page_number,
+                "PageSize": page_size,
+            }
+            response = _make_api_request('ListRecords', params, region, ak, sk)
+            return OperationResult(True, "成功获取域名记录列表", response)
+
+        response = None
+        records = []
+        for page in _records_paginator(zid, page_size, ak, sk, region, {}).pages():
+            response = response or page
+            records.extend(page.get("Result", {}).get("Records") or [])
+        if response is not None and "Result" in response:
+            response = {**response, "Result": {**response["Result"], "Records": records}}
+        return OperationResult(True, f"成功获取域名记录列表，共 {len(records)} 条", response)
     except DNSOperationError as e:
         logger.error(f"获取域名记录列表失败: {str(e)}")
         return OperationResult(False, str(e))
@@ -1,15 +1,26 @@
 import time
 import os
+import re
+import json
+import hashlib
 import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from volcenginesdkcore.rest import ApiException
 import volcenginesdkecs
 import volcenginesdkcore
 import volcenginesdkvpc
 from configs.api_config import api_config
+from sdkclient import get_manager, new_api_client
 from configs.ecs_config import ecs_configs
 from eip_manager import EIPManager
 from instance_status_checker import InstanceStatusChecker
+from lookup import resource_lookup
+from paginator import NextTokenPaging, get_field, paginate
+from waiter import default_waiter, service_key
+from polling import AdaptiveSchedule
+from dag import client_token
 
 # 确保logs目录存在
 BASE_DIR = os.path.dirname(__file__)
@@ -29,6 +40,17 @@ if not logger.handlers:
     logger.addHandler(file_handler)
     logger.addHandler(console_handler)
 
+# 实例进入这些状态时不再等待
+FAILURE_STATUSES = ('ERROR',)
+
+# DeleteInstances单次请求最多包含的实例数
+DELETE_BATCH_SIZE = 100
+# 查询不到的实例视为已删除
+DELETED_STATUS = 'DELETED'
+
+# 只影响实例命名的配置字段，其余创建参数完全相同的配置可以合并为一次RunInstances
+NAMING_FIELDS = ('name', 'hostname', 'description', 'count')
+
 # 资源信息文件路径
 RESOURCE_INFO_FILE = os.path.join(log_dir, 'ecs_resource_info.md')
 
@@ -47,47 +69,67 @@ def handle_api_exception(func):
     return wrapper
 
 class ECSManager:
-    def __init__(self):
-        self._init_client()
-        self.ecs_api = volcenginesdkecs.ECSApi()
-        self.vpc_api = volcenginesdkvpc.VPCApi()
-        self.eip_manager = EIPManager()
-
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
+        self.ecs_api = volcenginesdkecs.ECSApi(self.api_client)
+        self.status_lookup = resource_lookup(self.ecs_api)
+        self.vpc_api = volcenginesdkvpc.VPCApi(self.api_client)
+        self.eip_manager = get_manager(EIPManager, ak, sk, region)
+
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     @handle_api_exception
     def get_existing_instance_by_name(self, instance_name):
-        """根据实例名称查找现有ECS实例"""
-        list_request = volcenginesdkecs.DescribeInstancesRequest()
-        list_response = self.ecs_api.describe_instances(list_request)
-        
-        if hasattr(list_response, 'Result') and hasattr(list_response.Result, 'Instances'):
-            for instance in list_response.Result.Instances:
-                if instance.InstanceName == instance_name:
-                    logger.info(f"找到已存在的ECS实例: {instance.InstanceId}")
-                    return instance.InstanceId, instance.InstanceName
+        """根据实例名称查找现有ECS实例，按InstanceName过滤后仍精确比对名称"""
+        for instance in self.list_instances(name=instance_name):
+            if instance.instance_name == instance_name:
+                logger.info(f"找到已存在的ECS实例: {instance.instance_id}")
+                return instance.instance_id, instance.instance_name
         return None, None
 
     @handle_api_exception
     def get_instance_by_id(self, instance_id):
-        """根据实例ID查找ECS实例"""
-        list_request = volcenginesdkecs.DescribeInstancesRequest()
-        list_response = self.ecs_api.describe_instances(list_request)
-        
-        if hasattr(list_response, 'Result') and hasattr(list_response.Result, 'Instances'):
-            for instance in list_response.Result.Instances:
-                if instance.InstanceId == instance_id:
-                    logger.info(f"找到指定的ECS实例ID: {instance_id}")
-                    return instance.InstanceId, instance.InstanceName
+        """根据实例ID查找ECS实例，按InstanceIds过滤查询"""
+        instance = self.status_lookup.find(instance_id)
+        if instance is not None:
+            logger.info(f"找到指定的ECS实例ID: {instance_id}")
+            return instance.instance_id, instance.instance_name
         logger.error(f"未找到指定的ECS实例ID: {instance_id}")
         return None, None
 
+    def _fetch_statuses(self, instance_ids):
+        """按实例ID批量查询状态，每100个实例一次DescribeInstances调用，供批量等待器使用"""
+        return self.status_lookup.statuses(instance_ids)
+
+    @handle_api_exception
+    def wait_for_instances_status(self, instance_ids, target_status="RUNNING", timeout=600, interval=100,
+                                  spec=None):
+        """等待多个ECS实例变为指定状态，同一账号、区域下的所有等待每个周期只查询一次
+
+        Args:
+            instance_ids: 实例ID列表
+            target_status: 目标状态，默认为"RUNNING"
+            timeout: 超时时间（秒）
+            interval: 没有历史耗时时的检查间隔（秒）
+            spec: 实例规格，按(服务与目标状态, 规格, 区域)的历史耗时安排查询
+
+        Returns:
+            dict: {实例ID: 是否达到目标状态}
+        """
+        history_key = (f"ecs:{target_status}", spec or '', self.api_client.configuration.region)
+        return InstanceStatusChecker.wait_for_instances_status(
+            service_key('ecs', self.api_client),
+            self._fetch_statuses,
+            instance_ids,
+            target_status=target_status,
+            timeout=timeout,
+            interval=interval,
+            failure_statuses=FAILURE_STATUSES,
+            schedule_for=lambda _: AdaptiveSchedule(history_key, fallback_interval=interval)
+        )
+
     @handle_api_exception
     def wait_for_instance_status(self, instance_id, target_status="RUNNING", timeout=600, interval=100):
         """等待ECS实例变为指定状态
@@ -98,24 +140,101 @@ class ECSManager:
             timeout: 超时时间（秒）
             interval: 检查间隔（秒）
         """
-        def status_check_func(api_client, instance_id):
-            list_request = volcenginesdkecs.DescribeInstancesRequest()
-            list_response = api_client.describe_instances(list_request)
-            if hasattr(list_response, 'instances'):
-                for instance in list_response.instances:
-                    if instance.instance_id == instance_id:
-                        return instance.status
+        return self.wait_for_instances_status([instance_id], target_status, timeout, interval)[instance_id]
 
+    def _run_instances_request(self, actual_config, count=1, suffix_index=None, client_token=None):
+        """按ECS配置构造RunInstances请求
+
+        Args:
+            actual_config: ECS配置
+            count: 创建数量
+            suffix_index: 有序后缀的起始序号，指定时实例名称和主机名由服务端添加有序后缀
+            client_token: 幂等令牌
+        """
+        # 将period_unit从字符串映射为整数值
+        period_unit_map = {"Month": 1, "Year": 2}
+        period_unit = period_unit_map.get(actual_config['period_unit'], 1)  # 默认使用1（月）
         
-        # 使用通用的实例状态检查器
-        return InstanceStatusChecker.wait_for_instance_status(
-            self.ecs_api, 
-            instance_id, 
-            target_status=target_status, 
-            timeout=timeout, 
-            interval=interval,
-            status_check_func=status_check_func
+        # 创建网络接口对象
+        req_network_interfaces = volcenginesdkecs.NetworkInterfaceForRunInstancesInput(
+            security_group_ids=actual_config['security_group_ids'],
+            subnet_id=actual_config['subnet_id']
         )
+        
+        # 创建卷对象
+        volumes = []
+        if 'volumes' in actual_config and actual_config['volumes']:
+            for volume in actual_config['volumes']:
+                req_volume = volcenginesdkecs.VolumeForRunInstancesInput(
+                    delete_with_instance=str(volume.get('delete_with_instance', True)).lower(),
+                    size=volume['size'],
+                    volume_type=volume.get('volume_type', 'ESSD_PL0')
+                )
+                volumes.append(req_volume)
+        
+        # 创建EIP对象
+        req_eip_address = None
+        if 'eip' in actual_config and actual_config['eip']:
+            req_eip_address = volcenginesdkecs.EipAddressForRunInstancesInput(
+                bandwidth_mbps=actual_config['eip'].get('bandwidth', 100),
+                charge_type="PayByTraffic" if actual_config['eip'].get('billing_type') == 3 else "PayByBandwidth",
+                isp=actual_config['eip'].get('isp', 'BGP'),
+                release_with_instance=True
+            )
+        
+        # 准备请求参数
+        request_params = {
+            'image_id': actual_config['image_id'],
+            'instance_type_id': actual_config['instance_type_id'],
+            'zone_id': actual_config['zone_id'],
+            'count': count,
+            'network_interfaces': [req_network_interfaces]
+        }
+        
+        # 添加EIP参数
+        if req_eip_address:
+            request_params['eip_address'] = req_eip_address
+        
+        # 添加其他参数
+        if 'name' in actual_config:
+            request_params['instance_name'] = actual_config['name']
+        if 'hostname' in actual_config:
+            request_params['hostname'] = actual_config['hostname']
+        if 'instance_charge_type' in actual_config:
+            request_params['instance_charge_type'] = actual_config['instance_charge_type']
+        if 'period' in actual_config:
+            request_params['period'] = actual_config['period']
+        if 'period_unit' in actual_config:
+            request_params['period_unit'] = actual_config['period_unit']
+        if 'description' in actual_config:
+            request_params['description'] = actual_config['description']
+        
+        # 添加密码参数 - 这是必需的
+        if 'password' in actual_config:
+            request_params['password'] = actual_config['password']
+        
+        # 添加其他缺失的参数
+        if 'auto_renew' in actual_config:
+            request_params['auto_renew'] = actual_config['auto_renew']
+        if 'auto_renew_period' in actual_config:
+            request_params['auto_renew_period'] = actual_config['auto_renew_period']
+        if 'user_data' in actual_config:
+            request_params['user_data'] = actual_config['user_data']
+        if 'install_run_command_agent' in actual_config:
+            request_params['install_run_command_agent'] = actual_config['install_run_command_agent']
+        if volumes:
+            request_params['volumes'] = volumes
+        if 'dry_run' in actual_config:
+            request_params['dry_run'] = actual_config['dry_run']
+        if suffix_index is not None:
+            # 一次创建多台时由服务端为实例名称和主机名添加有序后缀
+            request_params['unique_suffix'] = True
+            request_params['suffix_index'] = suffix_index
+        if client_token:
+            request_params['client_token'] = client_token
+
+        # 创建请求对象 - 使用构造函数传参方式
+        return volcenginesdkecs.RunInstancesRequest(**request_params)
 
     @handle_api_exception
     def create_instance(self, ecs_config):
@@ -149,91 +268,13 @@ class ECSManager:
                 logger.info(f"已存在同名ECS实例: {instance_id}")
                 return instance_id, instance_name, None
             
-            # 创建新的ECS实例
-            # 将period_unit从字符串映射为整数值
-            period_unit_map = {"Month": 1, "Year": 2}
-            period_unit = period_unit_map.get(actual_config['period_unit'], 1)  # 默认使用1（月）
-            
             # 打印配置信息以便调试
             logger.info(f"使用以下配置创建ECS实例:")
             logger.info(f"实例名称: {actual_config['name']}")
             logger.info(f"镜像ID: {actual_config['image_id']}")
             logger.info(f"实例类型: {actual_config['instance_type_id']}") 
             
-            # 创建网络接口对象
-            req_network_interfaces = volcenginesdkecs.NetworkInterfaceForRunInstancesInput(
-                security_group_ids=actual_config['security_group_ids'],
-                subnet_id=actual_config['subnet_id']
-            )
-            
-            # 创建卷对象
-            volumes = []
-            if 'volumes' in actual_config and actual_config['volumes']:
-                for volume in actual_config['volumes']:
-                    req_volume = volcenginesdkecs.VolumeForRunInstancesInput(
-                        delete_with_instance=str(volume.get('delete_with_instance', True)).lower(),
-                        size=volume['size'],
-                        volume_type=volume.get('volume_type', 'ESSD_PL0')
-                    )
-                    volumes.append(req_volume)
-            
-            # 创建EIP对象
-            req_eip_address = None
-            if 'eip' in actual_config and actual_config['eip']:
-                req_eip_address = volcenginesdkecs.EipAddressForRunInstancesInput(
-                    bandwidth_mbps=actual_config['eip'].get('bandwidth', 100),
-                    charge_type="PayByTraffic" if actual_config['eip'].get('billing_type') == 3 else "PayByBandwidth",
-                    isp=actual_config['eip'].get('isp', 'BGP'),
-                    release_with_instance=True
-                )
-            
-            # 准备请求参数
-            request_params = {
-                'image_id': actual_config['image_id'],
-                'instance_type_id': actual_config['instance_type_id'],
-                'zone_id': actual_config['zone_id'],
-                'count': 1,
-                'network_interfaces': [req_network_interfaces]
-            }
-            
-            # 添加EIP参数
-            if req_eip_address:
-                request_params['eip_address'] = req_eip_address
-            
-            # 添加其他参数
-            if 'name' in actual_config:
-                request_params['instance_name'] = actual_config['name']
-            if 'hostname' in actual_config:
-                request_params['hostname'] = actual_config['hostname']
-            if 'instance_charge_type' in actual_config:
-                request_params['instance_charge_type'] = actual_config['instance_charge_type']
-            if 'period' in actual_config:
-                request_params['period'] = actual_config['period']
-            if 'period_unit' in actual_config:
-                request_params['period_unit'] = actual_config['period_unit']
-            if 'description' in actual_config:
-                request_params['description'] = actual_config['description']
-            
-            # 添加密码参数 - 这是必需的
-            if 'password' in actual_config:
-                request_params['password'] = actual_config['password']
-            
-            # 添加其他缺失的参数
-            if 'auto_renew' in actual_config:
-                request_params['auto_renew'] = actual_config['auto_renew']
-            if 'auto_renew_period' in actual_config:
-                request_params['auto_renew_period'] = actual_config['auto_renew_period']
-            if 'user_data' in actual_config:
-                request_params['user_data'] = actual_config['user_data']
-            if 'install_run_command_agent' in actual_config:
-                request_params['install_run_command_agent'] = actual_config['install_run_command_agent']
-            if volumes:
-                request_params['volumes'] = volumes
-            if 'dry_run' in actual_config:
-                request_params['dry_run'] = actual_config['dry_run']
-            
-            # 创建请求对象 - 使用构造函数传参方式
-            request = volcenginesdkecs.RunInstancesRequest(**request_params)
+            request = self._run_instances_request(actual_config)
             print(request)
             
             # 发送创建请求
@@ -247,23 +288,105 @@ class ECSManager:
                 return None, None, None
             
             # 处理响应结果 - 适应不同的响应结构
-            instance_ids = response.get('instance_ids')
+            instance_ids = get_field(response, 'instance_ids')
             # print(instance_ids)
         
             if not instance_ids:
                 logger.error("响应中没有实例ID信息")
                 return None, None, None
                 
-            # 等待实例就绪
-            for instance_id in instance_ids:
-                if not self.wait_for_instance_status(instance_id, "RUNNING"):
-                    logger.error("ECS实例创建后未能及时就绪")
-                    return None, None, None
+            # 等待实例就绪，所有实例合并为一次批量查询
+            ready = self.wait_for_instances_status(instance_ids, "RUNNING", spec=actual_config['instance_type_id'])
+            if not ready or not all(ready.values()):
+                logger.error("ECS实例创建后未能及时就绪")
+                return None, None, None
+
+            return instance_ids[0], actual_config['name'], None
                 
         except Exception as e:
             logger.error(f"创建ECS实例时发生异常: {e}")
             return None, None, None
 
+    def _instances_by_name(self):
+        """分页列出全部实例，返回 {实例名称: [实例ID, ...]}"""
+        instances = {}
+        for instance in paginate(
+                lambda params: self.ecs_api.describe_instances(volcenginesdkecs.DescribeInstancesRequest(**params)),
+                NextTokenPaging(100), items='instances'):
+            instances.setdefault(instance.instance_name, []).append(instance.instance_id)
+        return instances
+
+    @handle_api_exception
+    def create_instances_batch(self, configs, timeout=600):
+        """按创建参数分组批量创建ECS实例
+
+        镜像、规格、可用区、子网、安全组等创建参数完全相同（只有名称、主机名、描述和数量不同）的配置
+        合并为一组，每组只发出一次RunInstances，数量为组内各配置count之和（默认为1）。数量大于1时
+        实例名称和主机名使用组内第一个配置的值，由服务端添加有序后缀。已存在同名（或同名加序号）
+        实例的组只补足差额，所有组的实例创建后合并等待。
+
+        Args:
+            configs: ECS配置列表
+            timeout: 等待实例运行的超时时间（秒）
+
+        Returns:
+            list: [{'instance_id': ..., 'instance_name': ..., 'eip_address': ...}]，只包含已运行的实例
+        """
+        # 幂等令牌混入本次运行的随机值：在DAG步骤中使用步骤令牌（恢复执行时不变），否则每次调用重新生成，
+        # 避免删除后再次创建时重复使用旧令牌、服务端返回已删除实例的结果
+        nonce = client_token('ecs-batch') or uuid.uuid4().hex
+        existing = self._instances_by_name()
+        pending = {}  # 实例规格 -> 实例ID列表
+        for group in group_by_shape(configs):
+            base = group[0]
+            count = sum(int(config.get('count', 1)) for config in group)
+            names = [config['name'] for config in group]
+            if len(set(names)) > 1:
+                logger.warning(f"配置 {', '.join(names)} 的创建参数相同，合并创建 {count} 台，"
+                               f"实例名称使用 {base['name']} 加序号")
+            suffixed = count > 1
+            instance_ids = matching_instances(existing, base['name'], suffixed)[:count]
+            missing = count - len(instance_ids)
+            if instance_ids:
+                logger.info(f"已存在 {len(instance_ids)} 台 {base['name']} 实例，需要新建 {max(missing, 0)} 台")
+            if missing > 0:
+                suffix_index = len(instance_ids) + 1 if suffixed else None
+                request = self._run_instances_request(
+                    base, count=missing, suffix_index=suffix_index,
+                    client_token=batch_token(base, count, len(instance_ids), nonce))
+                logger.info(f"发送ECS批量创建请求: {base['name']} x {missing}")
+                try:
+                    response = self.ecs_api.run_instances(request)
+                except ApiException as e:
+                    logger.error(f"批量创建ECS实例 {base['name']} 失败: {e}")
+                    continue
+                if base.get('dry_run', False):
+                    logger.info("这是一个dry_run请求，不会实际创建实例")
+                    continue
+                instance_ids += get_field(response, 'instance_ids', [])
+            pending.setdefault(base['instance_type_id'], []).extend(instance_ids)
+
+        if not pending:
+            return []
+        # 不同规格按各自的历史耗时安排查询，同一周期的查询由批量等待器合并
+        ready = {}
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = [executor.submit(self.wait_for_instances_status, instance_ids, "RUNNING", timeout, spec=spec)
+                       for spec, instance_ids in pending.items()]
+            for future in futures:
+                ready.update(future.result() or {})
+        running = [instance_id for instance_id, ok in ready.items() if ok]
+        failed = [instance_id for ids in pending.values() for instance_id in ids if not ready.get(instance_id)]
+        if failed:
+            logger.error(f"以下ECS实例未能及时就绪: {', '.join(failed)}")
+
+        found = self.status_lookup.find_all(running)
+        return [{
+            'instance_id': instance_id,
+            'instance_name': get_field(found.get(instance_id), 'instance_name'),
+            'eip_address': get_field(found.get(instance_id), 'eip_address.ip_address')
+        } for instance_id in running]
+
     @handle_api_exception
     def _associate_eip_to_instance(self, allocation_id, instance_id):
         """将EIP绑定到ECS实例
@@ -291,6 +414,91 @@ class ECSManager:
             logger.error(f"绑定EIP时发生异常: {e}")
             return False
 
+    def list_instances(self, name=None, tags=None, instance_ids=None):
+        """按条件分页列出全部ECS实例（NextToken分页）
+
+        Args:
+            name: 实例名称，按DescribeInstances的InstanceName条件过滤
+            tags: 标签条件 {标签键: 标签值或标签值列表}，值为None时只要求存在该标签
+            instance_ids: 实例ID列表
+
+        Returns:
+            list: SDK实例对象列表
+        """
+        params = {}
+        if name:
+            params['instance_name'] = name
+        if tags:
+            params['tag_filters'] = [
+                volcenginesdkecs.TagFilterForDescribeInstancesInput(key=key, values=_tag_values(value))
+                for key, value in tags.items()]
+        # InstanceIds单次最多100个
+        id_chunks = [instance_ids[start:start + 100] for start in range(0, len(instance_ids), 100)] \
+            if instance_ids else [None]
+        instances = []
+        for chunk in id_chunks:
+            request_params = dict(params, instance_ids=chunk) if chunk else params
+            instances += paginate(
+                lambda page: self.ecs_api.describe_instances(
+                    volcenginesdkecs.DescribeInstancesRequest(**request_params, **page)),
+                NextTokenPaging(100), items='instances')
+        return instances
+
+    def _fetch_deletion_statuses(self, instance_ids):
+        """查询删除中实例的状态，查询不到的实例返回DELETED_STATUS"""
+        statuses = self.status_lookup.statuses(instance_ids)
+        return {instance_id: statuses.get(instance_id, DELETED_STATUS) for instance_id in instance_ids}
+
+    def delete_instances_bulk(self, instance_ids, timeout=600, interval=10, wait=True):
+        """批量删除ECS实例并确认删除完成
+
+        实例ID按DELETE_BATCH_SIZE分批发出DeleteInstances，接口逐个返回的错误记为该实例删除失败；
+        请求成功的实例登记到批量等待器，每个周期一次查询确认它们从实例列表中消失。
+
+        Args:
+            instance_ids: 实例ID列表
+            timeout: 等待删除完成的超时时间（秒）
+            interval: 查询间隔（秒）
+            wait: 是否等待删除完成
+
+        Returns:
+            dict: {实例ID: (是否成功, 说明)}
+        """
+        instance_ids = list(dict.fromkeys(instance_ids))
+        outcomes = {}
+        accepted = []
+        for start in range(0, len(instance_ids), DELETE_BATCH_SIZE):
+            chunk = instance_ids[start:start + DELETE_BATCH_SIZE]
+            logger.info(f"发送批量删除请求: {len(chunk)} 个ECS实例")
+            try:
+                response = self.ecs_api.delete_instances(volcenginesdkecs.DeleteInstancesRequest(instance_ids=chunk))
+            except ApiException as e:
+                logger.error(f"批量删除ECS实例时发生异常: {e}")
+                for instance_id in chunk:
+                    outcomes[instance_id] = (False, f"删除请求失败: {e.reason or e.status}")
+                continue
+            errors = {}
+            for detail in get_field(response, 'operation_details', []):
+                error = get_field(detail, 'error')
+                if error is not None and (get_field(error, 'code') or get_field(error, 'message')):
+                    errors[get_field(detail, 'instance_id')] = f"{get_field(error, 'code', '')} {get_field(error, 'message', '')}".strip()
+            for instance_id in chunk:
+                if instance_id in errors:
+                    outcomes[instance_id] = (False, f"删除请求失败: {errors[instance_id]}")
+                else:
+                    accepted.append(instance_id)
+
+        if not wait:
+            outcomes.update({instance_id: (True, "已提交删除") for instance_id in accepted})
+            return outcomes
+        if accepted:
+            deleted = default_waiter.wait_all(
+                service_key('ecs:delete', self.api_client), self._fetch_deletion_statuses, accepted,
+                DELETED_STATUS, failure_statuses=FAILURE_STATUSES, timeout=timeout, interval=interval)
+            for instance_id in accepted:
+                outcomes[instance_id] = (True, "已删除") if deleted[instance_id] else (False, "等待删除完成超时或失败")
+        return outcomes
+
     @handle_api_exception
     def delete_instance(self, instance_id):
         """删除ECS实例
@@ -315,6 +523,39 @@ class ECSManager:
             logger.error(f"删除ECS实例时发生异常: {e}")
             return False
 
+def _tag_values(value):
+    if value is None:
+        return None
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def group_by_shape(configs):
+    """按创建参数分组（忽略NAMING_FIELDS中的字段），保持配置顺序"""
+    groups = {}
+    for config in configs:
+        shape = {key: value for key, value in config.items() if key not in NAMING_FIELDS}
+        shape['security_group_ids'] = sorted(shape.get('security_group_ids') or [])
+        groups.setdefault(json.dumps(shape, sort_keys=True, default=str), []).append(config)
+    return list(groups.values())
+
+
+def matching_instances(instances_by_name, name, suffixed):
+    """已存在的同名实例ID；suffixed为True时也包括名称为name加序号的实例"""
+    pattern = re.compile(re.escape(name) + (r'(?:[-_]?\d+)?' if suffixed else ''))
+    return [instance_id for instance_name, ids in sorted(instances_by_name.items())
+            if instance_name and pattern.fullmatch(instance_name) for instance_id in ids]
+
+
+def batch_token(config, count, existing, nonce):
+    """批量创建请求的幂等令牌：同一次运行中相同配置、数量和已有实例数的重试不会重复创建
+
+    Args:
+        nonce: 本次运行的随机值，不同运行的令牌不同
+    """
+    payload = json.dumps({'config': config, 'count': count, 'existing': existing, 'nonce': nonce},
+                         sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
 # 资源信息记录函数
 def write_resource_info(resources, operation_type):
     """记录资源信息到文件
@@ -340,8 +581,12 @@ def write_resource_info(resources, operation_type):
         logger.error(f"记录资源信息时发生错误: {e}")
 
 @handle_api_exception
-def create_instances():
-    """创建ECS实例"""
+def create_instances(batch=False):
+    """创建ECS实例
+
+    Args:
+        batch: 为True时按创建参数分组，每组一次RunInstances并合并等待（见ECSManager.create_instances_batch）
+    """
     # 检查ECS配置是否为空
     if not ecs_configs:
         logger.error("ECS配置为空，请检查配置文件")
@@ -352,31 +597,35 @@ def create_instances():
     
     # 遍历所有ECS配置
     created_instances = []
-    for ecs_name in ecs_configs:
-        logger.info(f"准备创建ECS实例: {ecs_name}")
-        config = ecs_configs[ecs_name]
-        logger.info(f"ECS配置信息:\n" + 
-                   f"- 实例类型: {config['instance_type_id']}\n" + 
-                   f"- 镜像ID: {config['image_id']}\n" + 
-                   f"- 可用区: {config['zone_id']}\n" + 
-                   f"- 名称: {config['name']}\n" + 
-                   f"- 主机名: {config['hostname']}\n" + 
-                   f"- 计费类型: {config['instance_charge_type']}\n" + 
-                   f"- 计费周期: {config['period']} {config['period_unit']}")
+    if batch:
+        logger.info(f"批量创建ECS实例: {', '.join(ecs_configs)}")
+        created_instances = ecs_manager.create_instances_batch(list(ecs_configs.values())) or []
+    else:
+        for ecs_name in ecs_configs:
+            logger.info(f"准备创建ECS实例: {ecs_name}")
+            config = ecs_configs[ecs_name]
+            logger.info(f"ECS配置信息:\n" + 
+                       f"- 实例类型: {config['instance_type_id']}\n" + 
+                       f"- 镜像ID: {config['image_id']}\n" + 
+                       f"- 可用区: {config['zone_id']}\n" + 
+                       f"- 名称: {config['name']}\n" + 
+                       f"- 主机名: {config['hostname']}\n" + 
+                       f"- 计费类型: {config['instance_charge_type']}\n" + 
+                       f"- 计费周期: {config['period']} {config['period_unit']}")
         
-        # 创建ECS实例
-        logger.info(f"开始创建ECS实例 {ecs_name}...")
-        instance_id, instance_name, eip_address = ecs_manager.create_instance(config)
-        if not instance_id:
-            logger.error(f"ECS实例 {ecs_name} 创建失败")
-            continue
+            # 创建ECS实例
+            logger.info(f"开始创建ECS实例 {ecs_name}...")
+            instance_id, instance_name, eip_address = ecs_manager.create_instance(config)
+            if not instance_id:
+                logger.error(f"ECS实例 {ecs_name} 创建失败")
+                continue
             
-        logger.info(f"成功创建ECS实例 {instance_name}:\n- 实例ID: {instance_id}\n- EIP地址: {eip_address if eip_address else '无'}")
-        created_instances.append({
-            'instance_id': instance_id,
-            'instance_name': instance_name,
-            'eip_address': eip_address
-        })
+            logger.info(f"成功创建ECS实例 {instance_name}:\n- 实例ID: {instance_id}\n- EIP地址: {eip_address if eip_address else '无'}")
+            created_instances.append({
+                'instance_id': instance_id,
+                'instance_name': instance_name,
+                'eip_address': eip_address
+            })
     
     # 输出创建结果汇总
     if created_instances:
@@ -389,91 +638,102 @@ def create_instances():
         logger.warning("没有成功创建任何ECS实例")
 
 @handle_api_exception
-def delete_instances(instance_ids=None):
-    """删除ECS实例
-    
+def delete_instances(instance_ids=None, name=None, tags=None, timeout=600, delete_all=False):
+    """批量删除ECS实例
+
     Args:
-        instance_ids: 要删除的ECS实例ID列表，如果为None，则尝试获取所有实例
-    
+        instance_ids: 要删除的ECS实例ID列表
+        name: 按实例名称筛选要删除的实例（精确匹配）
+        tags: 按标签筛选要删除的实例 {标签键: 标签值}
+        timeout: 等待删除完成的超时时间（秒）
+        delete_all: instance_ids、name、tags都未提供时必须为True，此时删除区域内的所有实例
+
     Returns:
-        bool: 操作是否成功
+        bool: 是否全部删除成功
     """
+    if not (instance_ids or name or tags or delete_all):
+        logger.error("未指定要删除的实例ID、名称或标签，拒绝删除；确实要删除所有实例时请指定 --all")
+        return False
+
     # 创建ECS管理器实例
     ecs_manager = ECSManager()
-    
-    # 如果未提供实例ID列表，则尝试获取所有实例
-    if not instance_ids:
-        try:
-            list_request = volcenginesdkecs.DescribeInstancesRequest()
-            list_response = ecs_manager.ecs_api.describe_instances(list_request)
-            
-            instance_ids = []
-            if hasattr(list_response, 'Result') and hasattr(list_response.Result, 'Instances'):
-                for instance in list_response.Result.Instances:
-                    instance_ids.append(instance.InstanceId)
-                    
-            if not instance_ids:
-                logger.warning("未找到任何ECS实例")
-                return False
-                
-            logger.info(f"找到 {len(instance_ids)} 个ECS实例")
-        except Exception as e:
-            logger.error(f"获取ECS实例列表时发生异常: {e}")
-            return False
-    
-    # 删除实例
-    deleted_instances = []
-    for instance_id in instance_ids:
-        # 获取实例信息
-        instance_id, instance_name = ecs_manager.get_instance_by_id(instance_id)
-        if not instance_id:
+
+    # 按ID、名称、标签分页查询要删除的实例
+    try:
+        instances = ecs_manager.list_instances(name=name, tags=tags, instance_ids=instance_ids)
+    except Exception as e:
+        logger.error(f"获取ECS实例列表时发生异常: {e}")
+        return False
+    if name:
+        # 名称过滤可能是模糊匹配，只删除名称完全相同的实例
+        instances = [instance for instance in instances if instance.instance_name == name]
+    names = {instance.instance_id: instance.instance_name for instance in instances}
+    for instance_id in instance_ids or []:
+        if instance_id not in names:
             logger.error(f"未找到ECS实例ID: {instance_id}")
-            continue
-            
-        # 检查是否有关联的EIP
-        eip_address = None
-        # 这里可以添加获取EIP的逻辑，如果需要的话
-        
-        # 删除ECS实例
-        logger.info(f"开始删除ECS实例 {instance_id}...")
-        if ecs_manager.delete_instance(instance_id):
-            logger.info(f"成功删除ECS实例: {instance_id}")
+    if not names:
+        logger.warning("未找到任何ECS实例")
+        return False
+    logger.info(f"找到 {len(names)} 个ECS实例，将删除以下实例:")
+    for instance_id, instance_name in names.items():
+        logger.info(f"  {instance_name} ({instance_id})")
+
+    logger.info("开始批量删除...")
+    outcomes = ecs_manager.delete_instances_bulk(list(names), timeout=timeout)
+
+    # 输出每个实例的删除结果
+    logger.info("\n=== ECS实例删除结果汇总 ===")
+    deleted_instances = []
+    for instance_id, instance_name in names.items():
+        ok, message = outcomes.get(instance_id, (False, "未处理"))
+        log = logger.info if ok else logger.error
+        log(f"ECS实例 {instance_name} ({instance_id}): {message}")
+        if ok:
             deleted_instances.append({
                 'instance_id': instance_id,
                 'instance_name': instance_name,
-                'eip_address': eip_address
+                'eip_address': None
             })
-        else:
-            logger.error(f"ECS实例 {instance_id} 删除失败")
-    
-    # 输出删除结果汇总
+
     if deleted_instances:
-        logger.info("\n=== ECS实例删除结果汇总 ===")
-        for instance in deleted_instances:
-            logger.info(f"已删除ECS实例 {instance['instance_name']}:\n- 实例ID: {instance['instance_id']}")
         # 记录删除结果
         write_resource_info(deleted_instances, "删除")
-        return True
     else:
         logger.warning("没有成功删除任何ECS实例")
-        return False
+    return len(deleted_instances) == len(names)
 
 # 如果需要，您可以在这里添加一个main函数，用于命令行调用
 if __name__ == "__main__":
     import sys
-    
+
+    usage = "用法: python ecs_manager.py [create [--batch]|delete [instance_ids...] [--name 名称] [--tag 键=值 ...] [--all]]"
     if len(sys.argv) < 2:
-        print("用法: python ecs_manager.py [create|delete] [instance_ids...]")
+        print(usage)
         sys.exit(1)
         
     command = sys.argv[1].lower()
     
     if command == "create":
-        create_instances()
+        create_instances(batch="--batch" in sys.argv[2:])
     elif command == "delete":
-        instance_ids = sys.argv[2:] if len(sys.argv) > 2 else None
-        delete_instances(instance_ids)
+        instance_ids, name, tags, delete_all = [], None, {}, False
+        args = iter(sys.argv[2:])
+        for arg in args:
+            if arg == "--all":
+                delete_all = True
+            elif arg == "--name":
+                name = next(args, None)
+            elif arg == "--tag":
+                key, _, value = next(args, "").partition("=")
+                tags[key] = value or None
+            else:
+                instance_ids.append(arg)
+        if not (instance_ids or name or tags or delete_all):
+            print("未指定要删除的实例ID、--name或--tag；删除区域内所有实例请使用 --all")
+            print(usage)
+            sys.exit(1)
+        delete_instances(instance_ids or None, name=name, tags=tags or None, delete_all=delete_all)
     else:
         print(f"未知命令: {command}")
-        print("用法: python ecs_manager.py [create|delete] [instance_ids...]")
-        sys.exit(1)
\ No newline at end of file
+        print(usage)
+        sys.exit(1)
@@ -6,6 +6,9 @@ from volcenginesdkcore.rest import ApiException
 import volcenginesdkvpc
 import volcenginesdkcore
 from configs.api_config import api_config
+from sdkclient import new_api_client
+from polling import AdaptiveSchedule, poll_until
+from lookup import resource_lookup
 from configs.eip_config import eip_configs
 
 # 确保logs目录存在
@@ -44,17 +47,14 @@ def handle_api_exception(func):
     return wrapper
 
 class EIPManager:
-    def __init__(self):
-        self._init_client()
-        self.vpc_api = volcenginesdkvpc.VPCApi()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
+        self.vpc_api = volcenginesdkvpc.VPCApi(self.api_client)
+        self.eip_lookup = resource_lookup(self.vpc_api, 'eip')
 
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     @handle_api_exception
     def get_existing_eip_by_name(self, eip_name):
@@ -100,27 +100,24 @@ class EIPManager:
         Args:
             allocation_id: EIP的分配ID
             timeout: 超时时间（秒）
-            interval: 检查间隔（秒）
+            interval: 没有历史就绪耗时时的检查间隔（秒）
         """
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            list_request = volcenginesdkvpc.DescribeEipAddressesRequest()
-            list_response = self.vpc_api.describe_eip_addresses(list_request)
-            
-            if hasattr(list_response, 'eip_addresses'):
-                for eip in list_response.eip_addresses:
-                    if eip.allocation_id == allocation_id and eip.status == "Available":
-                        logger.info(f"EIP {allocation_id} 已经就绪")
-                        return True
-                    
+        def available():
+            if self.eip_lookup.status(allocation_id) == "Available":
+                return True
             logger.info(f"等待EIP {allocation_id} 就绪中...")
-            time.sleep(interval)
+            return False
+
+        schedule = AdaptiveSchedule(('eip', '', self.vpc_api.api_client.configuration.region), fallback_interval=interval)
+        if poll_until(available, schedule, timeout, allocation_id):
+            logger.info(f"EIP {allocation_id} 已经就绪")
+            return True
         
         logger.error(f"等待EIP {allocation_id} 就绪超时")
         return False
 
     @handle_api_exception
-    def allocate_eip(self, eip_config):
+    def allocate_eip(self, eip_config, client_token=None):
         """
         申请EIP
         
@@ -128,6 +125,8 @@ class EIPManager:
             eip_config: 可以是eip_config.py中定义的EIP配置名称(字符串)，
                        也可以是直接在redis_configs.py中定义的完整EIP配置(字典)
         
+            client_token: 幂等令牌，重复提交同一令牌不会重复申请
+
         Returns:
             tuple: (eip_id, eip_address, eip_name)
         """
@@ -160,7 +159,8 @@ class EIPManager:
                     description=actual_config['description'],
                     project_name=actual_config['project_name'],
                     period_unit=period_unit,
-                    period=actual_config['period']
+                    period=actual_config['period'],
+                    client_token=client_token
                 )
 
                 response = self.vpc_api.allocate_eip_address(request)
@@ -196,7 +196,8 @@ class EIPManager:
                     description=actual_config['description'],
                     project_name=actual_config['project_name'],
                     period_unit=period_unit,
-                    period=actual_config['period']
+                    period=actual_config['period'],
+                    client_token=client_token
                 )
 
                 response = self.vpc_api.allocate_eip_address(request)
@@ -7,8 +7,14 @@ from volcenginesdkcore.rest import ApiException
 import volcenginesdkcore
 import volcenginesdkescloud
 from configs.api_config import api_config
+from sdkclient import client_identity, get_manager, new_api_client
+from waiter import default_waiter, service_key
+from lookup import resource_lookup
+from polling import AdaptiveSchedule, config_spec
 from vpc_manager import VPCManager
 from configs.escloud_configs import instance_configs
+from dag import client_token
+from provision import database_plan, run_plans
 
 # 确保logs目录存在
 log_dir = os.path.join(os.path.dirname(__file__), 'logs')
@@ -25,23 +31,27 @@ file_handler.setLevel(logging.INFO)
 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 logger.addHandler(file_handler)
 
+# 实例进入这些状态时不再等待
+FAILURE_STATUSES = ('CreateFailed', 'Error')
+
 class ESCloudManager:
-    def __init__(self):
-        self._init_client()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
         self.api = volcenginesdkescloud
-        self.client_api = self.api.ESCLOUDApi()
-        self.vpc_manager = VPCManager()
+        self.client_api = self.api.ESCLOUDApi(self.api_client)
+        self.status_lookup = resource_lookup(self.client_api)
         self.current_config = None
         self.max_retries = 3  # 最大重试次数
         self.retry_interval = 5  # 重试间隔（秒）
 
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    @property
+    def vpc_manager(self):
+        """VPC管理器，第一次使用时才创建，只查询实例时不加载VPC SDK"""
+        return get_manager(VPCManager, *client_identity(self.api_client))
+
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     def _validate_instance_config(self, instance_config):
         """验证实例配置的完整性和有效性"""
@@ -113,7 +123,7 @@ class ESCloudManager:
             logger.error(f"创建ESCloud实例时发生异常: {e}")
             return None
             
-    def create_instance_in_one_step(self, instance_config, vpc_id=None, subnet_id=None):
+    def create_instance_in_one_step(self, instance_config, vpc_id=None, subnet_id=None, client_token=None):
         """
         一步创建ESCloud实例，支持更丰富的配置选项
         参考Go SDK实现，支持多种节点类型和网络配置
@@ -213,7 +223,8 @@ class ESCloudManager:
             
             # 构建创建请求
             request = self.api.CreateInstanceInOneStepRequest(
-                instance_configuration=instance_configuration
+                instance_configuration=instance_configuration,
+                client_token=client_token
             )
             print(request)
             # 发送请求
@@ -255,33 +266,33 @@ class ESCloudManager:
             logger.error(f"删除实例时发生异常: {e}")
             return False
 
-    def wait_for_instance_ready(self, instance_id, timeout=1800, interval=30):
-        start_time = time.time()
-        while True:
-            try:
-                request = self.api.DescribeInstancesRequest()
-                response = self.client_api.describe_instances(request)
-                
-                for instance in response.instances:
-                    if instance.instance_id == instance_id:
-                        if instance.status == "Running":
-                            logger.info(f"实例 {instance_id} 已准备就绪")
-                            return True
-                        logger.info(f"实例 {instance_id} 当前状态: {instance.status}，等待 {interval} 秒后重试...")
-                        break
-                else:
-                    logger.warning(f"未找到实例 {instance_id}，可能正在创建中，等待 {interval} 秒后重试...")
-                
-                if time.time() - start_time > timeout:
-                    logger.error(f"等待实例 {instance_id} 就绪超时，已等待 {timeout} 秒")
-                    return False
-                    
-                time.sleep(interval)
-                
-            except ApiException as e:
-                logger.error(f"检查实例 {instance_id} 状态时发生错误: {e}")
-                return False
+    def _fetch_statuses(self, instance_ids):
+        """按实例ID查询多个实例的状态，供批量等待器使用"""
+        return self.status_lookup.statuses(instance_ids)
 
+    def wait_for_instances_ready(self, instance_ids, timeout=1800, interval=30, spec=None):
+        """
+        等待多个实例准备就绪，同一账号、区域下的所有等待每个周期只查询一次
+        :param instance_ids: 实例ID列表
+        :param timeout: 超时时间（秒）
+        :param interval: 没有历史就绪耗时时的检查间隔（秒）
+        :param spec: 实例规格，按(服务, 规格, 区域)的历史就绪耗时安排查询，默认取当前配置中的node_spec
+        :return: dict {实例ID: 是否就绪}
+        """
+        history_key = ('escloud', spec or config_spec(self.current_config, 'node_spec'), self.api_client.configuration.region)
+        return default_waiter.wait_all(service_key('escloud', self.api_client), self._fetch_statuses, instance_ids,
+                                       'Running', failure_statuses=FAILURE_STATUSES, timeout=timeout,
+                                       schedule_for=lambda _: AdaptiveSchedule(history_key, fallback_interval=interval))
+
+    def wait_for_instance_ready(self, instance_id, timeout=1800, interval=30):
+        """
+        等待实例准备就绪
+        :param instance_id: 实例ID
+        :param timeout: 超时时间（秒）
+        :param interval: 检查间隔（秒）
+        :return: bool 是否成功
+        """
+        return self.wait_for_instances_ready([instance_id], timeout, interval)[instance_id]
 
     def create_public_endpoint(self, instance_id, eip_id):
         try:
@@ -455,156 +466,45 @@ class ESCloudManager:
             logger.error(f"获取内网访问信息时发生异常: {e}")
             return None, None, None
             
-def main():
-    instance_manager = ESCloudManager()
-    vpc_manager = VPCManager()
-    subnet_id = None  # 初始化subnet_id变量
-
-    # 遍历所有PostgreSQL实例配置
-    for instance_config in instance_configs:
-        logger.info(f"\n开始创建实例: {instance_config['instance']['name']}")
-
-        # 1. 检查配置中是否已指定VPC和子网
-        if 'vpc_id' in instance_config['instance'] and 'subnet_id' in instance_config['instance']:
-            vpc_id = instance_config['instance']['vpc_id']
-            subnet_id = instance_config['instance']['subnet_id']
-            logger.info(f"使用配置中指定的VPC ID: {vpc_id} 和子网 ID: {subnet_id}")
-            instance_subnet_id = subnet_id
-        else:
-            # 创建VPC
-            vpc_id = vpc_manager.create_vpc(
-                vpc_name=instance_config['instance']['vpc']['name'],
-                cidr_block=instance_config['instance']['vpc']['cidr_block'],
-                description=instance_config['instance']['vpc']['description'],
-                tags=instance_config['instance']['vpc']['tags']
-            )
-            if not vpc_id:
-                logger.error("创建VPC失败")
-                continue
-
-            # 等待VPC就绪
-            if not vpc_manager.wait_for_vpc_available(vpc_id):
-                logger.error("VPC创建超时或失败")
-                continue
-
-            # 创建实例专用子网
-            subnet_config = instance_config['instance']['subnet']
-            subnet_id = vpc_manager.create_subnet(
-                vpc_id=vpc_id,
-                subnet_name=subnet_config['name'],
-                cidr_block=subnet_config['cidr_block'],
-                zone_id=subnet_config['zone_id'],
-                description=subnet_config.get('description'),
-                tags=subnet_config.get('tags')
-            )
-            if not subnet_id:
-                logger.error(f"创建子网 {subnet_config['name']} 失败")
-                continue
-
-            # 等待子网就绪
-            if not vpc_manager.wait_for_subnet_available(subnet_id):
-                logger.error(f"子网 {subnet_config['name']} 创建超时或失败")
-                continue
-
-            logger.info(f"子网 {subnet_config['name']} 创建成功，ID: {subnet_id}")
-            instance_subnet_id = subnet_id
-
-        if not instance_subnet_id:
-            logger.error("在实例指定可用区未找到或创建子网失败")
-            continue
-
-        # 3. 创建PostgreSQL实例
-        instance_id = instance_manager.create_instance_in_one_step(instance_config, vpc_id, subnet_id)
-        if not instance_id:
-            logger.error("创建实例失败")
-            continue
-
-        # 等待实例创建完成
-        logger.info("等待实例创建完成...")
-        if not instance_manager.wait_for_instance_ready(instance_id):
-            logger.error("实例创建超时或失败")
-            continue
-
-
-        # 5.1.  获取访问端点信息
-        es_private_endpoint, kibana_private_domain, kibana_public_domain = instance_manager.get_private_endpoint(instance_id)
-        if not es_private_endpoint:
-            logger.error("获取访问端点信息失败")
-            continue
-        
-        # 确保即使后续步骤失败，也会显示所有端点信息
-        logger.info(f"ES内网访问端点: {es_private_endpoint}")
-        if kibana_private_domain:
-            logger.info(f"Kibana内网访问端点: {kibana_private_domain}")
-        if kibana_public_domain:
-            logger.info(f"Kibana公网访问端点: {kibana_public_domain}")
-            
-        # 6. 创建白名单
-        try:
-            if not instance_manager.create_whitelist(instance_id, instance_config):
-                logger.error("创建白名单失败")
-                # 继续执行，不中断流程
-        except Exception as e:
-            logger.error(f"创建白名单时发生异常: {e}")
+def provision_plan(instance_config, ak=None, sk=None, region=None):
+    """ESCloud实例的创建步骤：一步创建实例，不申请EIP；白名单在实例就绪后设置，失败不影响流程"""
+    instance_manager = ESCloudManager(ak, sk, region)
+    vpc_manager = get_manager(VPCManager, ak, sk, region)
+    plan = database_plan(instance_manager, vpc_manager, instance_config,
+                         create_instance=lambda config, vpc_id, subnet_id: instance_manager.create_instance_in_one_step(
+                             config, vpc_id, subnet_id, client_token=client_token()),
+                         eip=False, whitelists=False)
+
+    plan.add('whitelist', lambda r: _create_whitelist(instance_manager, instance_config, r['instance']),
+             requires=['ready'])
+    plan.add('summary', lambda r: _log_instance(instance_config, r['private_endpoint']),
+             requires=['private_endpoint', 'whitelist'])
+    return plan
+
+
+def _create_whitelist(instance_manager, instance_config, instance_id):
+    try:
+        if not instance_manager.create_whitelist(instance_id, instance_config):
+            logger.error("创建白名单失败")
             # 继续执行，不中断流程
+    except Exception as e:
+        logger.error(f"创建白名单时发生异常: {e}")
+        # 继续执行，不中断流程
 
 
-
-        logger.info(f"成功完成实例 {instance_config['instance']['name']} 的所有操作！")
-        
-        # # 将实例信息写入日志文件，使用追加模式
-        # pg_instance_info_path = os.path.join(log_dir, 'escloud_instance_info.md')
-        # with open(pg_instance_info_path, 'a', encoding='utf-8') as f:
-        #     # 添加分隔符和时间戳
-        #     f.write(f"\n{'='*50}\n")
-        #     f.write(f"记录时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        #     f.write(f"# es实例创建记录\n\n")
-        #     f.write(f"## 实例信息\n")
-        #     f.write(f"- 实例ID: {instance_id}\n")
-        #     f.write(f"- 实例名称: {instance_config['instance']['name']}\n")
-        #     f.write(f"- 创建时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-        #     f.write(f"## 网络配置\n")
-        #     f.write(f"- VPC ID: {vpc_id}\n")
-        #     f.write(f"- 子网 ID: {subnet_id}\n")
-        #     f.write(f"- ES内网访问信息: {es_private_endpoint}\n")
-        #     f.write(f"- Kibana内网访问信息: {kibana_private_domain}\n")
-        #     f.write(f"- Kibana内网访问信息: {kibana_public_domain}\n")
+def _log_instance(instance_config, endpoints):
+    es_private_endpoint, kibana_private_domain, kibana_public_domain = endpoints
+    logger.info(f"ES内网访问端点: {es_private_endpoint}")
+    if kibana_private_domain:
+        logger.info(f"Kibana内网访问端点: {kibana_private_domain}")
+    if kibana_public_domain:
+        logger.info(f"Kibana公网访问端点: {kibana_public_domain}")
+    logger.info(f"成功完成实例 {instance_config['instance']['name']} 的所有操作！")
 
 
-
-        #     f.write(f"## 数据库配置\n")
-        #     f.write(f"- 数据库列表: {', '.join([db['name'] for db in instance_config['databases']])}\n\n")
-            
-        #     f.write(f"## 账号信息\n")
-        #     f.write(f"- 超级用户名: {instance_config['accounts'][0]['username']}\n")
-        #     f.write(f"- 超级用户密码: {instance_config['accounts'][0]['password']}\n")
-        #     f.write(f"- 普通用户名: {instance_config['accounts'][1]['username']}\n")
-        #     f.write(f"- 普通用户密码: {instance_config['accounts'][1]['password']}\n\n")
-            
-        #     f.write(f"## Schema配置\n")
-        #     for db in instance_config['databases']:
-        #         for schema in db['schemas']:
-        #             f.write(f"- {db['name']}.{schema['name']}\n")
-        #     f.write("\n")
-            
-        #     f.write(f"## 备份策略\n")
-        #     f.write(f"- 备份保留天数: {instance_config['backup']['retention_period']}天\n")
-        #     f.write(f"- 全量备份周期: {instance_config['backup']['full_backup_period']}\n")
-        #     f.write(f"- 全量备份时间: {instance_config['backup']['full_backup_time']}\n")
-        #     f.write(f"- 增量备份频率: {instance_config['backup']['increment_backup_frequency']}\n")
-        
-        # logger.info(f"PostgreSQL实例ID: {instance_id}")
-        # logger.info(f"VPC ID: {vpc_id}")
-        # logger.info(f"子网 ID: {subnet_id}")
-        # logger.info(f"EIP地址: {eip_address}")
-        # logger.info(f"公网访问: {address_domain}:{address_port}")
-        # logger.info(f"数据库列表: {', '.join([db['name'] for db in instance_config['databases']])}")
-        # logger.info(f"超级用户名: {instance_config['accounts'][0]['username']}")
-        # logger.info(f"超级用户密码: {instance_config['accounts'][0]['password']}")
-        # logger.info(f"普通用户名: {instance_config['accounts'][1]['username']}")
-        # logger.info(f"普通用户密码: {instance_config['accounts'][1]['password']}")
-        # logger.info(f"Schema列表: {', '.join([f"{db['name']}.{schema['name']}" for db in instance_config['databases'] for schema in db['schemas']])}")
+def main():
+    # 各实例配置的创建流程并发执行，结束时输出每个步骤的耗时
+    run_plans([provision_plan(instance_config) for instance_config in instance_configs])
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -18,6 +18,8 @@ import volcenginesdkcore
 import volcenginesdkiam
 from volcenginesdkcore.rest import ApiException
 from configs.api_config import api_config
+from sdkclient import new_api_client
+from paginator import Paginator, OffsetLimitPaging
 from configs.iam_config import USER_CONFIG, TEAM_GROUPS, DEFAULT_PASSWORD, SECRET_DIR
 import time
 
@@ -34,18 +36,14 @@ class IAMManager:
     用于管理火山引擎IAM用户和用户组的核心类，包含所有IAM相关操作。
     """
     
-    def __init__(self):
-        self._init_client()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
         self.api = volcenginesdkiam
-        self.client_api = self.api.IAMApi()
+        self.client_api = self.api.IAMApi(self.api_client)
 
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
     
     def create_user_groups(self) -> Dict:
         """创建用户组，如果用户组已存在则跳过创建
@@ -99,11 +97,8 @@ class IAMManager:
             try:
                 # 先检查用户是否已存在
                 try:
-                    list_users_request = self.api.ListUsersRequest(limit=1000)
-                    list_users_response = self.client_api.list_users(list_users_request)
-
                     user_exists = any(user.user_name == user_info["user_name"]
-                                    for user in list_users_response.user_metadata)
+                                    for user in self.iter_users())
                     
                     if user_exists:
                         logger.info(f"用户已存在，跳过创建: {user_info['display_name']}")
@@ -259,25 +254,33 @@ class IAMManager:
             logger.error(f"附加策略失败: {user_name} -> {policy_name}, 错误: {str(e)}")
             raise
             
-    def list_users(self, limit: int = 1000, offset: int = 0) -> List:
+    def iter_users(self, limit: int = 100, offset: int = 0):
+        """逐个产出IAM用户，自动翻页并预取下一页
+        
+        Args:
+            limit: 每页返回的最大数量，默认100
+            offset: 起始偏移量，默认0
+        """
+        return iter(Paginator(
+            lambda params: self.client_api.list_users(self.api.ListUsersRequest(**params)),
+            OffsetLimitPaging(limit=limit, total='total', start=offset),
+            items='user_metadata'
+        ))
+
+    def list_users(self, limit: int = 100, offset: int = 0) -> List:
         """获取所有IAM用户列表
         
         Args:
-            limit: 每页返回的最大数量，默认1000
-            offset: 分页偏移量，默认0
+            limit: 每页返回的最大数量，默认100
+            offset: 起始偏移量，默认0
             
         Returns:
             List: 用户列表
         """
         try:
-            list_users_request = self.api.ListUsersRequest(
-                limit=limit,
-                offset=offset
-            )
-            list_users_response = self.client_api.list_users(list_users_request)
-
-            logger.info(f"成功获取用户列表，共 {len(list_users_response.user_metadata)} 个用户")
-            return list_users_response.user_metadata
+            users = list(self.iter_users(limit, offset))
+            logger.info(f"成功获取用户列表，共 {len(users)} 个用户")
+            return users
         except Exception as e:
             logger.error(f"获取用户列表失败，错误: {str(e)}")
             raise
@@ -1,67 +1,78 @@
-import time
 import logging
-from volcenginesdkcore.rest import ApiException
+from singleflight import enable_sdk_singleflight
+from waiter import default_waiter, service_key
+from lookup import resource_lookup
 
 logger = logging.getLogger(__name__)
 
+# 多个等待者同时发出的相同状态查询只会真正请求一次
+enable_sdk_singleflight()
+
 class InstanceStatusChecker:
     @staticmethod
     def wait_for_instance_status(api_client, instance_id, target_status="Running", timeout=1800, interval=30,
-                                status_check_func=None, instance_id_field="instance_id", status_field="status"):
+                                status_check_func=None, instance_id_field=None, status_field=None):
         """
         通用的实例状态检查函数
+
+        登记到批量等待器（见wait_for_instances_status），同一服务、账号、区域下同时等待的实例
+        每个周期只查询一次，不再为每个实例单独轮询。
         
         Args:
-            api_client: API客户端实例
+            api_client: SDK接口对象，例如 REDISApi(api_client)
             instance_id (str): 实例ID
             target_status (str): 目标状态，默认为"Running"
             timeout (int): 超时时间（秒），默认1800秒
             interval (int): 检查间隔（秒），默认30秒
-            status_check_func: 自定义状态检查函数，用于处理不同服务的状态检查逻辑
-            instance_id_field (str): 实例ID字段名，默认为"instance_id"
-            status_field (str): 状态字段名，默认为"status"
+            status_check_func: 自定义状态检查函数(api_client, instance_id) -> 状态，用于处理不同服务的状态检查逻辑
+            instance_id_field (str): 实例ID字段名，默认按服务推断（lookup.LOOKUP_SPECS）
+            status_field (str): 状态字段名，默认按服务推断
             
         Returns:
             bool: 是否达到目标状态
         """
-        start_time = time.time()
-        while True:
-            try:
-                if status_check_func:
-                    # 使用自定义状态检查函数
-                    current_status = status_check_func(api_client, instance_id)
-                else:
-                    # 默认状态检查逻辑
-                    body = {
-                        "instance_ids": [instance_id]
-                    }
-                    response = api_client.describe_db_instances(body=body)
-                    current_status = None
-                    # 直接访问字典结构
-                    if isinstance(response, dict):
-                        if 'Result' in response and 'Instances' in response['Result']:
-                            for instance in response['Result']['Instances']:
-                                if instance.get(instance_id_field) == instance_id:
-                                    current_status = instance.get(status_field)
-                                    break
-                        elif 'Instances' in response:
-                            for instance in response['Instances']:
-                                if instance.get(instance_id_field) == instance_id:
-                                    current_status = instance.get(status_field)
-                                    break
-                
-                if current_status == target_status:
-                    logger.info(f"实例 {instance_id} 已达到目标状态: {target_status}")
-                    return True
-                    
-                logger.info(f"实例 {instance_id} 当前状态: {current_status}，等待 {interval} 秒后重试...")
-                
-                if time.time() - start_time > timeout:
-                    logger.error(f"等待实例 {instance_id} 状态超时，已等待 {timeout} 秒")
-                    return False
-                    
-                time.sleep(interval)
-                
-            except ApiException as e:
-                logger.error(f"检查实例 {instance_id} 状态时发生错误: {e}")
-                return False
\ No newline at end of file
+        client = getattr(api_client, 'api_client', api_client)
+        if status_check_func:
+            key = service_key(('custom', status_check_func), client)
+
+            def fetch(instance_ids):
+                return {pending_id: status_check_func(api_client, pending_id) for pending_id in instance_ids}
+        else:
+            options = {}
+            if instance_id_field:
+                options['id_field'] = instance_id_field
+            if status_field:
+                options['status_field'] = status_field
+            # 默认按实例ID过滤查询，不再列出全部实例逐个比对
+            lookup = resource_lookup(api_client, **options)
+            # 与管理器的wait_for_instance_ready共用同一个key，自定义字段时单独分组
+            key = service_key((lookup.name, instance_id_field, status_field) if options else lookup.name, client)
+            fetch = lookup.statuses
+        return InstanceStatusChecker.wait_for_instances_status(
+            key, fetch, [instance_id], target_status, timeout=timeout, interval=interval)[instance_id]
+
+    @staticmethod
+    def wait_for_instances_status(key, fetch_statuses, instance_ids, target_status="Running", timeout=1800,
+                                  interval=30, failure_statuses=None, schedule_for=None):
+        """
+        批量等待多个实例达到目标状态
+
+        与wait_for_instance_status不同，登记到同一个key下的所有实例（包括其他线程同时登记的）
+        每个周期只调用一次fetch_statuses。
+
+        Args:
+            key: 服务标识，例如 waiter.service_key('ecs', api_client)
+            fetch_statuses: 接收实例ID列表、返回{实例ID: 状态}的函数
+            instance_ids (list): 实例ID列表
+            target_status (str): 目标状态，默认为"Running"
+            timeout (int): 超时时间（秒），默认1800秒
+            interval (int): 检查间隔（秒），默认30秒
+            failure_statuses: 失败状态，实例进入这些状态时立即结束等待
+            schedule_for: 为每个实例创建轮询调度的函数（例如polling.AdaptiveSchedule），提供时interval只作为默认间隔
+
+        Returns:
+            dict: {实例ID: 是否达到目标状态}
+        """
+        return default_waiter.wait_all(key, fetch_statuses, instance_ids, target_status,
+                                       failure_statuses=failure_statuses, timeout=timeout, interval=interval,
+                                       schedule_for=schedule_for)
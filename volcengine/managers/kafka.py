@@ -1,13 +1,18 @@
 import time
 import logging
-from volcenginesdkcore import Configuration
 from volcenginesdkcore.rest import ApiException
 import volcenginesdkkafka
 import volcenginesdkvpc
 from configs.api_config import api_config
+from sdkclient import client_identity, get_manager, new_api_client
+from waiter import default_waiter, service_key
+from lookup import resource_lookup
+from dag import client_token, require
+from polling import AdaptiveSchedule, config_spec
 from configs.kafka_configs import instance_configs
 from vpc_manager import VPCManager
 from whitelist_manager import KafkaWhitelistManager
+from provision import database_plan, run_plans
 
 
 # 配置日志
@@ -28,36 +33,37 @@ file_handler.setLevel(logging.INFO)
 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 logger.addHandler(file_handler)
 
+# 实例进入这些状态时不再等待
+FAILURE_STATUSES = ('CreateFailed', 'Error')
+
 class KafkaManager:
-    def __init__(self):
-        self._init_client()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
         self.api = volcenginesdkkafka
-        self.client_api = self.api.KAFKAApi()
-        self.vpc_api = volcenginesdkvpc.VPCApi()
-        self.vpc_manager = VPCManager()
-        self.whitelist_manager = KafkaWhitelistManager()
+        self.client_api = self.api.KAFKAApi(self.api_client)
+        self.status_lookup = resource_lookup(self.client_api)
+        self.vpc_api = volcenginesdkvpc.VPCApi(self.api_client)
+        self.vpc_manager = get_manager(VPCManager, ak, sk, region)
+        self.whitelist_manager = get_manager(KafkaWhitelistManager, ak, sk, region)
         self.current_config = None
 
-    def _init_client(self):
-        configuration = Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        Configuration.set_default(configuration)
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
-    def create_instance(self, instance_config, vpc_id=None, subnet_id=None):
+    def create_instance(self, instance_config, vpc_id=None, subnet_id=None, client_token=None):
         """
         创建Kafka实例
         :param instance_config: Kafka实例配置
         :param vpc_id: VPC ID
         :param subnet_id: 子网ID
+        :param client_token: 幂等令牌，重复提交同一令牌不会重复创建
         :return: 实例ID或None（如果创建失败）
         """
         self.current_config = instance_config
         try:
             # 检查是否已存在同名实例
-            api_instance = volcenginesdkkafka.KAFKAApi()
+            api_instance = volcenginesdkkafka.KAFKAApi(self.api_client)
             list_request = self.api.DescribeInstancesRequest(
                 page_number=1,
                 page_size=100,
@@ -99,7 +105,8 @@ class KafkaManager:
                 version=instance_config['instance']['version'],
                 project_name=instance_config['instance'].get('project_name', 'default'),
                 instance_description=instance_config['instance'].get('description', ''),
-                parameters=instance_config['instance'].get('parameters', '{}')
+                parameters=instance_config['instance'].get('parameters', '{}'),
+                client_token=client_token
             )
             
             response = self.client_api.create_instance(request)
@@ -110,38 +117,33 @@ class KafkaManager:
             logger.error(f"创建Kafka实例时发生异常: {e}")
             return None
 
+    def _fetch_statuses(self, instance_ids):
+        """按实例ID查询多个实例的状态，供批量等待器使用"""
+        return self.status_lookup.statuses(instance_ids)
+
+    def wait_for_instances_ready(self, instance_ids, timeout=1800, interval=30, spec=None):
+        """
+        等待多个实例准备就绪，同一账号、区域下的所有等待每个周期只查询一次
+        :param instance_ids: 实例ID列表
+        :param timeout: 超时时间（秒）
+        :param interval: 没有历史就绪耗时时的检查间隔（秒）
+        :param spec: 实例规格，按(服务, 规格, 区域)的历史就绪耗时安排查询，默认取当前配置中的compute_spec
+        :return: dict {实例ID: 是否就绪}
+        """
+        history_key = ('kafka', spec or config_spec(self.current_config, 'compute_spec'), self.api_client.configuration.region)
+        return default_waiter.wait_all(service_key('kafka', self.api_client), self._fetch_statuses, instance_ids,
+                                       'Running', failure_statuses=FAILURE_STATUSES, timeout=timeout,
+                                       schedule_for=lambda _: AdaptiveSchedule(history_key, fallback_interval=interval))
+
     def wait_for_instance_ready(self, instance_id, timeout=1800, interval=30):
         """
         等待实例准备就绪
-        :param instance_id: Kafka实例ID
+        :param instance_id: 实例ID
         :param timeout: 超时时间（秒）
         :param interval: 检查间隔（秒）
         :return: bool 是否成功
         """
-        start_time = time.time()
-        while True:
-            try:
-                request = self.api.DescribeInstanceDetailRequest(instance_id=instance_id)
-                response = self.client_api.describe_instance_detail(request)
-                # print(response)
-                if response.basic_instance_info.instance_status == "Running":
-                    logger.info("实例已准备就绪")
-                    return True
-                logger.info(f"实例状态: {response.basic_instance_info.instance_status}")
-                
-                if time.time() - start_time > timeout:
-                    logger.error("等待实例就绪超时")
-                    return False
-                    
-                time.sleep(interval)
-                
-            except ApiException as e:
-                if "OperationDenied.InvalidInstanceStatus" in str(e):
-                    logger.info("实例状态暂时不可用，等待后重试...")
-                    time.sleep(interval)
-                    continue
-                logger.error(f"检查实例状态时发生错误: {e}")
-                return False
+        return self.wait_for_instances_ready([instance_id], timeout, interval)[instance_id]
 
     def create_whitelist(self, instance_id):
         """
@@ -200,7 +202,7 @@ class KafkaManager:
             logger.info("未配置EIP，跳过EIP申请和公网访问创建")
             return None, None, None
 
-        eip_manager = EIPManager()
+        eip_manager = get_manager(EIPManager, *client_identity(self.api_client))
         return eip_manager.allocate_eip(self.current_config['eip'])
 
 
@@ -267,100 +269,25 @@ class KafkaManager:
             print("获取内网访问信息时发生异常: %s\n" % e)
             return None, None
 
-def main():
-    instance_manager = KafkaManager()
-    vpc_manager = VPCManager()
-
-    # 遍历所有Kafka实例配置
-    for instance_config in instance_configs:
-        logger.info(f"\n开始创建实例: {instance_config['instance']['name']}")
-
-        # 1. 检查配置中是否已指定VPC和子网
-        if 'vpc_id' in instance_config['instance'] and 'subnet_id' in instance_config['instance']:
-            vpc_id = instance_config['instance']['vpc_id']
-            subnet_id = instance_config['instance']['subnet_id']
-            logger.info(f"使用配置中指定的VPC ID: {vpc_id} 和子网 ID: {subnet_id}")
-        else:
-            # 创建VPC
-            vpc_id = vpc_manager.create_vpc(
-                vpc_name=instance_config['instance']['vpc']['name'],
-                cidr_block=instance_config['instance']['vpc']['cidr_block'],
-                description=instance_config['instance']['vpc']['description'],
-                tags=instance_config['instance']['vpc']['tags']
-            )
-            if not vpc_id:
-                logger.error("创建VPC失败")
-                continue
-
-            # 等待VPC就绪
-            if not vpc_manager.wait_for_vpc_available(vpc_id):
-                logger.error("VPC创建超时或失败")
-                continue
-
-            # 创建实例专用子网
-            subnet_config = instance_config['instance']['subnet']
-            subnet_id = vpc_manager.create_subnet(
-                vpc_id=vpc_id,
-                subnet_name=subnet_config['name'],
-                cidr_block=subnet_config['cidr_block'],
-                zone_id=subnet_config['zone_id'],
-                description=subnet_config.get('description'),
-                tags=subnet_config.get('tags')
-            )
-            if not subnet_id:
-                logger.error(f"创建子网 {subnet_config['name']} 失败")
-                continue
+def provision_plan(instance_config, ak=None, sk=None, region=None):
+    """Kafka实例的创建步骤：不申请EIP，实例就绪后创建ACL策略，与端点和白名单并发执行"""
+    instance_manager = KafkaManager(ak, sk, region)
+    vpc_manager = get_manager(VPCManager, ak, sk, region)
+    plan = database_plan(instance_manager, vpc_manager, instance_config, eip=False,
+                         create_instance=lambda config, vpc_id, subnet_id: instance_manager.create_instance(
+                             config, vpc_id, subnet_id, client_token=client_token()))
 
-            # 等待子网就绪
-            if not vpc_manager.wait_for_subnet_available(subnet_id):
-                logger.error(f"子网 {subnet_config['name']} 创建超时或失败")
-                continue
+    plan.add('acl', lambda r: require(instance_manager.create_acl(r['instance']), "创建ACL策略失败"),
+             requires=['ready'])
+    plan.add('summary',
+             lambda r: logger.info(f"Kafka实例 {instance_config['instance']['name']} 创建完成！"),
+             requires=['private_endpoint', 'bind_whitelists', 'acl'])
+    return plan
 
-            logger.info(f"子网 {subnet_config['name']} 创建成功，ID: {subnet_id}")
 
-        # 2. 创建Kafka实例
-        instance_id = instance_manager.create_instance(instance_config, vpc_id, subnet_id)
-        if not instance_id:
-            logger.error("创建Kafka实例失败")
-            continue
-
-        # 等待实例创建完成
-        logger.info("等待实例创建完成...")
-        if not instance_manager.wait_for_instance_ready(instance_id):
-            logger.error("实例创建超时或失败")
-            continue
-
-        # # 4. 申请EIP
-        # eip_id, eip_address, eip_name = instance_manager.allocate_eip()
-        # if not eip_id:
-        #     logger.error("申请EIP失败，跳过创建公网访问端点")
-        #     address_domain = None
-        #     address_port = None
-        # else:
-        #     # 5. 创建公网访问端点
-        #     logger.info("开始创建公网访问端点...")
-        #     address_domain, address_port = instance_manager.create_public_endpoint(instance_id, eip_id)
-        #     if not address_domain:
-        #         logger.error("创建公网访问端点失败")
-        #         continue
-        #     logger.info(f"成功创建公网访问端点: {address_domain}:{address_port}")
-
-        private_address_domain, private_address_port = instance_manager.get_private_endpoint(instance_id)
-        if not private_address_domain:
-            logger.error("获取内网访问端点失败")
-            continue
-        logger.info(f"成功获取内网访问端点: {private_address_domain}:{private_address_port}")
-        # 5. 创建白名单
-        if not instance_manager.create_whitelist(instance_id):
-            logger.error("创建白名单失败")
-            continue
-
-        # 6. 创建ACL策略
-        if not instance_manager.create_acl(instance_id):
-            logger.error("创建ACL策略失败")
-            continue
-
-        logger.info(f"Kafka实例 {instance_config['instance']['name']} 创建完成！")
+def main():
+    # 各实例配置的创建流程并发执行，结束时输出每个步骤的耗时
+    run_plans([provision_plan(instance_config) for instance_config in instance_configs])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
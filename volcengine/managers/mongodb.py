@@ -6,9 +6,14 @@ from volcenginesdkcore.rest import ApiException
 import time
 import logging
 from configs.api_config import api_config, timeout_config
+from sdkclient import client_identity, get_manager, new_api_client
+from waiter import default_waiter, service_key
+from lookup import resource_lookup
+from polling import AdaptiveSchedule, config_spec
 from configs.network_config import network_config
 from vpc_manager import VPCManager
 from whitelist_manager import MongoDBWhitelistManager
+from provision import database_plan, run_plans
 from configs.mongodb_configs import instance_configs
 
 import os
@@ -27,23 +32,23 @@ file_handler.setLevel(logging.INFO)
 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 logger.addHandler(file_handler)
 
+# 实例进入这些状态时不再等待
+FAILURE_STATUSES = ('CreateFailed', 'Error')
+
 class MongoDBManager:
-    def __init__(self):
-        self._init_client()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
         self.api = volcenginesdkmongodb
-        self.client_api = self.api.MONGODBApi()
-        self.vpc_api = volcenginesdkvpc.VPCApi()
-        self.vpc_manager = VPCManager()
+        self.client_api = self.api.MONGODBApi(self.api_client)
+        self.status_lookup = resource_lookup(self.client_api)
+        self.vpc_api = volcenginesdkvpc.VPCApi(self.api_client)
+        self.vpc_manager = get_manager(VPCManager, ak, sk, region)
         self.current_config = None  # 当前正在处理的配置
-        self.whitelist_manager = MongoDBWhitelistManager()
+        self.whitelist_manager = get_manager(MongoDBWhitelistManager, ak, sk, region)
 
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     def print_instance(self, instance_config, vpc_id=None, subnet_id=None):
         self.current_config = instance_config  # 设置当前配置
@@ -134,7 +139,7 @@ class MongoDBManager:
             print("操作MongoDB实例时发生异常: %s\n" % e)
             return None
 
-    def allocate_eip(self):
+    def allocate_eip(self, client_token=None):
         from eip_manager import EIPManager
         """申请EIP，如果配置中没有EIP配置则跳过"""
         # 检查是否有EIP配置
@@ -142,8 +147,8 @@ class MongoDBManager:
             logger.info("未配置EIP，跳过EIP申请和公网访问创建")
             return None, None, None
 
-        eip_manager = EIPManager()
-        return eip_manager.allocate_eip(self.current_config['eip'])
+        eip_manager = get_manager(EIPManager, *client_identity(self.api_client))
+        return eip_manager.allocate_eip(self.current_config['eip'], client_token=client_token)
 
 
     def get_private_endpoint(self, instance_id):
@@ -238,37 +243,33 @@ class MongoDBManager:
             print("创建公网访问地址时发生异常: %s\n" % e)
             return None, None
 
+    def _fetch_statuses(self, instance_ids):
+        """按实例ID查询多个实例的状态，供批量等待器使用"""
+        return self.status_lookup.statuses(instance_ids)
+
+    def wait_for_instances_ready(self, instance_ids, timeout=1800, interval=30, spec=None):
+        """
+        等待多个实例准备就绪，同一账号、区域下的所有等待每个周期只查询一次
+        :param instance_ids: 实例ID列表
+        :param timeout: 超时时间（秒）
+        :param interval: 没有历史就绪耗时时的检查间隔（秒）
+        :param spec: 实例规格，按(服务, 规格, 区域)的历史就绪耗时安排查询，默认取当前配置中的node_spec
+        :return: dict {实例ID: 是否就绪}
+        """
+        history_key = ('mongodb', spec or config_spec(self.current_config, 'node_spec'), self.api_client.configuration.region)
+        return default_waiter.wait_all(service_key('mongodb', self.api_client), self._fetch_statuses, instance_ids,
+                                       'Running', failure_statuses=FAILURE_STATUSES, timeout=timeout,
+                                       schedule_for=lambda _: AdaptiveSchedule(history_key, fallback_interval=interval))
+
     def wait_for_instance_ready(self, instance_id, timeout=1800, interval=30):
         """
         等待实例准备就绪
-        :param instance_id: 数据库实例ID
+        :param instance_id: 实例ID
         :param timeout: 超时时间（秒）
         :param interval: 检查间隔（秒）
         :return: bool 是否成功
         """
-        start_time = time.time()
-        while True:
-            try:
-                request = self.api.DescribeDBInstancesRequest()
-                response = self.client_api.describe_db_instances(request)
-                
-                for instance in response.db_instances:
-                    if instance.instance_id == instance_id:
-                        if instance.instance_status == "Running":
-                            print("实例已准备就绪")
-                            return True
-                        print(f"实例状态: {instance.instance_status}")
-                        break
-                
-                if time.time() - start_time > timeout:
-                    print("等待实例就绪超时")
-                    return False
-                    
-                time.sleep(interval)
-                
-            except ApiException as e:
-                print(f"检查实例状态时发生错误: {e}")
-                return False
+        return self.wait_for_instances_ready([instance_id], timeout, interval)[instance_id]
 
     def create_whitelist(self, instance_id):
         try:
@@ -438,182 +439,26 @@ class MongoDBManager:
             logger.error(f"修改备份策略时发生异常: {e}")
             return False
 
+def provision_plan(instance_config, ak=None, sk=None, region=None):
+    """MongoDB实例的创建步骤，只包含通用步骤（账号、数据库和备份策略官方未支持）"""
+    instance_manager = MongoDBManager(ak, sk, region)
+    vpc_manager = get_manager(VPCManager, ak, sk, region)
+
+    def create_instance(config, vpc_id, subnet_id):
+        # 无法指定 config_server 的配置，也无法调用接口修改 config_server 的配置
+        instance_manager.print_instance(config, vpc_id, subnet_id)
+        return instance_manager.create_instance(config, vpc_id, subnet_id)
+
+    plan = database_plan(instance_manager, vpc_manager, instance_config, create_instance=create_instance)
+    plan.add('summary',
+             lambda r: logger.info(f"成功完成实例 {instance_config['instance']['name']} 的所有操作！"),
+             requires=['private_endpoint', 'public_endpoint', 'bind_whitelists'])
+    return plan
+
+
 def main():
-    instance_manager = MongoDBManager()
-    vpc_manager = VPCManager()
-    subnet_id = None  # 初始化subnet_id变量
-
-    # 遍历所有PostgreSQL实例配置
-    for instance_config in instance_configs:
-        logger.info(f"\n开始创建实例: {instance_config['instance']['name']}")
-
-        # 1. 检查配置中是否已指定VPC和子网
-        if 'vpc_id' in instance_config['instance'] and 'subnet_id' in instance_config['instance']:
-            vpc_id = instance_config['instance']['vpc_id']
-            subnet_id = instance_config['instance']['subnet_id']
-            logger.info(f"使用配置中指定的VPC ID: {vpc_id} 和子网 ID: {subnet_id}")
-            instance_subnet_id = subnet_id
-        else:
-            # 创建VPC
-            vpc_id = vpc_manager.create_vpc(
-                vpc_name=instance_config['instance']['vpc']['name'],
-                cidr_block=instance_config['instance']['vpc']['cidr_block'],
-                description=instance_config['instance']['vpc']['description'],
-                tags=instance_config['instance']['vpc']['tags']
-            )
-            if not vpc_id:
-                logger.error("创建VPC失败")
-                continue
-
-            # 等待VPC就绪
-            if not vpc_manager.wait_for_vpc_available(vpc_id):
-                logger.error("VPC创建超时或失败")
-                continue
-
-            # 创建实例专用子网
-            subnet_config = instance_config['instance']['subnet']
-            subnet_id = vpc_manager.create_subnet(
-                vpc_id=vpc_id,
-                subnet_name=subnet_config['name'],
-                cidr_block=subnet_config['cidr_block'],
-                zone_id=subnet_config['zone_id'],
-                description=subnet_config.get('description'),
-                tags=subnet_config.get('tags')
-            )
-            if not subnet_id:
-                logger.error(f"创建子网 {subnet_config['name']} 失败")
-                continue
-
-            # 等待子网就绪
-            if not vpc_manager.wait_for_subnet_available(subnet_id):
-                logger.error(f"子网 {subnet_config['name']} 创建超时或失败")
-                continue
-
-            logger.info(f"子网 {subnet_config['name']} 创建成功，ID: {subnet_id}")
-            instance_subnet_id = subnet_id
-
-        if not instance_subnet_id:
-            logger.error("在实例指定可用区未找到或创建子网失败")
-            continue
-
-        # 3. 创建实例 ，无法指定 config_server 的配置，也无法调用接口修改 config_server 的配置
-        instance_manager.print_instance(instance_config,vpc_id, subnet_id)
-        instance_id = instance_manager.create_instance(instance_config, vpc_id, subnet_id)
-        if not instance_id:
-            logger.error("创建实例失败")
-            continue
-
-        # 等待实例创建完成
-        logger.info("等待实例创建完成...")
-        if not instance_manager.wait_for_instance_ready(instance_id):
-            logger.error("实例创建超时或失败")
-            continue
-
-
-        # 4. 申请EIP
-        eip_id, eip_address, eip_name = instance_manager.allocate_eip()
-        if not eip_id:
-            logger.error("申请EIP失败，跳过创建公网访问端点")
-            address_domain = None
-            address_port = None
-        else:
-            # 5. 创建公网访问端点
-            logger.info("开始创建公网访问端点...")
-            address_domain, address_port = instance_manager.create_public_endpoint(instance_id, eip_id)
-            if not address_domain:
-                logger.error("创建公网访问端点失败")
-                continue
-            logger.info(f"成功创建公网访问端点: {address_domain}:{address_port}")
-
-        # 5.1.  获取内网访问端点
-        private_address_domain, address_port = instance_manager.get_private_endpoint(instance_id)
-        if not address_domain:
-            logger.error("创建公网访问端点失败")
-            continue
-        logger.info(f"成功获取内网访问端点: {private_address_domain}:{address_port}")
-        # 6. 创建白名单
-        if not instance_manager.create_whitelist(instance_id):
-            logger.error("创建白名单失败")
-            continue
-
-        # # 7. 创建账号
-        # if not instance_manager.create_account(instance_id):
-        #     logger.error("创建账号失败")
-        #     continue
-
-        # # 8. 创建数据库，官方不支持
-        # if not instance_manager.create_database(instance_id):
-        #     logger.error("创建数据库失败")
-        #     continue
-
-        # # 9. 创建Schema
-        # if not instance_manager.create_schema(instance_id):
-        #     logger.error("创建Schema失败")
-        #     continue
-
-        # 10. 修改备份策略, 官方未实现
-        # if not instance_manager.modify_backup_policy(instance_id):
-            # logger.error("修改备份策略失败")
-            # continue
-
-        logger.info(f"成功完成实例 {instance_config['instance']['name']} 的所有操作！")
-        
-        # 将实例信息写入日志文件，使用追加模式
-        # pg_instance_info_path = os.path.join(log_dir, 'mongodb_instance_info.md')
-        # with open(pg_instance_info_path, 'a', encoding='utf-8') as f:
-        #     # 添加分隔符和时间戳
-        #     f.write(f"\n{'='*50}\n")
-        #     f.write(f"记录时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        #     f.write(f"# PostgreSQL实例创建记录\n\n")
-        #     f.write(f"## 实例信息\n")
-        #     f.write(f"- 实例ID: {instance_id}\n")
-        #     f.write(f"- 实例名称: {instance_config['instance']['name']}\n")
-        #     f.write(f"- 创建时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-        #     f.write(f"## 网络配置\n")
-        #     f.write(f"- VPC ID: {vpc_id}\n")
-        #     f.write(f"- 子网 ID: {subnet_id}\n")
-        #     f.write(f"- EIP名称: {eip_name}\n")
-        #     f.write(f"- EIP地址: {eip_address}\n")
-        #     f.write(f"- EIP ID: {eip_id}\n")
-        #     f.write(f"- 内网访问信息: {private_address_domain}\n")
-        #     # f.write(f"- 内网访问端口: {private_address_port}\n")
-        #     f.write(f"- 公网访问域名: {address_domain}\n")
-        #     f.write(f"- 公网访问端口: {address_port}\n")
-
-
-        #     f.write(f"## 数据库配置\n")
-        #     f.write(f"- 数据库列表: {', '.join([db['name'] for db in instance_config['databases']])}\n\n")
-            
-        #     f.write(f"## 账号信息\n")
-        #     f.write(f"- 超级用户名: {instance_config['accounts'][0]['username']}\n")
-        #     f.write(f"- 超级用户密码: {instance_config['accounts'][0]['password']}\n")
-        #     # f.write(f"- 普通用户名: {instance_config['accounts'][1]['username']}\n")
-        #     # f.write(f"- 普通用户密码: {instance_config['accounts'][1]['password']}\n\n")
-            
-        #     f.write(f"## Schema配置\n")
-        #     for db in instance_config['databases']:
-        #         for schema in db['schemas']:
-        #             f.write(f"- {db['name']}.{schema['name']}\n")
-        #     f.write("\n")
-            
-        #     f.write(f"## 备份策略\n")
-        #     f.write(f"- 备份保留天数: {instance_config['backup']['retention_period']}天\n")
-        #     f.write(f"- 全量备份周期: {instance_config['backup']['full_backup_period']}\n")
-        #     f.write(f"- 全量备份时间: {instance_config['backup']['full_backup_time']}\n")
-        #     f.write(f"- 增量备份频率: {instance_config['backup']['increment_backup_frequency']}\n")
-        
-        # logger.info(f"PostgreSQL实例ID: {instance_id}")
-        # logger.info(f"VPC ID: {vpc_id}")
-        # logger.info(f"子网 ID: {subnet_id}")
-        # logger.info(f"EIP地址: {eip_address}")
-        # logger.info(f"公网访问: {address_domain}:{address_port}")
-        # logger.info(f"数据库列表: {', '.join([db['name'] for db in instance_config['databases']])}")
-        # logger.info(f"超级用户名: {instance_config['accounts'][0]['username']}")
-        # logger.info(f"超级用户密码: {instance_config['accounts'][0]['password']}")
-        # logger.info(f"普通用户名: {instance_config['accounts'][1]['username']}")
-        # logger.info(f"普通用户密码: {instance_config['accounts'][1]['password']}")
-        # logger.info(f"Schema列表: {', '.join([f"{db['name']}.{schema['name']}" for db in instance_config['databases'] for schema in db['schemas']])}")
+    # 各实例配置的创建流程并发执行，结束时输出每个步骤的耗时
+    run_plans([provision_plan(instance_config) for instance_config in instance_configs])
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
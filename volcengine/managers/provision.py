@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import os
+
+from configs.api_config import provision_config
+from dag import Orchestrator, Plan, client_token, require
+from journal import StepJournal
+
+logger = logging.getLogger(__name__)
+
+'''
+数据库类实例的并发创建流程
+
+各服务的main原来逐个实例串行执行：VPC → 等待 → 子网 → 等待 → 实例 → 等待就绪 → EIP → 端点 → 白名单 → ...
+这里把共同的步骤组织成依赖图（dag.Plan），各服务再补充自己的步骤：
+
+    network ──> instance ──> ready ──┬──> private_endpoint
+                                     ├──> public_endpoint <── eip
+                                     └──> bind_whitelists <── whitelists
+
+申请EIP、创建白名单不依赖实例，与创建实例同时进行；多个实例配置的流程也同时执行。
+VPC和子网按名称查重，同一时刻只创建一个（network限制组），创建实例的并发数由create_instance限制组控制。
+
+完成的步骤写入步骤日志（journal.StepJournal），中途失败后重新运行会跳过已完成的步骤；
+VPC、子网、EIP以及支持幂等令牌的实例创建请求都带上client_token，重复提交不会重复创建。
+实例配置修改后Plan的键随之变化，不会恢复旧配置的结果。
+'''
+
+
+def _create_network(vpc_manager, instance):
+    """创建VPC和子网并等待可用，返回(vpc_id, subnet_id)"""
+    vpc_config = instance['vpc']
+    vpc_id = require(vpc_manager.create_vpc(
+        vpc_name=vpc_config['name'],
+        cidr_block=vpc_config['cidr_block'],
+        description=vpc_config['description'],
+        tags=vpc_config['tags'],
+        client_token=client_token('vpc')
+    ), "创建VPC失败")
+    require(vpc_manager.wait_for_vpc_available(vpc_id), "VPC创建超时或失败")
+
+    subnet_config = instance['subnet']
+    subnet_id = require(vpc_manager.create_subnet(
+        vpc_id=vpc_id,
+        subnet_name=subnet_config['name'],
+        cidr_block=subnet_config['cidr_block'],
+        zone_id=subnet_config['zone_id'],
+        description=subnet_config.get('description'),
+        tags=subnet_config.get('tags'),
+        client_token=client_token('subnet')
+    ), f"创建子网 {subnet_config['name']} 失败")
+    require(vpc_manager.wait_for_subnet_available(subnet_id), f"子网 {subnet_config['name']} 创建超时或失败")
+    logger.info(f"子网 {subnet_config['name']} 创建成功，ID: {subnet_id}")
+    return vpc_id, subnet_id
+
+
+def _private_endpoint(manager, instance_id):
+    endpoint = manager.get_private_endpoint(instance_id)
+    require(endpoint and endpoint[0], "获取内网访问端点失败")
+    logger.info(f"成功获取内网访问端点: {endpoint[0]}")
+    return endpoint
+
+
+def _public_endpoint(manager, instance_id, eip):
+    eip_id = eip[0] if eip else None
+    if not eip_id:
+        logger.info("没有可用的EIP，跳过创建公网访问端点")
+        return None, None
+    address_domain, address_port = manager.create_public_endpoint(instance_id, eip_id)
+    require(address_domain, "创建公网访问端点失败")
+    logger.info(f"成功创建公网访问端点: {address_domain}:{address_port}")
+    return address_domain, address_port
+
+
+def _bind_whitelists(manager, instance_id, prepared):
+    # 从步骤日志恢复时白名单ID来自日志，避免重新按名称查询
+    manager.whitelist_manager.prepare_whitelists(known=prepared)
+    return require(manager.create_whitelist(instance_id), "绑定白名单失败")
+
+
+def plan_key(manager, instance_config, name=None):
+    """步骤日志中的Plan键：服务、实例名称和配置摘要，配置修改后不会恢复旧的结果
+
+    Args:
+        name: 资源名称，默认为instance_config['instance']['name']
+    """
+    digest = hashlib.sha1(json.dumps(instance_config, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return f"{type(manager).__name__}/{name or instance_config['instance']['name']}/{digest[:12]}"
+
+
+def database_plan(manager, vpc_manager, instance_config, create_instance=None, eip=True, whitelists=True):
+    """创建数据库类实例的通用步骤
+
+    Args:
+        manager: 服务管理器，每个实例配置使用独立的管理器（管理器在current_config中保存当前配置）
+        vpc_manager: VPC管理器
+        instance_config: 实例配置
+        create_instance: 创建实例的函数(instance_config, vpc_id, subnet_id)，默认为manager.create_instance；
+            接口支持幂等令牌时在函数中传入client_token()
+        eip: 是否包含申请EIP和创建公网访问端点
+        whitelists: 是否包含预先创建白名单和绑定白名单
+
+    Returns:
+        Plan: 包含network、instance、ready、private_endpoint，以及按参数包含的
+              eip、public_endpoint、whitelists、bind_whitelists步骤
+    """
+    instance = instance_config['instance']
+    create_instance = create_instance or manager.create_instance
+    # EIP等步骤在创建实例前就会读取当前配置
+    manager.current_config = instance_config
+    plan = Plan(instance['name'], key=plan_key(manager, instance_config))
+
+    if 'vpc_id' in instance and 'subnet_id' in instance:
+        logger.info(f"[{instance['name']}] 使用配置中指定的VPC ID: {instance['vpc_id']} 和子网 ID: {instance['subnet_id']}")
+        plan.add('network', lambda r: (instance['vpc_id'], instance['subnet_id']))
+    else:
+        plan.add('network', lambda r: _create_network(vpc_manager, instance), limit='network')
+
+    plan.add('instance', lambda r: require(create_instance(instance_config, *r['network']), "创建实例失败"),
+             requires=['network'], limit='create_instance')
+    plan.add('ready', lambda r: require(manager.wait_for_instance_ready(r['instance']), "实例创建超时或失败"),
+             requires=['instance'])
+    plan.add('private_endpoint', lambda r: _private_endpoint(manager, r['instance']), requires=['ready'])
+
+    if eip:
+        # EIP不存在时allocate_eip返回(None, None, None)，后续只跳过公网访问端点
+        plan.add('eip', lambda r: manager.allocate_eip(client_token=client_token()))
+        plan.add('public_endpoint', lambda r: _public_endpoint(manager, r['instance'], r['eip']),
+                 requires=['ready', 'eip'])
+    if whitelists:
+        plan.add('whitelists', lambda r: require(manager.whitelist_manager.prepare_whitelists(), "创建白名单失败"))
+        plan.add('bind_whitelists', lambda r: _bind_whitelists(manager, r['instance'], r['whitelists']),
+                 requires=['ready', 'whitelists'])
+    return plan
+
+
+def default_journal():
+    """按provision_config打开步骤日志，未启用时返回None"""
+    if not provision_config.get('journal', True):
+        return None
+    return StepJournal(provision_config.get('journal_file') or os.path.join(
+        os.path.expanduser('~'), '.volcengine', 'provision_journal.jsonl'))
+
+
+def run_plans(plans, max_workers=None, limits=None, fresh=False):
+    """按provision_config的并发设置执行多个Plan，记录每个步骤的耗时并返回dag.Report
+
+    Args:
+        fresh: 为True时丢弃这些Plan在步骤日志中的记录，从头执行
+    """
+    limits = dict(provision_config['limits'], **(limits or {}))
+    journal = default_journal()
+    if journal is not None and fresh:
+        for plan in plans:
+            journal.finish(plan.key)
+    orchestrator = Orchestrator(max_workers or provision_config['max_workers'], limits, journal=journal)
+    report = orchestrator.run(plans)
+    report.log()
+    return report
@@ -1,14 +1,19 @@
 import time
 import logging
-from volcenginesdkcore import Configuration
 from volcenginesdkcore.rest import ApiException
 import volcenginesdkredis
 import volcenginesdkvpc
 from configs.api_config import api_config
+from sdkclient import client_identity, get_manager, new_api_client
+from waiter import default_waiter, service_key
+from lookup import resource_lookup
+from dag import client_token, require
+from polling import AdaptiveSchedule, config_spec
 from configs.redis_configs import instance_configs
 from vpc_manager import VPCManager
 from whitelist_manager import RedisWhitelistManager
 from eip_manager import EIPManager
+from provision import database_plan, run_plans
 
 
 # 配置日志
@@ -29,26 +34,26 @@ file_handler.setLevel(logging.INFO)
 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 logger.addHandler(file_handler)
 
+# 实例进入这些状态时不再等待
+FAILURE_STATUSES = ('CreateFailed', 'Error')
+
 class RedisManager:
-    def __init__(self):
-        self._init_client()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
         self.api = volcenginesdkredis
-        self.client_api = self.api.REDISApi()
-        self.vpc_api = volcenginesdkvpc.VPCApi()
-        self.vpc_manager = VPCManager()
-        self.whitelist_manager = RedisWhitelistManager()
+        self.client_api = self.api.REDISApi(self.api_client)
+        self.status_lookup = resource_lookup(self.client_api)
+        self.vpc_api = volcenginesdkvpc.VPCApi(self.api_client)
+        self.vpc_manager = get_manager(VPCManager, ak, sk, region)
+        self.whitelist_manager = get_manager(RedisWhitelistManager, ak, sk, region)
         self.current_config = None
         self.status_checker = None  # 实例状态检查器，由子类初始化
 
-    def _init_client(self):
-        configuration = Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        Configuration.set_default(configuration)
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
-    def create_instance(self, instance_config, vpc_id=None, subnet_id=None):
+    def create_instance(self, instance_config, vpc_id=None, subnet_id=None, client_token=None):
         self.current_config = instance_config
         try:
         #    检查是否已存在同名实例
@@ -91,7 +96,8 @@ class RedisManager:
                 purchase_months=instance_config['instance']['charge_info']['period'],
                 port=instance_config['instance']['port'],
                 password=instance_config['instance']['password'],
-                sharded_cluster=instance_config['instance']['sharded_cluster']
+                sharded_cluster=instance_config['instance']['sharded_cluster'],
+                client_token=client_token
             )
             print(request)
             response = self.client_api.create_db_instance(request)
@@ -102,35 +108,33 @@ class RedisManager:
             logger.error(f"创建Redis实例时发生异常: {e}")
             return None
 
+    def _fetch_statuses(self, instance_ids):
+        """按实例ID查询多个实例的状态，供批量等待器使用"""
+        return self.status_lookup.statuses(instance_ids)
+
+    def wait_for_instances_ready(self, instance_ids, timeout=1800, interval=30, spec=None):
+        """
+        等待多个实例准备就绪，同一账号、区域下的所有等待每个周期只查询一次
+        :param instance_ids: 实例ID列表
+        :param timeout: 超时时间（秒）
+        :param interval: 没有历史就绪耗时时的检查间隔（秒）
+        :param spec: 实例规格，按(服务, 规格, 区域)的历史就绪耗时安排查询，默认取当前配置中的shard_capacity
+        :return: dict {实例ID: 是否就绪}
+        """
+        history_key = ('redis', spec or config_spec(self.current_config, 'shard_capacity'), self.api_client.configuration.region)
+        return default_waiter.wait_all(service_key('redis', self.api_client), self._fetch_statuses, instance_ids,
+                                       'Running', failure_statuses=FAILURE_STATUSES, timeout=timeout,
+                                       schedule_for=lambda _: AdaptiveSchedule(history_key, fallback_interval=interval))
+
     def wait_for_instance_ready(self, instance_id, timeout=1800, interval=30):
-        start_time = time.time()
-        while True:
-            try:
-                # 查询实例状态
-                status_request = self.api.DescribeDBInstancesRequest()
-                status_response = self.client_api.describe_db_instances(status_request)
-                
-                instance_status = None
-                for instance in status_response.instances:
-                    if instance.instance_id == instance_id:
-                        instance_status = instance.status
-                        break
-                
-                if instance_status == "Running":
-                    logger.info(f"实例 {instance_id} 已就绪")
-                    return True
-                    
-                logger.info(f"实例 {instance_id} 当前状态: {instance_status}，等待 {interval} 秒后重试...")
-                
-                if time.time() - start_time > timeout:
-                    logger.error(f"等待实例 {instance_id} 状态超时，已等待 {timeout} 秒")
-                    return False
-                    
-                time.sleep(interval)
-                
-            except ApiException as e:
-                logger.error(f"检查实例 {instance_id} 状态时发生错误: {e}")
-                return False
+        """
+        等待实例准备就绪
+        :param instance_id: 实例ID
+        :param timeout: 超时时间（秒）
+        :param interval: 检查间隔（秒）
+        :return: bool 是否成功
+        """
+        return self.wait_for_instances_ready([instance_id], timeout, interval)[instance_id]
 
     def create_whitelist(self, instance_id):
         try:
@@ -153,15 +157,15 @@ class RedisManager:
             return False
 
 
-    def allocate_eip(self):
+    def allocate_eip(self, client_token=None):
         """申请EIP，如果配置中没有EIP配置则跳过"""
         # 检查是否有EIP配置
         if 'eip' not in self.current_config:
             logger.info("未配置EIP，跳过EIP申请和公网访问创建")
             return None, None, None
 
-        eip_manager = EIPManager()
-        return eip_manager.allocate_eip(self.current_config['eip'])
+        eip_manager = get_manager(EIPManager, *client_identity(self.api_client))
+        return eip_manager.allocate_eip(self.current_config['eip'], client_token=client_token)
 
     def create_public_endpoint(self, instance_id, eip_id):
         try:
@@ -363,169 +367,59 @@ class RedisManager:
             logger.error(f"创建数据库账号时发生异常: {e}")
             return False
 
-def main():
-    instance_manager = RedisManager()
-    vpc_manager = VPCManager()
-    subnet_id = None
-
-    # 遍历所有Redis实例配置
-    for instance_config in instance_configs:
-        logger.info(f"\n开始创建实例: {instance_config['instance']['name']}")
-
-        # 1. 检查配置中是否已指定VPC和子网
-        if 'vpc_id' in instance_config['instance'] and 'subnet_id' in instance_config['instance']:
-            vpc_id = instance_config['instance']['vpc_id']
-            subnet_id = instance_config['instance']['subnet_id']
-            logger.info(f"使用配置中指定的VPC ID: {vpc_id} 和子网 ID: {subnet_id}")
-            instance_subnet_id = subnet_id
-        else:
-            # 创建VPC
-            vpc_id = vpc_manager.create_vpc(
-                vpc_name=instance_config['instance']['vpc']['name'],
-                cidr_block=instance_config['instance']['vpc']['cidr_block'],
-                description=instance_config['instance']['vpc']['description'],
-                tags=instance_config['instance']['vpc']['tags']
-            )
-            if not vpc_id:
-                logger.error("创建VPC失败")
-                continue
-
-            # 等待VPC就绪
-            if not vpc_manager.wait_for_vpc_available(vpc_id):
-                logger.error("VPC创建超时或失败")
-                continue
-
-            # 创建实例专用子网
-            subnet_config = instance_config['instance']['subnet']
-            subnet_id = vpc_manager.create_subnet(
-                vpc_id=vpc_id,
-                subnet_name=subnet_config['name'],
-                cidr_block=subnet_config['cidr_block'],
-                zone_id=subnet_config['zone_id'],
-                description=subnet_config.get('description'),
-                tags=subnet_config.get('tags')
-            )
-            if not subnet_id:
-                logger.error(f"创建子网 {subnet_config['name']} 失败")
-                continue
-
-            # 等待子网就绪
-            if not vpc_manager.wait_for_subnet_available(subnet_id):
-                logger.error(f"子网 {subnet_config['name']} 创建超时或失败")
-                continue
-
-            logger.info(f"子网 {subnet_config['name']} 创建成功，ID: {subnet_id}")
-            instance_subnet_id = subnet_id
-
-        if not instance_subnet_id:
-            logger.error("在实例指定可用区未找到或创建子网失败")
+def provision_plan(instance_config, ak=None, sk=None, region=None):
+    """Redis实例的创建步骤
+
+    端点和白名单完成后修改实例参数，再创建账号；单个账号创建失败只记录日志。
+    """
+    instance_manager = RedisManager(ak, sk, region)
+    vpc_manager = get_manager(VPCManager, ak, sk, region)
+    plan = database_plan(instance_manager, vpc_manager, instance_config,
+                         create_instance=lambda config, vpc_id, subnet_id: instance_manager.create_instance(
+                             config, vpc_id, subnet_id, client_token=client_token()))
+
+    plan.add('parameters',
+             lambda r: require(instance_manager.modify_instance_params(
+                 r['instance'], param_name="disabled-commands", param_value="flushall,flushdb"), "修改实例参数配置失败"),
+             requires=['bind_whitelists', 'public_endpoint', 'private_endpoint'])
+    plan.add('accounts', lambda r: _create_accounts(instance_manager, instance_config, r['instance']),
+             requires=['parameters'])
+    plan.add('summary', lambda r: _log_instance(instance_config, r), requires=['accounts'])
+    return plan
+
+
+def _create_accounts(instance_manager, instance_config, instance_id):
+    if 'accounts' not in instance_config:
+        return
+    logger.info(f"开始为实例 {instance_id} 创建账号...")
+    for account in instance_config['accounts']:
+        if not instance_manager.create_db_account(
+            instance_id=instance_id,
+            account_name=account['username'],
+            password=account['password'],
+            role_name=account['account_type']
+        ):
+            logger.error(f"创建账号 {account['username']} 失败")
             continue
+        logger.info(f"账号 {account['username']} 处理完成")
 
-        # 3. 创建Redis实例
-        instance_id = instance_manager.create_instance(instance_config, vpc_id, subnet_id)
-        if not instance_id:
-            logger.error("创建Redis实例失败")
-            continue
-
-        # 等待实例创建完成
-        logger.info("等待实例创建完成...")
-        if not instance_manager.wait_for_instance_ready(instance_id):
-            logger.error("实例创建超时或失败")
-            continue
-
-        # 4. 申请EIP
-        
-        eip_id, eip_address, eip_name = instance_manager.allocate_eip()
-        if not eip_id:
-            logger.error("申请EIP失败，跳过创建公网访问端点")
-            address_domain = None
-            address_port = None
-        else:
-            # 5. 创建公网访问端点
-            logger.info("开始创建公网访问端点...")
-            address_domain, address_port = instance_manager.create_public_endpoint(instance_id, eip_id)
-            if not address_domain:
-                logger.error("创建公网访问端点失败")
-                continue
-            logger.info(f"成功创建公网访问端点: {address_domain}:{address_port}")
-        # 5.1 获取内网访问端点
-        private_address_domain, private_address_port = instance_manager.get_private_endpoint(instance_id)
-        if not private_address_domain:
-            logger.error("获取内网访问端点失败")
-            continue
 
-        # 6. 创建白名单
-        if not instance_manager.create_whitelist(instance_id):
-            logger.error("创建白名单失败")
-            continue
+def _log_instance(instance_config, results):
+    vpc_id, subnet_id = results['network']
+    address_domain, address_port = results['public_endpoint']
+    private_address_domain, private_address_port = results['private_endpoint']
+    logger.info(f"\n成功完成实例 {instance_config['instance']['name']} 的所有操作！")
+    logger.info(f"Redis实例ID: {results['instance']}")
+    logger.info(f"VPC ID: {vpc_id}")
+    logger.info(f"子网 ID: {subnet_id}")
+    logger.info(f"EIP地址: {results['eip'][1]}")
+    logger.info(f"公网访问: {address_domain}:{address_port}")
+    logger.info(f"内网访问: {private_address_domain}:{private_address_port}")
 
-        # if not instance_manager.delete_whitelist(instance_id):
-        #     logger.error("删除白名单失败")
-        #     continue
 
-        # 7. 修改实例参数配置
-        if not instance_manager.modify_instance_params(instance_id,param_name="disabled-commands",param_value="flushall,flushdb"):
-            logger.error("修改实例参数配置失败")
-            continue
-
-        # 在实例创建成功后，添加数据库账号
-        if 'accounts' in instance_config:
-            logger.info(f"开始为实例 {instance_id} 创建账号...")
-            for account in instance_config['accounts']:
-                if not instance_manager.create_db_account(
-                    instance_id=instance_id,
-                    account_name=account['username'],
-                    password=account['password'],
-                    role_name=account['account_type']
-                ):
-                    logger.error(f"创建账号 {account['username']} 失败")
-                    continue
-                logger.info(f"账号 {account['username']} 处理完成")
-
-        # 记录实例创建成功的信息
-        logger.info(f"\n成功完成实例 {instance_config['instance']['name']} 的所有操作！")
-        logger.info(f"Redis实例ID: {instance_id}")
-        logger.info(f"VPC ID: {vpc_id}")
-        logger.info(f"子网 ID: {subnet_id}")
-        logger.info(f"EIP地址: {eip_address}")
-        logger.info(f"公网访问: {address_domain}:{address_port}")
-        logger.info(f"内网访问: {private_address_domain}:{private_address_port}")
-
-        # # 将实例信息写入Markdown文件
-        # redis_instance_info_path = os.path.join(log_dir, 'redis_instance_info.md')
-        # with open(redis_instance_info_path, 'a', encoding='utf-8') as f:
-        #     # 添加分隔符和时间戳
-        #     f.write(f"\n{'='*50}\n")
-        #     f.write(f"记录时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        #     f.write(f"# Redis实例创建记录\n\n")
-        #     f.write(f"## 实例信息\n")
-        #     f.write(f"- 实例ID: {instance_id}\n")
-        #     f.write(f"- 实例名称: {instance_config['instance']['name']}\n")
-        #     f.write(f"- 查询时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-        #     f.write(f"- Redis版本: {instance_config['instance']['engine_version']}\n")
-        #     f.write(f"- 节点数量: {instance_config['instance']['node_number']}\n")
-        #     f.write(f"- 分片容量: {instance_config['instance']['shard_capacity']}MB\n\n")
-
-        #     f.write(f"## 网络配置\n")
-        #     f.write(f"- VPC ID: {vpc_id}\n")
-        #     f.write(f"- 子网 ID: {subnet_id}\n")
-        #     f.write(f"- EIP名称: {instance_config['eip']}\n")
-        #     f.write(f"- EIP地址: {eip_address}\n")
-        #     f.write(f"- 内网访问域名: {private_address_domain}\n")
-        #     f.write(f"- 内网访问端口: {private_address_port}\n")
-        #     f.write(f"- 公网访问域名: {address_domain}\n")
-        #     f.write(f"- 公网访问端口: {address_port}\n\n")
-
-        #     f.write(f"## 账号信息\n")
-        #     for account in instance_config['accounts']:
-        #         f.write(f"- 账号类型: {account['account_type']}\n")
-        #         f.write(f"- 用户名: {account['username']}\n")
-        #         f.write(f"- 密码: {account['password']}\n\n")
-
-        #     f.write(f"## 备份策略\n")
-        #     f.write(f"- 备份保留天数: {instance_config['backup']['retention_period']}天\n")
-        #     f.write(f"- 备份时间段: {instance_config['backup']['backup_time']}\n")
-        #     f.write(f"- 备份周期: {', '.join(instance_config['backup']['backup_period'])}\n\n")
+def main():
+    # 各实例配置的创建流程并发执行，结束时输出每个步骤的耗时
+    run_plans([provision_plan(instance_config) for instance_config in instance_configs])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,14 +2,16 @@
 
 from __future__ import absolute_import
 
-from volcenginesdkcore.configuration import Configuration
 from volcenginesdkcore.rest import ApiException
-from whitelist_manager import WhitelistBaseManager
+from whitelist_manager import KafkaWhitelistManager, MongoDBWhitelistManager, PostgreSQLWhitelistManager, RedisWhitelistManager
 from configs.api_config import api_config
-import volcenginesdkrdspostgresql
-import volcenginesdkredis
-import volcenginesdkmongodb
-import volcenginesdkvpc
+from lazy import lazy_import
+from sdkclient import client_identity, get_api, get_manager, new_api_client
+from rawjson import call_raw
+volcenginesdkrdspostgresql = lazy_import('volcenginesdkrdspostgresql')
+volcenginesdkredis = lazy_import('volcenginesdkredis')
+volcenginesdkmongodb = lazy_import('volcenginesdkmongodb')
+volcenginesdkvpc = lazy_import('volcenginesdkvpc')
 
 import os
 import time
@@ -46,23 +48,23 @@ class ResourceBase:
 
     # 定义成功状态常量
     SUCCESS = True
+    # 子类对应的白名单管理器类，为None时不支持白名单解绑
+    whitelist_manager_class = None
 
-    def __init__(self):
-        self._init_client()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
         self.api = None  # 子类需要设置具体的API实例
         self.client_api = None
-        self.whitelist_manager = WhitelistBaseManager()  # 实例化白名单管理器
+        # 白名单管理器从注册表获取，同一账号、区域的资源清理器共用一个实例
+        self.whitelist_manager = (get_manager(self.whitelist_manager_class, *client_identity(self.api_client))
+                                  if self.whitelist_manager_class else None)
 
 
 
-    def _init_client(self):
+    def _init_client(self, ak=None, sk=None, region=None):
         """初始化API客户端配置"""
-        configuration = Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        Configuration.set_default(configuration)
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
 
     def disassociate_whitelist(self, instance_id):
         """解绑实例的白名单
@@ -89,8 +91,8 @@ class ResourceBase:
         :return: bool 操作是否成功
         """
         try:
-            # 初始化VPC API客户端
-            vpc_api = volcenginesdkvpc.VPCApi()
+            # 复用注册表中的VPC API客户端
+            vpc_api = get_api(volcenginesdkvpc.VPCApi, *client_identity(self.api_client))
             
             # 如果没有提供allocation_id，则通过eip_address查询
             if not allocation_id:
@@ -195,7 +197,7 @@ class ResourceBase:
             else:
                 # 获取所有实例的详细信息
                 list_request = self.api.DescribeDBInstancesRequest()
-                list_response = self.client_api.describe_db_instances(list_request)
+                list_response = call_raw(self.client_api.describe_db_instances, list_request)
                 
                 instances = []
                 # 兼容不同API返回的字段名
@@ -238,10 +240,10 @@ class ResourceBase:
         try:
             if hasattr(self.api, 'DescribeDBInstancesRequest'):
                 list_request = self.api.DescribeDBInstancesRequest()
-                list_response = self.client_api.describe_db_instances(list_request)
+                list_response = call_raw(self.client_api.describe_db_instances, list_request)
             else:
                 list_request = self.api.DescribeInstancesRequest(page_number=page_number,page_size=page_size)
-                list_response = self.client_api.describe_instances(list_request)
+                list_response = call_raw(self.client_api.describe_instances, list_request)
                 # print(list_response)
             
             # print(list_response)
@@ -391,48 +393,45 @@ class ResourceBase:
         return "Unknown"
 
 class PostgreSQLResource(ResourceBase):
-    def __init__(self):
-        super().__init__()
+    whitelist_manager_class = PostgreSQLWhitelistManager
+
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__(ak, sk, region)
         self.api = volcenginesdkrdspostgresql
-        self.client_api = self.api.RDSPOSTGRESQLApi()
-        # 确保白名单管理器使用正确的API
-        self.whitelist_manager.api = self.api
-        self.whitelist_manager.client_api = self.client_api
+        self.client_api = self.api.RDSPOSTGRESQLApi(self.api_client)
 
 
 class RedisResource(ResourceBase):
-    def __init__(self):
-        super().__init__()
+    whitelist_manager_class = RedisWhitelistManager
+
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__(ak, sk, region)
         self.api = volcenginesdkredis
-        self.client_api = self.api.REDISApi()
-        self.whitelist_manager.api = self.api
-        self.whitelist_manager.client_api = self.client_api
+        self.client_api = self.api.REDISApi(self.api_client)
 
 
 class MongoDbResource(ResourceBase):
-    def __init__(self):
-        super().__init__()
+    whitelist_manager_class = MongoDBWhitelistManager
+
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__(ak, sk, region)
         self.api = volcenginesdkmongodb
-        self.client_api = self.api.MONGODBApi()
-        self.whitelist_manager.api = self.api
-        self.whitelist_manager.client_api = self.client_api
+        self.client_api = self.api.MONGODBApi(self.api_client)
 
 
-import volcenginesdkkafka
+volcenginesdkkafka = lazy_import('volcenginesdkkafka')
 class KafkaResource(ResourceBase):
-    def __init__(self):
-        super().__init__()
+    whitelist_manager_class = KafkaWhitelistManager
+
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__(ak, sk, region)
         self.api = volcenginesdkkafka
-        self.client_api = self.api.KAFKAApi()
-        self.whitelist_manager.api = self.api
-        self.whitelist_manager.client_api = self.client_api
+        self.client_api = self.api.KAFKAApi(self.api_client)
 
-import volcenginesdkescloud
+volcenginesdkescloud = lazy_import('volcenginesdkescloud')
 class ESCloudResource(ResourceBase):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__(ak, sk, region)
         self.api = volcenginesdkescloud
-        self.client_api = self.api.ESCLOUDApi()
-        self.whitelist_manager.api = self.api
-        self.whitelist_manager.client_api = self.client_api
+        self.client_api = self.api.ESCLOUDApi(self.api_client)
 
@@ -1,10 +1,12 @@
 import time
 import logging
 import os
-from volcenginesdkcore import Configuration
 from volcenginesdkcore.rest import ApiException
 import volcenginesdkredis
 from configs.api_config import api_config
+from sdkclient import get_manager, new_api_client
+from singleflight import enable_sdk_singleflight
+from lookup import resource_lookup
 from redis_manager import RedisManager
 
 # 确保logs目录存在
@@ -29,20 +31,18 @@ class RedisTransmissionManager:
     支持全量数据同步和增量数据同步
     """
     
-    def __init__(self):
-        self._init_client()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
         self.api = volcenginesdkredis
-        self.client_api = self.api.REDISApi()
-        self.redis_manager = RedisManager()
+        self.client_api = self.api.REDISApi(self.api_client)
+        self.status_lookup = resource_lookup(self.client_api)
+        self.redis_manager = get_manager(RedisManager, ak, sk, region)
         
-    def _init_client(self):
+    def _init_client(self, ak=None, sk=None, region=None):
         """初始化API客户端配置"""
-        configuration = Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        Configuration.set_default(configuration)
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
+        enable_sdk_singleflight()
     
     def create_transmission_task(self, task_config):
         """创建Redis实例间数据传输任务
@@ -129,12 +129,9 @@ class RedisTransmissionManager:
             str: 实例状态，如果查询失败则返回None
         """
         try:
-            status_request = self.api.DescribeDBInstancesRequest()
-            status_response = self.client_api.describe_db_instances(status_request)
-            
-            for instance in status_response.instances:
-                if instance.instance_id == instance_id:
-                    return instance.status
+            status = self.status_lookup.status(instance_id)
+            if status is not None:
+                return status
             
             logger.error(f"未找到Redis实例: {instance_id}")
             return None
@@ -6,20 +6,29 @@
 from __future__ import print_function
 import os
 import json
-import time
-import volcenginesdkcore
 import volcenginesdkvke
 from volcenginesdkcore.rest import ApiException
 from volcenginesdkvke.models.create_cluster_request import CreateClusterRequest
 from volcenginesdkvke.models.create_node_pool_request import CreateNodePoolRequest
 from volcenginesdkvke.models.create_kubeconfig_request import CreateKubeconfigRequest
 from volcenginesdkvke.models.list_clusters_request import ListClustersRequest
+from volcenginesdkvke.models.filter_for_list_clusters_input import FilterForListClustersInput
 from volcenginesdkvke.models.list_node_pools_request import ListNodePoolsRequest
 from volcenginesdkvke.models.create_addon_request import CreateAddonRequest
 from volcenginesdkvke.models.list_addons_request import ListAddonsRequest
 from configs.vke_configs import CLUSTER_CONFIGS
-from configs.api_config import api_config
-from configs.standard_addons import STANDARD_ADDONS
+from configs.api_config import rate_limit_config
+from sdkclient import new_api_client, new_configuration
+from ratelimit import enable_sdk_rate_limit
+from waiter import default_waiter, service_key
+from lookup import resource_lookup
+from polling import AdaptiveSchedule
+from cache import default_cache, enable_sdk_cache
+from paginator import PageNumberPaging, get_field, paginate
+from rawjson import call_raw
+from dag import SUCCEEDED, Plan, StepError, client_token, require
+from provision import plan_key, run_plans
+from configs.standard_addons import ADDON_DEPENDENCIES, STANDARD_ADDONS
 
 import logging
 # 确保logs目录存在
@@ -51,15 +60,39 @@ class VKEManager:
             sk (str): 访问密钥密码
             region (str): 区域，默认为上海
         """
-        self.configuration = volcenginesdkcore.Configuration()
-        self.configuration.ak = ak or api_config['ak']
-        self.configuration.sk = sk or api_config['sk']
-        self.configuration.region = region or api_config['region']
-        self.configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(self.configuration)
-        # 使用全局默认配置初始化API客户端
-        self.vke_api = volcenginesdkvke.VKEApi()
+        # 独立的配置和ApiClient，不同区域、账号的VKEManager可以同时使用
+        self.configuration = new_configuration(ak, sk, region)
+        # 每次请求（包括重试）先按接口配额获取令牌，代替固定sleep
+        self.rate_limiter = enable_sdk_rate_limit(rate_limit_config)
+        self.vke_api = volcenginesdkvke.VKEApi(new_api_client(self.configuration))
+        # ListClusters等只读调用走缓存，创建操作会自动让缓存失效
+        enable_sdk_cache(self.vke_api.api_client)
+        # 按集群ID过滤ListClusters，不再列出全部集群逐个比对
+        self.cluster_lookup = resource_lookup(self.vke_api)
+        self.node_pool_lookup = resource_lookup(self.vke_api, 'vke_node_pool')
     
+    def _fetch_cluster_phases(self, cluster_ids):
+        """按集群ID过滤ListClusters，返回{集群ID: 状态阶段}，供批量等待器使用"""
+        return self.cluster_lookup.statuses(cluster_ids)
+
+    def wait_for_clusters_ready(self, cluster_ids, timeout=600, interval=30, spec=None):
+        """等待多个集群就绪，同一账号、区域下的所有等待每个周期只查询一次
+        
+        Args:
+            cluster_ids (list): 集群ID列表
+            timeout (int): 超时时间（秒）
+            interval (int): 没有历史就绪耗时时的检查间隔（秒）
+            spec (str): 集群规格（例如Kubernetes版本），按(服务, 规格, 区域)的历史就绪耗时安排查询
+            
+        Returns:
+            dict: {集群ID: 是否就绪}
+        """
+        api_client = self.vke_api.api_client
+        history_key = ('vke', spec or '', api_client.configuration.region)
+        return default_waiter.wait_all(service_key('vke', api_client), self._fetch_cluster_phases,
+                                       cluster_ids, 'Running', failure_statuses=('Failed',), timeout=timeout,
+                                       schedule_for=lambda _: AdaptiveSchedule(history_key, fallback_interval=interval))
+
     def wait_for_cluster_ready(self, cluster_id, timeout=600, interval=30):
         """等待集群就绪
         
@@ -71,27 +104,48 @@ class VKEManager:
         Returns:
             bool: 集群是否就绪
         """
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                list_clusters_request = ListClustersRequest()
-                clusters_response = self.vke_api.list_clusters(list_clusters_request)
-                # logger.info(clusters_response)
-                if clusters_response and clusters_response.items:
-                    for cluster in clusters_response.items:
-                        # logger.info('=======')
-                        # logger.info(cluster.status.phase)
-                        # logger.info(cluster.id)
-                        if cluster.id == cluster_id and cluster.status.phase == 'Running':
-                            logger.info('集群已就绪')
-                            return True
-                logger.info(f'等待集群就绪中，已等待 {int(time.time() - start_time)} 秒...')
-                time.sleep(interval)
-            except Exception as e:
-                logger.info(f'检查集群状态时发生错误: {str(e)}')
-                time.sleep(interval)
-        logger.info(f'等待集群就绪超时，已等待 {timeout} 秒')
-        return False
+        return self.wait_for_clusters_ready([cluster_id], timeout, interval)[cluster_id]
+
+    def _fetch_node_pool_phases(self, node_pool_ids):
+        """按节点池ID过滤ListNodePools，返回{节点池ID: 状态阶段}，供批量等待器使用"""
+        return self.node_pool_lookup.statuses(node_pool_ids)
+
+    def wait_for_node_pools_ready(self, node_pool_ids, timeout=1200, interval=30):
+        """等待多个节点池就绪，与集群的等待由同一个批量等待器处理，所有节点池每个周期只查询一次
+        
+        Args:
+            node_pool_ids (list): 节点池ID列表
+            timeout (int): 超时时间（秒）
+            interval (int): 检查间隔（秒）
+            
+        Returns:
+            dict: {节点池ID: 是否就绪}
+        """
+        return default_waiter.wait_all(service_key('vke:node_pool', self.vke_api.api_client),
+                                       self._fetch_node_pool_phases, node_pool_ids, 'Running',
+                                       failure_statuses=('Failed',), timeout=timeout, interval=interval)
+
+    def list_existing(self):
+        """列出全部集群和节点池，作为并发创建时共用的快照
+        
+        Returns:
+            tuple: ({集群名称: 集群ID}, {集群ID: {节点池名称: 节点池ID}})
+        """
+        clusters = {}
+        for cluster in paginate(lambda params: self.vke_api.list_clusters(ListClustersRequest(**params)),
+                                PageNumberPaging(100, total='total_count'), items='items'):
+            clusters.setdefault(cluster.name, cluster.id)
+
+        node_pools = {}
+        cluster_ids = list(clusters.values())
+        # 按集群ID过滤，每次最多100个集群
+        for start in range(0, len(cluster_ids), 100):
+            request_filter = volcenginesdkvke.FilterForListNodePoolsInput(cluster_ids=cluster_ids[start:start + 100])
+            for node_pool in paginate(
+                    lambda params: self.vke_api.list_node_pools(ListNodePoolsRequest(filter=request_filter, **params)),
+                    PageNumberPaging(100, total='total_count'), items='items'):
+                node_pools.setdefault(node_pool.cluster_id, {}).setdefault(node_pool.name, node_pool.id)
+        return clusters, node_pools
     
     def create_clusters(self):
         """创建多个集群
@@ -119,38 +173,40 @@ class VKEManager:
                     'status': 'failed',
                     'error': str(e)
                 }
-            
-            # 避免请求过于频繁
-            time.sleep(2)
         
         return results
 
-    def create_cluster(self, cluster_name, cluster_config=None):
+    def create_cluster(self, cluster_name, cluster_config=None, existing=None, client_token=None):
         """创建或获取已存在的集群
         
         Args:
             cluster_name (str): 集群名称
             cluster_config (dict, optional): 集群配置，如果不提供则使用默认配置
+            existing (dict, optional): {集群名称: 集群ID}快照，提供时据此判断集群是否已存在，不再查询
+            client_token (str, optional): 幂等令牌
             
         Returns:
             str: 集群ID
         """
         try:
             # 检查集群是否已存在
-            list_clusters_request = ListClustersRequest()
-            clusters_response = self.vke_api.list_clusters(list_clusters_request)
+            if existing is not None:
+                existing_cluster_id = existing.get(cluster_name)
+            else:
+                list_clusters_request = ListClustersRequest(filter=FilterForListClustersInput(name=cluster_name))
+                clusters_response = self.vke_api.list_clusters(list_clusters_request)
 
-            # 检查是否有同名集群
-            existing_cluster = None
-            if clusters_response and clusters_response.items:
-                for cluster in clusters_response.items:
-                    if cluster.name == cluster_name:
-                        existing_cluster = cluster
-                        break
+                # 检查是否有同名集群（名称过滤可能是模糊匹配，仍逐个比对）
+                existing_cluster_id = None
+                if clusters_response and clusters_response.items:
+                    for cluster in clusters_response.items:
+                        if cluster.name == cluster_name:
+                            existing_cluster_id = cluster.id
+                            break
             
-            if existing_cluster:
-                logger.info(f'找到已存在的同名集群，ID: {existing_cluster.id}')
-                return existing_cluster.id
+            if existing_cluster_id:
+                logger.info(f'找到已存在的同名集群，ID: {existing_cluster_id}')
+                return existing_cluster_id
             
             # 创建新集群
             # 如果没有提供配置，使用第一个默认配置
@@ -225,6 +281,7 @@ class VKEManager:
                     service_cidrsv4=cluster_config['services_config']['service_cidrsv4']
                 ),
                 logging_config=req_logging_config,
+                client_token=client_token,
                 
                 # kubernetes_config=CLUSTER_CONFIG['kubernetes_config']
             )
@@ -238,12 +295,14 @@ class VKEManager:
             logger.info(f'创建集群时发生错误: {str(e)}')
             return None
     
-    def create_node_pool(self, cluster_id, node_pool_config=None):
+    def create_node_pool(self, cluster_id, node_pool_config=None, existing=None, client_token=None):
         """创建单个节点池
         
         Args:
             cluster_id (str): 集群ID
             node_pool_config (dict, optional): 节点池配置，如果不提供则使用默认配置
+            existing (dict, optional): 该集群的{节点池名称: 节点池ID}快照，提供时据此判断节点池是否已存在，不再查询
+            client_token (str, optional): 幂等令牌
             
         Returns:
             str: 节点池ID
@@ -252,37 +311,37 @@ class VKEManager:
             # 如果没有提供配置，使用集群配置中的第一个节点池配置
             if node_pool_config is None:
                 # 从集群配置中获取节点池配置
-                list_clusters_request = ListClustersRequest()
-                clusters_response = self.vke_api.list_clusters(list_clusters_request)
-
-                if clusters_response and clusters_response.items:
-                    for cluster in clusters_response.items:
-                        if cluster.id == cluster_id:
-                            # 从CLUSTER_CONFIGS中找到对应的集群配置
-                            for config in CLUSTER_CONFIGS:
-                                if config['name'] == cluster.name:
-                                    node_pool_config = config['node_pools'][0]  # 使用第一个节点池配置
-                                    break
+                cluster = self.cluster_lookup.find(cluster_id)
+                if cluster is not None:
+                    # 从CLUSTER_CONFIGS中找到对应的集群配置
+                    for config in CLUSTER_CONFIGS:
+                        if config['name'] == cluster.name:
+                            node_pool_config = config['node_pools'][0]  # 使用第一个节点池配置
                             break
                 
                 if node_pool_config is None:
                     raise Exception('未找到集群对应的节点池配置')
             
             # 检查是否已有同名节点池
-            req_filter = volcenginesdkvke.FilterForListNodePoolsInput(
-                cluster_ids=[cluster_id],
-            )
-            list_node_pools_request = ListNodePoolsRequest(
-                filter=req_filter,
-            )
-            node_pools_response = self.vke_api.list_node_pools(list_node_pools_request)
-            
-            # 检查是否有同名节点池
-            if node_pools_response and node_pools_response.items:
-                for node_pool in node_pools_response.items:
-                    if node_pool.name == node_pool_config['name']:
-                        logger.info(f'找到已存在的同名节点池，ID: {node_pool.id}')
-                        return node_pool.id
+            if existing is not None:
+                if node_pool_config['name'] in existing:
+                    logger.info(f'找到已存在的同名节点池，ID: {existing[node_pool_config["name"]]}')
+                    return existing[node_pool_config['name']]
+            else:
+                req_filter = volcenginesdkvke.FilterForListNodePoolsInput(
+                    cluster_ids=[cluster_id],
+                )
+                list_node_pools_request = ListNodePoolsRequest(
+                    filter=req_filter,
+                )
+                node_pools_response = self.vke_api.list_node_pools(list_node_pools_request)
+                
+                # 检查是否有同名节点池
+                if node_pools_response and node_pools_response.items:
+                    for node_pool in node_pools_response.items:
+                        if node_pool.name == node_pool_config['name']:
+                            logger.info(f'找到已存在的同名节点池，ID: {node_pool.id}')
+                            return node_pool.id
             
             # 创建登录配置
 
@@ -330,6 +389,7 @@ class VKEManager:
             node_pool_request = CreateNodePoolRequest(
                 cluster_id=cluster_id,
                 name=node_pool_config['name'],
+                client_token=client_token,
                 node_config=req_node_config,
                 auto_scaling=volcenginesdkvke.AutoScalingForCreateNodePoolInput(
                     enabled=node_pool_config['auto_scaling']['enabled'],
@@ -381,18 +441,14 @@ class VKEManager:
         results = {}
         
         # 从集群配置中获取节点池配置列表
-        list_clusters_request = ListClustersRequest()
-        clusters_response = self.vke_api.list_clusters(list_clusters_request)
+        cluster = self.cluster_lookup.find(cluster_id)
         
         # 找到对应的集群配置
         cluster_config = None
-        if clusters_response and clusters_response.items:
-            for cluster in clusters_response.items:
-                if cluster.id == cluster_id:
-                    for config in CLUSTER_CONFIGS:
-                        if config['name'] == cluster.name:
-                            cluster_config = config
-                            break
+        if cluster is not None:
+            for config in CLUSTER_CONFIGS:
+                if config['name'] == cluster.name:
+                    cluster_config = config
                     break
 
         if cluster_config is None or 'node_pools' not in cluster_config:
@@ -413,12 +469,76 @@ class VKEManager:
                     'status': 'failed',
                     'error': str(e)
                 }
-            
-            # 避免请求过于频繁
-            time.sleep(2)
-        
+
         return results
-    
+
+    def _wait_node_pools(self, cluster_name, node_pool_ids):
+        ready = self.wait_for_node_pools_ready(node_pool_ids)
+        not_ready = [node_pool_id for node_pool_id, ok in ready.items() if not ok]
+        if not_ready:
+            raise StepError(f"集群 {cluster_name} 的节点池未能在预期时间内就绪: {', '.join(not_ready)}")
+        return node_pool_ids
+
+    def cluster_plan(self, cluster_config, clusters, node_pools):
+        """一个集群的创建步骤
+
+        集群就绪后同时创建它的所有节点池，节点池全部就绪后按依赖关系安装标准组件：
+
+            cluster ──> cluster_ready ──┬──> node_pool:<名称> ... ──> node_pools_ready ──> addon:<名称> ...
+                                        └──> kubeconfig
+
+        Args:
+            cluster_config (dict): 集群配置
+            clusters (dict): list_existing返回的集群快照
+            node_pools (dict): list_existing返回的节点池快照
+
+        Returns:
+            Plan: 集群的创建步骤
+        """
+        name = cluster_config['name']
+        plan = Plan(name, key=plan_key(self, cluster_config, name=name))
+        plan.add('cluster', lambda r: require(self.create_cluster(
+            name, cluster_config, existing=clusters, client_token=client_token()), f"创建集群 {name} 失败"))
+        plan.add('cluster_ready', lambda r: require(self.wait_for_clusters_ready(
+            [r['cluster']], spec=cluster_config['kubernetes_version'])[r['cluster']],
+            f"集群 {name} 未能在预期时间内就绪"), requires=['cluster'])
+        plan.add('kubeconfig', lambda r: require(self.get_cluster_kubeconfig(r['cluster']),
+                                                 f"获取集群 {name} 的kubeconfig失败"), requires=['cluster_ready'])
+
+        node_pool_steps = []
+        for node_pool_config in cluster_config.get('node_pools', []):
+            step = f"node_pool:{node_pool_config['name']}"
+            plan.add(step, lambda r, node_pool_config=node_pool_config: require(self.create_node_pool(
+                r['cluster'], node_pool_config, existing=node_pools.get(r['cluster'], {}),
+                client_token=client_token()), f"创建节点池 {node_pool_config['name']} 失败"),
+                requires=['cluster_ready'])
+            node_pool_steps.append(step)
+        if node_pool_steps:
+            plan.add('node_pools_ready', lambda r: self._wait_node_pools(name, [r[step] for step in node_pool_steps]),
+                     requires=node_pool_steps)
+        self.add_addon_steps(plan, STANDARD_ADDONS, lambda r: r['cluster'],
+                             requires=['node_pools_ready' if node_pool_steps else 'cluster_ready'])
+        return plan
+
+    def provision_clusters(self, cluster_configs=None, fresh=False):
+        """并发创建多个集群及其节点池
+
+        所有集群同时创建，每个集群就绪后立即同时创建它的节点池，不等待其他集群。
+        是否已存在统一按开始前列出的一份集群、节点池快照判断；集群和节点池的就绪等待
+        都登记到同一个批量等待器，每个周期每种资源只查询一次。
+
+        Args:
+            cluster_configs (list, optional): 集群配置列表，默认为CLUSTER_CONFIGS
+            fresh (bool): 为True时丢弃步骤日志中的记录，从头执行
+
+        Returns:
+            Report: 每个集群各步骤的执行结果
+        """
+        clusters, node_pools = self.list_existing()
+        plans = [self.cluster_plan(cluster_config, clusters, node_pools)
+                 for cluster_config in (cluster_configs or CLUSTER_CONFIGS)]
+        return run_plans(plans, fresh=fresh)
+
     def get_cluster_kubeconfig(self, cluster_id):
         """获取集群的kubeconfig配置
         
@@ -525,56 +645,130 @@ class VKEManager:
                 return True
             logger.info(f"安装组件 {name} 失败: {e}")
             return False
-    
-    def install_standard_addons(self, cluster_id):
-        """安装标准组件集
+
+    def list_installed_addons(self, cluster_ids):
+        """列出多个集群中已安装的组件，一次ListAddons查询所有集群，跳过响应缓存
         
-        根据预定义的标准组件列表，安装集群所需的基本组件
+        Args:
+            cluster_ids (list): 集群ID列表
+            
+        Returns:
+            dict: {(集群ID, 组件名称): 状态阶段}
+        """
+        addons = {}
+        cluster_ids = list(dict.fromkeys(cluster_ids))
+        # 按集群ID过滤，每次最多100个集群
+        with default_cache.bypass():
+            for start in range(0, len(cluster_ids), 100):
+                request_filter = volcenginesdkvke.FilterForListAddonsInput(cluster_ids=cluster_ids[start:start + 100])
+                for addon in paginate(
+                        lambda params: call_raw(self.vke_api.list_addons,
+                                                ListAddonsRequest(filter=request_filter, **params)),
+                        PageNumberPaging(100, total='total_count'), items='items', prefetch=False):
+                    addons[(addon.cluster_id, addon.name)] = get_field(addon, 'status.phase')
+        return addons
+
+    def _fetch_addon_phases(self, addon_keys):
+        """查询"集群ID/组件名称"的状态阶段，供批量等待器使用；所有集群的组件每个周期只调用一次ListAddons"""
+        installed = self.list_installed_addons([key.split('/', 1)[0] for key in addon_keys])
+        return {f"{cluster_id}/{name}": phase for (cluster_id, name), phase in installed.items()}
+
+    def wait_for_addons_ready(self, cluster_id, names, timeout=900, interval=10):
+        """等待集群中的组件进入Running状态
         
         Args:
             cluster_id (str): 集群ID
+            names (list): 组件名称列表
+            timeout (int): 超时时间（秒）
+            interval (int): 检查间隔（秒）
             
         Returns:
-            dict: 安装结果，包含成功和失败的组件列表
+            dict: {组件名称: 是否就绪}
         """
-        # 使用导入的标准组件配置
-        standard_addons = STANDARD_ADDONS
-        
-        results = {
-            "success": [],
-            "failed": []
-        }
+        ready = default_waiter.wait_all(service_key('vke:addon', self.vke_api.api_client), self._fetch_addon_phases,
+                                        [f"{cluster_id}/{name}" for name in names], 'Running',
+                                        failure_statuses=('Failed',), timeout=timeout, interval=interval)
+        return {key.split('/', 1)[1]: ok for key, ok in ready.items()}
+
+    def _install_and_wait(self, cluster_id, addon, installed):
+        name = addon['name']
+        if (cluster_id, name) in installed:
+            logger.info(f"组件 {name} 已存在，跳过安装")
+        else:
+            require(self.install_addon(
+                cluster_id=cluster_id,
+                name=name,
+                version=addon['version'],
+                deploy_mode=addon['deploy_mode'],
+                deploy_node_type=addon.get('deploy_node_type'),
+                config=addon.get('config')
+            ), f"安装组件 {name} 失败")
+        require(self.wait_for_addons_ready(cluster_id, [name])[name], f"组件 {name} 未能在预期时间内就绪")
+        return addon['version']
+
+    def add_addon_steps(self, plan, addons, cluster_id, requires=(), installed=None):
+        """把组件安装加入Plan，每个组件一个步骤（addon:<名称>），安装后等待组件进入Running状态
         
-        # 获取已安装的组件列表
-        existing_addons = self.list_addons(cluster_id)
-        existing_addon_names = []
-        if existing_addons and hasattr(existing_addons, 'items'):
-            existing_addon_names = [addon.name for addon in existing_addons.items]
+        依赖的组件（组件配置的requires字段或ADDON_DEPENDENCIES）就绪后才开始安装，互不依赖的组件同时安装。
         
-        # 安装缺失的组件
-        for addon in standard_addons:
-            if addon["name"] in existing_addon_names:
-                logger.info(f"组件 {addon['name']} 已存在，跳过安装")
-                continue
-                
-            success = self.install_addon(
-                cluster_id=cluster_id,
-                name=addon["name"],
-                version=addon["version"],
-                deploy_mode=addon["deploy_mode"],
-                deploy_node_type=addon.get("deploy_node_type"),
-                config=addon.get("config")
-            )
-            
-            if success:
-                results["success"].append(addon["name"])
-            else:
-                results["failed"].append(addon["name"])
+        Args:
+            plan (Plan): 要加入步骤的Plan
+            addons (list): 组件配置列表
+            cluster_id: 集群ID，或接收已完成步骤结果、返回集群ID的函数
+            requires (list): 所有组件步骤都依赖的步骤，例如节点池就绪
+            installed (dict, optional): list_installed_addons的结果，其中的组件不再提交安装
             
-            # 避免请求过于频繁
-            time.sleep(2)
+        Returns:
+            list: 加入的步骤名
+        """
+        names = {addon['name'] for addon in addons}
+        resolve = cluster_id if callable(cluster_id) else (lambda r: cluster_id)
+        steps = []
+        for addon in addons:
+            dependencies = addon.get('requires', ADDON_DEPENDENCIES.get(addon['name'], []))
+            plan.add(f"addon:{addon['name']}",
+                     lambda r, addon=addon: self._install_and_wait(resolve(r), addon, installed or {}),
+                     requires=list(requires) + [f"addon:{name}" for name in dependencies if name in names])
+            steps.append(f"addon:{addon['name']}")
+        return steps
+
+    def install_addons(self, cluster_addons):
+        """在多个集群中同时按依赖关系安装组件
         
+        Args:
+            cluster_addons (dict): {集群ID: 组件配置列表}
+            
+        Returns:
+            dict: {集群ID: {"success": [就绪的组件], "failed": [失败或因依赖失败跳过的组件]}}
+        """
+        installed = self.list_installed_addons(list(cluster_addons))
+        plans = []
+        for cluster_id, addons in cluster_addons.items():
+            plan = Plan(cluster_id, key=plan_key(self, addons, name=f"{cluster_id}/addons"))
+            self.add_addon_steps(plan, addons, cluster_id, installed=installed)
+            plans.append(plan)
+        report = run_plans(plans)
+
+        results = {}
+        for cluster_id, addons in cluster_addons.items():
+            results[cluster_id] = {"success": [], "failed": []}
+            for addon in addons:
+                status = report.step(cluster_id, f"addon:{addon['name']}").status
+                results[cluster_id]["success" if status == SUCCEEDED else "failed"].append(addon['name'])
         return results
+    
+    def install_standard_addons(self, cluster_id):
+        """安装标准组件集
+        
+        根据预定义的标准组件列表，按依赖关系安装集群所需的基本组件，见install_addons
+        
+        Args:
+            cluster_id (str): 集群ID
+            
+        Returns:
+            dict: 安装结果，包含成功和失败的组件列表
+        """
+        return self.install_addons({cluster_id: STANDARD_ADDONS})[cluster_id]
 
     def install_addons_from_log(self, log_file, cluster_id):
         """从日志文件中读取组件配置并安装
@@ -601,24 +795,10 @@ class VKEManager:
                 logger.info("未在日志文件中找到组件列表")
                 return {"success": [], "failed": []}
             
-            results = {
-                "success": [],
-                "failed": []
-            }
-            
-            # 获取已安装的组件列表
-            existing_addons = self.list_addons(cluster_id)
-            existing_addon_names = []
-            if existing_addons and hasattr(existing_addons, 'items'):
-                existing_addon_names = [addon.name for addon in existing_addons.items]
-            
-            # 安装组件
+            addon_configs = []
             for addon in addons:
                 # logger.info(addon)
                 name = addon.get("Name")
-                if name in existing_addon_names:
-                    logger.info(f"组件 {name} 已存在，跳过安装")
-                    continue
                     
                 # 处理组件配置，替换SubnetId
                 config = addon.get("Config")
@@ -651,40 +831,27 @@ class VKEManager:
                         logger.info(f"解析组件 {name} 配置时出错: {e}，使用原始配置")
                 
                 # 准备组件配置
-                addon_config = {
+                addon_configs.append({
                     "name": name,
                     "version": addon.get("Version"),
                     "deploy_mode": addon.get("DeployMode"),
                     "deploy_node_type": addon.get("DeployNodeType"),
                     "config": config
-                }
-                
-                # 安装组件
-                success = self.install_addon(
-                    cluster_id=cluster_id,
-                    name=addon_config["name"],
-                    version=addon_config["version"],
-                    deploy_mode=addon_config["deploy_mode"],
-                    deploy_node_type=addon_config.get("deploy_node_type"),
-                    config=addon_config.get("config")
-                )
-                
-                if success:
-                    results["success"].append(name)
-                else:
-                    results["failed"].append(name)
-                
-                # 避免请求过于频繁
-                time.sleep(2)
+                })
             
-            return results
+            # 已安装的组件跳过，其余按依赖关系安装
+            return self.install_addons({cluster_id: addon_configs})[cluster_id]
         except Exception as e:
             logger.info(f"从日志文件安装组件时发生错误: {e}")
             return {"success": [], "failed": [], "error": str(e)}
 
 
-def main():
-    """主函数示例"""
+def main(concurrent=False):
+    """主函数示例
+    
+    Args:
+        concurrent (bool): 是否并发创建所有集群和节点池，见VKEManager.provision_clusters
+    """
     # 配置信息
     ak = ""  # 替换为您的AK
     sk = ""  # 替换为您的SK
@@ -692,6 +859,10 @@ def main():
     
     # 初始化VKE管理器
     vke_manager = VKEManager(ak=ak, sk=sk, region=region)
+
+    if concurrent:
+        vke_manager.provision_clusters()
+        return
     
     # 步骤1: 创建或获取多个集群
     clusters_result = vke_manager.create_clusters()
@@ -706,7 +877,12 @@ def main():
         else:
             logger.info(f'创建集群 {cluster_name} 失败: {result.get("error", "未知错误")}')
     
+    # 所有新建集群一起等待就绪，每个周期只查询一次
+    ready = vke_manager.wait_for_clusters_ready(
+        [result['cluster_id'] for result in clusters_result.values() if result['status'] == 'created'])
+
     # 步骤2: 对每个成功创建的集群执行后续操作
+    addon_clusters = {}
     for cluster_name, cluster_result in clusters_result.items():
         logger.info(cluster_result)
         if cluster_result['status'] != 'created':
@@ -716,7 +892,7 @@ def main():
         logger.info(f"\n开始处理集群: {cluster_name} (ID: {cluster_id})")
         
         # 等待集群就绪
-        if not vke_manager.wait_for_cluster_ready(cluster_id):
+        if not ready.get(cluster_id):
             logger.info(f"集群 {cluster_name} 未能在预期时间内就绪，跳过后续操作")
             continue
         
@@ -737,18 +913,23 @@ def main():
             logger.info(f"获取集群 {cluster_name} 的kubeconfig失败")
             continue
             
-        # 安装标准组件
-        results = vke_manager.install_standard_addons(cluster_id)
-        logger.info(f"集群 {cluster_name} 标准组件安装结果: {results}")
+        addon_clusters[cluster_id] = cluster_name
         
         # 从日志文件安装额外组件（可选）
         # log_file = "listaddon.log"  # 替换为实际的日志文件路径
         # if os.path.exists(log_file):
         #     results = vke_manager.install_addons_from_log(log_file, cluster_id)
         #     logger.info(f"集群 {cluster_name} 从日志文件安装组件结果: {results}")
-            
-        logger.info(f"集群 {cluster_name} 处理完成\n")
+
+    # 步骤3: 所有集群同时按依赖关系安装标准组件
+    if addon_clusters:
+        addon_results = vke_manager.install_addons({cluster_id: STANDARD_ADDONS for cluster_id in addon_clusters})
+        for cluster_id, cluster_name in addon_clusters.items():
+            logger.info(f"集群 {cluster_name} 标准组件安装结果: {addon_results[cluster_id]}")
+            logger.info(f"集群 {cluster_name} 处理完成\n")
 
 
 if __name__ == "__main__":
-    main()
+    import sys
+
+    main(concurrent="--concurrent" in sys.argv[1:])
@@ -1,13 +1,19 @@
 from __future__ import print_function
 import volcenginesdkcore
-import volcenginesdkvpc
 from volcenginesdkcore.rest import ApiException
 import time
 import logging
 
 from configs.api_config import api_config   
+from sdkclient import new_api_client
+from lazy import lazy_import
+from polling import AdaptiveSchedule, poll_until
+from lookup import resource_lookup
 from configs.network_config import network_config
 import os
+
+volcenginesdkvpc = lazy_import('volcenginesdkvpc')
+
 # 确保logs目录存在
 log_dir = os.path.join(os.path.dirname(__file__), 'logs')
 os.makedirs(log_dir, exist_ok=True)
@@ -26,19 +32,17 @@ logger.addHandler(file_handler)
 
 
 class VPCManager:
-    def __init__(self):
-        self._init_client()
-        self.vpc_api = volcenginesdkvpc.VPCApi()
-
-    def _init_client(self):
-        configuration = volcenginesdkcore.Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        volcenginesdkcore.Configuration.set_default(configuration)
-
-    def create_vpc(self, vpc_name, cidr_block, description=None, project_name=None, tags=None):
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
+        self.vpc_api = volcenginesdkvpc.VPCApi(self.api_client)
+        self.vpc_lookup = resource_lookup(self.vpc_api, 'vpc')
+        self.subnet_lookup = resource_lookup(self.vpc_api, 'subnet')
+
+    def _init_client(self, ak=None, sk=None, region=None):
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
+
+    def create_vpc(self, vpc_name, cidr_block, description=None, project_name=None, tags=None, client_token=None):
         try:
             # 先列出所有VPC
             list_request = volcenginesdkvpc.DescribeVpcsRequest()
@@ -64,6 +68,8 @@ class VPCManager:
                 request.project_name = project_name
             if tags:
                 request.tags = tags
+            if client_token:
+                request.client_token = client_token
 
             # 发送创建请求
             response = self.vpc_api.create_vpc(request)
@@ -75,7 +81,7 @@ class VPCManager:
             logger.error(f"创建VPC时发生异常: {e}")
             return None
 
-    def create_subnet(self, vpc_id, subnet_name, cidr_block, zone_id, description=None, tags=None):
+    def create_subnet(self, vpc_id, subnet_name, cidr_block, zone_id, description=None, tags=None, client_token=None):
         try:
             # 先检查VPC状态
             request = volcenginesdkvpc.DescribeVpcsRequest()
@@ -123,6 +129,8 @@ class VPCManager:
                 request.description = description
             if tags:
                 request.tags = tags
+            if client_token:
+                request.client_token = client_token
 
             # 发送创建请求
             response = self.vpc_api.create_subnet(request)
@@ -134,57 +142,43 @@ class VPCManager:
             logger.error(f"创建子网时发生异常: {e}")
             return None
 
+    def _status_schedule(self, resource, interval):
+        region = self.vpc_api.api_client.configuration.region
+        return AdaptiveSchedule((resource, '', region), fallback_interval=interval)
+
     def wait_for_vpc_available(self, vpc_id, timeout=300, interval=10):
-        """等待VPC变为可用状态"""
-        start_time = time.time()
-        while True:
-            try:
-                request = volcenginesdkvpc.DescribeVpcsRequest()
-                response = self.vpc_api.describe_vpcs(request)
-                
-                for vpc in response.vpcs:
-                    if vpc.vpc_id == vpc_id:
-                        if vpc.status == "Available":
-                            logger.info("VPC已准备就绪")
-                            return True
-                        logger.info(f"当前VPC状态: {vpc.status}")
-                        break
-                
-                if time.time() - start_time > timeout:
-                    logger.error("等待VPC就绪超时")
-                    return False
-                    
-                time.sleep(interval)
-                
-            except ApiException as e:
-                logger.error(f"检查VPC状态时发生错误: {e}")
-                return False
+        """等待VPC变为可用状态，按历史就绪耗时安排查询，interval为没有历史数据时的间隔"""
+        def available():
+            status = self.vpc_lookup.status(vpc_id)
+            logger.info(f"当前VPC状态: {status}")
+            return status == "Available"
+
+        try:
+            if poll_until(available, self._status_schedule('vpc', interval), timeout, vpc_id):
+                logger.info("VPC已准备就绪")
+                return True
+            logger.error("等待VPC就绪超时")
+            return False
+        except ApiException as e:
+            logger.error(f"检查VPC状态时发生错误: {e}")
+            return False
 
     def wait_for_subnet_available(self, subnet_id, timeout=300, interval=10):
-        """等待子网变为可用状态"""
-        start_time = time.time()
-        while True:
-            try:
-                request = volcenginesdkvpc.DescribeSubnetsRequest()
-                response = self.vpc_api.describe_subnets(request)
-                
-                for subnet in response.subnets:
-                    if subnet.subnet_id == subnet_id:
-                        if subnet.status == "Available":
-                            logger.info("子网已准备就绪")
-                            return True
-                        logger.info(f"当前子网状态: {subnet.status}")
-                        break
-                
-                if time.time() - start_time > timeout:
-                    logger.error("等待子网就绪超时")
-                    return False
-                    
-                time.sleep(interval)
-                
-            except ApiException as e:
-                logger.error(f"检查子网状态时发生错误: {e}")
-                return False
+        """等待子网变为可用状态，按历史就绪耗时安排查询，interval为没有历史数据时的间隔"""
+        def available():
+            status = self.subnet_lookup.status(subnet_id)
+            logger.info(f"当前子网状态: {status}")
+            return status == "Available"
+
+        try:
+            if poll_until(available, self._status_schedule('subnet', interval), timeout, subnet_id):
+                logger.info("子网已准备就绪")
+                return True
+            logger.error("等待子网就绪超时")
+            return False
+        except ApiException as e:
+            logger.error(f"检查子网状态时发生错误: {e}")
+            return False
 
 def main():
     vpc_manager = VPCManager()
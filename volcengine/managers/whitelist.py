@@ -2,11 +2,16 @@
 
 from __future__ import absolute_import
 
-from volcenginesdkcore.configuration import Configuration
 from volcenginesdkcore.rest import ApiException
 from configs.api_config import api_config
+from lazy import lazy_import
+from sdkclient import new_api_client
+from cache import enable_sdk_cache
+from singleflight import enable_sdk_singleflight
+from lookup import resource_lookup
 from configs.whitelist_config import whitelist_config
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +28,32 @@ class WhitelistBaseManager:
     子类需要实现具体的API调用方法。
     """
 
-    def __init__(self):
-        self._init_client()
+    def __init__(self, ak=None, sk=None, region=None):
+        self._init_client(ak, sk, region)
         self.api = None  # 子类需要设置具体的API实例
         self.client_api = None 
         self.whitelist_config = whitelist_config  # 从配置文件加载白名单配置
+        self._prepared_whitelists = {}  # 白名单名称 -> 已创建的白名单ID
+        self._prepare_lock = threading.Lock()
+
+    @property
+    def client_api(self):
+        return self._client_api
+
+    @client_api.setter
+    def client_api(self, value):
+        """子类设置API实例时为其开启响应缓存，避免每个白名单条目都重新查询白名单列表"""
+        self._client_api = value
+        self._status_lookup = None
+        if value is not None:
+            enable_sdk_cache(value.api_client)
+
+    @property
+    def status_lookup(self):
+        """按实例ID过滤的状态查询，随client_api创建"""
+        if self._status_lookup is None and self._client_api is not None:
+            self._status_lookup = resource_lookup(self._client_api)
+        return self._status_lookup
 
     def get_whitelist_config(self):
         """获取白名单配置
@@ -37,14 +63,12 @@ class WhitelistBaseManager:
         return self.whitelist_config
 
         
-    def _init_client(self):
+    def _init_client(self, ak=None, sk=None, region=None):
         """初始化API客户端配置"""
-        configuration = Configuration()
-        configuration.ak = api_config['ak']
-        configuration.sk = api_config['sk']
-        configuration.region = api_config['region']
-        configuration.client_side_validation = True
-        Configuration.set_default(configuration)
+        # 每个管理器使用独立的配置和ApiClient，不修改全局默认配置
+        self.api_client = new_api_client(ak=ak, sk=sk, region=region)
+        # 多个实例同时等待就绪时合并相同的状态查询
+        enable_sdk_singleflight()
 
     def create_whitelist(self, whitelist_config):
         """创建白名单
@@ -88,6 +112,39 @@ class WhitelistBaseManager:
         except ApiException as e:
             return self._handle_api_exception(e, "创建白名单")
 
+    def prepare_whitelists(self, known=None):
+        """创建配置中的全部白名单（已存在的直接复用），不依赖实例，可以与创建实例同时进行
+
+        同一个管理器只创建一次，并发调用时等待第一次调用完成。
+
+        :param known: dict {白名单名称: 白名单ID}，已知已创建的白名单（例如从步骤日志恢复），不再查询
+        :return: dict {白名单名称: 白名单ID}，有白名单创建失败时返回None
+        """
+        with self._prepare_lock:
+            self._prepared_whitelists.update(known or {})
+            for whitelist_item in self.whitelist_config['whitelists']:
+                if whitelist_item['name'] in self._prepared_whitelists:
+                    continue
+                success, whitelist_id = self.create_whitelist(whitelist_item)
+                if not (success and whitelist_id):
+                    logger.error(f"创建白名单 {whitelist_item['name']} 失败")
+                    return None
+                self._prepared_whitelists[whitelist_item['name']] = whitelist_id
+            return dict(self._prepared_whitelists)
+
+    def _unbound_whitelists(self, instance_id, current_whitelists):
+        """返回尚未绑定到实例的白名单ID，白名单创建失败时返回None"""
+        prepared = self.prepare_whitelists()
+        if prepared is None:
+            return None
+        whitelist_ids = []
+        for name, whitelist_id in prepared.items():
+            if whitelist_id in current_whitelists:
+                logger.info(f"白名单 {name} (ID: {whitelist_id}) 已绑定到实例 {instance_id}，跳过绑定")
+                continue
+            whitelist_ids.append(whitelist_id)
+        return whitelist_ids
+
     def bind_whitelists_to_instance(self, instance_id):
         """
         将白名单绑定到指定的实例
@@ -108,19 +165,10 @@ class WhitelistBaseManager:
                 return False
             # 创建并绑定白名单
             try:
-                # 从配置文件创建所有白名单
-                whitelist_ids = []
-                for whitelist_item in self.whitelist_config['whitelists']:
-                    success, whitelist_id = self.create_whitelist(whitelist_item)
-                    if success and whitelist_id:
-                        # 检查白名单是否已经绑定到实例
-                        if whitelist_id in current_whitelists:
-                            logger.info(f"白名单 {whitelist_item['name']} (ID: {whitelist_id}) 已绑定到实例 {instance_id}，跳过绑定")
-                            continue
-                        whitelist_ids.append(whitelist_id)
-                    else:
-                        logger.error(f"创建白名单 {whitelist_item['name']} 失败")
-                        return False
+                # 从配置文件创建所有白名单（已由prepare_whitelists创建的直接复用）
+                whitelist_ids = self._unbound_whitelists(instance_id, current_whitelists)
+                if whitelist_ids is None:
+                    return False
                 
                 if not whitelist_ids:
                     logger.info("所有白名单已经绑定到实例，无需重复绑定")
@@ -186,28 +234,14 @@ class WhitelistBaseManager:
                     logger.error(f"等待实例 {instance_id} 就绪超时")
                     return False
 
-                # 查询实例状态
-                status_request = self.api.DescribeDBInstancesRequest()
-                status_response = self.client_api.describe_db_instances(status_request)
-                
-                # 获取实例列表，兼容不同的返回字段名
-                instances = []
-                if hasattr(status_response, 'instances'):
-                    instances = status_response.instances
-                elif hasattr(status_response, 'db_instances'):
-                    instances = status_response.db_instances
-                
-                for instance in instances:
-                    if instance.instance_id == instance_id:
-                        # 兼容不同API返回的状态字段名称
-                        instance_status = getattr(instance, 'status', None) or getattr(instance, 'instance_status', None)
-                        if instance_status == "Running":
-                            logger.info(f"实例 {instance_id} 状态正常")
-                            return True
-                        else:
-                            logger.info(f"实例 {instance_id} 当前状态: {instance_status}，等待 {interval} 秒后重试")
-                            time.sleep(interval)
-                            break
+                # 按实例ID查询状态（查询本身跳过响应缓存）
+                instance_status = self.status_lookup.status(instance_id)
+                if instance_status is not None:
+                    if instance_status == "Running":
+                        logger.info(f"实例 {instance_id} 状态正常")
+                        return True
+                    logger.info(f"实例 {instance_id} 当前状态: {instance_status}，等待 {interval} 秒后重试")
+                    time.sleep(interval)
                 else:
                     logger.warning(f"未找到实例 {instance_id}，重试第 {retry_count + 1} 次")
                     retry_count += 1
@@ -283,51 +317,51 @@ class WhitelistBaseManager:
             logger.error(f"解绑白名单时发生异常: {e}")
             return False
 
-import volcenginesdkredis
+volcenginesdkredis = lazy_import('volcenginesdkredis')
 class RedisWhitelistManager(WhitelistBaseManager):
     """Redis服务的白名单管理类
 
     继承自WhitelistBaseManager，实现Redis服务特定的白名单操作。
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__(ak, sk, region)
         self.api = volcenginesdkredis
-        self.client_api = self.api.REDISApi()
+        self.client_api = self.api.REDISApi(self.api_client)
 
 
-import volcenginesdkrdspostgresql
+volcenginesdkrdspostgresql = lazy_import('volcenginesdkrdspostgresql')
 class PostgreSQLWhitelistManager(WhitelistBaseManager):
     """PostgreSQL白名单管理类
     这个类继承自WhitelistBaseManager，提供了PostgreSQL数据库的白名单管理功能。
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__(ak, sk, region)
         self.api = volcenginesdkrdspostgresql
-        self.client_api = self.api.RDSPOSTGRESQLApi()
+        self.client_api = self.api.RDSPOSTGRESQLApi(self.api_client)
 
-import volcenginesdkmongodb
+volcenginesdkmongodb = lazy_import('volcenginesdkmongodb')
 class MongoDBWhitelistManager(WhitelistBaseManager):
     """PostgreSQL白名单管理类
     这个类继承自WhitelistBaseManager，提供了PostgreSQL数据库的白名单管理功能。
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__(ak, sk, region)
         self.api = volcenginesdkmongodb
-        self.client_api = self.api.MONGODBApi()
+        self.client_api = self.api.MONGODBApi(self.api_client)
 
-import volcenginesdkkafka
+volcenginesdkkafka = lazy_import('volcenginesdkkafka')
 class KafkaWhitelistManager(WhitelistBaseManager):
     """Kafka白名单管理类
     这个类继承自WhitelistBaseManager，提供了Kafka服务的白名单管理功能。
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, ak=None, sk=None, region=None):
+        super().__init__(ak, sk, region)
         self.api = volcenginesdkkafka
-        self.client_api = self.api.KAFKAApi()
+        self.client_api = self.api.KAFKAApi(self.api_client)
 
     def bind_whitelists_to_instance(self, instance_id):
         """
@@ -349,19 +383,10 @@ class KafkaWhitelistManager(WhitelistBaseManager):
             #     return False
             # # 创建并绑定白名单
             try:
-                # 从配置文件创建所有白名单
-                whitelist_ids = []
-                for whitelist_item in self.whitelist_config['whitelists']:
-                    success, whitelist_id = self.create_whitelist(whitelist_item)
-                    if success and whitelist_id:
-                        # 检查白名单是否已经绑定到实例
-                        if whitelist_id in current_whitelists:
-                            logger.info(f"白名单 {whitelist_item['name']} (ID: {whitelist_id}) 已绑定到实例 {instance_id}，跳过绑定")
-                            continue
-                        whitelist_ids.append(whitelist_id)
-                    else:
-                        logger.error(f"创建白名单 {whitelist_item['name']} 失败")
-                        return False
+                # 从配置文件创建所有白名单（已由prepare_whitelists创建的直接复用）
+                whitelist_ids = self._unbound_whitelists(instance_id, current_whitelists)
+                if whitelist_ids is None:
+                    return False
                 
                 if not whitelist_ids:
                     logger.info("所有白名单已经绑定到实例，无需重复绑定")